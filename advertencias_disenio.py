@@ -83,6 +83,7 @@ def verificar_lineas_finas_v2(
     page: fitz.Page,
     material: str,
     thresholds: FlexoThresholds | None = None,
+    dibujos_pagina: List[Dict[str, Any]] | None = None,
 ) -> tuple[List[str], List[Dict[str, Any]]]:
     thresholds = thresholds or get_flexo_thresholds(material=material)
     thr = thresholds.min_stroke_mm
@@ -90,7 +91,9 @@ def verificar_lineas_finas_v2(
     min_detectada = None
     n_riesgo = 0
     overlay: List[Dict[str, Any]] = []
-    dibujos = filtrar_objetos_sistema(page.get_drawings(), None)
+    if dibujos_pagina is None:
+        dibujos_pagina = page.get_drawings()
+    dibujos = filtrar_objetos_sistema(dibujos_pagina, None)
     for d in dibujos:
         w_pt = (d.get("width", 0) or 0)
         if w_pt <= 0:
@@ -120,11 +123,13 @@ def verificar_lineas_finas_v2(
     return advertencias, overlay
 
 
-def verificar_modo_color(path_pdf: str) -> tuple[List[str], List[Dict[str, Any]]]:
+def verificar_modo_color(
+    path_pdf: str, doc_abierto: fitz.Document | None = None
+) -> tuple[List[str], List[Dict[str, Any]]]:
     advertencias: List[str] = []
     overlay: List[Dict[str, Any]] = []
     try:
-        doc = fitz.open(path_pdf)
+        doc = doc_abierto if doc_abierto is not None else fitz.open(path_pdf)
         for page_num, page in enumerate(doc, start=1):
             for xref, *_ in page.get_images(full=True):
                 cs = ""
@@ -173,7 +178,8 @@ def verificar_modo_color(path_pdf: str) -> tuple[List[str], List[Dict[str, Any]]
                         )
         if not advertencias:
             advertencias.append("<span class='icono ok'>✔️</span> Todas las imágenes están en modo CMYK o escala de grises.")
-        doc.close()
+        if doc_abierto is None:
+            doc.close()
     except Exception as e:
         advertencias.append(f"<span class='icono warn'>⚠️</span> No se pudo verificar el modo de color: {str(e)}")
     return advertencias, overlay
@@ -183,6 +189,7 @@ def revisar_sangrado(
     pagina: fitz.Page,
     sangrado_esperado: float | None = None,
     thresholds: FlexoThresholds | None = None,
+    contenido: Dict[str, Any] | None = None,
 ) -> tuple[List[str], List[Dict[str, Any]]]:
     advertencias: List[str] = []
     overlay: List[Dict[str, Any]] = []
@@ -190,7 +197,8 @@ def revisar_sangrado(
     sangrado_min = sangrado_esperado if sangrado_esperado is not None else thresholds.min_bleed_mm
     sangrado_str = _format_value(sangrado_min, 1)
     media = pagina.rect
-    contenido = pagina.get_text("dict")
+    if contenido is None:
+        contenido = pagina.get_text("dict")
     for bloque in contenido.get("blocks", []):
         bbox = bloque.get("bbox")
         if bbox:
@@ -223,20 +231,28 @@ def analizar_advertencias_disenio(
     material: str = "",
     pagina: fitz.Page | None = None,
     contenido: Dict[str, Any] | None = None,
+    ctx=None,
 ) -> Dict[str, Any]:
     doc = None
-    if pagina is None or contenido is None:
+    dibujos = None
+    doc_abierto = None
+    if ctx is not None:
+        pagina = ctx.page
+        contenido = ctx.text_dict
+        dibujos = ctx.drawings
+        doc_abierto = ctx.doc
+    elif pagina is None or contenido is None:
         doc = fitz.open(path_pdf)
         pagina = doc[0]
         contenido = pagina.get_text("dict")
     thresholds = get_flexo_thresholds(material=material)
     textos_adv, overlay_textos = verificar_textos_pequenos(contenido, thresholds)
     lineas_adv, overlay_lineas = verificar_lineas_finas_v2(
-        pagina, material, thresholds
+        pagina, material, thresholds, dibujos_pagina=dibujos
     )
-    modo_color_adv, overlay_color = verificar_modo_color(path_pdf)
+    modo_color_adv, overlay_color = verificar_modo_color(path_pdf, doc_abierto=doc_abierto)
     sangrado_adv, overlay_sangrado = revisar_sangrado(
-        pagina, thresholds=thresholds
+        pagina, thresholds=thresholds, contenido=contenido
     )
     overlay = consolidar_advertencias(overlay_textos, overlay_lineas, overlay_color, overlay_sangrado)
     if doc:
@@ -1,10 +1,20 @@
 from __future__ import annotations
 
+import os
 import statistics
-from typing import Any, Dict, List, Tuple
+import time
+from typing import Any, Dict, List, Sequence, Tuple
 
 from montaje_offset_inteligente import obtener_dimensiones_pdf
 
+# Modo "auto": estrategias que se miden y presupuesto total de la medición.
+CANDIDATOS_AUTO = ("flujo", "grid", "maxrects", "nesting_pro", "hybrid_nesting_repeat")
+AUTO_PRESUPUESTO_S = float(os.getenv("MONTAJE_AUTO_PRESUPUESTO_S") or "3")
+
+# Pesos del puntaje secundario (a igual cantidad de formas pedidas colocadas).
+PESO_USO = 1.0
+PESO_CORTES = 0.25
+
 
 def _calc_pdf_meta(disenos: List[Tuple[str, int]], usar_trimbox: bool) -> Dict[str, Any]:
     meta: Dict[str, Any] = {"items": []}
@@ -63,3 +73,97 @@ def select_strategy(disenos: List[Tuple[str, int]], config) -> str:
         return "maxrects"
 
     return "flujo"
+
+
+def complejidad_corte(cajas: Sequence[Tuple[float, float, float, float]]) -> float:
+    """Líneas de corte distintas por forma, normalizado a ``(0, 1]``.
+
+    Cada caja aporta a lo sumo dos líneas verticales y dos horizontales; una
+    grilla comparte casi todas y se corta en guillotina con pocas pasadas,
+    mientras que un empaquetado irregular necesita un corte por borde.
+    """
+    if not cajas:
+        return 0.0
+    xs = {round(v, 1) for x, _y, w, _h in cajas for v in (x, x + w)}
+    ys = {round(v, 1) for _x, y, _w, h in cajas for v in (y, y + h)}
+    return (len(xs) + len(ys)) / (4 * len(cajas))
+
+
+def _medir(nombre: str, disenos: List[Tuple[str, int]], config) -> Dict[str, Any]:
+    from strategies import get_strategy
+
+    inicio = time.perf_counter()
+    plan = get_strategy(nombre).planificar(disenos, config)
+    colocados, total = int(plan["colocados"]), int(plan["total"])
+    uso = float(plan["uso_pct"])
+    cortes = complejidad_corte(plan["cajas_mm"])
+    # Colocar más formas que las pedidas imprime de más: ese plan solo gana
+    # si ninguna candidata respeta la cantidad.
+    excedente = max(0, colocados - total)
+    return {
+        "estrategia": nombre,
+        "colocados": colocados,
+        "total": total,
+        "excedente": excedente,
+        "uso_pct": round(uso, 2),
+        "complejidad_corte": round(cortes, 3),
+        "puntaje": (excedente == 0, min(colocados, total), PESO_USO * uso / 100 - PESO_CORTES * cortes),
+        "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 1),
+    }
+
+
+def evaluar_estrategias(
+    disenos: List[Tuple[str, int]],
+    config,
+    candidatos: Sequence[str] = CANDIDATOS_AUTO,
+    presupuesto_s: float = AUTO_PRESUPUESTO_S,
+) -> List[Dict[str, Any]]:
+    """Mide cada candidata calculando solo sus posiciones.
+
+    El puntaje descarta primero los planes que colocan más formas que las
+    pedidas, luego prioriza las formas pedidas colocadas y, a igualdad, el
+    uso del pliego menos la complejidad de corte. Devuelve el ranking de
+    mejor a peor; las candidatas que fallan o no terminan dentro de
+    ``presupuesto_s`` quedan al final con ``error`` y sin ``puntaje``.
+
+    Las candidatas se miden en el proceso actual, una tras otra, con un
+    plazo cooperativo: una medición que termina después del plazo se
+    descarta y las que faltan no se empiezan. Así no se crean procesos por
+    request ni queda trabajo corriendo en segundo plano.
+    """
+    if not disenos or not candidatos:
+        return []
+    limite = time.monotonic() + max(0.0, presupuesto_s)
+    medidas: List[Dict[str, Any]] = []
+    descartadas: List[Dict[str, Any]] = []
+    for nombre in candidatos:
+        if time.monotonic() >= limite:
+            descartadas.append({"estrategia": nombre, "error": "presupuesto agotado"})
+            continue
+        try:
+            medida = _medir(nombre, disenos, config)
+        except Exception as exc:
+            descartadas.append({"estrategia": nombre, "error": str(exc)})
+            continue
+        if time.monotonic() > limite:
+            descartadas.append({"estrategia": nombre, "error": "presupuesto agotado"})
+            continue
+        medidas.append(medida)
+    medidas.sort(key=lambda m: m["puntaje"], reverse=True)
+    return medidas + descartadas
+
+
+def seleccionar_estrategia_auto(
+    disenos: List[Tuple[str, int]], config
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Estrategia del modo "auto" y el ranking medido.
+
+    Si ninguna candidata pudo medirse se recurre a las reglas de
+    :func:`select_strategy`.
+    """
+    if getattr(config, "posiciones_manual", None):
+        return "manual", []
+    ranking = evaluar_estrategias(disenos, config)
+    if ranking and "puntaje" in ranking[0]:
+        return ranking[0]["estrategia"], ranking
+    return select_strategy(disenos, config), ranking
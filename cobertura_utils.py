@@ -1,9 +1,206 @@
+import os
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
 import fitz
 import numpy as np
-from typing import Dict, Any
+
+# Memoria máxima (MB) por banda al rasterizar para medir cobertura. Una página
+# se procesa en franjas horizontales de este tamaño, así que el pico de RAM no
+# depende del ancho de la bobina ni de los dpi.
+COBERTURA_MAX_MB = float(os.getenv("COBERTURA_MAX_MB", "64") or 64)
+
+CANALES = ["Cyan", "Magenta", "Amarillo", "Negro"]
+
+# El TAC de un píxel es la suma de cuatro canales uint8: 0..1020.
+_TAC_BINS = 4 * 255 + 1
+
+# Bytes por píxel que ocupa una banda en el peor momento: muestras CMYK del
+# pixmap + copia uint16 para derivar el RGB + máscara/sumas intermedias.
+_BYTES_POR_PIXEL = 40
+
+
+class CoberturaAcumulador:
+    """Acumula cobertura CMYK y TAC banda por banda sin guardar la página.
+
+    Lleva sumas por canal, conteos de área sobre ``umbral`` y un histograma
+    del TAC en valores enteros (0..1020); con eso el promedio, el área
+    cubierta, el máximo y el percentil 95 salen exactos sin retener el raster.
+    """
+
+    def __init__(self, umbral: int = 5) -> None:
+        self.umbral = umbral
+        self.pixeles = 0
+        self.sumas = np.zeros(4, dtype=np.int64)
+        self.area = np.zeros(4, dtype=np.int64)
+        self.area_total = 0
+        self.histograma_tac = np.zeros(_TAC_BINS, dtype=np.int64)
+
+    def agregar(self, cmyk: np.ndarray) -> None:
+        """Suma una banda CMYK ``uint8`` (alto x ancho x 4)."""
+        if cmyk.size == 0:
+            return
+        cmyk = cmyk.reshape(-1, 4)
+        cmyk = np.where(_mascara_blanco(cmyk)[:, None], np.uint8(0), cmyk)
+        self.pixeles += cmyk.shape[0]
+        self.sumas += cmyk.sum(axis=0, dtype=np.int64)
+        self.area += (cmyk > self.umbral).sum(axis=0)
+        tac = cmyk.sum(axis=1, dtype=np.int32)
+        self.area_total += int((tac > self.umbral).sum())
+        self.histograma_tac += np.bincount(tac, minlength=_TAC_BINS)
+
+    def fusionar(self, otro: "CoberturaAcumulador") -> None:
+        self.pixeles += otro.pixeles
+        self.sumas += otro.sumas
+        self.area += otro.area
+        self.area_total += otro.area_total
+        self.histograma_tac += otro.histograma_tac
+
+    def percentil_tac(self, q: float) -> float:
+        """Percentil del TAC (en %) con la interpolación lineal de ``np.percentile``."""
+        return float(percentil_histograma(self.histograma_tac, q) / 255.0 * 100.0)
+
+    def resultado(self) -> Dict[str, Any]:
+        n = max(self.pixeles, 1)
+        no_vacios = np.flatnonzero(self.histograma_tac)
+        tac_max = int(no_vacios[-1]) if no_vacios.size else 0
+        return {
+            "cobertura_promedio": {
+                canal: float(self.sumas[i] / n / 255.0 * 100.0) for i, canal in enumerate(CANALES)
+            },
+            "cobertura_por_area": {
+                canal: float(self.area[i] / n * 100.0) for i, canal in enumerate(CANALES)
+            },
+            "cobertura_total": float(self.area_total / n * 100.0),
+            "tac_p95": self.percentil_tac(95),
+            "tac_max": float(tac_max / 255.0 * 100.0),
+        }
+
+
+class ResumenRaster:
+    """Todo lo que la revisión flexo mide del raster, en una sola pasada.
+
+    Además de la cobertura guarda el histograma crudo de cada canal CMYK y
+    el del gris (luma BT.601, igual que ``PageAnalysisContext.gray``), así
+    las tramas débiles y el contraste se calculan sin retener la página.
+    """
+
+    def __init__(self, umbral: int = 5) -> None:
+        self.cobertura = CoberturaAcumulador(umbral)
+        self.pixeles = 0
+        self.histograma_canales = np.zeros((4, 256), dtype=np.int64)
+        self.histograma_gris = np.zeros(256, dtype=np.int64)
+
+    def agregar(self, cmyk: np.ndarray) -> None:
+        """Suma una banda CMYK ``uint8`` (alto x ancho x 4)."""
+        if cmyk.size == 0:
+            return
+        self.cobertura.agregar(cmyk)
+        plano = cmyk.reshape(-1, 4)
+        self.pixeles += plano.shape[0]
+        for i in range(4):
+            self.histograma_canales[i] += np.bincount(plano[:, i], minlength=256)
+        rgb = _rgb_desde_cmyk(plano).astype(np.float32)
+        gris = rgb[:, 0] * 0.299 + rgb[:, 1] * 0.587 + rgb[:, 2] * 0.114
+        self.histograma_gris += np.bincount(
+            np.clip(np.rint(gris), 0, 255).astype(np.uint8), minlength=256
+        )
+
+
+def percentil_histograma(histograma: np.ndarray, q: float) -> float:
+    """Percentil ``q`` de los valores enteros contados en ``histograma``.
+
+    Usa la interpolación lineal de ``np.percentile`` sobre los valores
+    expandidos, sin materializarlos.
+    """
+    pixeles = int(histograma.sum())
+    if pixeles == 0:
+        return 0.0
+    acumulado = np.cumsum(histograma)
+    h = (pixeles - 1) * (q / 100.0)
+    bajo = int(np.floor(h))
+    alto = min(bajo + 1, pixeles - 1)
+    v_bajo = int(np.searchsorted(acumulado, bajo, side="right"))
+    v_alto = int(np.searchsorted(acumulado, alto, side="right"))
+    return float(v_bajo + (h - bajo) * (v_alto - v_bajo))
 
 
-def calcular_metricas_cobertura(pdf_path: str, dpi: int = 72, umbral: int = 5) -> Dict[str, Any]:
+def _rgb_desde_cmyk(cmyk: np.ndarray) -> np.ndarray:
+    c16 = cmyk.astype(np.uint16)
+    nk = 255 - c16[..., 3:4]
+    return nk - (c16[..., :3] * nk + 127) // 255
+
+
+def _mascara_blanco(cmyk: np.ndarray) -> np.ndarray:
+    """Píxeles casi blancos (RGB > 245 en los tres canales).
+
+    El RGB se deriva del CMYK con la misma fórmula que Pillow (y que
+    ``PageAnalysisContext.rgb``) en lugar de rasterizar la página dos veces.
+    """
+    return (_rgb_desde_cmyk(cmyk) > 245).all(axis=-1)
+
+
+def _filas_por_banda(ancho_px: int, max_mb: float | None) -> int:
+    max_bytes = (COBERTURA_MAX_MB if max_mb is None else max_mb) * 1024 * 1024
+    return max(1, int(max_bytes // (max(ancho_px, 1) * _BYTES_POR_PIXEL)))
+
+
+def iterar_bandas_cmyk(
+    page: fitz.Page, dpi: int, max_mb: float | None = None
+) -> Iterator[np.ndarray]:
+    """Rasteriza ``page`` en franjas horizontales CMYK ``uint8``.
+
+    Cada franja se renderiza con un ``clip`` de fitz; las filas se recortan
+    según el origen del pixmap para que las bandas encajen sin solaparse.
+    """
+    zoom = dpi / 72.0
+    mat = fitz.Matrix(zoom, zoom)
+    rect = page.rect
+    completo = (rect * mat).irect
+    alto_px = completo.height
+    filas = _filas_por_banda(completo.width, max_mb)
+    for r0 in range(0, alto_px, filas):
+        r1 = min(alto_px, r0 + filas)
+        clip = fitz.Rect(rect.x0, rect.y0 + r0 / zoom, rect.x1, rect.y0 + r1 / zoom)
+        pix = page.get_pixmap(matrix=mat, colorspace=fitz.csCMYK, alpha=False, clip=clip)
+        banda = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        desde = max(0, r0 + completo.y0 - pix.y)
+        yield banda[desde : desde + (r1 - r0)]
+
+
+def _acumular_pagina(page: fitz.Page, dpi: int, umbral: int, max_mb: float | None) -> CoberturaAcumulador:
+    acumulador = CoberturaAcumulador(umbral)
+    for banda in iterar_bandas_cmyk(page, dpi, max_mb):
+        acumulador.agregar(banda)
+    return acumulador
+
+
+def calcular_metricas_cobertura_documento(
+    pdf_path: str,
+    dpi: int = 72,
+    umbral: int = 5,
+    paginas: Optional[Iterable[int]] = None,
+    max_mb: float | None = None,
+) -> Dict[str, Any]:
+    """Cobertura y TAC de varias páginas (todas por defecto) en streaming.
+
+    Devuelve ``{"paginas": [...], "documento": {...}}``: las métricas de cada
+    página (con su ``pagina``, base 0) y las del documento completo, que
+    ponderan cada página por su cantidad de píxeles.
+    """
+    resultados: List[Dict[str, Any]] = []
+    total = CoberturaAcumulador(umbral)
+    with fitz.open(pdf_path) as doc:
+        indices = range(doc.page_count) if paginas is None else paginas
+        for idx in indices:
+            acumulador = _acumular_pagina(doc.load_page(int(idx)), dpi, umbral, max_mb)
+            total.fusionar(acumulador)
+            resultados.append({"pagina": int(idx), **acumulador.resultado()})
+    return {"paginas": resultados, "documento": total.resultado()}
+
+
+def calcular_metricas_cobertura(
+    pdf_path: str, dpi: int = 72, umbral: int = 5, ctx=None, max_mb: float | None = None
+) -> Dict[str, Any]:
     """Calcula métricas de cobertura CMYK y TAC de la primera página de un PDF.
 
     Devuelve un diccionario con:
@@ -14,49 +211,20 @@ def calcular_metricas_cobertura(pdf_path: str, dpi: int = 72, umbral: int = 5) -
           (cualquier canal sobre ``umbral``).
         - ``tac_p95``: percentil 95 del Total Area Coverage.
         - ``tac_max``: valor máximo del TAC.
+
+    Si se recibe un :class:`page_analysis.PageAnalysisContext` con el mismo
+    ``dpi`` se reutiliza su pasada por bandas (``ctx.resumen_raster``) en
+    lugar de volver a rasterizar la página. Si no, la página se rasteriza por
+    bandas de hasta ``max_mb`` (``COBERTURA_MAX_MB`` por defecto).
     """
-    doc = fitz.open(pdf_path)
-    page = doc.load_page(0)
-    zoom = dpi / 72.0
-    mat = fitz.Matrix(zoom, zoom)
-    pix_cmyk = page.get_pixmap(matrix=mat, colorspace=fitz.csCMYK, alpha=False)
-    pix_rgb = page.get_pixmap(matrix=mat, colorspace=fitz.csRGB, alpha=False)
-    doc.close()
-
-    img_cmyk = np.frombuffer(pix_cmyk.samples, dtype=np.uint8).reshape(
-        pix_cmyk.height, pix_cmyk.width, pix_cmyk.n
-    ).astype(np.float32)
-    img_rgb = np.frombuffer(pix_rgb.samples, dtype=np.uint8).reshape(
-        pix_rgb.height, pix_rgb.width, pix_rgb.n
-    )
-
-    mask_white = (
-        (img_rgb[..., 0] > 245)
-        & (img_rgb[..., 1] > 245)
-        & (img_rgb[..., 2] > 245)
-    )
-    img_cmyk[mask_white, :] = 0
-
-    canales = ["Cyan", "Magenta", "Amarillo", "Negro"]
-    cobertura_promedio = {
-        canal: float(img_cmyk[:, :, i].mean() / 255.0 * 100.0)
-        for i, canal in enumerate(canales)
-    }
-    cobertura_por_area = {
-        canal: float((img_cmyk[:, :, i] > umbral).mean() * 100.0)
-        for i, canal in enumerate(canales)
-    }
-
-    suma_cmyk = img_cmyk.sum(axis=2)
-    cobertura_total = float((suma_cmyk > umbral).mean() * 100.0)
-    tac_map = suma_cmyk / 255.0 * 100.0
-    tac_p95 = float(np.percentile(tac_map, 95))
-    tac_max = float(tac_map.max())
-
-    return {
-        "cobertura_promedio": cobertura_promedio,
-        "cobertura_por_area": cobertura_por_area,
-        "cobertura_total": cobertura_total,
-        "tac_p95": tac_p95,
-        "tac_max": tac_max,
-    }
+    if ctx is not None and ctx.dpi == dpi:
+        resumen = ctx.resumen_raster
+        if resumen.cobertura.umbral == umbral:
+            return resumen.cobertura.resultado()
+        acumulador = CoberturaAcumulador(umbral)
+        for banda in ctx.iterar_bandas_cmyk():
+            acumulador.agregar(banda)
+        return acumulador.resultado()
+
+    with fitz.open(pdf_path) as doc:
+        return _acumular_pagina(doc.load_page(0), dpi, umbral, max_mb).resultado()
@@ -3,6 +3,7 @@ import os
 
 MAX_CONTENT_LENGTH = 32 * 1024 * 1024  # 32MB
 MAX_PAGES_DIAG = 3
+MAX_PAGES_DIAG_LOTE = 500
 
 
 def _env_bool(name: str, default: str = "false") -> bool:
@@ -13,3 +14,7 @@ def _env_bool(name: str, default: str = "false") -> bool:
 
 
 ENABLE_POST_EDITOR = _env_bool("ENABLE_POST_EDITOR")
+
+# Cola de renders del editor visual (preview / PDF final en segundo plano)
+EDITOR_RENDER_WORKERS = int(os.environ.get("EDITOR_RENDER_WORKERS", "2") or 2)
+EDITOR_RENDER_INLINE = _env_bool("EDITOR_RENDER_INLINE")
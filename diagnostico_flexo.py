@@ -2,6 +2,7 @@ import json
 import math
 import os
 import unicodedata
+import uuid
 from collections import Counter
 from functools import lru_cache
 from typing import Any, Dict, List, Mapping
@@ -429,7 +430,12 @@ def inyectar_parametros_simulacion(
 
 
 def generar_preview_diagnostico(
-    pdf_path: str, advertencias: List[Dict[str, Any]] | None, dpi: int = 150
+    pdf_path: str,
+    advertencias: List[Dict[str, Any]] | None,
+    dpi: int = 150,
+    output_dir: str | None = None,
+    nombre_base: str | None = None,
+    render=None,
 ) -> tuple[str, str, str, List[Dict[str, Any]]]:
     """Genera imágenes PNG del PDF y una versión con bloques de color.
 
@@ -437,24 +443,38 @@ def generar_preview_diagnostico(
     de la imagen base, la ruta relativa de la imagen anotada y la lista de
     advertencias con las coordenadas escaladas al ``dpi`` solicitado para su
     uso interactivo en HTML.
-    """
-    doc = fitz.open(pdf_path)
-    page = doc.load_page(0)
-    zoom = dpi / 72.0
-    mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat, alpha=False)
 
-    static_dir = getattr(current_app, "static_folder", "static")
-    output_folder = os.path.join(static_dir, "previews")
-    os.makedirs(output_folder, exist_ok=True)
+    Las imágenes se escriben en ``output_dir`` (por ejemplo el directorio de
+    la revisión) como ``<nombre_base>.png`` y ``<nombre_base>_iconos.png``.
+    Sin ``output_dir`` van a ``static/previews`` con un nombre único, de modo
+    que dos revisiones concurrentes nunca comparten archivo. Las rutas
+    relativas lo son a la carpeta ``static``.
 
-    base_path = os.path.join(output_folder, "preview_diagnostico.png")
-    pix.save(base_path)
-    doc.close()
+    Si se pasa un :class:`revision_render.RevisionRender` con el mismo
+    ``dpi`` se reutiliza su raster en lugar de volver a rasterizar la página.
+    """
+    static_dir = getattr(current_app, "static_folder", "static")
+    if output_dir is None:
+        output_dir = os.path.join(static_dir, "previews")
+        nombre_base = nombre_base or f"preview_diagnostico_{uuid.uuid4().hex}"
+    nombre_base = nombre_base or "preview_diagnostico"
+    os.makedirs(output_dir, exist_ok=True)
+    base_path = os.path.join(output_dir, f"{nombre_base}.png")
+    anotada_path = os.path.join(output_dir, f"{nombre_base}_iconos.png")
 
-    # Imagen con bloques coloreados para descarga
-    anotada_path = os.path.join(output_folder, "preview_diagnostico_iconos.png")
-    base_img = Image.open(base_path).convert("RGBA")
+    zoom = dpi / 72.0
+    if render is not None and render.dpi == dpi:
+        base_rgb = render.imagen()
+    else:
+        with fitz.open(pdf_path) as doc:
+            pix = doc.load_page(0).get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        base_rgb = Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        del pix
+    base_rgb.save(base_path)
+
+    # Imagen con bloques coloreados para descarga, compuesta desde el raster
+    # ya decodificado en lugar de volver a leer el PNG recién escrito.
+    base_img = base_rgb.convert("RGBA")
     draw = ImageDraw.Draw(base_img)
 
     scale = dpi / 72.0
@@ -506,8 +526,8 @@ def generar_preview_diagnostico(
 
     base_img.save(anotada_path)
 
-    imagen_rel = os.path.join("previews", "preview_diagnostico.png")
-    anotada_rel = os.path.join("previews", "preview_diagnostico_iconos.png")
+    imagen_rel = os.path.relpath(base_path, static_dir).replace("\\", "/")
+    anotada_rel = os.path.relpath(anotada_path, static_dir).replace("\\", "/")
     return base_path, imagen_rel, anotada_rel, advertencias_iconos
 
 
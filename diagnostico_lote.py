@@ -0,0 +1,216 @@
+import atexit
+import base64
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import fitz  # PyMuPDF
+
+from diagnostico_pdf import diagnosticar_pagina
+
+# Diagnóstico offset de documentos completos (catálogos, revistas).
+#
+# ``diagnostico_offset_pro`` analiza una sola página. Aquí las páginas se
+# reparten en un pool de procesos: cada worker mantiene abierto su propio
+# documento fitz (se reabre solo si cambia el archivo) y devuelve el reporte
+# de cada página apenas termina. ``diagnosticar_documento`` produce esos
+# eventos en orden de llegada y cierra con un resumen del documento, listo
+# para transmitirse como NDJSON o SSE. Hay un pool por cantidad de workers
+# pedida; si un proceso muere el pool queda roto y se descarta para que el
+# próximo documento cree uno nuevo.
+
+DIAG_BATCH_WORKERS = int(os.getenv("DIAG_BATCH_WORKERS") or min(4, os.cpu_count() or 1))
+# Tope para ``workers``: cada valor distinto mantiene su propio pool.
+DIAG_BATCH_MAX_WORKERS = max(DIAG_BATCH_WORKERS, os.cpu_count() or 1)
+CONFIANZA_BAJA = 0.6
+SANGRADO_MINIMO_MM = 3.0
+
+_EXECUTORS: Dict[int, Executor] = {}
+_EXECUTOR_LOCK = threading.Lock()
+
+# Documento abierto en cada proceso worker: (ruta, mtime_ns, documento).
+_WORKER_DOC: tuple | None = None
+
+
+def _executor(workers: int) -> Executor:
+    with _EXECUTOR_LOCK:
+        executor = _EXECUTORS.get(workers)
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=workers)
+            _EXECUTORS[workers] = executor
+        return executor
+
+
+def _descartar_executor(workers: int, executor: Executor) -> None:
+    with _EXECUTOR_LOCK:
+        if _EXECUTORS.get(workers) is executor:
+            del _EXECUTORS[workers]
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def shutdown_pools() -> None:
+    """Cierra los pools de procesos (al salir del proceso o en tests)."""
+    with _EXECUTOR_LOCK:
+        executors = list(_EXECUTORS.values())
+        _EXECUTORS.clear()
+    for executor in executors:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+atexit.register(shutdown_pools)
+
+
+def _documento(pdf_path: str) -> fitz.Document:
+    global _WORKER_DOC
+    mtime_ns = os.stat(pdf_path).st_mtime_ns
+    if _WORKER_DOC is not None and _WORKER_DOC[:2] == (pdf_path, mtime_ns) and not _WORKER_DOC[2].is_closed:
+        return _WORKER_DOC[2]
+    if _WORKER_DOC is not None and not _WORKER_DOC[2].is_closed:
+        _WORKER_DOC[2].close()
+    _WORKER_DOC = (pdf_path, mtime_ns, fitz.open(pdf_path))
+    return _WORKER_DOC[2]
+
+
+def _cerrar_documento() -> None:
+    global _WORKER_DOC
+    if _WORKER_DOC is not None and not _WORKER_DOC[2].is_closed:
+        _WORKER_DOC[2].close()
+    _WORKER_DOC = None
+
+
+def diagnosticar_pagina_de(pdf_path: str, page_index: int, incluir_preview: bool = False) -> Dict:
+    """Evento de una página; se ejecuta dentro del worker."""
+    inicio = time.perf_counter()
+    try:
+        report, preview = diagnosticar_pagina(_documento(pdf_path)[page_index], incluir_preview)
+    except Exception as exc:
+        return {
+            "type": "page_error",
+            "page": page_index,
+            "error": f"{type(exc).__name__}: {exc}",
+            "elapsed_s": round(time.perf_counter() - inicio, 3),
+        }
+    evento = {
+        "type": "page",
+        "page": page_index,
+        "report": report,
+        "elapsed_s": round(time.perf_counter() - inicio, 3),
+    }
+    if preview is not None:
+        evento["preview_data"] = "data:image/jpeg;base64," + base64.b64encode(preview).decode("ascii")
+    return evento
+
+
+def resumen_documento(eventos: Iterable[Dict], page_count: int, elapsed_s: float = 0.0) -> Dict:
+    """Reporte agregado a partir de los eventos por página."""
+    eventos = list(eventos)
+    paginas = sorted((e for e in eventos if e.get("type") == "page"), key=lambda e: e["page"])
+    errores = sorted(e["page"] for e in eventos if e.get("type") == "page_error")
+    tamanos: Dict[str, List[int]] = {}
+    metodos: Counter = Counter()
+    sin_sangrado: List[int] = []
+    sangrado_corto: List[int] = []
+    confianza_baja: List[int] = []
+    sangrado_min = {}
+    for evento in paginas:
+        report, idx = evento["report"], evento["page"]
+        size = report["final_size_mm"]
+        tamanos.setdefault(f"{size['w']:.1f}x{size['h']:.1f}", []).append(idx)
+        metodos[report.get("detected_by", "")] += 1
+        bleed = report.get("bleed_mm") or {}
+        if bleed and min(bleed.values()) == 0:
+            sin_sangrado.append(idx)
+        elif bleed and min(bleed.values()) < SANGRADO_MINIMO_MM:
+            sangrado_corto.append(idx)
+        for lado, valor in bleed.items():
+            sangrado_min[lado] = min(valor, sangrado_min.get(lado, valor))
+        if report.get("confidence", 0.0) < CONFIANZA_BAJA:
+            confianza_baja.append(idx)
+
+    notas = []
+    if len(tamanos) > 1:
+        notas.append(f"El documento tiene {len(tamanos)} tamaños finales distintos.")
+    if sin_sangrado:
+        notas.append(f"{len(sin_sangrado)} página(s) sin sangrado en algún lado.")
+    if sangrado_corto:
+        notas.append(f"{len(sangrado_corto)} página(s) con sangrado menor a {SANGRADO_MINIMO_MM:g} mm.")
+    if confianza_baja:
+        notas.append(f"{len(confianza_baja)} página(s) con recorte de confianza media/baja.")
+    if errores:
+        notas.append(f"{len(errores)} página(s) no se pudieron analizar.")
+
+    return {
+        "page_count": page_count,
+        "pages_ok": len(paginas),
+        "pages_error": errores,
+        "final_sizes_mm": tamanos,
+        "detected_by": dict(metodos),
+        "bleed_min_mm": sangrado_min,
+        "pages_without_bleed": sin_sangrado,
+        "pages_short_bleed": sangrado_corto,
+        "pages_low_confidence": confianza_baja,
+        "notes": notas,
+        "elapsed_s": round(elapsed_s, 3),
+    }
+
+
+def diagnosticar_documento(
+    pdf_path: str,
+    paginas: Optional[Iterable[int]] = None,
+    workers: Optional[int] = None,
+    incluir_preview: bool = False,
+) -> Iterator[Dict]:
+    """Diagnostica todas las páginas (o ``paginas``) de ``pdf_path``.
+
+    Produce un evento ``{"type": "start"}``, luego un evento ``page`` (o
+    ``page_error``) por página en el orden en que terminan y, al final,
+    ``{"type": "summary", "report": ...}``.
+    """
+    pdf_path = os.path.abspath(pdf_path)
+    with fitz.open(pdf_path) as doc:
+        page_count = doc.page_count
+    indices = sorted({int(i) for i in paginas} if paginas is not None else range(page_count))
+    indices = [i for i in indices if 0 <= i < page_count]
+    workers = DIAG_BATCH_WORKERS if workers is None else int(workers)
+    workers = min(max(1, workers), max(1, DIAG_BATCH_MAX_WORKERS))
+
+    inicio = time.perf_counter()
+    yield {"type": "start", "page_count": page_count, "pages": len(indices), "workers": workers}
+
+    eventos: List[Dict] = []
+    if workers == 1 or len(indices) <= 1:
+        # En el proceso web: el documento no queda abierto al terminar.
+        try:
+            for idx in indices:
+                evento = diagnosticar_pagina_de(pdf_path, idx, incluir_preview)
+                eventos.append(evento)
+                yield evento
+        finally:
+            _cerrar_documento()
+    else:
+        executor = _executor(workers)
+        futures = {executor.submit(diagnosticar_pagina_de, pdf_path, idx, incluir_preview): idx for idx in indices}
+        # Si el cliente corta el stream el generador se cierra y la ruta borra
+        # el PDF: las páginas que no empezaron no deben correr.
+        try:
+            for future in as_completed(futures):
+                try:
+                    evento = future.result()
+                except Exception as exc:  # el worker murió (memoria, señal)
+                    if isinstance(exc, BrokenProcessPool):
+                        _descartar_executor(workers, executor)
+                    evento = {"type": "page_error", "page": futures[future], "error": f"{type(exc).__name__}: {exc}"}
+                eventos.append(evento)
+                yield evento
+        finally:
+            for future in futures:
+                future.cancel()
+
+    yield {
+        "type": "summary",
+        "report": resumen_documento(eventos, page_count, time.perf_counter() - inicio),
+    }
@@ -1,5 +1,5 @@
 import io, gc, base64
-from typing import Dict, List, Tuple
+from typing import Dict, List, NamedTuple, Tuple
 
 import fitz  # PyMuPDF
 from PIL import Image, ImageDraw
@@ -81,64 +81,205 @@ def combine_h_union_if_x_agree(
     return None
 
 
+def _likely_dieline_color(rgb):
+    """Return True if color matches typical dieline hues (red/magenta, cyan or dark gray/black)."""
+    if not rgb or len(rgb) < 3:
+        return False
+    r, g, b = rgb[:3]
+    # Red or magenta: red channel dominant
+    if (r > 0.7 and g < 0.35 and b < 0.35) or (r > 0.6 and b > 0.6 and g < 0.35):
+        return True
+    # Cyan: blue dominant with some green
+    if b > 0.6 and g > 0.6 and r < 0.35:
+        return True
+    # Black or dark gray: all channels low and similar
+    if max(r, g, b) < 0.25 and max(abs(r - g), abs(r - b), abs(g - b)) < 0.1:
+        return True
+    return False
+
+
+def _item_line(it):
+    """Segmento ``(x0, y0, x1, y1)`` de un item de ``get_drawings`` o ``None``."""
+    if len(it) == 4:
+        return tuple(it)
+    if len(it) == 3 and it[0] == 'l':
+        p0, p1 = it[1], it[2]
+        return (p0.x, p0.y, p1.x, p1.y)
+    return None
+
+
+def _orientation(x0, y0, x1, y1) -> str:
+    is_vert = abs(x0 - x1) < 0.5
+    is_horz = abs(y0 - y1) < 0.5
+    if is_vert and is_horz:
+        return "p"
+    if is_vert:
+        return "v"
+    if is_horz:
+        return "h"
+    return "d"
+
+
+class PagePath(NamedTuple):
+    """Un trazado de ``get_drawings`` reducido a lo que usan los detectores."""
+
+    stroke: bool
+    width: float
+    dieline_color: bool
+    dashed: bool
+    item_count: int
+    lines: Tuple[Tuple[float, float, float, float], ...]
+
+
+class Segment(NamedTuple):
+    x0: float
+    y0: float
+    x1: float
+    y1: float
+    width: float
+    orientation: str  # "v", "h", "p" (punto) o "d" (diagonal)
+    dieline_color: bool
+    index: int  # orden de aparición en la página
+
+
+class PageFeatures:
+    """Rasgos de una página extraídos una sola vez para todos los detectores.
+
+    ``compute_final_area`` y ``measure_bleed`` consultan troquel, marcas de
+    corte, contornos y masa visible de la misma página. En lugar de que cada
+    detector llame a ``page.get_drawings()`` o rasterice por su cuenta, esta
+    clase lee los dibujos una vez (``vector_passes``), los reduce a trazados y
+    segmentos agrupados por orientación y color, y guarda un único raster listo
+    para OpenCV (``raster_passes``) del que también sale la vista previa.
+    """
+
+    def __init__(self, page: fitz.Page) -> None:
+        self.page = page
+        self.page_w, self.page_h = page.rect.width, page.rect.height
+        self.page_mm = (pt_to_mm(self.page_w), pt_to_mm(self.page_h))
+        self.vector_passes = 0
+        self.raster_passes = 0
+        self._paths: List[PagePath] | None = None
+        self._segments: Dict[Tuple[str, bool], List[Segment]] | None = None
+        self._raster = None
+        self._visible_bbox = None
+
+    @property
+    def paths(self) -> List[PagePath]:
+        if self._paths is None:
+            try:
+                drawings = self.page.get_drawings()
+            except Exception:
+                drawings = []
+            self.vector_passes += 1
+            paths = []
+            for d in drawings:
+                items = d.get("items", [])
+                paths.append(
+                    PagePath(
+                        stroke=bool(d.get("stroke")),
+                        width=float(d.get("width") or 0.0),
+                        dieline_color=_likely_dieline_color(d.get("color", None)),
+                        dashed=d.get("dashes", None) is not None,
+                        item_count=len(items),
+                        lines=tuple(ln for ln in (_item_line(it) for it in items) if ln is not None),
+                    )
+                )
+            self._paths = paths
+        return self._paths
+
+    def segments(self, orientations: str, dieline_color: bool | None = None, max_width: float | None = None):
+        """Segmentos de trazados con ``stroke`` de las orientaciones dadas (p. ej. ``"vh"``).
+
+        Se devuelven en el orden en que aparecen en la página.
+        """
+        if self._segments is None:
+            buckets: Dict[Tuple[str, bool], List[Segment]] = {}
+            index = 0
+            for path in self.paths:
+                if not path.stroke:
+                    continue
+                for x0, y0, x1, y1 in path.lines:
+                    orient = _orientation(x0, y0, x1, y1)
+                    buckets.setdefault((orient, path.dieline_color), []).append(
+                        Segment(x0, y0, x1, y1, path.width, orient, path.dieline_color, index)
+                    )
+                    index += 1
+            self._segments = buckets
+        colores = (True, False) if dieline_color is None else (dieline_color,)
+        out = [
+            seg
+            for orient in orientations
+            for color in colores
+            for seg in self._segments.get((orient, color), [])
+            if max_width is None or seg.width <= max_width
+        ]
+        if len(orientations) > 1 or len(colores) > 1:
+            out.sort(key=lambda seg: seg.index)
+        return out
+
+    @property
+    def raster_dpi(self) -> int:
+        return dpi_for_raster_ops(self.page_mm)
+
+    @property
+    def raster(self):
+        """Raster de la página (``uint8``, alto x ancho x n) a ``raster_dpi``."""
+        if self._raster is None:
+            import numpy as np
+
+            dpi = self.raster_dpi
+            pix = self.page.get_pixmap(matrix=fitz.Matrix(dpi / 72, dpi / 72), alpha=False)
+            self.raster_passes += 1
+            self._raster = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+            pix = None
+        return self._raster
+
+    def preview_image(self, dpi: int) -> Image.Image:
+        """Vista previa RGB a ``dpi`` derivada del raster (sin volver a renderizar)."""
+        im = Image.fromarray(self.raster[..., :3].copy())
+        size = (
+            max(1, int(round(self.page_w * dpi / 72))),
+            max(1, int(round(self.page_h * dpi / 72))),
+        )
+        if im.size != size:
+            im = im.resize(size, Image.LANCZOS)
+        return im
+
+    def close(self) -> None:
+        self._raster = None
+        self._visible_bbox = None
+        fitz.TOOLS.store_shrink(1)
+        gc.collect()
+
+
 # ------------------------------------------------------------
 # NUEVO: Detección robusta de troquel (dieline)
 # ------------------------------------------------------------
-def detect_dieline_bbox_advanced(page: fitz.Page, page_w: float, page_h: float):
+def detect_dieline_bbox_advanced(page: fitz.Page, page_w: float, page_h: float, features: PageFeatures | None = None):
     """
     Heurística para troquel: trazos finos, sin relleno, color rojo/magenta (no obligatorio),
     a veces dashed. Se unifican todos los bboxes relevantes.
     """
-    try:
-        drawings = page.get_drawings()
-    except Exception:
-        return None, [], 0.0, {}
+    features = features or PageFeatures(page)
 
     dieline_rects = []
     MAX_STROKE_PT = 3.0
     MIN_PATH_SEGMENTS = 2
 
-    def likely_dieline_color(rgb):
-        """Return True if color matches typical dieline hues (red/magenta, cyan or dark gray/black)."""
-        if not rgb or len(rgb) < 3:
-            return False
-        r, g, b = rgb[:3]
-        # Red or magenta: red channel dominant
-        if (r > 0.7 and g < 0.35 and b < 0.35) or (r > 0.6 and b > 0.6 and g < 0.35):
-            return True
-        # Cyan: blue dominant with some green
-        if b > 0.6 and g > 0.6 and r < 0.35:
-            return True
-        # Black or dark gray: all channels low and similar
-        if max(r, g, b) < 0.25 and max(abs(r - g), abs(r - b), abs(g - b)) < 0.1:
-            return True
-        return False
-
-    for d in drawings:
-        if not d.get("stroke"):
+    for path in features.paths:
+        if not path.stroke:
             continue
-        width = float(d.get("width") or 0.0)
-        if width > MAX_STROKE_PT:
+        if path.width > MAX_STROKE_PT:
             continue
-        color = d.get("color", None)
-        dashes = d.get("dashes", None)
-        items = d.get("items", [])
-        if not items or len(items) < MIN_PATH_SEGMENTS:
-            continue
-        xs, ys = [], []
-        for it in items:
-            if len(it) == 4:
-                x0, y0, x1, y1 = it
-                xs += [x0, x1]; ys += [y0, y1]
-            elif len(it) == 3 and it[0] == 'l':
-                p0, p1 = it[1], it[2]
-                xs += [p0.x, p1.x]; ys += [p0.y, p1.y]
-        if not xs:
+        if path.item_count < MIN_PATH_SEGMENTS or not path.lines:
             continue
+        xs = [v for ln in path.lines for v in (ln[0], ln[2])]
+        ys = [v for ln in path.lines for v in (ln[1], ln[3])]
         r = fitz.Rect(min(xs), min(ys), max(xs), max(ys))
         if r.width < 10 or r.height < 10:
             continue
-        if likely_dieline_color(color) or dashes is not None or width <= 0.6:
+        if path.dieline_color or path.dashed or path.width <= 0.6:
             dieline_rects.append(r)
 
     if not dieline_rects:
@@ -170,48 +311,35 @@ def get_pdf_boxes(page: fitz.Page) -> Dict[str, fitz.Rect]:
     }
 
 
-def detect_cropmarks_vector(page: fitz.Page, page_w: float, page_h: float):
+def detect_cropmarks_vector(page: fitz.Page, page_w: float, page_h: float, features: PageFeatures | None = None):
     """Líneas finas cerca del borde que forman pares verticales/horizontales; devuelve rectángulo interior."""
-    try:
-        drawings = page.get_drawings()
-    except Exception:
-        return None, [], 0.0, {}
+    features = features or PageFeatures(page)
 
     vert_x, horiz_y, marks = [], [], []
     MAX_STROKE_PT = 1.5
     MAX_DIST_EDGE_PT = min(page_w, page_h) * 0.10
     MIN_LEN_MM, MAX_LEN_MM = 2.0, 25.0
 
-    for d in drawings:
-        if not d.get("stroke") or (d.get("width", 0) or 0) > MAX_STROKE_PT:
+    # Los segmentos "p" (puntos) y diagonales nunca miden entre 2 y 25 mm
+    # en su eje, así que solo se recorren los cubos vertical y horizontal.
+    for seg in features.segments("vh", max_width=MAX_STROKE_PT):
+        x0, y0, x1, y1 = seg.x0, seg.y0, seg.x1, seg.y1
+        is_vert = seg.orientation == "v"
+        length_pt = abs((y1 - y0) if is_vert else (x1 - x0))
+        length_mm = pt_to_mm(length_pt)
+        if not (MIN_LEN_MM <= length_mm <= MAX_LEN_MM):
             continue
-        for item in d.get("items", []):
-            if len(item) == 4:
-                x0, y0, x1, y1 = item
-            elif len(item) == 3 and item[0] == 'l':
-                p0, p1 = item[1], item[2]
-                x0, y0, x1, y1 = p0.x, p0.y, p1.x, p1.y
-            else:
-                continue
-            is_vert = abs(x0 - x1) < 0.5
-            is_horz = abs(y0 - y1) < 0.5
-            if not (is_vert or is_horz):
-                continue
-            length_pt = abs((y1 - y0) if is_vert else (x1 - x0))
-            length_mm = pt_to_mm(length_pt)
-            if not (MIN_LEN_MM <= length_mm <= MAX_LEN_MM):
-                continue
-            near_edge = (
-                min(x0, x1) < MAX_DIST_EDGE_PT or page_w - max(x0, x1) < MAX_DIST_EDGE_PT or
-                min(y0, y1) < MAX_DIST_EDGE_PT or page_h - max(y0, y1) < MAX_DIST_EDGE_PT
-            )
-            if not near_edge:
-                continue
-            marks.append((x0, y0, x1, y1))
-            if is_vert:
-                vert_x.append((x0 + x1) / 2)
-            if is_horz:
-                horiz_y.append((y0 + y1) / 2)
+        near_edge = (
+            min(x0, x1) < MAX_DIST_EDGE_PT or page_w - max(x0, x1) < MAX_DIST_EDGE_PT or
+            min(y0, y1) < MAX_DIST_EDGE_PT or page_h - max(y0, y1) < MAX_DIST_EDGE_PT
+        )
+        if not near_edge:
+            continue
+        marks.append((x0, y0, x1, y1))
+        if is_vert:
+            vert_x.append((x0 + x1) / 2)
+        else:
+            horiz_y.append((y0 + y1) / 2)
 
     if len(vert_x) >= 2 and len(horiz_y) >= 2:
         rect = fitz.Rect(min(vert_x), min(horiz_y), max(vert_x), max(horiz_y))
@@ -220,17 +348,17 @@ def detect_cropmarks_vector(page: fitz.Page, page_w: float, page_h: float):
     return None, [], 0.0, {}
 
 
-def raster_visible_bbox(page: fitz.Page, page_mm):
+def raster_visible_bbox(page: fitz.Page, page_mm, features: PageFeatures | None = None):
     """Fallback visual: renderiza, elimina líneas finas/ruido y toma bbox de masa visible."""
-    dpi = dpi_for_raster_ops(page_mm)
-    mat = fitz.Matrix(dpi / 72, dpi / 72)
-    pix = page.get_pixmap(matrix=mat, alpha=False)
+    features = features or PageFeatures(page)
+    if features._visible_bbox is not None:
+        return features._visible_bbox
+    dpi = features.raster_dpi
 
-    import numpy as np, cv2
-    arr = np.frombuffer(pix.samples, dtype=np.uint8)
-    arr = arr.reshape(pix.height, pix.width, pix.n)
+    import cv2
+    arr = features.raster
 
-    if pix.n == 4:
+    if arr.shape[2] == 4:
         arr = cv2.cvtColor(arr, cv2.COLOR_BGRA2BGR)
     gray = cv2.cvtColor(arr, cv2.COLOR_BGR2GRAY)
     blur = cv2.GaussianBlur(gray, (3, 3), 0)
@@ -243,45 +371,25 @@ def raster_visible_bbox(page: fitz.Page, page_mm):
     mask = cv2.morphologyEx(mask, cv2.MORPH_DILATE, k2, iterations=1)
     coords = cv2.findNonZero(mask)
     if coords is None:
-        del arr
-        pix = None
-        fitz.TOOLS.store_shrink(1)
-        gc.collect()
-        return None, [], 0.0, {}
-
-    x, y, w, h = cv2.boundingRect(coords)
-    scale = 72 / dpi
-    x0, y0 = x * scale, y * scale
-    x1, y1 = (x + w) * scale, (y + h) * scale
-    rect = fitz.Rect(x0, y0, x1, y1)
-
-    del arr
-    pix = None
-    fitz.TOOLS.store_shrink(1)
-    gc.collect()
-    return rect, [], 0.55, {"source": "VisibleRaster"}
-
-
-def detect_rectangular_contours(page: fitz.Page):
+        result = (None, [], 0.0, {})
+    else:
+        x, y, w, h = cv2.boundingRect(coords)
+        scale = 72 / dpi
+        x0, y0 = x * scale, y * scale
+        x1, y1 = (x + w) * scale, (y + h) * scale
+        result = (fitz.Rect(x0, y0, x1, y1), [], 0.55, {"source": "VisibleRaster"})
+    del gray, blur, binv, mask
+    features._visible_bbox = result
+    return result
+
+
+def detect_rectangular_contours(page: fitz.Page, features: PageFeatures | None = None):
     """Busca contornos rectangulares cerrados en los dibujos vectoriales."""
-    try:
-        drawings = page.get_drawings()
-    except Exception:
-        return None, [], 0.0, {}
+    features = features or PageFeatures(page)
 
     rects = []
-    for d in drawings:
-        items = d.get("items", [])
-        lines = []
-        for it in items:
-            if len(it) == 4:
-                x0, y0, x1, y1 = it
-            elif len(it) == 3 and it[0] == 'l':
-                p0, p1 = it[1], it[2]
-                x0, y0, x1, y1 = p0.x, p0.y, p1.x, p1.y
-            else:
-                continue
-            lines.append((x0, y0, x1, y1))
+    for path in features.paths:
+        lines = path.lines
         if len(lines) < 4:
             continue
         xs = [p for ln in lines for p in (ln[0], ln[2])]
@@ -312,7 +420,7 @@ def detect_rectangular_contours(page: fitz.Page):
     return rect, rects, 0.6, {"source": "RectContours"}
 
 
-def compute_final_area(page: fitz.Page):
+def compute_final_area(page: fitz.Page, features: PageFeatures | None = None):
     page_w, page_h = page.rect.width, page.rect.height
     boxes = get_pdf_boxes(page)
     notes: List[str] = []
@@ -329,10 +437,11 @@ def compute_final_area(page: fitz.Page):
         tb = clamp_rect(tb, page_w, page_h)
         return tb, 0.9, {"source": "TrimBox"}, components, notes
 
-    dieline_rect, dieline_comps, dieline_conf, dieline_info = detect_dieline_bbox_advanced(page, page_w, page_h)
-    crop_rect, crop_comps, crop_conf, crop_info = detect_cropmarks_vector(page, page_w, page_h)
-    raster_rect, raster_comps, raster_conf, raster_info = raster_visible_bbox(page, (pt_to_mm(page_w), pt_to_mm(page_h)))
-    contour_rect, contour_comps, contour_conf, contour_info = detect_rectangular_contours(page)
+    features = features or PageFeatures(page)
+    dieline_rect, dieline_comps, dieline_conf, dieline_info = detect_dieline_bbox_advanced(page, page_w, page_h, features)
+    crop_rect, crop_comps, crop_conf, crop_info = detect_cropmarks_vector(page, page_w, page_h, features)
+    raster_rect, raster_comps, raster_conf, raster_info = raster_visible_bbox(page, features.page_mm, features)
+    contour_rect, contour_comps, contour_conf, contour_info = detect_rectangular_contours(page, features)
 
     if dieline_info.get("snap"):
         notes.append("Troquel ajustado a altura completa por ancho total.")
@@ -430,13 +539,13 @@ def compute_final_area(page: fitz.Page):
     return final_rect, confidence, info, components, notes
 
 
-def measure_bleed(page: fitz.Page, final_rect: fitz.Rect):
+def measure_bleed(page: fitz.Page, final_rect: fitz.Rect, features: PageFeatures | None = None):
     page_w, page_h = page.rect.width, page.rect.height
-    page_mm = (pt_to_mm(page_w), pt_to_mm(page_h))
+    features = features or PageFeatures(page)
     boxes = get_pdf_boxes(page)
     bleedbox = boxes.get("bleedbox")
-    crop_rect, marks, _, _ = detect_cropmarks_vector(page, page_w, page_h)
-    raster_rect, _, _, _ = raster_visible_bbox(page, page_mm)
+    crop_rect, marks, _, _ = detect_cropmarks_vector(page, page_w, page_h, features)
+    raster_rect, _, _, _ = raster_visible_bbox(page, features.page_mm, features)
 
     def mark_pos(side: str):
         if not marks:
@@ -493,14 +602,18 @@ def measure_bleed(page: fitz.Page, final_rect: fitz.Rect):
     return bleed
 
 
-def generar_preview_jpg(page, final_rect_pt=None, page_mm=(210, 297), draw_overlay=True):
+def generar_preview_jpg(page, final_rect_pt=None, page_mm=(210, 297), draw_overlay=True, features=None):
     # 1) DPI dinámico para preview
     dpi = dpi_for_preview(page_mm)
-    mat = fitz.Matrix(dpi / 72, dpi / 72)
-    pix = page.get_pixmap(matrix=mat, alpha=False)
 
-    # 2) PIL Image
-    im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    # 2) PIL Image (reducida del raster de ``features`` si ya existe)
+    if features is not None:
+        im = features.preview_image(dpi)
+        pix = None
+    else:
+        mat = fitz.Matrix(dpi / 72, dpi / 72)
+        pix = page.get_pixmap(matrix=mat, alpha=False)
+        im = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
     draw = ImageDraw.Draw(im)
 
     # 3) Overlays (opcional)
@@ -510,7 +623,7 @@ def generar_preview_jpg(page, final_rect_pt=None, page_mm=(210, 297), draw_overl
 
         x0, y0, x1, y1 = final_rect_pt
         draw.rectangle([pt2px(x0), pt2px(y0), pt2px(x1), pt2px(y1)], outline="red", width=3)
-        draw.rectangle([0, 0, pix.width - 1, pix.height - 1], outline="black", width=1)
+        draw.rectangle([0, 0, im.width - 1, im.height - 1], outline="black", width=1)
 
     # 4) Exportar JPEG optimizado (reduce RAM y base64)
     bio = io.BytesIO()
@@ -529,14 +642,19 @@ def generar_preview_jpg(page, final_rect_pt=None, page_mm=(210, 297), draw_overl
     return preview_bytes
 
 
-def diagnostico_offset_pro(pdf_path: str, page_index: int = 0):
-    doc = fitz.open(pdf_path)
-    page = doc[page_index]
+def diagnosticar_pagina(page: fitz.Page, incluir_preview: bool = True):
+    """Diagnóstico técnico de una página (sin resumen IA).
+
+    Devuelve ``(reporte, preview_jpg_bytes)``; el preview es ``None`` si
+    ``incluir_preview`` es ``False``.
+    """
     page_w, page_h = page.rect.width, page.rect.height
     page_size_mm = {"w": pt_to_mm(page_w), "h": pt_to_mm(page_h)}
 
-    final_rect, confidence, info, components, notes = compute_final_area(page)
-    bleed = measure_bleed(page, final_rect)
+    # Una pasada vectorial y una raster por página, compartidas por todos los detectores.
+    features = PageFeatures(page)
+    final_rect, confidence, info, components, notes = compute_final_area(page, features)
+    bleed = measure_bleed(page, final_rect, features)
 
     if confidence < 0.6:
         notes.append("Verificar recorte (confianza media/baja).")
@@ -549,9 +667,10 @@ def diagnostico_offset_pro(pdf_path: str, page_index: int = 0):
     final_size_mm = rect_size_mm(final_rect)
     final_origin_mm = {"x": pt_to_mm(final_rect.x0), "y": pt_to_mm(final_rect.y0)}
 
+    # Las marcas de corte llegan como tuplas (x0, y0, x1, y1); el resto como Rect.
     components_mm = [
         (pt_to_mm(r.x0), pt_to_mm(r.y0), pt_to_mm(r.x1), pt_to_mm(r.y1))
-        for r in components
+        for r in (fitz.Rect(c) for c in components)
     ]
 
     out_dict = {
@@ -565,19 +684,31 @@ def diagnostico_offset_pro(pdf_path: str, page_index: int = 0):
         "final_components": components_mm,
         "notes": notes,
     }
-    preview_bytes = generar_preview_jpg(
-        page,
-        (final_rect.x0, final_rect.y0, final_rect.x1, final_rect.y1),
-        (page_size_mm["w"], page_size_mm["h"]),
-    )
+    preview_bytes = None
+    if incluir_preview:
+        preview_bytes = generar_preview_jpg(
+            page,
+            (final_rect.x0, final_rect.y0, final_rect.x1, final_rect.y1),
+            (page_size_mm["w"], page_size_mm["h"]),
+            features=features,
+        )
+    features.close()
+    return out_dict, preview_bytes
+
+
+def diagnostico_offset_pro(pdf_path: str, page_index: int = 0):
+    doc = fitz.open(pdf_path)
+    page = doc[page_index]
+    out_dict, preview_bytes = diagnosticar_pagina(page)
+    final_size_mm = out_dict["final_size_mm"]
 
     ai_summary = ""
     try:
         prompt = (
             f"Tamaño final: {final_size_mm['w']} x {final_size_mm['h']} mm. "
-            f"Detectado por: {info.get('source')}. "
-            f"Confianza: {confidence}. Sangrado: {bleed}. "
-            f"Notas: {', '.join(notes)}"
+            f"Detectado por: {out_dict['detected_by']}. "
+            f"Confianza: {out_dict['confidence']}. Sangrado: {out_dict['bleed_mm']}. "
+            f"Notas: {', '.join(out_dict['notes'])}"
         )
         ai_summary = chat_completion(prompt)
     except Exception:
@@ -593,4 +724,4 @@ def diagnosticar_pdf(path: str) -> str:
     return resultado.get("ai_summary", "")
 
 
-__all__ = ["diagnostico_offset_pro", "diagnosticar_pdf"]
+__all__ = ["PageFeatures", "diagnosticar_pagina", "diagnostico_offset_pro", "diagnosticar_pdf"]
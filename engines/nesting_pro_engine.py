@@ -1,10 +1,14 @@
 """Nesting PRO engine using rectpack for optimal packing."""
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import Dict, List, Tuple
 
-from rectpack import newPacker
+import numpy as np
+from rectpack import SORT_AREA, SORT_LSIDE, SORT_PERI, SORT_SSIDE, MaxRectsBssf, PackingBin, newPacker
+
+from engines.slot_store import SlotStore
+from services.editor_offset_layout_defaults import first_numeric
 
 
 @dataclass
@@ -22,10 +26,73 @@ class NestingPiece:
         return self.width_mm + bleed_pad, self.height_mm + bleed_pad
 
 
+# Claves (y orden) de los slots que expone el motor de nesting.
+NESTING_SLOT_FIELDS = ("design_ref", "x_mm", "y_mm", "w_mm", "h_mm", "rotation_deg", "bleed_mm")
+
+
+# Órdenes de first-fit decreciente que prueba ``compute_nesting_sheets``.
+NESTING_SORT_ORDERS = (SORT_AREA, SORT_PERI, SORT_LSIDE, SORT_SSIDE)
+
+
 @dataclass
 class NestingResult:
-    slots: List[Dict]
+    store: SlotStore
     bbox: Tuple[float, float, float, float]
+    unplaced: List[Dict] = field(default_factory=list)
+
+    @property
+    def slots(self) -> List[Dict]:
+        """Slots como dicts; solo para consumidores del contrato JSON."""
+        return self.store.to_dicts(NESTING_SLOT_FIELDS)
+
+
+@dataclass
+class NestingPlan:
+    """Resultado multi-pliego: un ``NestingResult`` por pliego usado."""
+
+    sheets: List[NestingResult]
+    unplaced: List[Dict]
+
+    @property
+    def sheet_count(self) -> int:
+        return len(self.sheets)
+
+    @property
+    def placed_count(self) -> int:
+        return sum(len(sheet.store) for sheet in self.sheets)
+
+    @property
+    def rank(self) -> Tuple[int, int]:
+        return sum(item["count"] for item in self.unplaced), self.sheet_count
+
+    def summary(self) -> Dict:
+        return {
+            "sheet_count": self.sheet_count,
+            "placed": self.placed_count,
+            "per_sheet": [len(sheet.store) for sheet in self.sheets],
+            "unplaced": self.unplaced,
+        }
+
+
+class _MaxRectsBssfPorPieza(MaxRectsBssf):
+    """MaxRectsBssf con la rotación desactivada para los ``rid`` de ``fixed_rids``.
+
+    rectpack solo permite activar la rotación para todo el packer; sin esto
+    una pieza con ``allow_rotation=False`` podía quedar rotada en el pliego.
+    """
+
+    def __init__(self, width, height, rot=True, fixed_rids=frozenset(), *args, **kwargs):
+        self.fixed_rids = fixed_rids
+        super().__init__(width, height, rot, *args, **kwargs)
+
+    def add_rect(self, width, height, rid=None):
+        if not self.rot or rid not in self.fixed_rids:
+            return super().add_rect(width, height, rid)
+        self.rot = False
+        try:
+            return super().add_rect(width, height, rid)
+        finally:
+            self.rot = True
 
 
 def _normalize_design(design: Dict) -> NestingPiece | None:
@@ -59,17 +126,106 @@ def _available_area(layout: Dict) -> Tuple[float, float, float, float]:
     return usable_w, usable_h, float(left), float(bottom)
 
 
-def _rectpack_positions(pieces: List[NestingPiece], layout: Dict) -> NestingResult:
+def _sheet_result(
+    packed: List[Tuple],
+    piece_map: Dict[str, NestingPiece],
+    pad: float,
+    usable_h: float,
+    offset_x: float,
+    offset_y: float,
+) -> NestingResult:
+    store = SlotStore(capacity=len(packed), id_prefix="nest")
+    if not packed:
+        return NestingResult(store=store, bbox=(0.0, 0.0, 0.0, 0.0))
+
+    # Datos por diseño indexados con el ref internado; el resto del cálculo
+    # es por columnas sobre todos los rectángulos empaquetados.
+    design_idx = np.fromiter((store.refs.intern(rect[5]) for rect in packed), dtype="i4", count=len(packed))
+    by_ref = [piece_map[ref] for ref in store.refs.values]
+    padded = np.array([p.padded_size for p in by_ref], dtype="f8").reshape(-1, 2)
+    allow_rot = np.array([p.allow_rotation for p in by_ref], dtype=bool)
+    bleeds = np.array([p.bleed_mm for p in by_ref], dtype="f8")
+    geom = np.array([rect[1:5] for rect in packed], dtype="f8")
+    x, y, w, h = geom[:, 0], geom[:, 1], geom[:, 2], geom[:, 3]
+
+    padded_w = padded[design_idx, 0]
+    padded_h = padded[design_idx, 1]
+    rotated = (np.abs(w - (padded_h + pad)) < 1e-3) & allow_rot[design_idx]
+    width_used = np.where(rotated, padded_h, padded_w)
+    height_used = np.where(rotated, padded_w, padded_h)
+    center_offset = pad / 2 if pad > 0 else 0
+    slot_x = offset_x + x + center_offset
+    # rectpack mide ``y`` desde arriba: el slot empieza ``center_offset`` por
+    # debajo del borde superior del rect empaquetado (que incluye el gap).
+    slot_y = offset_y + (usable_h - (y + h)) + center_offset
+
+    store.extend_columns(
+        _round4(slot_x),
+        _round4(slot_y),
+        _round4(width_used),
+        _round4(height_used),
+        rotation_deg=np.where(rotated, 90, 0),
+        bleed_mm=bleeds[design_idx],
+        design=design_idx,
+    )
+    bbox = (
+        float(slot_x.min()),
+        float(slot_y.min()),
+        float((slot_x + width_used).max()),
+        float((slot_y + height_used).max()),
+    )
+    return NestingResult(store=store, bbox=bbox)
+
+
+def _round4(values: np.ndarray) -> List[float]:
+    # ``round`` de Python (redondeo decimal exacto), como el cálculo por slot
+    # al que reemplaza: a igual fórmula, los mismos dígitos. Los jobs
+    # guardados antes de que ``slot_y`` descontara ``center_offset`` desde
+    # el borde superior tienen otra ``y`` y no coinciden.
+    return [round(v, 4) for v in values.tolist()]
+
+
+def _fits_empty_sheet(piece: NestingPiece, usable_w: float, usable_h: float, pad: float) -> bool:
+    padded_w, padded_h = piece.padded_size
+    rect_w, rect_h = padded_w + pad, padded_h + pad
+    if rect_w <= usable_w and rect_h <= usable_h:
+        return True
+    return piece.allow_rotation and rect_h <= usable_w and rect_w <= usable_h
+
+
+def _rectpack_positions(
+    pieces: List[NestingPiece],
+    layout: Dict,
+    max_sheets: int = 1,
+    sort_algo=SORT_AREA,
+) -> NestingPlan:
     usable_w, usable_h, offset_x, offset_y = _available_area(layout)
     if usable_w <= 0 or usable_h <= 0:
-        return NestingResult(slots=[], bbox=(0, 0, 0, 0))
+        return NestingPlan(sheets=[], unplaced=_unplaced(pieces, {}, lambda _p: False))
 
     gap = float(layout.get("gap_default_mm") or 0)
     pad = max(0.0, gap)
-    packer = newPacker(rotation=True)
-    packer.add_bin(usable_w, usable_h)
+    # Bin First Fit: cada pieza (en el orden de ``sort_algo``) va al primer
+    # pliego donde entra. El primer pliego queda idéntico al empaquetado de un
+    # solo bin y solo lo que no entra abre pliegos nuevos.
+    packer = newPacker(
+        bin_algo=PackingBin.BFF,
+        pack_algo=_MaxRectsBssfPorPieza,
+        sort_algo=sort_algo,
+        rotation=True,
+    )
+    packer.add_bin(
+        usable_w,
+        usable_h,
+        count=max(1, int(max_sheets)),
+        fixed_rids=frozenset(p.design_ref for p in pieces if not p.allow_rotation),
+    )
 
     for piece in pieces:
+        # Lo que no entra ni en un pliego vacío se informa sin pasar por
+        # rectpack (BFF abriría pliegos vacíos intentando ubicarlo).
+        if not _fits_empty_sheet(piece, usable_w, usable_h, pad):
+            continue
         padded_w, padded_h = piece.padded_size
         rect_w = padded_w + pad
         rect_h = padded_h + pad
@@ -82,52 +238,79 @@ def _rectpack_positions(pieces: List[NestingPiece], layout: Dict) -> NestingResu
 
     packer.pack()
 
-    slots: List[Dict] = []
-    min_x = min_y = float("inf")
-    max_x = max_y = 0.0
     piece_map = {p.design_ref: p for p in pieces}
-
-    for _, x, y, w, h, rid in packer.rect_list():
-        piece = piece_map.get(rid)
-        if not piece:
+    per_sheet: Dict[int, List[Tuple]] = {}
+    placed: Dict[str, int] = {}
+    for rect in packer.rect_list():
+        if rect[5] not in piece_map:
             continue
-        padded_w, padded_h = piece.padded_size
-        rot = 0
-        width_used, height_used = padded_w, padded_h
-        if abs(w - (padded_h + pad)) < 1e-3 and piece.allow_rotation:
-            rot = 90
-            width_used, height_used = padded_h, padded_w
-        center_offset = pad / 2 if pad > 0 else 0
-        slot_x = offset_x + x + center_offset
-        slot_y_from_top = y + center_offset
-        slot_y = offset_y + (usable_h - (slot_y_from_top + h))
-        slot = {
-            "design_ref": rid,
-            "x_mm": round(slot_x, 4),
-            "y_mm": round(slot_y, 4),
-            "w_mm": round(width_used, 4),
-            "h_mm": round(height_used, 4),
-            "rotation_deg": rot,
-            "bleed_mm": piece.bleed_mm,
-        }
-        slots.append(slot)
-        min_x = min(min_x, slot_x)
-        min_y = min(min_y, slot_y)
-        max_x = max(max_x, slot_x + width_used)
-        max_y = max(max_y, slot_y + height_used)
+        per_sheet.setdefault(rect[0], []).append(rect)
+        placed[rect[5]] = placed.get(rect[5], 0) + 1
 
-    if min_x == float("inf"):
-        min_x = min_y = max_x = max_y = 0.0
+    sheets = [
+        _sheet_result(per_sheet[b], piece_map, pad, usable_h, offset_x, offset_y)
+        for b in sorted(per_sheet)
+    ]
+    unplaced = _unplaced(pieces, placed, lambda p: _fits_empty_sheet(p, usable_w, usable_h, pad))
+    return NestingPlan(sheets=sheets, unplaced=unplaced)
 
-    return NestingResult(slots=slots, bbox=(min_x, min_y, max_x, max_y))
 
+def _unplaced(pieces: List[NestingPiece], placed: Dict[str, int], fits) -> List[Dict]:
+    unplaced = []
+    for piece in pieces:
+        missing = piece.forms_per_plate - placed.get(piece.design_ref, 0)
+        if missing > 0:
+            unplaced.append(
+                {
+                    "design_ref": piece.design_ref,
+                    "count": missing,
+                    "reason": "sheet_limit" if fits(piece) else "too_large",
+                }
+            )
+    return unplaced
 
-def compute_nesting(layout: Dict) -> NestingResult:
+
+def _pieces(layout: Dict) -> List[NestingPiece]:
     pieces: List[NestingPiece] = []
     for design in layout.get("designs", []):
         piece = _normalize_design(design)
         if piece:
             pieces.append(piece)
+    return pieces
+
+
+def compute_nesting(layout: Dict) -> NestingResult:
+    """Nesting en un solo pliego; lo que no entra queda en ``unplaced``."""
+    pieces = _pieces(layout)
+    if not pieces:
+        return NestingResult(store=SlotStore(id_prefix="nest"), bbox=(0, 0, 0, 0))
+    plan = _rectpack_positions(pieces, layout)
+    if plan.sheets:
+        result = plan.sheets[0]
+    else:
+        result = NestingResult(store=SlotStore(id_prefix="nest"), bbox=(0.0, 0.0, 0.0, 0.0))
+    result.unplaced = plan.unplaced
+    return result
+
+
+def compute_nesting_sheets(layout: Dict, max_sheets: int | None = None) -> NestingPlan:
+    """Nesting en tantos pliegos como haga falta (hasta ``max_sheets``).
+
+    Se prueban varios órdenes de first-fit decreciente y se queda el que
+    coloca más piezas en menos pliegos; ante empate gana el orden por área,
+    que deja el primer pliego igual que ``compute_nesting``.
+    """
+    pieces = _pieces(layout)
     if not pieces:
-        return NestingResult(slots=[], bbox=(0, 0, 0, 0))
-    return _rectpack_positions(pieces, layout)
+        return NestingPlan(sheets=[], unplaced=[])
+    if max_sheets is None:
+        max_sheets = int(first_numeric(layout.get("max_sheets"), default=0.0))
+    if max_sheets <= 0:
+        max_sheets = sum(p.forms_per_plate for p in pieces)
+
+    best: NestingPlan | None = None
+    for sort_algo in NESTING_SORT_ORDERS:
+        plan = _rectpack_positions(pieces, layout, max_sheets=max_sheets, sort_algo=sort_algo)
+        if best is None or plan.rank < best.rank:
+            best = plan
+    return best
@@ -0,0 +1,145 @@
+import math
+import statistics
+from typing import Dict, Hashable, Iterable, List, Set, Tuple
+
+from services.editor_offset_layout_defaults import first_numeric
+
+Rect = Tuple[float, float, float, float]
+
+
+def slot_rect(slot: Dict) -> Rect:
+    """(x, y, w, h) en mm de un slot, con la misma lectura tolerante del motor."""
+    return (
+        first_numeric(slot.get("x_mm"), default=0.0),
+        first_numeric(slot.get("y_mm"), default=0.0),
+        first_numeric(slot.get("w_mm"), default=0.0),
+        first_numeric(slot.get("h_mm"), default=0.0),
+    )
+
+
+def rects_overlap(a: Rect, b: Rect) -> bool:
+    """Solapamiento estricto (tocarse en un borde no cuenta), como en el motor."""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    return ax < bx + bw and ax + aw > bx and ay < by + bh and ay + ah > by
+
+
+class SlotIndex:
+    """Índice espacial de slots sobre una grilla uniforme (hash de celdas).
+
+    Cada rectángulo se registra en todas las celdas que toca, así una consulta
+    solo compara contra los slots de las celdas del candidato en lugar de
+    recorrer el pliego entero. Sin ``cell_mm``, ``from_slots`` usa la mediana
+    del lado mayor de todos los slots, lo que deja pocas celdas por slot
+    aunque haya piezas de tamaños muy distintos. Un índice vacío creado sin
+    ``cell_mm`` toma el lado mayor del primer slot insertado.
+    """
+
+    def __init__(self, cell_mm: float | None = None) -> None:
+        self.cell_mm = float(cell_mm) if cell_mm and cell_mm > 0 else None
+        self._rects: Dict[Hashable, Rect] = {}
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+
+    @classmethod
+    def from_slots(cls, slots: Iterable[Dict], cell_mm: float | None = None) -> "SlotIndex":
+        """Índice con clave = posición del slot en ``slots``."""
+        rects = [slot_rect(slot) for slot in slots]
+        if not (cell_mm and cell_mm > 0) and rects:
+            cell_mm = max(1.0, statistics.median(max(w, h) for _x, _y, w, h in rects))
+        index = cls(cell_mm)
+        for key, rect in enumerate(rects):
+            index.insert(key, rect)
+        return index
+
+    def __len__(self) -> int:
+        return len(self._rects)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._rects
+
+    def rect(self, key: Hashable) -> Rect:
+        return self._rects[key]
+
+    def _cell_range(self, rect: Rect) -> Tuple[int, int, int, int]:
+        x, y, w, h = rect
+        size = self.cell_mm or 1.0
+        return (
+            math.floor(x / size),
+            math.floor(y / size),
+            math.floor((x + max(0.0, w)) / size),
+            math.floor((y + max(0.0, h)) / size),
+        )
+
+    def insert(self, key: Hashable, rect: Rect) -> None:
+        if key in self._rects:
+            self.remove(key)
+        if self.cell_mm is None:
+            self.cell_mm = max(1.0, rect[2], rect[3])
+        self._rects[key] = rect
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells.setdefault((cx, cy), set()).add(key)
+
+    def insert_slot(self, key: Hashable, slot: Dict) -> None:
+        self.insert(key, slot_rect(slot))
+
+    def remove(self, key: Hashable) -> None:
+        rect = self._rects.pop(key, None)
+        if rect is None:
+            return
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                bucket = self._cells.get((cx, cy))
+                if bucket is None:
+                    continue
+                bucket.discard(key)
+                if not bucket:
+                    del self._cells[(cx, cy)]
+
+    def move(self, key: Hashable, rect: Rect) -> None:
+        self.remove(key)
+        self.insert(key, rect)
+
+    def translate(self, keys: Iterable[Hashable], dx: float, dy: float) -> None:
+        """Desplaza los slots ``keys`` en (dx, dy) mm."""
+        for key in list(keys):
+            x, y, w, h = self._rects[key]
+            self.move(key, (x + dx, y + dy, w, h))
+
+    def query(self, rect: Rect, exclude: Iterable[Hashable] | None = None) -> List[Hashable]:
+        """Claves de los slots que se solapan con ``rect``."""
+        if not self._rects:
+            return []
+        excluded = set(exclude) if exclude is not None else set()
+        seen: Set[Hashable] = set()
+        hits: List[Hashable] = []
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for key in self._cells.get((cx, cy), ()):
+                    if key in seen or key in excluded:
+                        continue
+                    seen.add(key)
+                    if rects_overlap(rect, self._rects[key]):
+                        hits.append(key)
+        return hits
+
+    def overlaps(self, rect: Rect, exclude: Iterable[Hashable] | None = None) -> bool:
+        """``True`` si ``rect`` se solapa con algún slot indexado."""
+        if not self._rects:
+            return False
+        excluded = exclude if isinstance(exclude, (set, frozenset, range)) else set(exclude or ())
+        cx0, cy0, cx1, cy1 = self._cell_range(rect)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for key in self._cells.get((cx, cy), ()):
+                    if key in excluded:
+                        continue
+                    if rects_overlap(rect, self._rects[key]):
+                        return True
+        return False
+
+    def overlaps_slot(self, slot: Dict, exclude: Iterable[Hashable] | None = None) -> bool:
+        return self.overlaps(slot_rect(slot), exclude)
@@ -0,0 +1,319 @@
+from typing import Any, Dict, Hashable, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from services.editor_offset_layout_defaults import first_numeric
+
+# Representación compacta de slots para los motores de imposición.
+#
+# Los campos geométricos viven en un array estructurado de NumPy (una fila por
+# slot) y los valores repetidos -- design_ref, cara, trabajo lógico -- se
+# internan en tablas y se guardan como índices. Un pliego de 10k etiquetas
+# ocupa ~0.5 MB en vez de decenas de MB de dicts, y los bucles geométricos
+# (bbox, desplazamientos, repetición del patrón) se hacen sobre columnas.
+# La conversión al contrato JSON de slots (``to_dicts``) se hace solo en el
+# borde HTTP / de estrategia.
+
+SLOT_DTYPE = np.dtype(
+    [
+        ("x_mm", "f8"),
+        ("y_mm", "f8"),
+        ("w_mm", "f8"),
+        ("h_mm", "f8"),
+        ("rotation_deg", "i2"),
+        ("bleed_mm", "f8"),
+        ("design", "i4"),
+        ("face", "i4"),
+        ("work", "i4"),
+        ("crop_marks", "?"),
+        ("locked", "?"),
+    ]
+)
+
+# Claves del contrato de slots del editor, en el orden en que se serializan.
+EDITOR_SLOT_FIELDS: Tuple[str, ...] = (
+    "id",
+    "x_mm",
+    "y_mm",
+    "w_mm",
+    "h_mm",
+    "rotation_deg",
+    "logical_work_id",
+    "bleed_mm",
+    "crop_marks",
+    "locked",
+    "design_ref",
+    "face",
+)
+
+_KNOWN_KEYS = set(EDITOR_SLOT_FIELDS)
+
+
+class InternTable:
+    """Tabla de valores repetidos (refs, caras) indexados por entero."""
+
+    __slots__ = ("values", "_index")
+
+    def __init__(self) -> None:
+        self.values: List[Hashable] = []
+        self._index: Dict[Hashable, int] = {}
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def intern(self, value: Hashable) -> int:
+        idx = self._index.get(value)
+        if idx is None:
+            idx = len(self.values)
+            self.values.append(value)
+            self._index[value] = idx
+        return idx
+
+
+class SlotStore:
+    """Slots en columnas NumPy con refs internados.
+
+    ``id_prefix`` genera los ids ``<prefijo>_<fila>`` al serializar, que es
+    como los arman los motores. Las claves que no forman parte del contrato
+    se conservan por fila en ``extras`` (solo si aparecen).
+    """
+
+    __slots__ = ("data", "size", "refs", "faces", "works", "id_prefix", "ids", "extras")
+
+    def __init__(self, capacity: int = 16, id_prefix: str = "slot") -> None:
+        self.data = np.zeros(max(1, int(capacity)), dtype=SLOT_DTYPE)
+        self.size = 0
+        self.refs = InternTable()
+        self.faces = InternTable()
+        self.works = InternTable()
+        self.id_prefix = id_prefix
+        self.ids: List[Any] | None = None
+        self.extras: List[Dict] | None = None
+
+    # -- construcción -------------------------------------------------------
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def rows(self) -> np.ndarray:
+        """Vista de las filas ocupadas (sin copiar)."""
+        return self.data[: self.size]
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.rows.nbytes)
+
+    def _reserve(self, extra: int) -> None:
+        needed = self.size + extra
+        if needed <= len(self.data):
+            return
+        grown = np.zeros(max(needed, len(self.data) * 2), dtype=SLOT_DTYPE)
+        grown[: self.size] = self.data[: self.size]
+        self.data = grown
+
+    def append(
+        self,
+        x_mm: float,
+        y_mm: float,
+        w_mm: float,
+        h_mm: float,
+        *,
+        rotation_deg: int = 0,
+        bleed_mm: float = 0.0,
+        design_ref: Hashable = None,
+        face: Hashable = "front",
+        logical_work_id: Hashable = None,
+        crop_marks: bool = True,
+        locked: bool = False,
+    ) -> int:
+        self._reserve(1)
+        row = self.size
+        self.data[row] = (
+            x_mm,
+            y_mm,
+            w_mm,
+            h_mm,
+            int(rotation_deg) % 360,
+            bleed_mm,
+            self.refs.intern(design_ref),
+            self.faces.intern(face),
+            self.works.intern(logical_work_id),
+            bool(crop_marks),
+            bool(locked),
+        )
+        self.size += 1
+        return row
+
+    def extend_columns(
+        self,
+        x_mm: np.ndarray,
+        y_mm: np.ndarray,
+        w_mm: np.ndarray,
+        h_mm: np.ndarray,
+        *,
+        rotation_deg: np.ndarray | int = 0,
+        bleed_mm: np.ndarray | float = 0.0,
+        design: np.ndarray | int = 0,
+        face: np.ndarray | int | None = None,
+        work: np.ndarray | int | None = None,
+        crop_marks: np.ndarray | bool = True,
+        locked: np.ndarray | bool = False,
+    ) -> None:
+        """Agrega filas en bloque; ``design``/``face``/``work`` son índices ya internados.
+
+        Sin ``face``/``work`` las filas quedan con ``None`` en esos campos.
+        """
+        count = len(x_mm)
+        if count == 0:
+            return
+        if face is None:
+            face = self.faces.intern(None)
+        if work is None:
+            work = self.works.intern(None)
+        self._reserve(count)
+        block = self.data[self.size : self.size + count]
+        block["x_mm"] = x_mm
+        block["y_mm"] = y_mm
+        block["w_mm"] = w_mm
+        block["h_mm"] = h_mm
+        block["rotation_deg"] = rotation_deg
+        block["bleed_mm"] = bleed_mm
+        block["design"] = design
+        block["face"] = face
+        block["work"] = work
+        block["crop_marks"] = crop_marks
+        block["locked"] = locked
+        self.size += count
+
+    @classmethod
+    def from_dicts(cls, slots: Sequence[Dict], id_prefix: str = "slot") -> "SlotStore":
+        """Parsea una sola vez una lista de slots del contrato JSON."""
+        store = cls(capacity=len(slots), id_prefix=id_prefix)
+        ids: List[Any] = []
+        extras: List[Dict] = []
+        has_extras = False
+        for slot in slots:
+            store.append(
+                first_numeric(slot.get("x_mm"), default=0.0),
+                first_numeric(slot.get("y_mm"), default=0.0),
+                first_numeric(slot.get("w_mm"), default=0.0),
+                first_numeric(slot.get("h_mm"), default=0.0),
+                rotation_deg=int(first_numeric(slot.get("rotation_deg"), default=0.0)),
+                bleed_mm=first_numeric(slot.get("bleed_mm"), default=0.0),
+                design_ref=slot.get("design_ref"),
+                face=slot.get("face"),
+                logical_work_id=slot.get("logical_work_id"),
+                crop_marks=slot.get("crop_marks", True),
+                locked=slot.get("locked", False),
+            )
+            ids.append(slot.get("id"))
+            extra = {key: value for key, value in slot.items() if key not in _KNOWN_KEYS}
+            has_extras = has_extras or bool(extra)
+            extras.append(extra)
+        store.ids = ids
+        store.extras = extras if has_extras else None
+        return store
+
+    def copy(self, id_prefix: str | None = None) -> "SlotStore":
+        out = SlotStore(capacity=self.size, id_prefix=id_prefix or self.id_prefix)
+        out.data = self.rows.copy()
+        out.size = self.size
+        out.refs, out.faces, out.works = self.refs, self.faces, self.works
+        out.ids = list(self.ids) if self.ids is not None else None
+        out.extras = list(self.extras) if self.extras is not None else None
+        return out
+
+    def set_face(self, face: Hashable) -> None:
+        """Asigna la misma cara a todas las filas."""
+        self.faces = InternTable()
+        self.rows["face"] = self.faces.intern(face)
+
+    # -- geometría vectorizada ---------------------------------------------
+
+    def bbox(self) -> Tuple[float, float, float, float]:
+        """(min_x, min_y, max_x, max_y) de todos los slots."""
+        if self.size == 0:
+            return 0.0, 0.0, 0.0, 0.0
+        rows = self.rows
+        return (
+            float(rows["x_mm"].min()),
+            float(rows["y_mm"].min()),
+            float((rows["x_mm"] + rows["w_mm"]).max()),
+            float((rows["y_mm"] + rows["h_mm"]).max()),
+        )
+
+    def translate(self, dx: float, dy: float, start: int = 0, end: int | None = None) -> None:
+        block = self.data[start : self.size if end is None else end]
+        block["x_mm"] += dx
+        block["y_mm"] += dy
+
+    def tiled(
+        self,
+        offsets: Iterable[Tuple[float, float]],
+        origin: Tuple[float, float],
+        id_prefix: str | None = None,
+    ) -> "SlotStore":
+        """Repite el bloque completo en cada offset: ``offset + (pos - origin)``."""
+        offsets = list(offsets)
+        out = SlotStore(capacity=max(1, self.size * len(offsets)), id_prefix=id_prefix or self.id_prefix)
+        out.refs, out.faces, out.works = self.refs, self.faces, self.works
+        if not offsets or self.size == 0:
+            return out
+        rows = self.rows
+        rel_x = rows["x_mm"] - origin[0]
+        rel_y = rows["y_mm"] - origin[1]
+        off = np.asarray(offsets, dtype="f8")
+        block = np.tile(rows, len(offsets))
+        block["x_mm"] = (off[:, 0:1] + rel_x[np.newaxis, :]).ravel()
+        block["y_mm"] = (off[:, 1:2] + rel_y[np.newaxis, :]).ravel()
+        out.data = block
+        out.size = len(block)
+        if self.extras is not None:
+            out.extras = self.extras * len(offsets)
+        return out
+
+    # -- borde JSON --------------------------------------------------------
+
+    def to_dicts(self, fields: Sequence[str] = EDITOR_SLOT_FIELDS) -> List[Dict]:
+        """Convierte al contrato de slots (lista de dicts) con claves ``fields``."""
+        rows = self.rows
+        columns = {
+            "x_mm": rows["x_mm"].tolist(),
+            "y_mm": rows["y_mm"].tolist(),
+            "w_mm": rows["w_mm"].tolist(),
+            "h_mm": rows["h_mm"].tolist(),
+            "rotation_deg": rows["rotation_deg"].tolist(),
+            "bleed_mm": rows["bleed_mm"].tolist(),
+            "crop_marks": rows["crop_marks"].tolist(),
+            "locked": rows["locked"].tolist(),
+        }
+        refs = self.refs.values
+        faces = self.faces.values
+        works = self.works.values
+        design_col = rows["design"].tolist()
+        face_col = rows["face"].tolist()
+        work_col = rows["work"].tolist()
+        out: List[Dict] = []
+        for i in range(self.size):
+            slot: Dict[str, Any] = {}
+            extra = self.extras[i] if self.extras is not None else None
+            if extra:
+                slot.update(extra)
+            for key in fields:
+                if key == "id":
+                    slot["id"] = (
+                        self.ids[i]
+                        if self.ids is not None and self.ids[i] is not None
+                        else f"{self.id_prefix}_{i}"
+                    )
+                elif key == "design_ref":
+                    slot["design_ref"] = refs[design_col[i]]
+                elif key == "face":
+                    slot["face"] = faces[face_col[i]]
+                elif key == "logical_work_id":
+                    slot["logical_work_id"] = works[work_col[i]]
+                else:
+                    slot[key] = columns[key][i]
+            out.append(slot)
+        return out
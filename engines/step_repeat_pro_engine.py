@@ -1,6 +1,10 @@
+import hashlib
 import math
-from typing import Dict, List
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
 
+from engines.slot_index import SlotIndex, rects_overlap, slot_rect
 from services.editor_offset_layout_defaults import (
     REPEAT_DESIGN_DEFAULT_PRIORITY,
     REPEAT_DESIGN_ZONES,
@@ -135,20 +139,8 @@ def get_zone_bounds(layout: Dict, zone: str) -> tuple[float, float, float, float
 
 
 def slot_overlaps_existing(candidate: Dict, existing_slots: List[Dict]) -> bool:
-    x = first_numeric(candidate.get("x_mm"), default=0.0)
-    y = first_numeric(candidate.get("y_mm"), default=0.0)
-    w = first_numeric(candidate.get("w_mm"), default=0.0)
-    h = first_numeric(candidate.get("h_mm"), default=0.0)
-    right = x + w
-    top = y + h
-    for slot in existing_slots:
-        sx = first_numeric(slot.get("x_mm"), default=0.0)
-        sy = first_numeric(slot.get("y_mm"), default=0.0)
-        sr = sx + first_numeric(slot.get("w_mm"), default=0.0)
-        st = sy + first_numeric(slot.get("h_mm"), default=0.0)
-        if x < sr and right > sx and y < st and top > sy:
-            return True
-    return False
+    rect = slot_rect(candidate)
+    return any(rects_overlap(rect, slot_rect(slot)) for slot in existing_slots)
 
 
 def repeat_requested_vs_placed(
@@ -246,6 +238,9 @@ def append_step_repeat_slots_in_bounds(
     group_start = len(slots)
     cursor_y = bottom
     sheet_top = bottom + usable_h
+    # Con avoid_existing se consulta un índice espacial en vez de recorrer
+    # ``slots + design_slots`` por cada candidato.
+    occupied = SlotIndex.from_slots(slots) if avoid_existing else None
 
     for design in designs:
         design_ref = str(design.get("ref") or "")
@@ -299,10 +294,15 @@ def append_step_repeat_slots_in_bounds(
                 "face": active_face,
             }
 
-            target_slots = slots + design_slots if avoid_existing else design_slots
-            if not avoid_existing or not slot_overlaps_existing(candidate, target_slots):
+            if occupied is None:
                 design_slots.append(candidate)
                 placed += 1
+            else:
+                rect = (x_mm, y_mm, slot_w, slot_h)
+                if not occupied.overlaps(rect):
+                    occupied.insert(len(slots) + len(design_slots), rect)
+                    design_slots.append(candidate)
+                    placed += 1
             idx += 1
 
         if placement_attempts is not None and design_ref:
@@ -488,6 +488,7 @@ def append_fill_slots_smart(
     if usable_w <= 0 or usable_h <= 0:
         return
 
+    occupied = SlotIndex.from_slots(slots)
     for design in designs:
         design_ref = str(design.get("ref") or "")
         piece_w, piece_h, bleed = design_dimensions(design, layout)
@@ -523,14 +524,19 @@ def append_fill_slots_smart(
                 "design_ref": design.get("ref"),
                 "face": active_face,
             }
-            if slot_overlaps_existing(candidate, slots + design_slots):
+            rect = (x_mm, y_mm, slot_w, slot_h)
+            if occupied.overlaps(rect):
                 continue
+            occupied.insert(len(slots) + len(design_slots), rect)
             design_slots.append(candidate)
             placed += 1
         if placement_attempts is not None and design_ref:
             placement_attempts[design_ref] = max(placement_attempts.get(design_ref, 0), placed)
         if placed == forms:
             slots.extend(design_slots)
+        else:
+            for offset in range(len(design_slots)):
+                occupied.remove(len(slots) + offset)
 
 
 def slot_group_bbox(slots: List[Dict], start: int, end: int) -> tuple[float, float, float, float] | None:
@@ -563,20 +569,25 @@ def can_place_translated_group(
     end: int,
     translated_slots: List[Dict],
     usable_bounds: tuple[float, float, float, float],
+    index: SlotIndex | None = None,
 ) -> bool:
+    """Valida un grupo desplazado contra el resto de ``slots``.
+
+    ``index`` puede traer un SlotIndex ya armado sobre ``slots`` (clave =
+    posición) para reutilizarlo entre varios grupos.
+    """
     left, bottom, usable_w, usable_h = usable_bounds
     right = left + usable_w
     top = bottom + usable_h
-    others = slots[:start] + slots[end:]
+    if index is None:
+        index = SlotIndex.from_slots(slots)
+    group_keys = range(start, end)
 
     for slot in translated_slots:
-        x = first_numeric(slot.get("x_mm"), default=0.0)
-        y = first_numeric(slot.get("y_mm"), default=0.0)
-        w = first_numeric(slot.get("w_mm"), default=0.0)
-        h = first_numeric(slot.get("h_mm"), default=0.0)
+        x, y, w, h = slot_rect(slot)
         if x < left - 1e-6 or y < bottom - 1e-6 or x + w > right + 1e-6 or y + h > top + 1e-6:
             return False
-        if slot_overlaps_existing(slot, others):
+        if index.overlaps((x, y, w, h), exclude=group_keys):
             return False
     return True
 
@@ -608,12 +619,15 @@ def compact_vertical_zone_groups(
 
     target_y = bottom + max(0.0, usable_h - packed_height) / 2.0
     moved_groups = []
+    index = SlotIndex.from_slots(slots)
     for group in present:
         min_x, min_y, max_x, max_y = group["bbox"]
         height = max_y - min_y
         dy = target_y - min_y
         translated = translated_group_slots(slots, group["start"], group["end"], 0.0, dy)
-        if not can_place_translated_group(slots, group["start"], group["end"], translated, usable_bounds):
+        if not can_place_translated_group(
+            slots, group["start"], group["end"], translated, usable_bounds, index=index
+        ):
             return
         moved_groups.append((group, translated))
         target_y += height + max(0.0, min_gap_y)
@@ -630,26 +644,24 @@ def translated_groups_are_safe(
     left, bottom, usable_w, usable_h = usable_bounds
     right = left + usable_w
     top = bottom + usable_h
-    moving_indices: set[int] = set()
-    for group, _ in translated_groups:
-        moving_indices.update(range(group["start"], group["end"]))
-    outside_slots = [slot for idx, slot in enumerate(slots) if idx not in moving_indices]
-
-    translated_slots: List[Dict] = []
-    for _, group_slots in translated_groups:
-        translated_slots.extend(group_slots)
 
-    checked: List[Dict] = []
-    for slot in translated_slots:
-        x = first_numeric(slot.get("x_mm"), default=0.0)
-        y = first_numeric(slot.get("y_mm"), default=0.0)
-        w = first_numeric(slot.get("w_mm"), default=0.0)
-        h = first_numeric(slot.get("h_mm"), default=0.0)
+    # Se mueven los grupos dentro del índice y cada slot desplazado se valida
+    # contra todo lo demás (fijos y otros desplazados) salvo sí mismo.
+    index = SlotIndex.from_slots(slots)
+    moved: List[tuple[int, tuple[float, float, float, float]]] = []
+    for group, group_slots in translated_groups:
+        for offset, slot in enumerate(group_slots):
+            key = group["start"] + offset
+            rect = slot_rect(slot)
+            index.move(key, rect)
+            moved.append((key, rect))
+
+    for key, rect in moved:
+        x, y, w, h = rect
         if x < left - 1e-6 or y < bottom - 1e-6 or x + w > right + 1e-6 or y + h > top + 1e-6:
             return False
-        if slot_overlaps_existing(slot, outside_slots) or slot_overlaps_existing(slot, checked):
+        if index.overlaps(rect, exclude={key}):
             return False
-        checked.append(slot)
     return True
 
 
@@ -699,7 +711,131 @@ def compact_vertical_zonal_and_auto_groups(
         slots[group["start"]:group["end"]] = translated
 
 
-def build_step_repeat_slots(layout: Dict) -> List[Dict]:
+class RepeatGroupCache:
+    """Resultados de cada grupo de zona de ``build_step_repeat_slots``.
+
+    Un grupo (una zona, el grupo ``auto`` o el de relleno) se identifica por
+    sus entradas: límites, separaciones, cara, los campos de sus diseños que
+    usa la colocación y, si evita o rellena huecos, los rectángulos ya
+    ocupados. Si un recálculo llega con las mismas entradas se reutilizan sus
+    slots en vez de volver a colocarlos; así, al cambiar un diseño solo se
+    recalcula su grupo y los que dependen de él. ``last_groups`` registra qué
+    grupos se reutilizaron en la última construcción.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self.max_entries = int(max_entries)
+        self.last_groups: List[Dict[str, Any]] = []
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> tuple | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: tuple) -> None:
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _group_key(
+    kind: str,
+    slots: List[Dict],
+    designs: List[Dict],
+    layout: Dict,
+    bounds: tuple[float, float, float, float],
+    gap_x: float,
+    gap_y: float,
+    active_face: str,
+    avoid_existing: bool,
+) -> str:
+    designs_fp = [
+        (
+            design.get("ref"),
+            design_dimensions(design, layout),
+            bool(design.get("allow_rotation", True)),
+            max(1, int(design.get("forms_per_plate") or 1)),
+            design.get("work_id"),
+        )
+        for design in designs
+    ]
+    # Los grupos que esquivan lo ya colocado dependen también de eso.
+    occupied_fp = [slot_rect(slot) for slot in slots] if avoid_existing or kind == "fill" else None
+    raw = repr((kind, tuple(bounds), gap_x, gap_y, active_face, avoid_existing, designs_fp, occupied_fp))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _place_group(
+    cache: RepeatGroupCache | None,
+    label: str,
+    slots: List[Dict],
+    designs: List[Dict],
+    layout: Dict,
+    bounds: tuple[float, float, float, float],
+    gap_x: float,
+    gap_y: float,
+    active_face: str,
+    avoid_existing: bool = False,
+    placement_attempts: Dict[str, int] | None = None,
+) -> Dict | None:
+    """Coloca un grupo con ``append_*`` o lo recupera de ``cache``."""
+    kind = "fill" if label == "fill" else "bounds"
+
+    def _place() -> Dict | None:
+        if kind == "fill":
+            return append_fill_slots_smart(
+                slots, designs, layout, bounds, gap_x, gap_y, active_face, placement_attempts=placement_attempts
+            )
+        return append_step_repeat_slots_in_bounds(
+            slots,
+            designs,
+            layout,
+            bounds,
+            gap_x,
+            gap_y,
+            active_face,
+            avoid_existing=avoid_existing,
+            placement_attempts=placement_attempts,
+        )
+
+    if cache is None or not designs:
+        return _place()
+
+    key = _group_key(kind, slots, designs, layout, bounds, gap_x, gap_y, active_face, avoid_existing)
+    start = len(slots)
+    entry = cache.get(key)
+    if entry is None:
+        attempts: Dict[str, int] = {}
+        info = _place()
+        refs = {str(design.get("ref") or "") for design in designs}
+        if placement_attempts is not None:
+            attempts = {ref: placement_attempts[ref] for ref in refs if ref in placement_attempts}
+        cache.put(key, ([dict(slot) for slot in slots[start:]], attempts, info is not None))
+        cache.last_groups.append({"group": label, "reused": False, "slots": len(slots) - start})
+        return info
+
+    group_slots, attempts, has_info = entry
+    for slot in group_slots:
+        # Los ids son posicionales ("sr_<índice>"), se renumeran al reutilizar.
+        slots.append({**slot, "id": f"sr_{len(slots)}"})
+    if placement_attempts is not None:
+        for ref, placed in attempts.items():
+            placement_attempts[ref] = max(placement_attempts.get(ref, 0), placed)
+    cache.last_groups.append({"group": label, "reused": True, "slots": len(group_slots)})
+    if not has_info:
+        return None
+    return {"start": start, "end": len(slots), "bounds": bounds}
+
+
+def build_step_repeat_slots(layout: Dict, cache: RepeatGroupCache | None = None) -> List[Dict]:
     designs = ordered_repeat_designs(layout)
     if not designs:
         raise ValueError("No hay diseños configurados para aplicar Step & Repeat.")
@@ -713,13 +849,18 @@ def build_step_repeat_slots(layout: Dict) -> List[Dict]:
     group_ranges: Dict[str, Dict] = {}
     placement_attempts: Dict[str, int] = {}
 
+    if cache is not None:
+        cache.last_groups = []
+
     zone_groups = group_designs_by_zone(designs)
     zonal_order = ["top", "left", "center", "right", "bottom"]
     has_zonal_designs = any(zone_groups.get(zone) for zone in zonal_order)
     has_fill_designs = bool(zone_groups.get("fill"))
 
     if not has_zonal_designs and not has_fill_designs:
-        append_step_repeat_slots_in_bounds(
+        _place_group(
+            cache,
+            "all",
             slots,
             designs,
             layout,
@@ -747,7 +888,9 @@ def build_step_repeat_slots(layout: Dict) -> List[Dict]:
 
     if has_zonal_designs:
         for zone in zonal_order:
-            group_info = append_step_repeat_slots_in_bounds(
+            group_info = _place_group(
+                cache,
+                zone,
                 slots,
                 zone_groups.get(zone, []),
                 layout,
@@ -790,7 +933,9 @@ def build_step_repeat_slots(layout: Dict) -> List[Dict]:
                 for zone in ["bottom", "center", "top"]:
                     if not zone_groups.get(zone):
                         continue
-                    group_info = append_step_repeat_slots_in_bounds(
+                    group_info = _place_group(
+                        cache,
+                        f"{zone}:expandida",
                         retry_slots,
                         zone_groups.get(zone, []),
                         layout,
@@ -824,7 +969,9 @@ def build_step_repeat_slots(layout: Dict) -> List[Dict]:
                         group_ranges = retry_group_ranges
                         placement_attempts = retry_attempts
 
-    auto_group_info = append_step_repeat_slots_in_bounds(
+    auto_group_info = _place_group(
+        cache,
+        "auto",
         slots,
         zone_groups.get("auto", []),
         layout,
@@ -851,7 +998,9 @@ def build_step_repeat_slots(layout: Dict) -> List[Dict]:
             max(0.0, first_numeric(gap_y, layout.get("gap_default_mm"), default=5.0)),
         )
 
-    append_fill_slots_smart(
+    _place_group(
+        cache,
+        "fill",
         slots,
         zone_groups.get("fill", []),
         layout,
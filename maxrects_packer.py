@@ -0,0 +1,166 @@
+from typing import List, Tuple
+
+import numpy as np
+
+# MaxRects con los rectángulos libres en arrays de NumPy.
+#
+# La puntuación de candidatos, el corte de los libres que toca la pieza y la
+# poda por contención se hacen por columnas sobre todos los libres a la vez.
+# A diferencia del ``MaxRects`` de listas al que reemplaza (se conserva como
+# ``_LegacyMaxRects`` en ``tools/bench_maxrects.py`` para comparar) se cortan
+# todos los rectángulos libres que intersecan la pieza colocada (no solo el
+# elegido), así que dos piezas nunca se superponen.
+#
+# Heurísticas (Jylänki, "A Thousand Ways to Pack the Bin"):
+#   bssf     best short side fit: menor sobrante del lado corto
+#   blsf     best long side fit: menor sobrante del lado largo
+#   baf      best area fit: menor área libre sobrante
+#   contact  contact point: mayor perímetro en contacto con bordes y piezas
+
+HEURISTICS = ("bssf", "blsf", "baf", "contact")
+
+
+class MaxRectsArray:
+    """Empaquetador MaxRects vectorizado.
+
+    Mismo contrato que el ``MaxRects`` anterior (``insert``/``occupancy``),
+    hoy ``tools/bench_maxrects._LegacyMaxRects``.
+    """
+
+    def __init__(self, width: float, height: float, heuristica: str = "bssf") -> None:
+        heuristica = (heuristica or "bssf").lower()
+        if heuristica not in HEURISTICS:
+            raise ValueError(f"Heurística MaxRects desconocida: {heuristica}")
+        self.width = float(width)
+        self.height = float(height)
+        self.heuristica = heuristica
+        # Columnas x, y, w, h.
+        self.free = np.array([[0.0, 0.0, self.width, self.height]], dtype="f8")
+        if self.width <= 0 or self.height <= 0:
+            self.free = np.empty((0, 4), dtype="f8")
+        self._used = np.empty((16, 4), dtype="f8")
+        self._used_count = 0
+
+    @property
+    def used(self) -> np.ndarray:
+        return self._used[: self._used_count]
+
+    @property
+    def free_rects(self) -> List[Tuple[float, float, float, float]]:
+        return [tuple(r) for r in self.free.tolist()]
+
+    def occupancy(self) -> float:
+        area = self.width * self.height
+        if area <= 0:
+            return 0.0
+        used = self.used
+        return float((used[:, 2] * used[:, 3]).sum() / area)
+
+    def insert(self, width: float, height: float) -> Tuple[float, float] | None:
+        free = self.free
+        fits = np.flatnonzero((free[:, 2] >= width) & (free[:, 3] >= height))
+        if fits.size == 0:
+            return None
+        primary, secondary = self._scores(free[fits], width, height)
+        # lexsort es estable: ante empate total gana el libre de menor índice,
+        # igual que el recorrido secuencial.
+        best = fits[np.lexsort((fits, secondary, primary))[0]]
+        x, y = float(free[best, 0]), float(free[best, 1])
+        self._place(np.array([x, y, width, height], dtype="f8"))
+        return x, y
+
+    # -- puntuación ----------------------------------------------------------
+
+    def _scores(self, cand: np.ndarray, width: float, height: float) -> Tuple[np.ndarray, np.ndarray]:
+        leftover_w = cand[:, 2] - width
+        leftover_h = cand[:, 3] - height
+        short_side = np.minimum(leftover_w, leftover_h)
+        long_side = np.maximum(leftover_w, leftover_h)
+        if self.heuristica == "bssf":
+            return short_side, long_side
+        if self.heuristica == "blsf":
+            return long_side, short_side
+        if self.heuristica == "baf":
+            return cand[:, 2] * cand[:, 3] - width * height, short_side
+        return -self._contact(cand[:, 0], cand[:, 1], width, height), short_side
+
+    def _contact(self, x: np.ndarray, y: np.ndarray, width: float, height: float) -> np.ndarray:
+        x1 = x + width
+        y1 = y + height
+        score = np.where((x == 0) | (x1 == self.width), height, 0.0)
+        score += np.where((y == 0) | (y1 == self.height), width, 0.0)
+        used = self.used
+        if used.shape[0] == 0:
+            return score
+        ux = used[:, 0][np.newaxis, :]
+        uy = used[:, 1][np.newaxis, :]
+        ux1 = ux + used[:, 2][np.newaxis, :]
+        uy1 = uy + used[:, 3][np.newaxis, :]
+        x = x[:, np.newaxis]
+        y = y[:, np.newaxis]
+        x1 = x1[:, np.newaxis]
+        y1 = y1[:, np.newaxis]
+        span_y = np.clip(np.minimum(y1, uy1) - np.maximum(y, uy), 0.0, None)
+        span_x = np.clip(np.minimum(x1, ux1) - np.maximum(x, ux), 0.0, None)
+        vertical = (ux == x1) | (ux1 == x)
+        horizontal = (uy == y1) | (uy1 == y)
+        score += np.where(vertical, span_y, 0.0).sum(axis=1)
+        score += np.where(horizontal, span_x, 0.0).sum(axis=1)
+        return score
+
+    # -- corte y poda --------------------------------------------------------
+
+    def _place(self, rect: np.ndarray) -> None:
+        if self._used_count == len(self._used):
+            self._used = np.concatenate([self._used, np.empty_like(self._used)])
+        self._used[self._used_count] = rect
+        self._used_count += 1
+
+        free = self.free
+        ux, uy, uw, uh = rect
+        ux1, uy1 = ux + uw, uy + uh
+        fx, fy, fw, fh = free[:, 0], free[:, 1], free[:, 2], free[:, 3]
+        fx1, fy1 = fx + fw, fy + fh
+        hit = (ux < fx1) & (ux1 > fx) & (uy < fy1) & (uy1 > fy)
+        if not hit.any():
+            return
+
+        hx, hy, hw, hh = fx[hit], fy[hit], fw[hit], fh[hit]
+        hx1, hy1 = fx1[hit], fy1[hit]
+        # Hasta cuatro sobrantes por libre cortado: abajo, arriba, izquierda, derecha.
+        pieces = np.concatenate(
+            [
+                np.stack([hx, hy, hw, uy - hy], axis=1)[uy > hy],
+                np.stack([hx, np.full_like(hx, uy1), hw, hy1 - uy1], axis=1)[uy1 < hy1],
+                np.stack([hx, hy, ux - hx, hh], axis=1)[ux > hx],
+                np.stack([np.full_like(hx, ux1), hy, hx1 - ux1, hh], axis=1)[ux1 < hx1],
+            ]
+        )
+        kept = free[~hit]
+        self.free = np.concatenate([kept, self._prune(pieces, kept)])
+
+    @staticmethod
+    def _contained(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        """Matriz [i, j]: ``a[i]`` contenido en ``b[j]``."""
+        ax, ay = a[:, 0:1], a[:, 1:2]
+        ax1, ay1 = ax + a[:, 2:3], ay + a[:, 3:4]
+        bx, by = b[:, 0][np.newaxis, :], b[:, 1][np.newaxis, :]
+        bx1, by1 = bx + b[:, 2][np.newaxis, :], by + b[:, 3][np.newaxis, :]
+        return (ax >= bx) & (ay >= by) & (ax1 <= bx1) & (ay1 <= by1)
+
+    def _prune(self, pieces: np.ndarray, kept: np.ndarray) -> np.ndarray:
+        # Los libres que quedan ya estaban podados entre sí y cada sobrante es
+        # un subconjunto de un libre cortado, así que ningún libre viejo puede
+        # quedar dentro de un sobrante: alcanza con podar los sobrantes.
+        if pieces.shape[0] == 0:
+            return pieces
+        drop = np.zeros(pieces.shape[0], dtype=bool)
+        if kept.shape[0]:
+            drop |= self._contained(pieces, kept).any(axis=1)
+        inside = self._contained(pieces, pieces)
+        np.fill_diagonal(inside, False)
+        # Sobrantes idénticos se contienen mutuamente: se conserva el primero.
+        same = inside & inside.T
+        inside &= ~np.triu(same)
+        drop |= inside.any(axis=1)
+        return pieces[~drop]
@@ -1,6 +1,24 @@
+from typing import Dict, Iterator, List
+
 import fitz
-from PIL import Image
-from io import BytesIO
+
+from cuadernillos.simulator import simular_cuadernillo
+
+# Las páginas se colocan con ``show_pdf_page``: el contenido vectorial (texto,
+# filetes, tramas) pasa intacto al pliego y cada página del original se
+# copia una sola vez al documento de salida aunque aparezca en varias caras.
+
+
+def _colocar_pagina(destino, doc, numero, rect, rotacion=0):
+    """Coloca la página ``numero`` (1-based) de ``doc`` dentro de ``rect``.
+
+    ``rotacion`` sigue la convención del simulador de cuadernillos (grados en
+    sentido horario); las páginas blancas o de relleno no se dibujan.
+    """
+    if not isinstance(numero, int) or numero < 1 or numero > len(doc):
+        return
+    # show_pdf_page gira en sentido antihorario.
+    destino.show_pdf_page(rect, doc, numero - 1, rotate=-rotacion % 360)
 
 
 def montar_pdf(input_path, output_path, paginas_por_cara=4):
@@ -9,9 +27,9 @@ def montar_pdf(input_path, output_path, paginas_por_cara=4):
     if len(doc) == 0:
         raise Exception("El PDF está vacío o corrupto.")
 
+    # Las páginas de relleno hasta múltiplo de 4 quedan en blanco.
     total_paginas = len(doc)
     while total_paginas % 4 != 0:
-        doc.insert_page(-1)
         total_paginas += 1
 
     salida = fitz.open()
@@ -37,18 +55,6 @@ def montar_pdf(input_path, output_path, paginas_por_cara=4):
             paginas = paginas[paginas_por_cara*2:]
 
     def insertar_pagina(nueva_pagina, idx, pos, paginas_por_cara, rotar=0):
-        if not idx or idx < 1 or idx > len(doc):
-            return
-        pagina = doc[idx - 1]
-        pix = pagina.get_pixmap(matrix=fitz.Matrix(3, 3), alpha=False)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        if rotar != 0:
-            img = img.rotate(rotar, expand=True)
-
-        buffer = BytesIO()
-        img.save(buffer, format="JPEG", quality=95)
-        buffer.seek(0)
-
         if paginas_por_cara == 4:
             x = (pos % 2) * (A4_WIDTH / 2)
             y = (pos // 2) * (A4_HEIGHT / 2)
@@ -62,8 +68,7 @@ def montar_pdf(input_path, output_path, paginas_por_cara=4):
         else:
             rect = fitz.Rect(0, 0, A4_WIDTH, A4_HEIGHT)
 
-        nueva_pagina.insert_image(rect, stream=buffer)
-        buffer.close()
+        _colocar_pagina(nueva_pagina, doc, idx, rect, rotar)
 
     for frente, dorso in hojas:
         if paginas_por_cara == 2:
@@ -82,4 +87,95 @@ def montar_pdf(input_path, output_path, paginas_por_cara=4):
             rotacion = 180 if paginas_por_cara == 2 else 0
             insertar_pagina(pag_dorso, idx, j, paginas_por_cara, rotar=rotacion)
 
-    salida.save(output_path)
+    salida.save(output_path, garbage=3, deflate=True)
+    salida.close()
+    doc.close()
+
+
+def _caras_cuadernillo(simulacion: Dict) -> Iterator[List[Dict]]:
+    """Caras a imprimir, en orden: tapa (si hay) y luego cada pliego de tripa.
+
+    Los pliegos VYV tienen una sola cara; el resto, frente y dorso.
+    """
+    tapa = simulacion.get("tapa")
+    if tapa:
+        yield tapa["cara_visual"]
+    for pliego in simulacion["pliegos"]:
+        if "cara_visual" in pliego:
+            yield pliego["cara_visual"]
+        else:
+            yield pliego["frente_visual"]
+            yield pliego["dorso_visual"]
+
+
+def montar_cuadernillos_pdf(
+    input_path,
+    output_path,
+    tipo_cuadernillo=8,
+    tipo_tapa="sin_tapa",
+    medianil_mm=0.0,
+):
+    """Impone una revista cosida a caballete en cuadernillos de 8 o 16 páginas.
+
+    El orden de páginas y las rotaciones salen de
+    ``cuadernillos.simulator.simular_cuadernillo`` (cabeza con cabeza). Las
+    caras se arman una por una con ``show_pdf_page``, sin rasterizar ni
+    guardar imágenes intermedias. El documento de salida guarda todas las
+    caras hasta ``save``; cada cara solo referencia las páginas de origen,
+    que se copian una vez. Devuelve la simulación usada.
+    """
+    doc = fitz.open(input_path)
+    if len(doc) == 0:
+        raise Exception("El PDF está vacío o corrupto.")
+
+    simulacion = simular_cuadernillo(
+        {
+            "tipo_encuadernacion": "cosido_caballete",
+            "tipo_tapa": tipo_tapa,
+            "tipo_cuadernillo": tipo_cuadernillo,
+            "total_paginas": len(doc),
+        }
+    )
+
+    # Celda de una página: el tamaño de la primera; las demás se ajustan
+    # manteniendo proporción.
+    pag_w, pag_h = doc[0].rect.width, doc[0].rect.height
+    medianil = medianil_mm * 72 / 25.4
+    salida = fitz.open()
+    for cara in _caras_cuadernillo(simulacion):
+        # 4 por cara: 2x2 con páginas acostadas; 8 por cara: 4x2 derechas.
+        acostadas = len(cara) == 4
+        columnas, filas = (2, 2) if acostadas else (4, 2)
+        celda_w, celda_h = (pag_h, pag_w) if acostadas else (pag_w, pag_h)
+        cara_pdf = salida.new_page(
+            width=columnas * celda_w + (columnas - 1) * medianil,
+            height=filas * celda_h + (filas - 1) * medianil,
+        )
+        for pos, item in enumerate(cara):
+            x = (pos % columnas) * (celda_w + medianil)
+            y = (pos // columnas) * (celda_h + medianil)
+            rect = fitz.Rect(x, y, x + celda_w, y + celda_h)
+            _colocar_pagina(cara_pdf, doc, item["pagina"], rect, item["rotacion"])
+
+    salida.save(output_path, garbage=3, deflate=True)
+    salida.close()
+    doc.close()
+    return simulacion
+
+
+# Modos de montaje que se imponen con cuadernillos.simulator (páginas por
+# cuadernillo); el resto son páginas por cara de ``montar_pdf``.
+MODOS_CUADERNILLO = (8, 16)
+
+
+def montar_revista(input_path, output_path, modo=4, tipo_tapa="sin_tapa"):
+    """Punto de entrada de las rutas de montaje.
+
+    ``modo`` 8 o 16 impone cuadernillos cosidos a caballete con
+    :func:`montar_cuadernillos_pdf` (``tipo_tapa``: ``sin_tapa`` o
+    ``tapa_completa``); 2 o 4 usa :func:`montar_pdf`.
+    """
+    if modo in MODOS_CUADERNILLO:
+        return montar_cuadernillos_pdf(input_path, output_path, tipo_cuadernillo=modo, tipo_tapa=tipo_tapa)
+    montar_pdf(input_path, output_path, paginas_por_cara=modo)
+    return None
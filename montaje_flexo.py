@@ -10,11 +10,13 @@ from PIL import Image, ImageOps
 import re
 import matplotlib.pyplot as plt
 from io import BytesIO
+from contextlib import nullcontext
 import base64
 from html import unescape
 from typing import Any, Dict, List
 from types import SimpleNamespace
 from services.openai_client import create_chat_completion
+from raster_cache import cached_raster
 
 from utils import (
     convertir_pts_a_mm,
@@ -25,7 +27,8 @@ from utils import (
 
 from diagnostico_flexo import coeficiente_material, filtrar_objetos_sistema
 from advertencias_disenio import analizar_advertencias_disenio
-from cobertura_utils import calcular_metricas_cobertura
+from cobertura_utils import calcular_metricas_cobertura, percentil_histograma
+from page_analysis import PageAnalysisContext
 from reporte_tecnico import generar_reporte_tecnico, resumen_cobertura_tac
 from flexo_config import get_flexo_thresholds
 from tinta_utils import (
@@ -100,8 +103,11 @@ def corregir_sangrado_y_marcas(pdf_path: str) -> str:
         doc.close()
         return pdf_path
 
-    pix = page.get_pixmap(dpi=300)
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    def _render_page() -> Image.Image:
+        pix = page.get_pixmap(dpi=300)
+        return Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+
+    img = cached_raster(pdf_path, _render_page, page=page.number, dpi=300, mode="rgb")
     bleed_px = int(round(3 / 25.4 * 300))
 
     new_doc = fitz.open()
@@ -257,10 +263,21 @@ def corregir_sangrado_y_marcas(pdf_path: str) -> str:
     doc.close()
     return corrected_path
 
-def verificar_resolucion_imagenes(path_pdf):
+def _abrir_documento(path_pdf, ctx=None):
+    """Devuelve un context manager con el documento fitz.
+
+    Si hay un :class:`PageAnalysisContext` se reutiliza su documento abierto
+    (sin cerrarlo al salir); si no, se abre ``path_pdf``.
+    """
+    if ctx is not None:
+        return nullcontext(ctx.doc)
+    return fitz.open(path_pdf)
+
+
+def verificar_resolucion_imagenes(path_pdf, ctx=None):
     items = []
     try:
-        with fitz.open(path_pdf) as doc:
+        with _abrir_documento(path_pdf, ctx) as doc:
             for p, page in enumerate(doc, start=1):
                 for (xref, *_rest) in page.get_images(full=True):
                     try:
@@ -291,10 +308,10 @@ def verificar_resolucion_imagenes(path_pdf):
     return items
 
 
-def detectar_capas_especiales(path_pdf):
+def detectar_capas_especiales(path_pdf, ctx=None):
     items = []
     try:
-        reader = PdfReader(path_pdf)
+        reader = ctx.reader if ctx is not None else PdfReader(path_pdf)
         spots = set()
         patrones = {
             "white": re.compile(r"(white|blanco)", re.I),
@@ -327,7 +344,7 @@ def detectar_capas_especiales(path_pdf):
         if spots_str:
             items.append(f"<li><b>Spots detectados:</b> {spots_str}</li>")
         try:
-            over = detectar_overprints(path_pdf)
+            over = detectar_overprints(path_pdf, ctx=ctx)
         except Exception:
             over = 0
         if patrones["white"].search(spots_str or ""):
@@ -344,14 +361,32 @@ def detectar_capas_especiales(path_pdf):
     return items
 
 
-def analizar_contraste(path_pdf):
+def analizar_contraste(path_pdf, ctx=None):
+    """Contraste p98 - p2 del gris de la primera página (0-255, umbral 30).
+
+    Sin ``ctx`` el gris sale del render RGB de poppler. Con ``ctx`` sale del
+    raster CMYK del contexto pasado a RGB con la fórmula de Pillow
+    (``PageAnalysisContext.rgb``), igual que desde que la revisión comparte
+    el contexto: los colores saturados dan más contraste que con poppler
+    (p. ej. 163 contra 130) y los planos claros apenas cambian (26 contra
+    21), así que el umbral de 30 sigue marcando los mismos casos bajos. Los
+    percentiles se toman del histograma entero, sin interpolar, y coinciden
+    con ``np.percentile`` sobre ``ctx.gray``.
+    """
     advertencias = []
-    imagenes = convert_from_path(path_pdf, dpi=300, first_page=1, last_page=1)
-    if imagenes:
-        imagen = imagenes[0].convert("RGB")
-        img_np = np.array(imagen)
-        img_gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
-        p2, p98 = np.percentile(img_gray, (2, 98))
+    percentiles = None
+    if ctx is not None:
+        # Histograma del gris de la pasada por bandas: sin el raster completo.
+        histograma = ctx.resumen_raster.histograma_gris
+        percentiles = tuple(percentil_histograma(histograma, q) for q in (2, 98))
+    else:
+        imagenes = convert_from_path(path_pdf, dpi=300, first_page=1, last_page=1)
+        if imagenes:
+            img_np = np.array(imagenes[0].convert("RGB"))
+            img_gray = cv2.cvtColor(img_np, cv2.COLOR_RGB2GRAY)
+            percentiles = tuple(np.percentile(img_gray, (2, 98)))
+    if percentiles is not None:
+        p2, p98 = percentiles
         contraste = p98 - p2
         if contraste < 30:
             advertencias.append(
@@ -363,14 +398,14 @@ def analizar_contraste(path_pdf):
         advertencias.append("<span class='icono warn'>⚠️</span> No se pudo analizar el contraste.")
     return advertencias
 
-def detectar_tramas_débiles(path_pdf):
+def detectar_tramas_débiles(path_pdf, ctx=None):
     mensajes: List[str] = []
     advertencias_overlay: List[Dict[str, Any]] = []
     hay_tramas = False
 
     bbox_total: List[float] | None = None
     try:
-        with fitz.open(path_pdf) as doc_bbox:
+        with _abrir_documento(path_pdf, ctx) as doc_bbox:
             page0 = doc_bbox.load_page(0)
             rect = page0.rect
             bbox_total = [float(rect.x0), float(rect.y0), float(rect.x1), float(rect.y1)]
@@ -378,24 +413,30 @@ def detectar_tramas_débiles(path_pdf):
         bbox_total = None
 
     try:
-        imagenes = convert_from_path(path_pdf, dpi=300, first_page=1, last_page=1)
-        if not imagenes:
-            raise ValueError("No se pudieron rasterizar páginas del PDF")
-        imagen = imagenes[0].convert("CMYK")
-        img_np = np.array(imagen)
+        if ctx is not None:
+            # Histogramas por canal de la pasada por bandas del contexto.
+            resumen = ctx.resumen_raster
+            histogramas = resumen.histograma_canales
+            total_pixeles = resumen.pixeles or 1
+        else:
+            imagenes = convert_from_path(path_pdf, dpi=300, first_page=1, last_page=1)
+            if not imagenes:
+                raise ValueError("No se pudieron rasterizar páginas del PDF")
+            img_np = np.array(imagenes[0].convert("CMYK"))
+            histogramas = np.stack(
+                [np.bincount(img_np[:, :, i].ravel(), minlength=256) for i in range(4)]
+            )
+            h, w, _ = img_np.shape
+            total_pixeles = h * w if h and w else 1
 
         umbral_trama = 13  # Aproximadamente 5% de 255
         min_pixeles_relevantes = 0.02  # 2% del total
 
         canales = ["Cian", "Magenta", "Amarillo", "Negro"]
-        h, w, _ = img_np.shape
-        total_pixeles = h * w if h and w else 1
 
         for i, nombre in enumerate(canales):
-            canal = img_np[:, :, i]
             # Consideramos solo los píxeles con cobertura real (>0) por debajo del 5%
-            mask = (canal > 0) & (canal < umbral_trama)
-            pixeles_debiles = int(np.sum(mask))
+            pixeles_debiles = int(histogramas[i, 1:umbral_trama].sum())
             proporcion = pixeles_debiles / total_pixeles
             if proporcion > min_pixeles_relevantes:
                 hay_tramas = True
@@ -527,11 +568,11 @@ def _contar_overprints_pagina(doc, page):
     return conteo
 
 
-def detectar_overprints(path_pdf):
+def detectar_overprints(path_pdf, ctx=None):
     """Retorna el número total de objetos con overprint en el documento."""
     total = 0
     try:
-        with fitz.open(path_pdf) as doc:
+        with _abrir_documento(path_pdf, ctx) as doc:
             for page in doc:
                 total += _contar_overprints_pagina(doc, page)
     except Exception:
@@ -585,10 +626,41 @@ def revisar_diseño_flexo(
     anilox_bcm=None,
     velocidad_impresion=None,
     cobertura_estimada=None,
+    ctx: PageAnalysisContext | None = None,
+):
+    # Un único contexto abre el PDF una vez y rasteriza la página una sola vez
+    # para todos los detectores (cobertura, contraste, tramas, capas, etc.).
+    ctx_propio = ctx is None
+    if ctx_propio:
+        ctx = PageAnalysisContext(path_pdf, dpi=300)
+    try:
+        return _revisar_diseño_flexo_ctx(
+            ctx,
+            path_pdf,
+            anilox_lpi,
+            paso_mm,
+            material=material,
+            anilox_bcm=anilox_bcm,
+            velocidad_impresion=velocidad_impresion,
+            cobertura_estimada=cobertura_estimada,
+        )
+    finally:
+        if ctx_propio:
+            ctx.close()
+
+
+def _revisar_diseño_flexo_ctx(
+    ctx: PageAnalysisContext,
+    path_pdf,
+    anilox_lpi,
+    paso_mm,
+    material="",
+    anilox_bcm=None,
+    velocidad_impresion=None,
+    cobertura_estimada=None,
 ):
-    doc = fitz.open(path_pdf)
-    pagina = doc[0]
-    contenido = pagina.get_text("dict")
+    pagina = ctx.page
+    contenido = ctx.text_dict
     material_norm = normalizar_material(material)
     material_coef_val = coeficiente_material(material, default=1.0) or 1.0
     ancho_mm, alto_mm = obtener_info_basica(pagina)
@@ -632,7 +704,7 @@ def revisar_diseño_flexo(
         cobertura_total=None,
     )
     try:
-        metricas_cobertura = calcular_metricas_cobertura(path_pdf, dpi=300)
+        metricas_cobertura = calcular_metricas_cobertura(path_pdf, dpi=ctx.dpi, ctx=ctx)
         for clave in ("tac_p95", "tac_max"):
             valor = metricas_cobertura.get(clave)
             if valor is None:
@@ -723,13 +795,13 @@ def revisar_diseño_flexo(
     )
 
     dim_adv = verificar_dimensiones(ancho_mm, alto_mm, paso_mm)
-    adv_res = analizar_advertencias_disenio(path_pdf, material_norm, pagina=pagina, contenido=contenido)
+    adv_res = analizar_advertencias_disenio(path_pdf, material_norm, ctx=ctx)
     textos_adv = adv_res["textos"]
     lineas_adv = adv_res["lineas"]
     modo_color_adv = adv_res["modo_color"]
     sangrado_adv = adv_res["sangrado"]
     advertencias_overlay = adv_res["overlay"]
-    resolucion_items = verificar_resolucion_imagenes(path_pdf)
+    resolucion_items = verificar_resolucion_imagenes(path_pdf, ctx=ctx)
     resolucion_minima = None
     for item in resolucion_items:
         m = re.search(r">\s*(\d+)\s*DPI", item)
@@ -740,9 +812,9 @@ def revisar_diseño_flexo(
         til_items = resumen_cobertura_tac(metricas_cobertura, material_norm)
     else:
         til_items = ["<li><span class='icono warn'>⚠️</span> No se pudo estimar TAC/cobertura.</li>"]
-    capas_items = detectar_capas_especiales(path_pdf)
-    contraste_adv = analizar_contraste(path_pdf)
-    tramas_adv = detectar_tramas_débiles(path_pdf)
+    capas_items = detectar_capas_especiales(path_pdf, ctx=ctx)
+    contraste_adv = analizar_contraste(path_pdf, ctx=ctx)
+    tramas_adv = detectar_tramas_débiles(path_pdf, ctx=ctx)
     tramas_mensajes = tramas_adv.get("mensajes", [])
     tramas_overlay = tramas_adv.get("advertencias", [])
 
@@ -772,8 +844,7 @@ def revisar_diseño_flexo(
 
     # Detección de tintas planas (Pantone/Spot)
     try:
-        reader_spot = PdfReader(path_pdf)
-        tintas_planas = detectar_tintas_pantone(reader_spot)
+        tintas_planas = detectar_tintas_pantone(ctx.reader)
         if tintas_planas:
             cobertura_info.append(
                 f"<li><span class='icono warn'>🎨</span> Tintas planas detectadas: <b>{', '.join(tintas_planas)}</b></li>"
@@ -787,7 +858,7 @@ def revisar_diseño_flexo(
             f"<li><span class='icono warning'>⚠️</span> Error al verificar tintas planas: {str(e)}</li>"
         )
 
-    overprint_count = detectar_overprints(path_pdf)
+    overprint_count = detectar_overprints(path_pdf, ctx=ctx)
     if overprint_count:
         riesgos_info.append(
             f"<li><span class='icono warning'>⚠️</span> Se detectaron <b>{overprint_count}</b> objetos con overprint habilitado. Posibles sobreimpresiones no intencionadas.</li>"
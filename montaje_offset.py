@@ -1,5 +1,4 @@
 import os
-import io
 from typing import Dict, List, Tuple
 from datetime import datetime
 
@@ -9,6 +8,8 @@ from PIL import Image
 from reportlab.pdfgen import canvas
 from reportlab.lib.utils import ImageReader
 
+from raster_cache import cached_raster
+
 
 MM_TO_PT = 2.83465  # milímetros a puntos (300 dpi)
 
@@ -22,33 +23,40 @@ def mm_to_pt(valor: float) -> float:
     return valor * MM_TO_PT
 
 
-def _pdf_a_imagen_con_sangrado(path: str, sangrado_mm: float) -> ImageReader:
+def _render_con_sangrado(path: str, sangrado_mm: float) -> Image.Image:
     doc = fitz.open(path)
     page = doc.load_page(0)
     pix = page.get_pixmap(dpi=300, alpha=False)
     img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+    doc.close()
 
     sangrado_px = int((sangrado_mm / 25.4) * 300)
     if sangrado_px <= 0:
-        img_con_sangrado = img
-    else:
-        arr = np.array(img)
-        pad_width = (
-            (sangrado_px, sangrado_px),
-            (sangrado_px, sangrado_px),
-            (0, 0),
-        )
-        try:
-            padded = np.pad(arr, pad_width, mode="reflect")
-        except ValueError:
-            padded = np.pad(arr, pad_width, mode="symmetric")
-        img_con_sangrado = Image.fromarray(padded)
-
-    img_byte_arr = io.BytesIO()
-    img_con_sangrado.save(img_byte_arr, format="PNG")
-    img_byte_arr.seek(0)
-    doc.close()
-    return ImageReader(img_byte_arr)
+        return img
+    arr = np.array(img)
+    pad_width = (
+        (sangrado_px, sangrado_px),
+        (sangrado_px, sangrado_px),
+        (0, 0),
+    )
+    try:
+        padded = np.pad(arr, pad_width, mode="reflect")
+    except ValueError:
+        padded = np.pad(arr, pad_width, mode="symmetric")
+    return Image.fromarray(padded)
+
+
+def _pdf_a_imagen_con_sangrado(path: str, sangrado_mm: float) -> ImageReader:
+    # Misma clave que montaje_offset_inteligente (sin clip, reflect): ambos
+    # módulos comparten el raster del diseño.
+    img_con_sangrado = cached_raster(
+        path,
+        lambda: _render_con_sangrado(path, sangrado_mm),
+        dpi=300,
+        bleed_mm=sangrado_mm,
+        mode="reflect_rgb",
+    )
+    return ImageReader(img_con_sangrado)
 
 
 def calcular_distribucion(sheet_w: float, sheet_h: float,
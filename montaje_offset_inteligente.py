@@ -11,11 +11,15 @@ import fitz  # PyMuPDF
 import numpy as np
 from PIL import Image
 from reportlab.pdfgen import canvas
-from reportlab.lib.utils import ImageReader
 from PyPDF2 import PdfReader, PdfWriter
 from PyPDF2.generic import RectangleObject
 
 from pdf_compat import apply_pdf_compat
+from pdf_form_xobjects import FormXObjectRegistry, SourcePdfCache
+from pdf_geometry import pdf_geometry
+from preview_compositor import preview_compositor, render_gray_source, transform_sprite
+from maxrects_packer import MaxRectsArray
+from raster_cache import cached_raster
 
 MM_TO_PT = 72.0 / 25.4  # milímetros a puntos
 EPS_MM = 0.2
@@ -76,64 +80,61 @@ class MontajeConfig:
     resumen_path: Optional[str] = None
     export_compat: Optional[str] = None  # None | "pdfx1a" | "adobe_compatible"
     ctp_config: Optional[dict] = None
-    output_mode: str = "raster"
+    output_mode: str = "raster"  # "raster" | "vector_hybrid" | "vector"
+    maxrects_heuristica: str = "bssf"  # "bssf" | "blsf" | "baf" | "contact"
+    preview_job: Optional[str] = None  # compositor incremental de la vista previa
 
 
 def mm_to_px(mm: float, dpi: int) -> int:
     return int(round((mm / 25.4) * dpi))
 
 
-def generar_preview_pliego(disenos, positions, hoja_ancho_mm, hoja_alto_mm, preview_path):
+def _colocaciones_preview(disenos, positions, dpi):
+    """Posiciones en mm → ``(ruta, x_px, y_px, w_px, h_px, rot)`` del lienzo."""
+    colocaciones = []
+    for pos in positions:
+        w_px = mm_to_px(pos["w_mm"], dpi)
+        h_px = mm_to_px(pos["h_mm"], dpi)
+        if w_px <= 0 or h_px <= 0:
+            continue
+        colocaciones.append(
+            (
+                disenos[pos["file_idx"]][0],
+                mm_to_px(pos["x_mm"], dpi),
+                mm_to_px(pos["y_mm"], dpi),
+                w_px,
+                h_px,
+                int(pos.get("rot_deg") or 0) % 360,  # rotación por posición (grados)
+            )
+        )
+    return colocaciones
+
+
+def generar_preview_pliego(disenos, positions, hoja_ancho_mm, hoja_alto_mm, preview_path, preview_job=None):
     """
     disenos: list[ (ruta_absoluta_pdf, copias) ]
     positions: [{file_idx,x_mm,y_mm,w_mm,h_mm,rot}, ...]
     hoja_*_mm: tamaño del pliego en mm
     preview_path: salida PNG
+    preview_job: si se indica, compone con el ``PreviewCompositor`` del
+        trabajo y repinta solo lo que cambió desde la vista previa anterior.
     """
     dpi = PREVIEW_DPI
     W = mm_to_px(hoja_ancho_mm, dpi)
     H = mm_to_px(hoja_alto_mm, dpi)
+    colocaciones = _colocaciones_preview(disenos, positions, dpi)
 
-    canvas_img = Image.new("L", (W, H), 255)
-    cache: Dict[int, Image.Image] = {}
-
-    scale = dpi / 72.0
-    mat = fitz.Matrix(scale, scale)
-
-    for pos in positions:
-        idx = pos["file_idx"]
-        ruta = disenos[idx][0]
-
-        if idx not in cache:
-            with fitz.open(ruta) as doc:
-                page = doc[0]
-                pix = page.get_pixmap(matrix=mat, alpha=False, colorspace=fitz.csGRAY)
-            img = Image.frombytes("L", (pix.width, pix.height), pix.samples, "raw")
-            cache[idx] = img
-
-        src = cache[idx]
-
-        # Dimensiones destino en px
-        w_px = mm_to_px(pos["w_mm"], dpi)
-        h_px = mm_to_px(pos["h_mm"], dpi)
-        if w_px <= 0 or h_px <= 0:
-            continue
-
-        # Rotación por posición (grados)
-        rot = int(pos.get("rot_deg") or 0) % 360
+    if preview_job:
+        preview_compositor(preview_job).compose_to(preview_path, W, H, dpi, colocaciones)
+        return
 
-        # El cliente ya envía w/h coherentes con la rotación; primero rotamos y luego escalamos
-        if rot in (90, 270):
-            rotated = src.rotate(-rot, resample=Image.BILINEAR, expand=True)
-            scaled = rotated.resize((w_px, h_px), Image.BILINEAR)
-            del rotated
-        else:
-            scaled = src.resize((w_px, h_px), Image.BILINEAR)
-            if rot:
-                scaled = scaled.rotate(-rot, resample=Image.BILINEAR, expand=False)
+    canvas_img = Image.new("L", (W, H), 255)
+    cache: Dict[str, Image.Image] = {}
 
-        x_px = mm_to_px(pos["x_mm"], dpi)
-        y_px = mm_to_px(pos["y_mm"], dpi)
+    for ruta, x_px, y_px, w_px, h_px, rot in colocaciones:
+        if ruta not in cache:
+            cache[ruta] = render_gray_source(ruta, dpi)
+        scaled = transform_sprite(cache[ruta], w_px, h_px, rot)
         canvas_img.paste(scaled, (x_px, y_px))
         del scaled
 
@@ -310,33 +311,15 @@ def detectar_sangrado_pdf(path: str) -> float:
 
     Se calcula como la diferencia entre ``BleedBox`` y ``TrimBox``. Si no se
     encuentran dichas cajas o el resultado es negativo se devuelve ``0``.
+    La geometría se lee una vez por archivo (ver :mod:`pdf_geometry`).
     """
-    doc = fitz.open(path)
-    page = doc[0]
-    try:
-        bleed = page.bleedbox
-        trim = page.trimbox
-    except AttributeError:
-        doc.close()
-        return 0.0
-    if not bleed or not trim:
-        doc.close()
-        return 0.0
-    width_diff = (bleed.width - trim.width) / 2
-    height_diff = (bleed.height - trim.height) / 2
-    bleed_pt = min(width_diff, height_diff)
-    doc.close()
-    bleed_mm = bleed_pt * 25.4 / 72.0
-    return bleed_mm if bleed_mm > 0 else 0.0
+    return pdf_geometry(path).bleed_mm
 
 
 def obtener_dimensiones_pdf(path: str, usar_trimbox: bool = False) -> Tuple[float, float]:
     """Devuelve ancho y alto del primer página de un PDF en milímetros."""
-    with fitz.open(path) as doc:
-        page = doc[0]
-        rect = page.trimbox if usar_trimbox and getattr(page, "trimbox", None) else page.mediabox
-        w, h = rect.width, rect.height
-    return round(w * 25.4 / 72, 2), round(h * 25.4 / 72, 2)
+    w, h = pdf_geometry(path).size_mm(usar_trimbox)
+    return round(w, 2), round(h, 2)
 
 
 def _pdf_a_imagen_con_sangrado(
@@ -354,36 +337,50 @@ def _pdf_a_imagen_con_sangrado(
         Cuando es ``True`` la página se rasteriza usando el ``TrimBox`` en lugar
         del ``MediaBox``. Esto permite recortar un sangrado existente y
         reemplazarlo por uno nuevo.
+
+    El resultado se guarda en la caché de rasters compartida, por lo que una
+    segunda exportación del mismo diseño no vuelve a abrir el PDF.
     """
-    doc = fitz.open(path)
-    page = doc[0]
-    clip = None
-    if usar_trimbox and getattr(page, "trimbox", None):
-        try:
-            clip = page.trimbox
-        except AttributeError:
-            clip = None
-    pix = page.get_pixmap(dpi=300, alpha=False, clip=clip)
-    img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
 
-    sangrado_px = int((sangrado_mm / 25.4) * 300)
-    if sangrado_px <= 0:
-        img_con_sangrado = img
-    else:
-        arr = np.array(img)
-        pad_width = (
-            (sangrado_px, sangrado_px),
-            (sangrado_px, sangrado_px),
-            (0, 0),
-        )
-        try:
-            padded = np.pad(arr, pad_width, mode="reflect")
-        except ValueError:
-            padded = np.pad(arr, pad_width, mode="symmetric")
-        img_con_sangrado = Image.fromarray(padded)
+    def _render() -> Image.Image:
+        doc = fitz.open(path)
+        page = doc[0]
+        clip = None
+        if usar_trimbox and getattr(page, "trimbox", None):
+            try:
+                clip = page.trimbox
+            except AttributeError:
+                clip = None
+        pix = page.get_pixmap(dpi=300, alpha=False, clip=clip)
+        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        doc.close()
+        return _pad_reflect(img, int((sangrado_mm / 25.4) * 300))
+
+    return cached_raster(
+        path,
+        _render,
+        dpi=300,
+        clip="trimbox" if usar_trimbox else None,
+        bleed_mm=sangrado_mm,
+        mode="reflect_rgb",
+    )
 
-    doc.close()
-    return img_con_sangrado
+
+def _pad_reflect(img: Image.Image, sangrado_px: int) -> Image.Image:
+    """Agrega ``sangrado_px`` por lado replicando los bordes en espejo."""
+    if sangrado_px <= 0:
+        return img
+    arr = np.array(img)
+    pad_width = (
+        (sangrado_px, sangrado_px),
+        (sangrado_px, sangrado_px),
+        (0, 0),
+    )
+    try:
+        padded = np.pad(arr, pad_width, mode="reflect")
+    except ValueError:
+        padded = np.pad(arr, pad_width, mode="symmetric")
+    return Image.fromarray(padded)
 
 
 def _pdf_a_imagen_trim(path: str, usar_trimbox: bool = True) -> Image.Image:
@@ -418,11 +415,90 @@ def _render_vector_hybrid_bleed(path: str, bleed_mm: float, usar_trimbox: bool =
     if bleed_mm <= 0:
         raise ValueError("El sangrado debe ser positivo para generar el marco")
 
-    trim_img = _pdf_a_imagen_trim(path, usar_trimbox=usar_trimbox)
     bleed_px = int(round((bleed_mm / 25.4) * 300))
     if bleed_px <= 0:
         raise ValueError("El sangrado en píxeles debe ser positivo")
 
+    return cached_raster(
+        path,
+        lambda: _build_mirror_bleed_frame(
+            _pdf_a_imagen_trim(path, usar_trimbox=usar_trimbox), bleed_px
+        ),
+        dpi=300,
+        clip="trimbox" if usar_trimbox else None,
+        bleed_mm=bleed_mm,
+        mode="mirror_frame_rgba",
+    )
+
+
+def _pdf_a_imagen_bordes_trim(path: str, bleed_px: int, dpi: int = 300) -> Image.Image:
+    """Imagen del tamaño del trim con solo las franjas de borde rasterizadas.
+
+    ``_build_mirror_bleed_frame`` únicamente lee ``bleed_px`` píxeles de cada
+    borde, así que no hace falta rasterizar el centro del diseño.
+    """
+
+    with fitz.open(path) as doc:
+        page = doc[0]
+        trim = page.trimbox if getattr(page, "trimbox", None) else page.rect
+        matrix = fitz.Matrix(dpi / 72.0, dpi / 72.0)
+        full = (fitz.Rect(trim) * matrix).irect
+        img = Image.new("RGB", (full.width, full.height), (255, 255, 255))
+        strip_pt = bleed_px * 72.0 / dpi
+        strips = (
+            fitz.Rect(trim.x0, trim.y0, min(trim.x1, trim.x0 + strip_pt), trim.y1),
+            fitz.Rect(max(trim.x0, trim.x1 - strip_pt), trim.y0, trim.x1, trim.y1),
+            fitz.Rect(trim.x0, trim.y0, trim.x1, min(trim.y1, trim.y0 + strip_pt)),
+            fitz.Rect(trim.x0, max(trim.y0, trim.y1 - strip_pt), trim.x1, trim.y1),
+        )
+        for strip in strips:
+            pix = page.get_pixmap(matrix=matrix, alpha=False, clip=strip)
+            tile = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            img.paste(tile, (pix.x - full.x0, pix.y - full.y0))
+    return img
+
+
+def _build_vector_bleed_frame(trim_img: Image.Image, bleed_px: int, overlap_px: int = 2) -> Image.Image:
+    """Marco espejo que además invade ``overlap_px`` del trim (sin espejar).
+
+    El diseño vectorial se dibuja encima, así que el solape no se ve, pero
+    evita la línea clara que el antialias deja en la unión raster/vector.
+    """
+
+    frame = _build_mirror_bleed_frame(trim_img, bleed_px)
+    trim_w, trim_h = trim_img.size
+    ov_w = min(overlap_px, trim_w)
+    ov_h = min(overlap_px, trim_h)
+    for box in (
+        (0, 0, ov_w, trim_h),
+        (trim_w - ov_w, 0, trim_w, trim_h),
+        (0, 0, trim_w, ov_h),
+        (0, trim_h - ov_h, trim_w, trim_h),
+    ):
+        frame.paste(trim_img.crop(box).convert("RGBA"), (bleed_px + box[0], bleed_px + box[1]))
+    return frame
+
+
+def _render_vector_bleed_frame(path: str, bleed_mm: float) -> Image.Image:
+    """Marco espejo del modo ``vector`` generado solo desde los bordes del trim."""
+
+    bleed_px = int(round((bleed_mm / 25.4) * 300))
+    if bleed_px <= 0:
+        raise ValueError("El sangrado en píxeles debe ser positivo")
+
+    return cached_raster(
+        path,
+        lambda: _build_vector_bleed_frame(_pdf_a_imagen_bordes_trim(path, bleed_px), bleed_px),
+        dpi=300,
+        clip="trimbox",
+        bleed_mm=bleed_mm,
+        mode="mirror_frame_vector_rgba",
+    )
+
+
+def _build_mirror_bleed_frame(trim_img: Image.Image, bleed_px: int) -> Image.Image:
+    """Arma el marco RGBA espejado de ``bleed_px`` alrededor de ``trim_img``."""
+
     trim_w, trim_h = trim_img.size
     frame_w = trim_w + 2 * bleed_px
     frame_h = trim_h + 2 * bleed_px
@@ -669,108 +745,20 @@ def agregar_marcas_registro(c: canvas.Canvas, sheet_w_pt: float, sheet_h_pt: flo
         c.circle(x, y, mm_to_pt(1), stroke=1, fill=0)
 
 
-class Rect:
-    __slots__ = ("x", "y", "w", "h")
-
-    def __init__(self, x: float, y: float, w: float, h: float) -> None:
-        self.x = x
-        self.y = y
-        self.w = w
-        self.h = h
-
-
-class MaxRects:
-    def __init__(self, width: float, height: float) -> None:
-        self.width = width
-        self.height = height
-        self.free_rects: List[Rect] = [Rect(0, 0, width, height)]
-
-    def insert(self, width: float, height: float) -> Tuple[float, float] | None:
-        best_index = -1
-        best_short = math.inf
-        best_long = math.inf
-        best_rect: Rect | None = None
-        for i, r in enumerate(self.free_rects):
-            if r.w >= width and r.h >= height:
-                leftover_h = r.h - height
-                leftover_w = r.w - width
-                short_side = min(leftover_w, leftover_h)
-                long_side = max(leftover_w, leftover_h)
-                if short_side < best_short or (
-                    short_side == best_short and long_side < best_long
-                ):
-                    best_index = i
-                    best_rect = r
-                    best_short = short_side
-                    best_long = long_side
-        if best_index == -1 or best_rect is None:
-            return None
-        placed = Rect(best_rect.x, best_rect.y, width, height)
-        self._split_free_rect(best_rect, placed)
-        del self.free_rects[best_index]
-        self._prune_free_list()
-        return placed.x, placed.y
-
-    def _split_free_rect(self, free: Rect, used: Rect) -> None:
-        if (
-            used.x >= free.x + free.w
-            or used.x + used.w <= free.x
-            or used.y >= free.y + free.h
-            or used.y + used.h <= free.y
-        ):
-            return
-        if used.x < free.x + free.w and used.x + used.w > free.x:
-            if used.y > free.y:
-                self.free_rects.append(
-                    Rect(free.x, free.y, free.w, used.y - free.y)
-                )
-            if used.y + used.h < free.y + free.h:
-                self.free_rects.append(
-                    Rect(
-                        free.x,
-                        used.y + used.h,
-                        free.w,
-                        free.y + free.h - (used.y + used.h),
-                    )
-                )
-        if used.y < free.y + free.h and used.y + used.h > free.y:
-            if used.x > free.x:
-                self.free_rects.append(
-                    Rect(free.x, free.y, used.x - free.x, free.h)
-                )
-            if used.x + used.w < free.x + free.w:
-                self.free_rects.append(
-                    Rect(
-                        used.x + used.w,
-                        free.y,
-                        free.x + free.w - (used.x + used.w),
-                        free.h,
-                    )
-                )
+def resolver_estrategia(
+    disenos: List[Tuple[str, int]], config: MontajeConfig
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """Estrategia efectiva para ``config`` y, en modo "auto", el ranking medido."""
+    estrategia = config.estrategia
+    if config.modo_manual or config.posiciones_manual:
+        return "manual", []
+    if config.forzar_grilla and estrategia != "manual":
+        return "grid", []
+    if estrategia == "auto":
+        from ai_strategy_selector import seleccionar_estrategia_auto
 
-    def _prune_free_list(self) -> None:
-        i = 0
-        while i < len(self.free_rects):
-            j = i + 1
-            while j < len(self.free_rects):
-                if self._is_contained_in(self.free_rects[i], self.free_rects[j]):
-                    del self.free_rects[i]
-                    i -= 1
-                    break
-                if self._is_contained_in(self.free_rects[j], self.free_rects[i]):
-                    del self.free_rects[j]
-                else:
-                    j += 1
-            i += 1
-
-    @staticmethod
-    def _is_contained_in(a: Rect, b: Rect) -> bool:
-        return (
-            a.x >= b.x
-            and a.y >= b.y
-            and a.x + a.w <= b.x + b.w
-            and a.y + a.h <= b.y + b.h
-        )
+        return seleccionar_estrategia_auto(disenos, config)
+    return estrategia, []
 
 
 def realizar_montaje_inteligente(
@@ -798,24 +786,16 @@ def realizar_montaje_inteligente(
     if not disenos:
         raise ValueError("Se requieren al menos una copia de algún diseño")
 
-    estrategia_actual = config.estrategia
-    auto_mode = estrategia_actual == "auto"
-    if auto_mode:
-        from ai_strategy_selector import select_strategy
-
-        estrategia_actual = select_strategy(disenos, config)
-
-    if config.modo_manual or config.posiciones_manual:
-        estrategia_actual = "manual"
-    elif config.forzar_grilla and estrategia_actual != "manual":
-        estrategia_actual = "grid"
-
+    auto_mode = config.estrategia == "auto"
+    estrategia_actual, ranking = resolver_estrategia(disenos, config)
     config.estrategia = estrategia_actual
 
     from strategies import get_strategy
 
     strategy = get_strategy(estrategia_actual)
     meta: Dict[str, Any] = {"auto": auto_mode, "estrategia_final": estrategia_actual}
+    if ranking:
+        meta["auto_ranking"] = ranking
     return strategy.calcular(disenos, config, meta)
 
 
@@ -857,6 +837,10 @@ def montar_pliego_offset_inteligente(
     resumen_path: str | None = None,
     ctp_config: dict | None = None,
     output_mode: str = "raster",
+    maxrects_heuristica: str = "bssf",
+    solo_posiciones: bool = False,
+    posiciones_calculadas: dict | None = None,
+    preview_job: str | None = None,
     **kwargs,
 ) -> str | Tuple[bytes, str]:
     """Genera un PDF montando múltiples diseños con lógica profesional.
@@ -879,6 +863,16 @@ def montar_pliego_offset_inteligente(
         Cuando es ``True`` y se genera una vista previa, se incluyen las
         posiciones normalizadas en la respuesta para que el frontend pueda
         utilizarlas.
+    maxrects_heuristica: str, optional
+        Heurística del empaquetador de la estrategia ``maxrects``: ``bssf``,
+        ``blsf``, ``baf`` o ``contact`` (ver ``maxrects_packer``).
+    solo_posiciones: bool, optional
+        Cuando es ``True`` solo se ejecuta la fase de cálculo de posiciones:
+        se devuelven las posiciones, las cajas ocupadas (con sangrado) y las
+        métricas de aprovechamiento sin rasterizar ni escribir archivos.
+    posiciones_calculadas: dict | None, optional
+        Resultado de una llamada previa con ``solo_posiciones``: se reutilizan
+        sus ``posiciones`` y ``sobrantes`` y se pasa directo a la salida.
     """
 
     preview_path = kwargs.get("preview_path", preview_path)
@@ -1039,8 +1033,13 @@ def montar_pliego_offset_inteligente(
                 )
         return lista
 
+    if posiciones_calculadas is not None:
+        # Posiciones ya calculadas (y centradas) por ``solo_posiciones``.
+        posiciones = [dict(p) for p in posiciones_calculadas["posiciones"]]
+        sobrantes = [dict(s) for s in posiciones_calculadas.get("sobrantes", [])]
+
     # --- RAMA MANUAL: si estrategia == "manual" y hay posiciones_manual ---
-    if estrategia == "manual" and posiciones_manual:
+    elif estrategia == "manual" and posiciones_manual:
         # posiciones_manual viene en mm, bottom-left, con w/h = TRIM (sin sangrado)
         # Para repeat, el slot ya representa la caja final con bleed incluido; el bleed
         # de salida solo afecta contenido interno y marcas, no el tamaño externo.
@@ -1188,7 +1187,7 @@ def montar_pliego_offset_inteligente(
         copias = _expandir_copias()
         ancho_util = ancho_pliego - margen_izq - margen_der
         alto_util = alto_pliego - margen_sup - margen_inf
-        packer = MaxRects(ancho_util, alto_util)
+        packer = MaxRectsArray(ancho_util, alto_util, heuristica=maxrects_heuristica)
         for copia in copias:
             rect_w = copia["ancho"] + 2 * sangrado + sep_h
             rect_h = copia["alto"] + 2 * sangrado + sep_v
@@ -1278,7 +1277,13 @@ def montar_pliego_offset_inteligente(
                 if y_cursor - margen_inf < unit_h:
                     break
 
-    if centrar and posiciones and not ctp_enabled and not posiciones_manual:
+    if (
+        centrar
+        and posiciones
+        and not ctp_enabled
+        and not posiciones_manual
+        and posiciones_calculadas is None
+    ):
         _center_positions_in_usable_area(posiciones)
 
     area_usada = sum(
@@ -1293,6 +1298,16 @@ def montar_pliego_offset_inteligente(
     porcentaje = 0.0
     if area_total > 0:
         porcentaje = area_usada / area_total * 100
+    if solo_posiciones:
+        return {
+            "estrategia": estrategia,
+            "posiciones": posiciones,
+            "cajas_mm": [(p["x"], p["y"], *_position_occupied_size(p)) for p in posiciones],
+            "sobrantes": sobrantes,
+            "colocados": colocados_total,
+            "total": total_disenos,
+            "uso_pct": porcentaje,
+        }
     advertencias = ""
     if sobrantes:
         faltantes = ", ".join(
@@ -1366,6 +1381,7 @@ def montar_pliego_offset_inteligente(
             hoja_ancho_mm=ancho_pliego,
             hoja_alto_mm=alto_pliego,
             preview_path=preview_path,
+            **({"preview_job": preview_job} if preview_job else {}),
         )
 
         result = {
@@ -1482,6 +1498,12 @@ def montar_pliego_offset_inteligente(
     bleed_frame_cache: Dict[tuple[str, float], Image.Image] = {}
     vector_overlays: list[dict] = []
     is_vector_hybrid = output_mode == "vector_hybrid"
+    # ``vector``: el diseño se coloca siempre con show_pdf_page; solo se
+    # rasteriza el marco espejo cuando el PDF no trae sangrado propio.
+    is_vector = output_mode == "vector"
+    # Cada (diseño, sangrado, modo) se emite una sola vez como Form XObject.
+    design_forms = FormXObjectRegistry(c)
+    form_mode = "mirror_frame" if (is_vector_hybrid or is_vector) else "raster"
     for pos in posiciones:
         idx = pos.get("file_idx")
         if idx is None:
@@ -1500,7 +1522,18 @@ def montar_pliego_offset_inteligente(
         cache_key = (archivo, float(bleed_effective))
         draw_raster = True
         img = None
-        if is_vector_hybrid:
+        vector_real_bleed = False
+        if is_vector:
+            if archivo not in bleed_cache:
+                bleed_cache[archivo] = detectar_sangrado_pdf(archivo)
+            # Si el PDF ya trae el sangrado pedido se recorta vectorialmente.
+            vector_real_bleed = bleed_effective > 0 and bleed_cache[archivo] + 0.01 >= bleed_effective
+            draw_raster = bleed_effective > 0 and not vector_real_bleed
+            if draw_raster:
+                if cache_key not in bleed_frame_cache:
+                    bleed_frame_cache[cache_key] = _render_vector_bleed_frame(archivo, bleed_effective)
+                img = bleed_frame_cache[cache_key]
+        elif is_vector_hybrid:
             draw_raster = bleed_effective > 0
             if draw_raster:
                 if cache_key not in bleed_frame_cache:
@@ -1553,10 +1586,7 @@ def montar_pliego_offset_inteligente(
         h_pt = mm_to_pt(eff_draw_h_mm)
 
         if draw_raster and img is not None:
-            draw_kwargs = {}
-            if getattr(img, "mode", "") == "RGBA":
-                draw_kwargs["mask"] = "auto"
-
+            form_key = (archivo, float(bleed_effective), form_mode)
             draw_w_pt = mm_to_pt(source_draw_w_mm)
             draw_h_pt = mm_to_pt(source_draw_h_mm)
 
@@ -1574,28 +1604,14 @@ def montar_pliego_offset_inteligente(
                     draw_y_pt = -draw_h_pt
                 elif rot == 270:
                     draw_y_pt = -draw_h_pt
-                c.drawImage(
-                    ImageReader(img),
-                    draw_x_pt,
-                    draw_y_pt,
-                    width=draw_w_pt,
-                    height=draw_h_pt,
-                    **draw_kwargs,
-                )
+                design_forms.draw(form_key, img, draw_x_pt, draw_y_pt, draw_w_pt, draw_h_pt)
             else:
                 cx_pt = mm_to_pt(cx_mm)
                 cy_pt = mm_to_pt(cy_mm)
                 c.translate(cx_pt, cy_pt)
                 if rot:
                     c.rotate(-rot)
-                c.drawImage(
-                    ImageReader(img),
-                    -draw_w_pt / 2.0,
-                    -draw_h_pt / 2.0,
-                    width=draw_w_pt,
-                    height=draw_h_pt,
-                    **draw_kwargs,
-                )
+                design_forms.draw(form_key, img, -draw_w_pt / 2.0, -draw_h_pt / 2.0, draw_w_pt, draw_h_pt)
             c.restoreState()
 
         bleed_eff = bleed_effective
@@ -1620,6 +1636,29 @@ def montar_pliego_offset_inteligente(
                     "rot_deg": rot,
                 }
             )
+        elif is_vector:
+            # Caja ocupada por el diseño (con sangrado), igual que el raster:
+            # anclada en la esquina del slot si slot_box_final, si no centrada.
+            placed_w_mm = source_draw_h_mm if swapped else source_draw_w_mm
+            placed_h_mm = source_draw_w_mm if swapped else source_draw_h_mm
+            if slot_box_final:
+                placed_x_mm, placed_y_mm = x_draw_mm, y_draw_mm
+            else:
+                placed_x_mm = cx_mm - placed_w_mm / 2.0
+                placed_y_mm = cy_mm - placed_h_mm / 2.0
+            inset_mm = 0.0 if vector_real_bleed else bleed_effective
+            vector_overlays.append(
+                {
+                    "path": archivo,
+                    "x_mm": placed_x_mm + inset_mm,
+                    "y_mm": placed_y_mm + inset_mm,
+                    "w_mm": max(0.1, placed_w_mm - 2 * inset_mm),
+                    "h_mm": max(0.1, placed_h_mm - 2 * inset_mm),
+                    "rot_deg": rot,
+                    "clip_bleed_mm": bleed_effective if vector_real_bleed else 0.0,
+                    "full_page": bleed_effective <= 0 and not usar_trimbox,
+                }
+            )
         x_trim_pt = mm_to_pt(x_trim_mm)
         y_trim_pt = mm_to_pt(y_trim_mm)
         if bleed_effective > 0:
@@ -1786,46 +1825,38 @@ def montar_pliego_offset_inteligente(
         c.setStrokeColorRGB(0, 0, 0)
     c.save()
 
-    if is_vector_hybrid and vector_overlays:
+    if (is_vector_hybrid or is_vector) and vector_overlays:
         tmp_out = output_path + ".tmp.pdf"
         try:
-            with fitz.open(output_path) as target_doc:
+            with fitz.open(output_path) as target_doc, SourcePdfCache() as sources:
                 page = target_doc[0]
                 page_h_pt = float(page.rect.height)
 
                 for overlay in vector_overlays:
-                    with fitz.open(overlay["path"]) as src_doc:
-                        src_page = src_doc[0]
-                        clip_rect = None
-                        try:
-                            clip_rect = src_page.trimbox
-                        except Exception:
-                            clip_rect = None
-                        if clip_rect is None:
-                            try:
-                                clip_rect = src_page.cropbox
-                            except Exception:
-                                clip_rect = None
-                        if clip_rect is None:
-                            clip_rect = src_page.mediabox
-
-                        x_pt = mm_to_pt(overlay["x_mm"])
-                        y_pt = mm_to_pt(overlay["y_mm"])
-                        w_pt = mm_to_pt(overlay["w_mm"])
-                        h_pt = mm_to_pt(overlay["h_mm"])
-
-                        x0 = x_pt
-                        y0 = page_h_pt - (y_pt + h_pt)
-                        x1 = x_pt + w_pt
-                        y1 = page_h_pt - y_pt
-                        target_rect = fitz.Rect(x0, y0, x1, y1)
-                        page.show_pdf_page(
-                            target_rect,
-                            src_doc,
-                            0,
-                            rotate=int(overlay.get("rot_deg", 0)) % 360,
-                            clip=clip_rect,
-                        )
+                    src_doc = sources.document(overlay["path"])
+                    if overlay.get("full_page"):
+                        clip_rect = src_doc[0].cropbox
+                    else:
+                        clip_rect = sources.trim_clip(overlay["path"], overlay.get("clip_bleed_mm", 0.0))
+
+                    x_pt = mm_to_pt(overlay["x_mm"])
+                    y_pt = mm_to_pt(overlay["y_mm"])
+                    w_pt = mm_to_pt(overlay["w_mm"])
+                    h_pt = mm_to_pt(overlay["h_mm"])
+
+                    x0 = x_pt
+                    y0 = page_h_pt - (y_pt + h_pt)
+                    x1 = x_pt + w_pt
+                    y1 = page_h_pt - y_pt
+                    target_rect = fitz.Rect(x0, y0, x1, y1)
+                    page.show_pdf_page(
+                        target_rect,
+                        src_doc,
+                        0,
+                        # show_pdf_page gira antihorario; el raster (rotate(-rot)) horario.
+                        rotate=(-int(overlay.get("rot_deg", 0))) % 360,
+                        clip=clip_rect,
+                    )
 
                 target_doc.save(tmp_out, incremental=False)
             os.replace(tmp_out, output_path)
@@ -0,0 +1,136 @@
+from typing import Any, Dict, List, Optional
+
+import fitz  # PyMuPDF
+import numpy as np
+from PyPDF2 import PdfReader
+
+from cobertura_utils import ResumenRaster, iterar_bandas_cmyk
+
+
+class PageAnalysisContext:
+    """Contexto compartido para analizar una página de un PDF una sola vez.
+
+    Abre el documento con PyMuPDF al construirse y memoiza de forma perezosa
+    todo lo que los detectores del pipeline flexo necesitan: el ``dict`` de
+    texto, los dibujos vectoriales, la lista de imágenes, el ``PdfReader`` de
+    PyPDF2 y un resumen del raster (cobertura e histogramas) obtenido en una
+    pasada por bandas de hasta ``max_mb`` (``COBERTURA_MAX_MB`` por defecto),
+    sin retener la página completa. Las vistas ``cmyk``/``rgb``/``gray``
+    siguen disponibles para quien necesite el raster entero.
+
+    ``render_count`` cuenta las pasadas de rasterizado: una revisión completa
+    recorre la página una sola vez.
+    """
+
+    def __init__(
+        self, path_pdf: str, page_index: int = 0, dpi: int = 300, max_mb: float | None = None
+    ) -> None:
+        self.path_pdf = path_pdf
+        self.page_index = int(page_index)
+        self.dpi = int(dpi)
+        self.max_mb = max_mb
+        self.doc = fitz.open(path_pdf)
+        self.page = self.doc[self.page_index]
+        self.render_count = 0
+        self._text_dict: Optional[Dict[str, Any]] = None
+        self._drawings: Optional[List[Dict[str, Any]]] = None
+        self._images: Optional[list] = None
+        self._reader: Optional[PdfReader] = None
+        self._cmyk: Optional[np.ndarray] = None
+        self._rgb: Optional[np.ndarray] = None
+        self._gray: Optional[np.ndarray] = None
+        self._resumen: Optional[ResumenRaster] = None
+
+    def __enter__(self) -> "PageAnalysisContext":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self.doc is not None and not self.doc.is_closed:
+            self.doc.close()
+        self._cmyk = self._rgb = self._gray = None
+        self._resumen = None
+
+    @property
+    def page_rect(self) -> fitz.Rect:
+        return self.page.rect
+
+    @property
+    def text_dict(self) -> Dict[str, Any]:
+        if self._text_dict is None:
+            self._text_dict = self.page.get_text("dict")
+        return self._text_dict
+
+    @property
+    def drawings(self) -> List[Dict[str, Any]]:
+        if self._drawings is None:
+            self._drawings = self.page.get_drawings()
+        return self._drawings
+
+    @property
+    def images(self) -> list:
+        if self._images is None:
+            self._images = self.page.get_images(full=True)
+        return self._images
+
+    @property
+    def reader(self) -> PdfReader:
+        if self._reader is None:
+            self._reader = PdfReader(self.path_pdf)
+        return self._reader
+
+    def iterar_bandas_cmyk(self):
+        """Bandas CMYK ``uint8`` de la página (una pasada de rasterizado).
+
+        Si el raster completo ya está en memoria se devuelve tal cual.
+        """
+        if self._cmyk is not None:
+            yield self._cmyk
+            return
+        self.render_count += 1
+        yield from iterar_bandas_cmyk(self.page, self.dpi, self.max_mb)
+
+    @property
+    def resumen_raster(self) -> ResumenRaster:
+        """Cobertura e histogramas CMYK/gris de la página, por bandas."""
+        if self._resumen is None:
+            resumen = ResumenRaster()
+            for banda in self.iterar_bandas_cmyk():
+                resumen.agregar(banda)
+            self._resumen = resumen
+        return self._resumen
+
+    @property
+    def cmyk(self) -> np.ndarray:
+        """Raster CMYK ``uint8`` (alto x ancho x 4) de la página a ``dpi``."""
+        if self._cmyk is None:
+            zoom = self.dpi / 72.0
+            pix = self.page.get_pixmap(
+                matrix=fitz.Matrix(zoom, zoom), colorspace=fitz.csCMYK, alpha=False
+            )
+            self.render_count += 1
+            self._cmyk = np.frombuffer(pix.samples, dtype=np.uint8).reshape(
+                pix.height, pix.width, pix.n
+            )
+        return self._cmyk
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """Vista RGB derivada del raster CMYK (misma fórmula que Pillow)."""
+        if self._rgb is None:
+            cmyk = self.cmyk.astype(np.uint16)
+            nk = 255 - cmyk[..., 3:4]
+            rgb = nk - (cmyk[..., :3] * nk + 127) // 255
+            self._rgb = rgb.astype(np.uint8)
+        return self._rgb
+
+    @property
+    def gray(self) -> np.ndarray:
+        """Vista en escala de grises (luma BT.601) derivada de ``rgb``."""
+        if self._gray is None:
+            rgb = self.rgb.astype(np.float32)
+            gray = rgb[..., 0] * 0.299 + rgb[..., 1] * 0.587 + rgb[..., 2] * 0.114
+            self._gray = np.clip(np.rint(gray), 0, 255).astype(np.uint8)
+        return self._gray
@@ -0,0 +1,120 @@
+from typing import Dict, Hashable, Optional
+
+import fitz  # PyMuPDF
+from PIL import Image
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfgen import canvas as rl_canvas
+
+# Registro de diseños como Form XObjects reutilizables para el pliego final.
+#
+# reportlab deduplica imágenes idénticas, pero para decidirlo vuelve a
+# convertir el raster completo a bytes y a calcular su hash en cada
+# ``drawImage``: en un pliego de 48 etiquetas eso son 48 conversiones del
+# mismo raster. Aquí cada (diseño, sangrado, modo) se dibuja una sola vez
+# dentro de un Form XObject de 1x1 pt y cada copia solo agrega
+# ``cm ... /Form Do`` con su transformación.
+
+
+class FormXObjectRegistry:
+    """Form XObjects de reportlab indexados por una clave arbitraria."""
+
+    def __init__(self, canvas: rl_canvas.Canvas, prefix: str = "dsn") -> None:
+        self.canvas = canvas
+        self.prefix = prefix
+        self._names: Dict[Hashable, str] = {}
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def form_name(self, key: Hashable, img: Image.Image) -> str:
+        """Devuelve el nombre del form para ``key``, creándolo la primera vez."""
+        name = self._names.get(key)
+        if name is not None:
+            return name
+        name = f"{self.prefix}{len(self._names)}"
+        draw_kwargs = {}
+        if getattr(img, "mode", "") == "RGBA":
+            draw_kwargs["mask"] = "auto"
+        c = self.canvas
+        c.beginForm(name, lowerx=0, lowery=0, upperx=1, uppery=1)
+        c.drawImage(ImageReader(img), 0, 0, width=1, height=1, **draw_kwargs)
+        c.endForm()
+        self._names[key] = name
+        return name
+
+    def draw(
+        self,
+        key: Hashable,
+        img: Image.Image,
+        x: float,
+        y: float,
+        width: float,
+        height: float,
+    ) -> None:
+        """Equivalente a ``drawImage(img, x, y, width, height)`` usando el form."""
+        name = self.form_name(key, img)
+        c = self.canvas
+        c.saveState()
+        c.translate(x, y)
+        c.scale(width, height)
+        c.doForm(name)
+        c.restoreState()
+
+
+class SourcePdfCache:
+    """Documentos fuente abiertos una vez por pasada de ``show_pdf_page``.
+
+    PyMuPDF reutiliza la página importada (su XObject) mientras el documento
+    fuente sea el mismo objeto; reabrir el PDF en cada copia obliga a volver a
+    copiar todo su contenido al pliego.
+    """
+
+    def __init__(self) -> None:
+        self._docs: Dict[str, fitz.Document] = {}
+        self._clips: Dict[str, fitz.Rect] = {}
+
+    def __enter__(self) -> "SourcePdfCache":
+        return self
+
+    def __exit__(self, *_exc) -> None:
+        self.close()
+
+    def document(self, path: str) -> fitz.Document:
+        doc = self._docs.get(path)
+        if doc is None:
+            doc = fitz.open(path)
+            self._docs[path] = doc
+        return doc
+
+    def trim_clip(self, path: str, bleed_mm: float = 0.0) -> Optional[fitz.Rect]:
+        """TrimBox de la primera página (o CropBox / MediaBox como respaldo).
+
+        Con ``bleed_mm`` el recorte se amplía para incluir el sangrado real
+        del PDF, sin salir de la MediaBox.
+        """
+        if path not in self._clips:
+            src_page = self.document(path)[0]
+            clip_rect = None
+            for attr in ("trimbox", "cropbox", "mediabox"):
+                try:
+                    clip_rect = getattr(src_page, attr)
+                except Exception:
+                    clip_rect = None
+                if clip_rect is not None:
+                    break
+            self._clips[path] = clip_rect
+        clip_rect = self._clips[path]
+        if clip_rect is None or bleed_mm <= 0:
+            return clip_rect
+        bleed_pt = bleed_mm * 72.0 / 25.4
+        expanded = fitz.Rect(clip_rect) + (-bleed_pt, -bleed_pt, bleed_pt, bleed_pt)
+        return expanded & self.document(path)[0].mediabox
+
+    def close(self) -> None:
+        for doc in self._docs.values():
+            try:
+                doc.close()
+            except Exception:
+                pass
+        self._docs.clear()
+        self._clips.clear()
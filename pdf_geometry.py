@@ -0,0 +1,111 @@
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Tuple
+
+import fitz  # PyMuPDF
+
+# Geometría de la primera página de un PDF, leída una sola vez por archivo.
+#
+# El pipeline offset pregunta por el mismo PDF varias veces por pedido
+# (selector de estrategia, layout de nesting, montaje, detección de sangrado,
+# subida al editor). ``pdf_geometry`` abre el archivo con PyMuPDF una vez,
+# extrae todas las cajas y memoiza el resultado por (ruta absoluta, mtime,
+# tamaño), igual que ``raster_cache.file_digest``: si el archivo cambia en
+# disco se vuelve a leer.
+
+PT_TO_MM = 25.4 / 72.0
+PDF_GEOMETRY_MEMO_MAX = 512
+
+Box = Tuple[float, float, float, float]
+
+
+@dataclass(frozen=True)
+class PdfGeometry:
+    """Cajas (en puntos, coordenadas de PyMuPDF) y metadatos de la página 0."""
+
+    path: str
+    page_count: int
+    rotation: int
+    mediabox: Box
+    cropbox: Box
+    trimbox: Box
+    bleedbox: Box
+    artbox: Box
+
+    @staticmethod
+    def _size(box: Box) -> Tuple[float, float]:
+        return box[2] - box[0], box[3] - box[1]
+
+    def size_pt(self, usar_trimbox: bool = False) -> Tuple[float, float]:
+        return self._size(self.trimbox if usar_trimbox else self.mediabox)
+
+    def size_mm(self, usar_trimbox: bool = False) -> Tuple[float, float]:
+        """Ancho y alto en mm (``TrimBox`` o ``MediaBox``), sin redondear."""
+        w, h = self.size_pt(usar_trimbox)
+        return w * PT_TO_MM, h * PT_TO_MM
+
+    @property
+    def bleed_mm(self) -> float:
+        """Sangrado existente: diferencia entre ``BleedBox`` y ``TrimBox``."""
+        bleed_w, bleed_h = self._size(self.bleedbox)
+        trim_w, trim_h = self._size(self.trimbox)
+        bleed_pt = min((bleed_w - trim_w) / 2, (bleed_h - trim_h) / 2)
+        bleed_mm = bleed_pt * PT_TO_MM
+        return bleed_mm if bleed_mm > 0 else 0.0
+
+
+_MEMO: "OrderedDict[Tuple[str, int, int], PdfGeometry]" = OrderedDict()
+_MEMO_LOCK = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _box(rect: fitz.Rect) -> Box:
+    return (float(rect.x0), float(rect.y0), float(rect.x1), float(rect.y1))
+
+
+def _read_geometry(path: str) -> PdfGeometry:
+    with fitz.open(path) as doc:
+        page = doc[0]
+        return PdfGeometry(
+            path=path,
+            page_count=doc.page_count,
+            rotation=int(page.rotation),
+            mediabox=_box(page.mediabox),
+            cropbox=_box(page.cropbox),
+            trimbox=_box(page.trimbox),
+            bleedbox=_box(page.bleedbox),
+            artbox=_box(page.artbox),
+        )
+
+
+def pdf_geometry(path: str) -> PdfGeometry:
+    """Geometría memoizada de ``path``; abre el PDF solo si cambió en disco."""
+    abs_path = os.path.abspath(path)
+    st = os.stat(abs_path)
+    key = (abs_path, st.st_mtime_ns, st.st_size)
+    with _MEMO_LOCK:
+        geometry = _MEMO.get(key)
+        if geometry is not None:
+            _MEMO.move_to_end(key)
+            _stats["hits"] += 1
+            return geometry
+    geometry = _read_geometry(abs_path)
+    with _MEMO_LOCK:
+        _stats["misses"] += 1
+        _MEMO[key] = geometry
+        while len(_MEMO) > PDF_GEOMETRY_MEMO_MAX:
+            _MEMO.popitem(last=False)
+    return geometry
+
+
+def pdf_geometry_stats() -> dict:
+    with _MEMO_LOCK:
+        return {**_stats, "entries": len(_MEMO)}
+
+
+def clear_pdf_geometry() -> None:
+    with _MEMO_LOCK:
+        _MEMO.clear()
+        _stats["hits"] = _stats["misses"] = 0
@@ -0,0 +1,198 @@
+import os
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import fitz  # PyMuPDF
+from PIL import Image
+
+from raster_cache import cached_raster
+
+# Composición incremental de la vista previa del editor manual.
+#
+# ``generar_preview_pliego`` arma el pliego completo en cada llamada: lienzo
+# nuevo, y rasterizado + rotación + escalado de cada forma. Mientras el usuario
+# arrastra piezas casi todo el pliego queda igual, así que ``PreviewCompositor``
+# guarda por trabajo el último lienzo y los sprites ya escalados/rotados
+# (clave: diseño, ancho px, alto px, rotación). En la siguiente composición solo
+# repinta los rectángulos sucios: las cajas de las formas que se quitaron o
+# agregaron. Dentro de cada rectángulo vuelve a pegar, en el mismo orden, todas
+# las formas que lo tocan, por lo que el resultado es idéntico píxel a píxel al
+# de un render completo.
+
+PREVIEW_COMPOSITOR_JOBS = 8
+PREVIEW_SPRITES_MAX = 256
+# Si el área sucia supera esta fracción del pliego se repinta todo.
+PREVIEW_DIRTY_MAX_FRACTION = 0.5
+
+# (ruta, x_px, y_px, w_px, h_px, rot_deg)
+Colocacion = Tuple[str, int, int, int, int, int]
+Rect = Tuple[int, int, int, int]
+
+
+def render_gray_source(ruta: str, dpi: int) -> Image.Image:
+    """Primera página de ``ruta`` en escala de grises a ``dpi`` (cacheada)."""
+
+    def _render() -> Image.Image:
+        scale = dpi / 72.0
+        with fitz.open(ruta) as doc:
+            pix = doc[0].get_pixmap(matrix=fitz.Matrix(scale, scale), alpha=False, colorspace=fitz.csGRAY)
+        return Image.frombytes("L", (pix.width, pix.height), pix.samples, "raw")
+
+    return cached_raster(ruta, _render, dpi=dpi, mode="gray")
+
+
+def transform_sprite(src: Image.Image, w_px: int, h_px: int, rot: int) -> Image.Image:
+    """Escala y rota ``src`` a la caja destino de la forma."""
+    # El cliente ya envía w/h coherentes con la rotación; primero rotamos y luego escalamos
+    if rot in (90, 270):
+        return src.rotate(-rot, resample=Image.BILINEAR, expand=True).resize((w_px, h_px), Image.BILINEAR)
+    scaled = src.resize((w_px, h_px), Image.BILINEAR)
+    if rot:
+        scaled = scaled.rotate(-rot, resample=Image.BILINEAR, expand=False)
+    return scaled
+
+
+def _intersect(a: Rect, b: Rect) -> Optional[Rect]:
+    x0, y0 = max(a[0], b[0]), max(a[1], b[1])
+    x1, y1 = min(a[2], b[2]), min(a[3], b[3])
+    if x0 >= x1 or y0 >= y1:
+        return None
+    return x0, y0, x1, y1
+
+
+def _box(c: Colocacion) -> Rect:
+    _, x, y, w, h, _ = c
+    return x, y, x + w, y + h
+
+
+class PreviewCompositor:
+    """Lienzo y sprites de la vista previa de un trabajo."""
+
+    def __init__(self, max_sprites: int = PREVIEW_SPRITES_MAX) -> None:
+        self.max_sprites = max_sprites
+        self._lock = threading.Lock()
+        self._canvas: Image.Image | None = None
+        self._geometria: Tuple[int, int, int] | None = None
+        self._colocadas: List[Tuple[Tuple, Colocacion]] = []
+        self._sprites: "OrderedDict[Tuple, Image.Image]" = OrderedDict()
+
+    def _sprite_key(self, c: Colocacion, dpi: int) -> Tuple:
+        ruta, _, _, w, h, rot = c
+        st = os.stat(ruta)
+        return (os.path.abspath(ruta), st.st_mtime_ns, st.st_size, dpi, w, h, rot)
+
+    def _sprite(self, key: Tuple, c: Colocacion, dpi: int) -> Image.Image:
+        sprite = self._sprites.get(key)
+        if sprite is not None:
+            self._sprites.move_to_end(key)
+            _count("sprite_hits")
+            return sprite
+        _count("sprite_misses")
+        ruta, _, _, w, h, rot = c
+        sprite = transform_sprite(render_gray_source(ruta, dpi), w, h, rot)
+        self._sprites[key] = sprite
+        while len(self._sprites) > self.max_sprites:
+            self._sprites.popitem(last=False)
+        return sprite
+
+    def _paint(self, placed: Sequence[Tuple[Tuple, Colocacion]], dpi: int, clip: Rect) -> None:
+        self._canvas.paste(255, clip)
+        for key, c in placed:
+            area = _intersect(_box(c), clip)
+            if area is None:
+                continue
+            x, y = c[1], c[2]
+            sprite = self._sprite(key, c, dpi)
+            self._canvas.paste(
+                sprite.crop((area[0] - x, area[1] - y, area[2] - x, area[3] - y)), area[:2]
+            )
+
+    def compose(self, W: int, H: int, dpi: int, colocaciones: Sequence[Colocacion]) -> Tuple[Image.Image, List[Rect]]:
+        """Actualiza el lienzo y devuelve ``(lienzo, rectángulos repintados)``.
+
+        El lienzo se reutiliza entre llamadas; quien lo use fuera del lock del
+        compositor debe copiarlo.
+        """
+        hoja = (0, 0, W, H)
+        placed = [
+            (self._sprite_key(c, dpi), c) for c in colocaciones if c[3] > 0 and c[4] > 0
+        ]
+        nuevas = Counter((k, c[1], c[2]) for k, c in placed)
+
+        if self._canvas is None or self._geometria != (W, H, dpi):
+            sucios = [hoja]
+        else:
+            viejas = Counter((k, c[1], c[2]) for k, c in self._colocadas)
+            cambios = (viejas - nuevas) + (nuevas - viejas)
+            cajas = {
+                (k, x, y): (x, y, x + k[4], y + k[5]) for k, x, y in cambios
+            }
+            sucios = [r for r in (_intersect(b, hoja) for b in cajas.values()) if r]
+            area = sum((r[2] - r[0]) * (r[3] - r[1]) for r in sucios)
+            if area > PREVIEW_DIRTY_MAX_FRACTION * W * H:
+                sucios = [hoja]
+
+        if sucios == [hoja]:
+            self._canvas = Image.new("L", (W, H), 255)
+            self._geometria = (W, H, dpi)
+            _count("full_renders")
+        elif sucios:
+            _count("incremental_renders")
+        else:
+            _count("unchanged")
+        for rect in sucios:
+            self._paint(placed, dpi, rect)
+        self._colocadas = placed
+        return self._canvas, sucios
+
+    def compose_to(self, path: str, W: int, H: int, dpi: int, colocaciones: Sequence[Colocacion]) -> List[Rect]:
+        """Compone y guarda el PNG en ``path``; devuelve los rectángulos sucios."""
+        with self._lock:
+            canvas, sucios = self.compose(W, H, dpi, colocaciones)
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            # ``optimize`` recorre el pliego entero varias veces; para el
+            # feedback de arrastre prima la latencia sobre el tamaño del PNG.
+            canvas.save(path, compress_level=1)
+        return sucios
+
+
+_COMPOSITORS: "OrderedDict[str, PreviewCompositor]" = OrderedDict()
+_COMPOSITORS_LOCK = threading.Lock()
+_stats: Dict[str, int] = {
+    "full_renders": 0,
+    "incremental_renders": 0,
+    "unchanged": 0,
+    "sprite_hits": 0,
+    "sprite_misses": 0,
+}
+
+
+def _count(campo: str) -> None:
+    with _COMPOSITORS_LOCK:
+        _stats[campo] += 1
+
+
+def preview_compositor(job: str) -> PreviewCompositor:
+    """Compositor del trabajo ``job`` (LRU de ``PREVIEW_COMPOSITOR_JOBS``)."""
+    with _COMPOSITORS_LOCK:
+        compositor = _COMPOSITORS.get(job)
+        if compositor is None:
+            compositor = _COMPOSITORS[job] = PreviewCompositor()
+            while len(_COMPOSITORS) > PREVIEW_COMPOSITOR_JOBS:
+                _COMPOSITORS.popitem(last=False)
+        else:
+            _COMPOSITORS.move_to_end(job)
+        return compositor
+
+
+def preview_compositor_stats() -> dict:
+    with _COMPOSITORS_LOCK:
+        return {**_stats, "jobs": len(_COMPOSITORS)}
+
+
+def clear_preview_compositors() -> None:
+    with _COMPOSITORS_LOCK:
+        _COMPOSITORS.clear()
+        for campo in _stats:
+            _stats[campo] = 0
@@ -41,14 +41,28 @@ def analizar_riesgos_pdf(
     layout: dict | None = None,
     pieza: dict | None = None,
     bleed_mm: float | None = None,
+    output_path: str | None = None,
+    render=None,
 ) -> dict:
-    """Genera una superposición de advertencias para un PDF."""
+    """Genera una superposición de advertencias para un PDF.
+
+    La imagen se guarda en ``output_path`` si se indica (por ejemplo dentro
+    del directorio de la revisión); si no, en un archivo temporal único.
+    Con un :class:`revision_render.RevisionRender` se usa su ``dpi`` y su
+    tamaño para que la superposición coincida con el raster compartido.
+    """
+    if render is not None:
+        dpi = render.dpi
     doc = fitz.open(pdf_path)
     page = doc.load_page(0)
     zoom = dpi / 72.0
     mat = fitz.Matrix(zoom, zoom)
-    pix = page.get_pixmap(matrix=mat, alpha=False)
-    size = (pix.width, pix.height)
+    if render is not None:
+        size = render.size
+    else:
+        # Mismo tamaño que tendría el pixmap, sin rasterizar la página.
+        irect = (page.rect * mat).irect
+        size = (irect.width, irect.height)
 
     if advertencias is None:
         adv_res = analizar_advertencias_disenio(pdf_path, material)
@@ -110,11 +124,11 @@ def analizar_riesgos_pdf(
     draw.rectangle(rect_segura, outline=color_sangrado, width=3)
 
     doc.close()
-    tmp_dir = tempfile.gettempdir()
-    filename = f"preview_tecnico_overlay_{uuid.uuid4().hex}.png"
-    tmp_path = os.path.join(tmp_dir, filename)
-    overlay_img.save(tmp_path)
-    return {"overlay_path": tmp_path, "dpi": dpi, "advertencias": advertencias}
+    if output_path is None:
+        filename = f"preview_tecnico_overlay_{uuid.uuid4().hex}.png"
+        output_path = os.path.join(tempfile.gettempdir(), filename)
+    overlay_img.save(output_path)
+    return {"overlay_path": output_path, "dpi": dpi, "advertencias": advertencias}
 
 
 def generar_preview_tecnico(
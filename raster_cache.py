@@ -0,0 +1,264 @@
+import hashlib
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+# Caché en disco de rasterizaciones de PDFs de diseño. La clave se arma con el
+# hash del contenido del archivo (no con su ruta), de modo que el mismo PDF
+# subido en dos trabajos distintos comparte el mismo raster. Los arrays se
+# guardan como ``.npy`` sin compresión para que la lectura sea casi gratuita
+# frente a volver a rasterizar a 300 dpi.
+
+RASTER_CACHE_DIR = os.getenv("RASTER_CACHE_DIR") or os.path.join(
+    tempfile.gettempdir(), "revista_montaje_raster_cache"
+)
+RASTER_CACHE_MAX_MB = int(os.getenv("RASTER_CACHE_MAX_MB") or "1024")
+RASTER_CACHE_DISABLED = os.getenv("RASTER_CACHE_DISABLED", "false").lower() in (
+    "1",
+    "true",
+    "yes",
+    "y",
+)
+
+DIGEST_MEMO_MAX = 1024
+
+_DIGEST_MEMO: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+_DIGEST_LOCK = threading.Lock()
+
+
+def file_digest(path: str) -> str:
+    """Devuelve el SHA-1 del contenido de ``path``.
+
+    Se memoiza por (ruta absoluta, mtime, tamaño) para no releer el archivo
+    en cada posición del pliego; la memo es una LRU de ``DIGEST_MEMO_MAX``
+    entradas.
+    """
+    abs_path = os.path.abspath(path)
+    st = os.stat(abs_path)
+    memo_key = (abs_path, st.st_mtime_ns, st.st_size)
+    with _DIGEST_LOCK:
+        cached = _DIGEST_MEMO.get(memo_key)
+        if cached is not None:
+            _DIGEST_MEMO.move_to_end(memo_key)
+            return cached
+    h = hashlib.sha1()
+    with open(abs_path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _DIGEST_LOCK:
+        _DIGEST_MEMO[memo_key] = digest
+        while len(_DIGEST_MEMO) > DIGEST_MEMO_MAX:
+            _DIGEST_MEMO.popitem(last=False)
+    return digest
+
+
+def _format_clip(clip: Any) -> str:
+    if clip is None:
+        return "none"
+    if isinstance(clip, str):
+        return clip
+    if isinstance(clip, Iterable):
+        return ",".join(f"{float(v):.3f}" for v in clip)
+    return str(clip)
+
+
+def raster_key(
+    path: str,
+    page: int = 0,
+    dpi: int = 300,
+    clip: Any = None,
+    bleed_mm: float = 0.0,
+    mode: str = "rgb",
+) -> str:
+    """Clave estable para un raster: (hash contenido, página, dpi, clip, sangrado, modo)."""
+    parts = (
+        file_digest(path),
+        str(int(page)),
+        str(int(dpi)),
+        _format_clip(clip),
+        f"{float(bleed_mm or 0.0):.4f}",
+        str(mode),
+    )
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+
+
+# Cada cuánto (s) se vuelve a medir la carpeta aunque el total estimado esté
+# dentro del presupuesto: otros procesos escriben en la misma caché.
+RASTER_CACHE_RESCAN_S = 300.0
+
+
+class RasterCache:
+    """Caché de imágenes en disco con expulsión LRU por bytes totales.
+
+    El orden LRU se lleva con el ``mtime`` de cada archivo: un acierto lo
+    actualiza y, al superar ``max_bytes``, se borran los más antiguos. El
+    total se lleva en memoria y se suma en cada ``put``; la carpeta solo se
+    recorre al pasarse del presupuesto o cada ``RASTER_CACHE_RESCAN_S``.
+    """
+
+    def __init__(self, root: str, max_bytes: int) -> None:
+        self.root = root
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self._total: Optional[int] = None
+        self._medido = 0.0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _touch(path: str) -> None:
+        # El mtime que asigna el kernel tiene granularidad gruesa; se fija
+        # explícitamente en ns para que el orden LRU sea estable.
+        now = time.time_ns()
+        try:
+            os.utime(path, ns=(now, now))
+        except OSError:
+            pass
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], f"{key}.npy")
+
+    def get(self, key: str) -> Optional[Image.Image]:
+        path = self._path_for(key)
+        try:
+            arr = np.load(path, allow_pickle=False)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        self._touch(path)
+        with self._lock:
+            self.hits += 1
+        return Image.fromarray(arr)
+
+    def put(self, key: str, img: Image.Image) -> None:
+        path = self._path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        arr = np.asarray(img)
+        try:
+            previo = os.path.getsize(path)
+        except OSError:
+            previo = 0
+        fd, tmp_path = tempfile.mkstemp(suffix=".npy.tmp", dir=os.path.dirname(path))
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                np.save(fh, arr, allow_pickle=False)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, path)
+            self._touch(path)
+        finally:
+            if os.path.exists(tmp_path):
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+        with self._lock:
+            vencido = time.monotonic() - self._medido > RASTER_CACHE_RESCAN_S
+            if self._total is not None and not vencido:
+                self._total += size - previo
+                if self._total <= self.max_bytes:
+                    return
+        self.evict()
+
+    def _entries(self) -> list[tuple[int, int, str]]:
+        entries = []
+        if not os.path.isdir(self.root):
+            return entries
+        for dirpath, _dirnames, filenames in os.walk(self.root):
+            for name in filenames:
+                if not name.endswith(".npy"):
+                    continue
+                full = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(full)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime_ns, st.st_size, full))
+        return entries
+
+    def total_bytes(self) -> int:
+        return sum(size for _mtime, size, _path in self._entries())
+
+    def evict(self) -> None:
+        """Mide la carpeta y borra los más antiguos hasta entrar en ``max_bytes``."""
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _mtime, size, _path in entries)
+            if total > self.max_bytes:
+                entries.sort()
+                for _mtime, size, full in entries:
+                    if total <= self.max_bytes:
+                        break
+                    try:
+                        os.remove(full)
+                        total -= size
+                    except OSError:
+                        continue
+            self._total = total
+            self._medido = time.monotonic()
+
+    def clear(self) -> None:
+        with self._lock:
+            for _mtime, _size, full in self._entries():
+                try:
+                    os.remove(full)
+                except OSError:
+                    pass
+            self._total = 0
+            self._medido = time.monotonic()
+
+
+_DEFAULT_CACHE: Optional[RasterCache] = None
+
+
+def get_raster_cache() -> RasterCache:
+    global _DEFAULT_CACHE
+    if _DEFAULT_CACHE is None:
+        _DEFAULT_CACHE = RasterCache(RASTER_CACHE_DIR, RASTER_CACHE_MAX_MB * 1024 * 1024)
+    return _DEFAULT_CACHE
+
+
+def set_raster_cache(cache: Optional[RasterCache]) -> None:
+    """Reemplaza la caché global (útil en tests)."""
+    global _DEFAULT_CACHE
+    _DEFAULT_CACHE = cache
+
+
+def cached_raster(
+    path: str,
+    render_fn: Callable[[], Image.Image],
+    *,
+    page: int = 0,
+    dpi: int = 300,
+    clip: Any = None,
+    bleed_mm: float = 0.0,
+    mode: str = "rgb",
+) -> Image.Image:
+    """Devuelve el raster cacheado o lo genera con ``render_fn`` y lo guarda.
+
+    Ante cualquier error de la caché (disco lleno, permisos) se renderiza
+    directamente para no bloquear la exportación.
+    """
+    if RASTER_CACHE_DISABLED:
+        return render_fn()
+    cache = get_raster_cache()
+    try:
+        key = raster_key(path, page=page, dpi=dpi, clip=clip, bleed_mm=bleed_mm, mode=mode)
+    except OSError:
+        return render_fn()
+    img = cache.get(key)
+    if img is not None:
+        return img
+    img = render_fn()
+    try:
+        cache.put(key, img)
+    except OSError:
+        pass
+    return img
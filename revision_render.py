@@ -0,0 +1,65 @@
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import fitz  # PyMuPDF
+import numpy as np
+from PIL import Image
+
+
+class RevisionRender:
+    """Raster RGB de una página compartido por las etapas de ``/revision``.
+
+    La superposición de riesgos, la vista previa del diagnóstico y la
+    simulación de trama trabajan todas a la misma resolución; este objeto
+    rasteriza la página una sola vez (de forma perezosa) y entrega el mismo
+    array a cada etapa. ``render_count`` permite verificarlo y ``tiempos``
+    acumula la duración en milisegundos de cada etapa medida con
+    :meth:`etapa`.
+    """
+
+    def __init__(self, pdf_path: str, dpi: int = 200, page_index: int = 0) -> None:
+        self.pdf_path = pdf_path
+        self.dpi = int(dpi)
+        self.page_index = int(page_index)
+        self.render_count = 0
+        self.tiempos: Dict[str, float] = {}
+        with fitz.open(pdf_path) as doc:
+            self.page_rect = fitz.Rect(doc[self.page_index].rect)
+        irect = (self.page_rect * self.matrix).irect
+        self.size = (irect.width, irect.height)
+        self._rgb: Optional[np.ndarray] = None
+
+    @property
+    def zoom(self) -> float:
+        return self.dpi / 72.0
+
+    @property
+    def matrix(self) -> fitz.Matrix:
+        return fitz.Matrix(self.zoom, self.zoom)
+
+    @property
+    def rgb(self) -> np.ndarray:
+        """Raster RGB ``uint8`` (alto x ancho x 3) de la página a ``dpi``."""
+        if self._rgb is None:
+            with self.etapa("render"), fitz.open(self.pdf_path) as doc:
+                pix = doc[self.page_index].get_pixmap(matrix=self.matrix, alpha=False)
+                self.render_count += 1
+                self._rgb = np.frombuffer(pix.samples, dtype=np.uint8).reshape(
+                    pix.height, pix.width, pix.n
+                )
+        return self._rgb
+
+    def imagen(self) -> Image.Image:
+        """Copia del raster como imagen RGB de Pillow."""
+        return Image.fromarray(self.rgb, "RGB")
+
+    @contextmanager
+    def etapa(self, nombre: str) -> Iterator[None]:
+        """Mide el bloque y suma su duración (ms) en ``tiempos[nombre]``."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000.0
+            self.tiempos[nombre] = round(self.tiempos.get(nombre, 0.0) + ms, 2)
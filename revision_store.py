@@ -0,0 +1,218 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Almacén local de los resultados de ``/revision``. Reemplaza a los archivos
+# ``diag.json`` / ``res.json`` por revisión: cada revisión es una fila con sus
+# metadatos (para listar y purgar) y sus datos se guardan en secciones JSON
+# independientes, de modo que un endpoint que solo necesita las rutas de las
+# imágenes y el ``diagnostico_json`` no decodifica el análisis completo.
+
+REVISION_STORE_PATH = os.getenv("REVISION_STORE_PATH") or ""
+REVISION_STORE_MAX = int(os.getenv("REVISION_STORE_MAX") or "500")
+REVISION_STORE_MAX_DIAS = float(os.getenv("REVISION_STORE_MAX_DIAS") or "30")
+
+# Claves del resultado que se guardan como sección propia; el resto va a la
+# sección ``resultado``. ``diagnostico`` guarda lo que antes iba a diag.json.
+SECCIONES_RESULTADO = ("diagnostico_json", "advertencias_iconos", "analisis")
+SECCION_RESULTADO = "resultado"
+SECCION_DIAGNOSTICO = "diagnostico"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revisiones (
+    id TEXT PRIMARY KEY,
+    creada REAL NOT NULL,
+    accedida REAL NOT NULL,
+    archivo TEXT,
+    material TEXT,
+    tac_total REAL,
+    riesgo TEXT
+);
+CREATE INDEX IF NOT EXISTS revisiones_accedida ON revisiones (accedida);
+CREATE TABLE IF NOT EXISTS secciones (
+    revision_id TEXT NOT NULL REFERENCES revisiones (id) ON DELETE CASCADE,
+    nombre TEXT NOT NULL,
+    datos TEXT NOT NULL,
+    PRIMARY KEY (revision_id, nombre)
+) WITHOUT ROWID;
+"""
+
+
+class RevisionStore:
+    """Resultados de revisiones flexo en SQLite con retención por antigüedad.
+
+    Se abre una conexión por operación (SQLite en modo WAL), así que una
+    instancia puede compartirse entre hilos y varios workers pueden usar el
+    mismo archivo. ``purgar`` elimina las revisiones no consultadas en
+    ``max_dias`` y, si sobran, las menos usadas por encima de
+    ``max_revisiones``.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_revisiones: int = REVISION_STORE_MAX,
+        max_dias: float = REVISION_STORE_MAX_DIAS,
+    ) -> None:
+        self.path = path
+        self.max_revisiones = int(max_revisiones)
+        self.max_dias = float(max_dias)
+        self._lock = threading.Lock()
+        self._inicializado = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA foreign_keys = ON")
+        with self._lock:
+            if not self._inicializado:
+                conn.execute("PRAGMA journal_mode = WAL")
+                conn.executescript(_SCHEMA)
+                self._inicializado = True
+        return conn
+
+    @contextmanager
+    def _conexion(self) -> Iterator[sqlite3.Connection]:
+        conn = self._connect()
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def guardar(
+        self,
+        revision_id: str,
+        resultado: Dict[str, Any],
+        diagnostico: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """Guarda (o reemplaza) una revisión completa."""
+        diag_json = resultado.get("diagnostico_json") or {}
+        secciones = {
+            SECCION_RESULTADO: {
+                k: v for k, v in resultado.items() if k not in SECCIONES_RESULTADO
+            }
+        }
+        for nombre in SECCIONES_RESULTADO:
+            if nombre in resultado:
+                secciones[nombre] = resultado[nombre]
+        if diagnostico is not None:
+            secciones[SECCION_DIAGNOSTICO] = diagnostico
+        ahora = time.time()
+        fila = (
+            revision_id,
+            ahora,
+            ahora,
+            diag_json.get("archivo"),
+            diag_json.get("material"),
+            diag_json.get("tac_total"),
+            diag_json.get("ink_risk"),
+        )
+        with self._conexion() as conn:
+            conn.execute("DELETE FROM revisiones WHERE id = ?", (revision_id,))
+            conn.execute(
+                "INSERT INTO revisiones (id, creada, accedida, archivo, material, tac_total, riesgo) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                fila,
+            )
+            conn.executemany(
+                "INSERT INTO secciones (revision_id, nombre, datos) VALUES (?, ?, ?)",
+                [(revision_id, nombre, json.dumps(datos)) for nombre, datos in secciones.items()],
+            )
+
+    def _secciones(self, revision_id: str, nombres: Iterable[str]) -> Optional[Dict[str, Any]]:
+        nombres = list(nombres)
+        marcas = ",".join("?" for _ in nombres)
+        with self._conexion() as conn:
+            actualizada = conn.execute(
+                "UPDATE revisiones SET accedida = ? WHERE id = ?", (time.time(), revision_id)
+            ).rowcount
+            if not actualizada:
+                return None
+            filas = conn.execute(
+                f"SELECT nombre, datos FROM secciones WHERE revision_id = ? AND nombre IN ({marcas})",
+                (revision_id, *nombres),
+            ).fetchall()
+        return {nombre: json.loads(datos) for nombre, datos in filas}
+
+    def cargar(
+        self, revision_id: str, secciones: Optional[Iterable[str]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Devuelve el resultado con la forma del antiguo ``res.json``.
+
+        ``secciones`` limita qué partes se leen y decodifican (``resultado`` y
+        las de ``SECCIONES_RESULTADO``); por defecto se cargan todas. Devuelve
+        ``None`` si la revisión no existe.
+        """
+        nombres = (SECCION_RESULTADO, *SECCIONES_RESULTADO) if secciones is None else secciones
+        partes = self._secciones(revision_id, nombres)
+        if partes is None:
+            return None
+        datos = dict(partes.pop(SECCION_RESULTADO, None) or {})
+        datos.update(partes)
+        return datos
+
+    def cargar_diagnostico(self, revision_id: str) -> Optional[Dict[str, Any]]:
+        """Datos de diagnóstico (antes ``diag.json``) o ``None``."""
+        partes = self._secciones(revision_id, [SECCION_DIAGNOSTICO])
+        if partes is None:
+            return None
+        return partes.get(SECCION_DIAGNOSTICO)
+
+    def listar(self, limite: int = 50) -> List[Dict[str, Any]]:
+        """Revisiones más recientes primero, solo con sus metadatos."""
+        with self._conexion() as conn:
+            conn.row_factory = sqlite3.Row
+            filas = conn.execute(
+                "SELECT * FROM revisiones ORDER BY creada DESC LIMIT ?", (int(limite),)
+            ).fetchall()
+        return [dict(fila) for fila in filas]
+
+    def eliminar(self, revision_id: str) -> bool:
+        with self._conexion() as conn:
+            return bool(conn.execute("DELETE FROM revisiones WHERE id = ?", (revision_id,)).rowcount)
+
+    def purgar(self, ahora: Optional[float] = None) -> List[str]:
+        """Aplica la retención y devuelve los ids eliminados.
+
+        El llamador se encarga de borrar los archivos asociados (PDF e
+        imágenes de ``uploads/<revision_id>``).
+        """
+        limite = (time.time() if ahora is None else ahora) - self.max_dias * 86400
+        with self._conexion() as conn:
+            viejas = [
+                fila[0]
+                for fila in conn.execute(
+                    "SELECT id FROM revisiones WHERE accedida < ?", (limite,)
+                )
+            ]
+            sobrantes = [
+                fila[0]
+                for fila in conn.execute(
+                    "SELECT id FROM revisiones WHERE accedida >= ? "
+                    "ORDER BY accedida DESC LIMIT -1 OFFSET ?",
+                    (limite, max(self.max_revisiones, 0)),
+                )
+            ]
+            ids = viejas + sobrantes
+            conn.executemany("DELETE FROM revisiones WHERE id = ?", [(i,) for i in ids])
+        return ids
+
+
+_STORES: Dict[str, RevisionStore] = {}
+_STORES_LOCK = threading.Lock()
+
+
+def get_revision_store(path: str) -> RevisionStore:
+    """Instancia compartida del almacén para ``path`` (crea el directorio)."""
+    path = os.path.abspath(path)
+    with _STORES_LOCK:
+        store = _STORES.get(path)
+        if store is None:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            store = RevisionStore(path)
+            _STORES[path] = store
+    return store
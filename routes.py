@@ -28,6 +28,8 @@ from flask import (
     session,
     flash,
     abort,
+    Response,
+    stream_with_context,
 )
 from werkzeug.utils import secure_filename
 from werkzeug.exceptions import RequestEntityTooLarge
@@ -42,10 +44,12 @@ from services import editor_offset_imposition_service as editor_imposition
 from services import editor_offset_http_service as editor_http
 from services import editor_offset_layout_defaults as editor_layout_defaults
 from services import editor_offset_uploads as editor_uploads
+from services.manual_editor_state import create_manual_state, load_manual_state
 from services.editor_offset_output_contract import validate_constructor_output_layout
-from montaje import montar_pdf
+from montaje import montar_revista
 from diagnostico import diagnosticar_pdf, analizar_grafico_tecnico
 from diagnostico_pdf import diagnostico_offset_pro
+from diagnostico_lote import diagnosticar_documento
 from utils import (
     corregir_sangrado,
     redimensionar_pdf,
@@ -58,6 +62,7 @@ from simulacion import (
     generar_preview_interactivo,
     generar_preview_virtual,
     generar_simulacion_avanzada,
+    simulacion_png,
 )
 from ia_sugerencias import chat_completion, transcribir_audio
 from montaje_flexo import (
@@ -66,6 +71,8 @@ from montaje_flexo import (
     corregir_sangrado_y_marcas,
 )
 from preview_tecnico import generar_preview_tecnico, analizar_riesgos_pdf
+from revision_render import RevisionRender
+from revision_store import REVISION_STORE_PATH, get_revision_store
 from montaje_offset import montar_pliego_offset
 from montaje_offset_inteligente import (
     Diseno,
@@ -74,6 +81,7 @@ from montaje_offset_inteligente import (
     generar_preview_pliego,
 )
 from montaje_offset_personalizado import montar_pliego_offset_personalizado
+from sheet_plan import plan_sheet, render_sheet
 from imposicion_offset_auto import imponer_pliego_offset_auto
 from diagnostico_flexo import (
     construir_resultado_diagnostico,
@@ -135,10 +143,6 @@ def _too_large(e):
     return _json_error("Payload demasiado grande. Reduce DPI o cantidad de archivos.", 413)
 
 
-def _resolve_uploads():
-    return current_app.config.get("LAST_UPLOADS", [])
-
-
 def _tmp_static(*parts):
     p = os.path.join(current_app.static_folder, *parts)
     os.makedirs(os.path.dirname(p), exist_ok=True)
@@ -715,6 +719,21 @@ def editor_offset_generar_pdf(job_id: str):
     return _editor_http_response(editor_http.generate_pdf(job_id))
 
 
+@routes_bp.route("/editor_offset/render/<job_id>/<kind>", methods=["POST"])
+def editor_offset_render_submit(job_id: str, kind: str):
+    return _editor_http_response(editor_http.submit_render(job_id, kind))
+
+
+@routes_bp.route("/editor_offset/render/<job_id>/status/<task_id>", methods=["GET"])
+def editor_offset_render_status(job_id: str, task_id: str):
+    return _editor_http_response(editor_http.render_status(job_id, task_id))
+
+
+@routes_bp.route("/editor_offset/render/<job_id>/result/<task_id>", methods=["GET"])
+def editor_offset_render_result(job_id: str, task_id: str):
+    return _editor_http_response(editor_http.render_result(job_id, task_id))
+
+
 def call_openai_for_editor_chat(user_message: str, layout_state: Dict, job_id: str) -> Dict:
     system_prompt = """
 Sos un asistente de montaje offset/flexográfico dentro de un editor visual de imposición.
@@ -923,6 +942,7 @@ def _montaje_config_from_params(
             params.get("marcas_registro") or params.get("marcas_corte")
         ),
         "export_compat": params.get("export_compat"),
+        "maxrects_heuristica": params.get("maxrects_heuristica") or "bssf",
     }
     if resolved_output_mode is not None:
         base_kwargs["output_mode"] = resolved_output_mode
@@ -967,6 +987,7 @@ def index():
         try:
             action = request.form.get("action")
             modo_montaje = int(request.form.get("modo_montaje", 4) or 4)
+            tipo_tapa = request.form.get("tipo_tapa") or "sin_tapa"
             nuevo_ancho = request.form.get("nuevo_ancho")
             nuevo_alto = request.form.get("nuevo_alto")
 
@@ -1001,7 +1022,7 @@ def index():
                         generar_preview_interactivo(path_pdf)
                         return send_from_directory("preview_temp", "preview.html")
                     else:
-                        montar_pdf(path_pdf, output_path, paginas_por_cara=modo_montaje)
+                        montar_revista(path_pdf, output_path, modo=modo_montaje, tipo_tapa=tipo_tapa)
                         output_pdf = True
                 elif action == "diagnostico":
                     diagnostico = diagnosticar_pdf(path_pdf)
@@ -1069,6 +1090,58 @@ def diagnostico_offset_endpoint():
         )
 
 
+@routes_bp.route("/diagnostico_offset/lote", methods=["POST"])
+def diagnostico_offset_lote_endpoint():
+    """Diagnóstico de todas las páginas, transmitido a medida que terminan.
+
+    ``formato=ndjson`` (por defecto) envía un objeto JSON por línea;
+    ``formato=sse`` usa eventos ``text/event-stream``.
+    """
+    archivo = request.files.get("pdf")
+    if not archivo or archivo.filename == "":
+        return jsonify({"ok": False, "error": "Debe subir un PDF"}), 400
+    formato = (request.form.get("formato") or request.args.get("formato") or "ndjson").lower()
+    if formato not in ("ndjson", "sse"):
+        return jsonify({"ok": False, "error": "formato debe ser 'ndjson' o 'sse'"}), 400
+    incluir_preview = (request.form.get("preview") or "").lower() in {"1", "true", "on", "si", "sí"}
+
+    # Nombre único: varios lotes pueden transmitirse a la vez.
+    filename = f"diag_{uuid.uuid4().hex[:8]}_{secure_filename(archivo.filename)}"
+    path_pdf = os.path.join(UPLOAD_FOLDER, filename)
+    archivo.save(path_pdf)
+    try:
+        with fitz.open(path_pdf) as doc:
+            pdf_page_count = doc.page_count
+    except Exception:
+        os.remove(path_pdf)
+        return jsonify({"ok": False, "error": "El archivo no es un PDF válido"}), 400
+    limite = current_app.config.get("MAX_PAGES_DIAG_LOTE", 500)
+    if pdf_page_count > limite:
+        os.remove(path_pdf)
+        return jsonify({"ok": False, "error": f"PDF demasiado largo para diagnóstico por lote (máx. {limite} páginas)."}), 413
+
+    def _eventos():
+        try:
+            for evento in diagnosticar_documento(path_pdf, incluir_preview=incluir_preview):
+                data = json.dumps(evento, ensure_ascii=False)
+                if formato == "sse":
+                    yield f"event: {evento['type']}\ndata: {data}\n\n"
+                else:
+                    yield data + "\n"
+        finally:
+            try:
+                os.remove(path_pdf)
+            except OSError:
+                pass
+
+    mimetype = "text/event-stream" if formato == "sse" else "application/x-ndjson"
+    return Response(
+        stream_with_context(_eventos()),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @routes_bp.route('/descargar')
 def descargar_pdf():
     return send_file("output/montado.pdf", as_attachment=True)
@@ -1183,8 +1256,6 @@ def _parse_montaje_offset_form(req):
     if not diseños or len(diseños) > 5:
         raise ValueError("Debe subir entre 1 y 5 archivos PDF")
 
-    current_app.config["LAST_UPLOADS"] = [path for path, _ in diseños]
-
     modo_ia = "modo_ia" in req.form
     estrategia = req.form.get("estrategia", "flujo")
     if modo_ia:
@@ -1269,6 +1340,7 @@ def _parse_montaje_offset_form(req):
         "usar_trimbox": usar_trimbox,
         "modo_ia": modo_ia,
         "export_compat": export_compat or None,
+        "maxrects_heuristica": req.form.get("maxrects_heuristica") or "bssf",
     }
 
     return diseños, ancho_pliego, alto_pliego, params
@@ -1323,7 +1395,9 @@ def montaje_offset_inteligente_view():
                 export_area_util=opciones_extra.get("export_area_util", False),
                 export_compat=opciones_extra.get("export_compat"),
             )
-            res = realizar_montaje_inteligente(diseno_objs, config)
+            # La geometría queda en caché para el "generar" posterior.
+            plan = plan_sheet(diseños, config)
+            res = render_sheet(plan, "preview", config)
 
             ppath_abs, resumen_html, positions, sheet_mm = _unpack_preview_result(
                 res, preview_path, ancho_pliego, alto_pliego
@@ -1334,8 +1408,10 @@ def montaje_offset_inteligente_view():
             preview_url = url_for("static", filename=rel_path)
             files_list = [ruta for ruta, _ in diseños]
 
-            current_app.config["LAST_SHEET_MM"] = sheet_mm
-            current_app.config["LAST_SANGRADO_MM"] = params["sangrado"]
+            # Estado del editor manual ligado a este montaje (no al proceso).
+            manual_state = create_manual_state(
+                sheet_mm or {"w": ancho_pliego, "h": alto_pliego}, params["sangrado"], files_list
+            )
 
             return render_template(
                 "montaje_offset_inteligente.html",
@@ -1346,6 +1422,7 @@ def montaje_offset_inteligente_view():
                 sheet_mm=sheet_mm,
                 sangrado_mm=params["sangrado"],
                 files_list=files_list,
+                manual_job=manual_state.job_id,
                 modo_ia=params.get("modo_ia", False),
                 layout_json_exists=False,
                 job_id=None,
@@ -1364,7 +1441,9 @@ def montaje_offset_inteligente_view():
             export_area_util=opciones_extra.get("export_area_util", False),
             export_compat=opciones_extra.get("export_compat"),
         )
-        result_path = realizar_montaje_inteligente(diseno_objs, config)
+        # Si la vista previa ya planificó este pliego, se reutiliza su geometría.
+        plan = plan_sheet(diseños, config)
+        result_path = render_sheet(plan, "pdf", config)
         final_path = result_path if isinstance(result_path, str) else output_path
 
         if not modo_ia:
@@ -1372,24 +1451,8 @@ def montaje_offset_inteligente_view():
 
         result_dict = result_path if isinstance(result_path, dict) else None
         if not result_dict:
-            # Intentamos obtener posiciones en una segunda pasada si el backend no las devolvió
-            config_pos = _montaje_config_from_params(
-                tamano_pliego,
-                params,
-                es_pdf_final=False,
-                devolver_posiciones=True,
-                export_area_util=opciones_extra.get("export_area_util", False),
-                export_compat=opciones_extra.get("export_compat"),
-            )
-            try:
-                preview_res = realizar_montaje_inteligente(diseno_objs, config_pos)
-                if isinstance(preview_res, dict):
-                    result_dict = {
-                        "positions": preview_res.get("positions"),
-                        "sheet_mm": preview_res.get("sheet_mm"),
-                    }
-            except Exception:
-                result_dict = None
+            # Las posiciones salen del plan, sin una segunda pasada del montaje.
+            result_dict = {"positions": plan.positions(), "sheet_mm": plan.sheet_mm}
 
         if not result_dict or not result_dict.get("positions"):
             return send_file(final_path, as_attachment=True)
@@ -1648,14 +1711,14 @@ def montaje_offset_preview():
             diseños, ancho_pliego, alto_pliego, params = _parse_montaje_offset_form(request)
             export_area_util = request.form.get("export_area_util") == "on"
             opciones_extra = {"export_area_util": export_area_util}
-            diseno_objs = _build_diseno_objs(diseños)
             config = _montaje_config_from_params(
                 (ancho_pliego, alto_pliego),
                 params,
                 es_pdf_final=False,
                 export_area_util=opciones_extra.get("export_area_util", False),
             )
-            png_bytes, resumen_html = realizar_montaje_inteligente(diseno_objs, config)
+            plan = plan_sheet(diseños, config)
+            png_bytes, resumen_html = render_sheet(plan, "preview", config)
         b64 = base64.b64encode(png_bytes).decode("ascii")
         return jsonify(
             {
@@ -1679,7 +1742,12 @@ def api_manual_preview():
     if not positions:
         return _json_error("No hay posiciones válidas para aplicar.")
 
-    diseños = [(ruta, 1) for ruta in _resolve_uploads()]
+    manual_state = load_manual_state(payload.get("manual_job"))
+    if manual_state is None:
+        return _json_error(
+            "La sesión del editor manual no existe o venció. Volvé a generar la vista previa.", 404
+        )
+    diseños = [(ruta, 1) for ruta in manual_state.designs]
     diseno_objs = _build_diseno_objs(diseños)
     name_to_idx = {os.path.basename(r): i for i, (r, _) in enumerate(diseños)}
     path_to_idx = {r: i for i, (r, _) in enumerate(diseños)}
@@ -1732,18 +1800,18 @@ def api_manual_preview():
                 f"El archivo no está disponible en el servidor: {os.path.basename(real_path)}. Volvé a subirlo."
             )
 
-    sheet_mm = current_app.config.get("LAST_SHEET_MM", {})
-    sangrado = current_app.config.get("LAST_SANGRADO_MM", 0)
     try:
-        w_mm = float(sheet_mm.get("w"))
-        h_mm = float(sheet_mm.get("h"))
-        sangrado = float(sangrado)
+        w_mm, h_mm = manual_state.sheet_size
+        sangrado = float(manual_state.sangrado_mm)
     except Exception:
         return _json_error("Dimensiones del pliego inválidas en el servidor.")
 
     prev_dir = os.path.join(current_app.static_folder, "previews")
     os.makedirs(prev_dir, exist_ok=True)
-    token = uuid.uuid4().hex
+    # Con ``preview_job`` el editor reutiliza el lienzo y los sprites de la
+    # vista previa anterior y solo se repintan las formas que se movieron.
+    preview_job = _safe_job_id(payload.get("preview_job"))
+    token = preview_job or uuid.uuid4().hex
     preview_path = os.path.join(prev_dir, f"manual_{token}.png")
 
     for j, pos in enumerate(positions[:3]):
@@ -1771,6 +1839,7 @@ def api_manual_preview():
             posiciones_manual=positions,
             preview_path=preview_path,
             export_compat=export_compat,
+            preview_job=preview_job,
         )
         res = realizar_montaje_inteligente(diseno_objs, config)
         rel = os.path.relpath(preview_path, current_app.static_folder).replace("\\", "/")
@@ -1808,7 +1877,12 @@ def api_manual_impose():
     if not positions:
         return _json_error("No hay posiciones válidas para aplicar.")
 
-    diseños = [(ruta, 1) for ruta in _resolve_uploads()]
+    manual_state = load_manual_state(payload.get("manual_job"))
+    if manual_state is None:
+        return _json_error(
+            "La sesión del editor manual no existe o venció. Volvé a generar la vista previa.", 404
+        )
+    diseños = [(ruta, 1) for ruta in manual_state.designs]
     diseno_objs = _build_diseno_objs(diseños)
     name_to_idx = {os.path.basename(r): i for i, (r, _) in enumerate(diseños)}
     path_to_idx = {r: i for i, (r, _) in enumerate(diseños)}
@@ -1857,12 +1931,9 @@ def api_manual_impose():
                 f"El archivo no está disponible en el servidor: {os.path.basename(real_path)}. Volvé a subirlo."
             )
 
-    sheet_mm = current_app.config.get("LAST_SHEET_MM", {})
-    sangrado = current_app.config.get("LAST_SANGRADO_MM", 0)
     try:
-        w_mm = float(sheet_mm.get("w"))
-        h_mm = float(sheet_mm.get("h"))
-        sangrado = float(sangrado)
+        w_mm, h_mm = manual_state.sheet_size
+        sangrado = float(manual_state.sangrado_mm)
     except Exception:
         return _json_error("Dimensiones del pliego inválidas en el servidor.")
 
@@ -2176,7 +2247,9 @@ def vista_previa():
         generar_preview_interactivo(ruta_pdf)
         return send_from_directory("preview_temp", "preview.html")
     else:
-        montar_pdf(ruta_pdf, "output/montado.pdf", paginas_por_cara=modo)
+        montar_revista(
+            ruta_pdf, "output/montado.pdf", modo=modo, tipo_tapa=request.form.get("tipo_tapa") or "sin_tapa"
+        )
         return send_file("output/montado.pdf", as_attachment=True)
 
 
@@ -2236,10 +2309,60 @@ def generar_pdf_final():
         return "No hay archivo para montar."
     path_pdf = os.path.join("uploads", pdfs[-1])
     output_pdf_path = "output/montado.pdf"
-    montar_pdf(path_pdf, output_pdf_path, paginas_por_cara=modo)
+    montar_revista(path_pdf, output_pdf_path, modo=modo, tipo_tapa=request.form.get("tipo_tapa") or "sin_tapa")
     return send_file(output_pdf_path, as_attachment=True)
 
 
+def _revision_store():
+    """Almacén de revisiones flexo; por defecto en ``instance/`` junto a ``static``."""
+    path = current_app.config.get("REVISION_STORE_PATH") or REVISION_STORE_PATH
+    if not path:
+        raiz = os.path.dirname(os.path.abspath(current_app.static_folder))
+        path = os.path.join(raiz, "instance", "revisiones.sqlite3")
+    return get_revision_store(path)
+
+
+def _cargar_revision(revision_id, secciones=None):
+    """Resultado de una revisión flexo (forma de ``res.json``) o ``None``.
+
+    Las revisiones guardadas antes del almacén se leen de su ``res.json``.
+    """
+    datos = _revision_store().cargar(revision_id, secciones)
+    if datos is not None:
+        return datos
+    res_json_path = os.path.join(current_app.static_folder, "uploads", revision_id, "res.json")
+    try:
+        with open(res_json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _cargar_diagnostico_revision(revision_id):
+    """Datos de diagnóstico de una revisión (antes ``diag.json``) o ``None``."""
+    diag = _revision_store().cargar_diagnostico(revision_id)
+    if diag is not None:
+        return diag
+    diag_path = os.path.join(current_app.static_folder, "uploads", revision_id, "diag.json")
+    try:
+        with open(diag_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def _purgar_revisiones(store):
+    """Aplica la retención del almacén y borra los archivos de lo expulsado."""
+    for revision_id in store.purgar():
+        shutil.rmtree(
+            os.path.join(current_app.static_folder, "uploads", revision_id),
+            ignore_errors=True,
+        )
+        sim_path = os.path.join(current_app.static_folder, "simulaciones", f"sim_{revision_id}.png")
+        if os.path.exists(sim_path):
+            os.remove(sim_path)
+
+
 @routes_bp.route("/revision", methods=["GET", "POST"], endpoint="revision")
 def revision():
     if request.method == "GET":
@@ -2341,50 +2464,55 @@ def revision():
     os.makedirs(rev_dir, exist_ok=True)
 
     try:
-        (
-            resumen,
-            _imagen_tinta,
-            texto,
-            analisis_detallado,
-            advertencias_overlay,
-        ) = revisar_diseño_flexo(
-            save_path,
-            anilox_lpi,
-            paso_mm,
-            material_norm,
-            anilox_bcm,
-            velocidad,
-            None,
-        )
-        overlay_info = analizar_riesgos_pdf(
-            save_path, advertencias=advertencias_overlay
-        )
-        if overlay_info.get("overlay_path"):
-            overlay_persist = os.path.join(rev_dir, "overlay.png")
-            shutil.copy(overlay_info["overlay_path"], overlay_persist)
-            overlay_info["overlay_path"] = overlay_persist
-        base_img_path, imagen_rel, imagen_iconos_rel, advertencias_iconos = generar_preview_diagnostico(
-            save_path, overlay_info["advertencias"], dpi=overlay_info["dpi"]
-        )
-
-        # Persistir imágenes de diagnóstico en uploads/<revision_id>
-        diag_abs = os.path.join(rev_dir, "diagnostico.png")
-        shutil.copy(base_img_path, diag_abs)
-        base_img_path = diag_abs
-        diag_rel = _static_web_relpath(diag_abs)
-
-        iconos_src = os.path.join(current_app.static_folder, imagen_iconos_rel)
-        iconos_abs = os.path.join(rev_dir, "diagnostico_iconos.png")
-        shutil.copy(iconos_src, iconos_abs)
-        imagen_rel = diag_rel
-        imagen_iconos_rel = _static_web_relpath(iconos_abs)
+        # Un único raster de la página alimenta overlay, preview y simulación.
+        render = RevisionRender(save_path, dpi=200)
+        with render.etapa("diagnostico"):
+            (
+                resumen,
+                _imagen_tinta,
+                texto,
+                analisis_detallado,
+                advertencias_overlay,
+            ) = revisar_diseño_flexo(
+                save_path,
+                anilox_lpi,
+                paso_mm,
+                material_norm,
+                anilox_bcm,
+                velocidad,
+                None,
+            )
+        # Todas las imágenes de la revisión se escriben directamente en
+        # uploads/<revision_id>: no hay archivos compartidos entre peticiones.
+        with render.etapa("overlay"):
+            overlay_info = analizar_riesgos_pdf(
+                save_path,
+                advertencias=advertencias_overlay,
+                output_path=os.path.join(rev_dir, "overlay.png"),
+                render=render,
+            )
+        with render.etapa("preview"):
+            base_img_path, imagen_rel, imagen_iconos_rel, advertencias_iconos = generar_preview_diagnostico(
+                save_path,
+                overlay_info["advertencias"],
+                dpi=overlay_info["dpi"],
+                output_dir=rev_dir,
+                nombre_base="diagnostico",
+                render=render,
+            )
 
         sim_dir = os.path.join(current_app.static_folder, "simulaciones")
         os.makedirs(sim_dir, exist_ok=True)
         sim_filename = f"sim_{revision_id}.png"
         sim_abs = os.path.join(sim_dir, sim_filename)
-        generar_simulacion_avanzada(base_img_path, advertencias_iconos, anilox_lpi, sim_abs)
+        with render.etapa("simulacion"):
+            generar_simulacion_avanzada(render.rgb, advertencias_iconos, anilox_lpi, sim_abs)
         sim_rel = _static_web_relpath(sim_abs)
+        current_app.logger.info(
+            "REV FLEXO: tiempos por etapa (ms) %s, renders=%d",
+            render.tiempos,
+            render.render_count,
+        )
 
         try:
             with fitz.open(save_path) as doc_dimensiones:
@@ -2621,12 +2749,12 @@ def revision():
             "sugerencia_produccion": sugerencia_produccion,
         }
 
-        diag_json_path = os.path.join(rev_dir, "diag.json")
-        res_json_path = os.path.join(rev_dir, "res.json")
-        with open(diag_json_path, "w", encoding="utf-8") as f:
-            json.dump(diagnostico_data, f)
-        with open(res_json_path, "w", encoding="utf-8") as f:
-            json.dump(resultado_data, f)
+        store = _revision_store()
+        store.guardar(revision_id, resultado_data, diagnostico_data)
+        try:
+            _purgar_revisiones(store)
+        except Exception:
+            current_app.logger.warning("REV FLEXO: no se pudieron purgar revisiones viejas", exc_info=True)
 
         session["revision_flexo_id"] = revision_id
         session["archivo_pdf"] = pdf_rel
@@ -2655,15 +2783,10 @@ def resultado_flexo():
     revision_id = session.get("revision_flexo_id")
     if not revision_id:
         return redirect(url_for("revision"))
-    res_json_path = os.path.join(
-        current_app.static_folder, "uploads", revision_id, "res.json"
-    )
-    try:
-        with open(res_json_path, "r", encoding="utf-8") as f:
-            datos = json.load(f)
-    except FileNotFoundError:
+    datos = _cargar_revision(revision_id)
+    if datos is None:
         current_app.logger.error(
-            "REV FLEXO: resultados no encontrados en %s", res_json_path
+            "REV FLEXO: resultados no encontrados para %s", revision_id
         )
         flash(
             "No se encontraron los resultados de la revisión. Volvé a cargar el PDF.",
@@ -2818,28 +2941,23 @@ def exportar_simulacion(revision_id):
         total = sum(scaled.values())
         return scaled, total
 
-    def _cmyk_to_rgb(c, m, y, k):
-        r = int(round(255 * (1 - c) * (1 - k)))
-        g = int(round(255 * (1 - m) * (1 - k)))
-        b = int(round(255 * (1 - y) * (1 - k)))
-        return max(0, min(255, r)), max(0, min(255, g)), max(0, min(255, b))
-
     revision = (revision_id or "").strip()
     if not revision or revision.lower() in {"actual", "undefined", "null"}:
         revision = session.get("revision_flexo_id")
     if not revision:
         return jsonify({"error": "No se encontró la revisión solicitada."}), 404
 
-    res_json_path = os.path.join(current_app.static_folder, "uploads", revision, "res.json")
+    # Solo las secciones que usa la exportación: el análisis completo no se lee.
     try:
-        with open(res_json_path, "r", encoding="utf-8") as f:
-            datos = json.load(f)
-    except FileNotFoundError:
-        current_app.logger.error("REV FLEXO: resultados faltantes en %s", res_json_path)
-        return jsonify({"error": "Los datos de la simulación ya no están disponibles."}), 404
+        datos = _cargar_revision(
+            revision, ("resultado", "diagnostico_json", "advertencias_iconos")
+        )
     except json.JSONDecodeError:
-        current_app.logger.exception("REV FLEXO: resultados corruptos en %s", res_json_path)
+        current_app.logger.exception("REV FLEXO: resultados corruptos para %s", revision)
         return jsonify({"error": "No se pudieron leer los datos guardados de la simulación."}), 500
+    if datos is None:
+        current_app.logger.error("REV FLEXO: resultados faltantes para %s", revision)
+        return jsonify({"error": "Los datos de la simulación ya no están disponibles."}), 404
 
     payload = request.get_json(silent=True) or {}
     diagnostico = datos.get("diagnostico_json") if isinstance(datos, dict) else {}
@@ -2892,105 +3010,16 @@ def exportar_simulacion(revision_id):
         current_app.logger.exception("REV FLEXO: error abriendo imagen base %s", base_path)
         base_image = Image.new("RGBA", (1600, 1200), (238, 247, 255, 255))
 
-    width, height = base_image.size
-    overlay = Image.new("RGBA", (width, height), (0, 0, 0, 0))
-
-    if cobertura_total > 0 and width > 0 and height > 0:
-        lpi_val = lpi or 0.0
-        spacing_raw = max(2.5, (540.0 / max(lpi_val or 0.0, 40.0)) * 3.0)
-        spacing = max(6.0, spacing_raw)
-        bcm_factor = min(1.2, (bcm or 0.0) / 12.0)
-        coverage_factor = max(0.05, min(1.0, cobertura_total / 300.0))
-        density = min(0.9, 0.12 + coverage_factor * (0.6 + bcm_factor))
-        offset = ((paso or 0.0) % spacing) / 2.0 if spacing else 0.0
-        c_val = min(1.0, (cobertura_mapa.get("C", 0.0) or 0.0) / 100.0)
-        m_val = min(1.0, (cobertura_mapa.get("M", 0.0) or 0.0) / 100.0)
-        y_val = min(1.0, (cobertura_mapa.get("Y", 0.0) or 0.0) / 100.0)
-        k_val = min(1.0, (cobertura_mapa.get("K", 0.0) or 0.0) / 100.0)
-        rgb = _cmyk_to_rgb(c_val, m_val, y_val, k_val)
-        radius_base = max(1.2, (spacing / 2.0) * min(0.85, 0.25 + coverage_factor))
-        radius = min(radius_base, spacing * 0.48)
-        rotation_rad = math.sin((paso or 0.0) / 90.0)
-        rotation_deg = math.degrees(rotation_rad)
-
-        tile_size = max(8, int(round(spacing)))
-        tile_size = max(tile_size, int(math.ceil(radius * 2 + 4)))
-        dot = Image.new("RGBA", (tile_size, tile_size), (0, 0, 0, 0))
-        draw_dot = ImageDraw.Draw(dot)
-        radius_y = radius * 0.82
-        cx = tile_size / 2.0
-        cy = tile_size / 2.0
-        bbox = (cx - radius, cy - radius_y, cx + radius, cy + radius_y)
-        draw_dot.ellipse(
-            bbox,
-            fill=(rgb[0], rgb[1], rgb[2], int(round(density * 255))),
-        )
-        if rotation_deg:
-            dot = dot.rotate(rotation_deg, resample=Image.BICUBIC, expand=True)
-
-        tile = Image.new("RGBA", (tile_size, tile_size), (0, 0, 0, 0))
-        paste_x = tile_size // 2 - dot.width // 2
-        paste_y = tile_size // 2 - dot.height // 2
-        tile.paste(dot, (paste_x, paste_y), dot)
-
-        pattern_width = width + tile_size * 2
-        pattern_height = height + tile_size * 2
-        tiled = Image.new("RGBA", (pattern_width, pattern_height), (0, 0, 0, 0))
-        for pos_y in range(0, pattern_height, tile_size):
-            for pos_x in range(0, pattern_width, tile_size):
-                tiled.paste(tile, (pos_x, pos_y), tile)
-
-        offset_px = int(round(offset % tile_size)) if tile_size else 0
-        pattern_cropped = tiled.crop(
-            (offset_px, offset_px, offset_px + width, offset_px + height)
-        )
-        overlay.paste(pattern_cropped, (0, 0), pattern_cropped)
-
-        shadow_alpha = max(0.0, min(1.0, density * 0.3))
-        if shadow_alpha > 0:
-            shadow = Image.new(
-                "RGBA", (width, height), (20, 40, 60, int(round(shadow_alpha * 255)))
-            )
-            overlay.paste(shadow, (0, 0), shadow)
-
     advertencias = datos.get("advertencias_iconos") if isinstance(datos, dict) else []
-    if isinstance(advertencias, list) and advertencias:
-        warning_colors = {
-            "texto_pequeno": {"stroke": (220, 53, 69, 230), "fill": (220, 53, 69, 46)},
-            "trama_debil": {"stroke": (128, 0, 128, 230), "fill": (128, 0, 128, 46)},
-            "imagen_baja": {"stroke": (255, 140, 0, 230), "fill": (255, 140, 0, 46)},
-            "overprint": {"stroke": (0, 123, 255, 230), "fill": (0, 123, 255, 46)},
-            "sin_sangrado": {"stroke": (0, 150, 0, 230), "fill": (0, 150, 0, 46)},
-            "default": {"stroke": (255, 193, 7, 230), "fill": (255, 193, 7, 46)},
-        }
-        draw_overlay = ImageDraw.Draw(overlay)
-        line_width = max(2, int(round(2)))
-        for adv in advertencias:
-            bbox = None
-            if isinstance(adv, dict):
-                bbox = adv.get("bbox") or adv.get("box")
-            if not isinstance(bbox, (list, tuple)) or len(bbox) != 4:
-                continue
-            try:
-                x0, y0, x1, y1 = [float(v) for v in bbox]
-            except (TypeError, ValueError):
-                continue
-            tipo_raw = str(adv.get("tipo") or adv.get("type") or "").lower()
-            tipo = "trama_debil" if tipo_raw.startswith("trama") else tipo_raw
-            colores = warning_colors.get(tipo, warning_colors["default"])
-            draw_overlay.rectangle(
-                [(x0, y0), (x1, y1)],
-                fill=colores["fill"],
-                outline=colores["stroke"],
-                width=line_width,
-            )
-
-    resultado = base_image.convert("RGBA")
-    resultado.paste(overlay, (0, 0), overlay)
-
-    output = io.BytesIO()
-    resultado.save(output, format="PNG")
-    output.seek(0)
+    png = simulacion_png(
+        base_image,
+        cobertura_mapa if cobertura_total > 0 else {},
+        lpi,
+        bcm,
+        paso,
+        advertencias if isinstance(advertencias, list) else [],
+    )
+    output = io.BytesIO(png)
 
     safe_revision = secure_filename(str(revision)) or "resultado"
     filename = f"sim_{safe_revision}.png"
@@ -3233,15 +3262,11 @@ def vista_previa_tecnica():
 
         diag = {}
         if revision_id:
-            diag_path = os.path.join(
-                current_app.static_folder, "uploads", revision_id, "diag.json"
-            )
-            try:
-                with open(diag_path, "r", encoding="utf-8") as f:
-                    diag = json.load(f)
-            except FileNotFoundError:
+            diag = _cargar_diagnostico_revision(revision_id)
+            if diag is None:
+                diag = {}
                 current_app.logger.error(
-                    "REV FLEXO: datos de diagnóstico faltantes %s", diag_path
+                    "REV FLEXO: datos de diagnóstico faltantes para %s", revision_id
                 )
 
         rel_path = generar_preview_tecnico(
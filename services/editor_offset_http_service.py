@@ -12,6 +12,7 @@ from cuadernillos.simulator import CuadernilloSimulationError, simular_cuadernil
 from services import editor_offset_imposition_service as editor_imposition
 from services import editor_offset_jobs as editor_jobs
 from services import editor_offset_layout_defaults as editor_layout_defaults
+from services import editor_offset_render_queue as render_queue
 from services import editor_offset_uploads as editor_uploads
 from services.editor_offset_output_service import montar_offset_desde_layout
 from services.editor_offset_output_contract import validate_constructor_output_layout
@@ -128,7 +129,9 @@ def apply_imposition(
     try:
         layout_for_engine = deepcopy(layout)
         layout_for_engine["slots"] = []
-        slots = editor_imposition.apply_imposition_engine(layout_for_engine, engine)
+        slots, nesting_plan, groups = editor_imposition.apply_imposition_incremental(
+            job_id, layout_for_engine, engine
+        )
     except editor_imposition.IncompleteImpositionError as exc:
         current_app.logger.warning(
             "Imposicion incompleta en Step & Repeat PRO para job %s: %s | details=%s",
@@ -140,9 +143,15 @@ def apply_imposition(
     except ValueError as exc:
         return _error_result(str(exc))
 
+    delta = editor_imposition.slot_delta(layout.get("slots") or [], slots)
+    delta["groups"] = groups
     layout["slots"] = slots
+    if nesting_plan is not None:
+        layout["nesting_plan"] = nesting_plan
+    else:
+        layout.pop("nesting_plan", None)
     editor_jobs.save_constructor_layout(job_dir, layout)
-    return EditorHttpResult({"ok": True, "layout": layout})
+    return EditorHttpResult({"ok": True, "layout": layout, "slot_delta": delta})
 
 
 def generate_preview(job_id: str) -> EditorHttpResult:
@@ -179,3 +188,78 @@ def generate_pdf(job_id: str) -> EditorHttpResult:
     pdf_path = montar_offset_desde_layout(layout, job_dir, preview=False)
     rel = os.path.relpath(pdf_path, current_app.static_folder).replace("\\", "/")
     return EditorHttpResult({"ok": True, "url": url_for("static", filename=rel), "warnings": warnings})
+
+
+def _render_queue() -> render_queue.RenderQueue:
+    return render_queue.get_render_queue(
+        max_workers=current_app.config.get("EDITOR_RENDER_WORKERS", 2),
+        inline=current_app.config.get("EDITOR_RENDER_INLINE", False),
+    )
+
+
+def _task_payload(job_id: str, task: Dict) -> Dict:
+    payload = {
+        "ok": task.get("status") != render_queue.STATUS_ERROR,
+        "job_id": job_id,
+        "task_id": task.get("task_id"),
+        "kind": task.get("kind"),
+        "status": task.get("status"),
+        "progress": task.get("progress", 0.0),
+        "message": task.get("message"),
+        "status_url": url_for("routes.editor_offset_render_status", job_id=job_id, task_id=task.get("task_id")),
+        "result_url": url_for("routes.editor_offset_render_result", job_id=job_id, task_id=task.get("task_id")),
+    }
+    if task.get("status") == render_queue.STATUS_DONE and task.get("result_path"):
+        rel = os.path.relpath(task["result_path"], current_app.static_folder).replace("\\", "/")
+        payload["url"] = url_for("static", filename=rel)
+    if task.get("status") == render_queue.STATUS_ERROR:
+        payload["error"] = task.get("error") or "No se pudo generar la salida."
+    for key in ("warnings",):
+        if key in task:
+            payload[key] = task[key]
+    return payload
+
+
+def submit_render(job_id: str, kind: str) -> EditorHttpResult:
+    safe_job_id = editor_jobs.safe_job_id(job_id)
+    if not safe_job_id:
+        return _error_result("job_id inválido")
+    if kind not in render_queue.RENDER_TASK_KINDS:
+        return _error_result("Tipo de render inválido", 400)
+    job_dir, layout = editor_jobs.load_or_init_constructor_layout(safe_job_id)
+    errors, warnings = validate_constructor_output_layout(layout)
+    if errors:
+        target = "la preview" if kind == "preview" else "el PDF final"
+        return _error_result(
+            f"El layout contiene errores de contrato y no se puede generar {target}.",
+            422,
+            errors=errors,
+            warnings=warnings,
+        )
+    task = _render_queue().submit(job_dir, kind, layout)
+    if warnings:
+        task = render_queue.update_task(job_dir, task["task_id"], warnings=warnings)
+    return EditorHttpResult(_task_payload(safe_job_id, task), 202)
+
+
+def render_status(job_id: str, task_id: str) -> EditorHttpResult:
+    safe_job_id = editor_jobs.safe_job_id(job_id)
+    safe_task_id = editor_jobs.safe_job_id(task_id)
+    if not safe_job_id or not safe_task_id:
+        return _error_result("job_id o task_id inválido")
+    task = render_queue.get_task(editor_jobs.constructor_job_dir(safe_job_id), safe_task_id)
+    if task is None:
+        return _error_result("Tarea de render inexistente", 404)
+    return EditorHttpResult(_task_payload(safe_job_id, task))
+
+
+def render_result(job_id: str, task_id: str) -> EditorHttpResult:
+    result = render_status(job_id, task_id)
+    if result.status != 200:
+        return result
+    status = result.payload.get("status")
+    if status == render_queue.STATUS_ERROR:
+        return EditorHttpResult(result.payload, 500)
+    if status != render_queue.STATUS_DONE:
+        return EditorHttpResult(result.payload, 202)
+    return result
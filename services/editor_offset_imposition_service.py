@@ -1,12 +1,36 @@
-from typing import Dict, List
+import copy
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
 
-from engines.nesting_pro_engine import NestingResult, compute_nesting
+from engines.nesting_pro_engine import NestingPlan, NestingResult, compute_nesting, compute_nesting_sheets
 from engines import step_repeat_pro_engine
-from services.editor_offset_layout_defaults import first_numeric, layout_spacing_gaps
+from engines.slot_store import SlotStore
+from services.editor_offset_layout_defaults import layout_spacing_gaps
 
 
 IncompleteImpositionError = step_repeat_pro_engine.IncompleteImpositionError
 
+# Estado de imposición por job para recalcular de forma incremental: la caché
+# de grupos de Step & Repeat y el último resultado de nesting/híbrido.
+IMPOSITION_STATE_JOBS = 32
+
+
+class _JobImpositionState:
+    def __init__(self) -> None:
+        # Serializa los recálculos de un mismo job (la caché de grupos y el
+        # último resultado se leen y escriben juntos).
+        self.lock = threading.Lock()
+        self.groups = step_repeat_pro_engine.RepeatGroupCache()
+        self.engine_key: str | None = None
+        self.engine_result: tuple | None = None
+
+
+_JOB_STATES: "OrderedDict[str, _JobImpositionState]" = OrderedDict()
+_JOB_STATES_LOCK = threading.Lock()
+
 
 def select_imposition_engine(
     layout: Dict,
@@ -25,27 +49,34 @@ def select_imposition_engine(
     return engine
 
 
+def store_from_nesting_result(result: NestingResult, layout: Dict) -> SlotStore:
+    """Slots del nesting con los campos del editor, sin pasar por dicts."""
+    store = result.store.copy(id_prefix="nest")
+    store.ids = None
+    store.set_face(layout.get("active_face") or "front")
+    return store
+
+
 def slots_from_nesting_result(result: NestingResult, layout: Dict) -> List[Dict]:
-    active_face = layout.get("active_face") or "front"
-    slots: List[Dict] = []
-    for idx, slot in enumerate(result.slots):
-        slots.append(
-            {
-                "id": f"nest_{idx}",
-                "x_mm": float(slot.get("x_mm", 0)),
-                "y_mm": float(slot.get("y_mm", 0)),
-                "w_mm": float(slot.get("w_mm", 0)),
-                "h_mm": float(slot.get("h_mm", 0)),
-                "rotation_deg": int(slot.get("rotation_deg", 0)) % 360,
-                "logical_work_id": None,
-                "bleed_mm": first_numeric(slot.get("bleed_mm"), layout.get("bleed_default_mm"), default=0.0),
-                "crop_marks": True,
-                "locked": False,
-                "design_ref": slot.get("design_ref") or slot.get("file"),
-                "face": active_face,
-            }
-        )
-    return slots
+    return store_from_nesting_result(result, layout).to_dicts()
+
+
+def _pattern_offsets(
+    block_w: float,
+    block_h: float,
+    layout: Dict,
+) -> List[tuple[float, float]]:
+    usable_w, usable_h, left, _, _, bottom = step_repeat_pro_engine.sheet_area(layout)
+    gap_x, gap_y = layout_spacing_gaps(layout)
+    offsets: List[tuple[float, float]] = []
+    y_offset = bottom
+    while y_offset + block_h <= bottom + usable_h + 1e-6:
+        x_offset = left
+        while x_offset + block_w <= left + usable_w + 1e-6:
+            offsets.append((x_offset, y_offset))
+            x_offset += block_w + gap_x
+        y_offset += block_h + gap_y
+    return offsets
 
 
 def repeat_pattern_over_sheet(
@@ -55,7 +86,7 @@ def repeat_pattern_over_sheet(
 ) -> List[Dict]:
     if not base_slots:
         return []
-    usable_w, usable_h, left, _, _, bottom = step_repeat_pro_engine.sheet_area(layout)
+    usable_w, usable_h, *_ = step_repeat_pro_engine.sheet_area(layout)
     if usable_w <= 0 or usable_h <= 0:
         return []
     min_x, min_y, max_x, max_y = bbox
@@ -64,32 +95,151 @@ def repeat_pattern_over_sheet(
     if block_w <= 0 or block_h <= 0:
         return base_slots
 
-    gap_x, gap_y = layout_spacing_gaps(layout)
     slots: List[Dict] = []
-    y_offset = bottom
-    while y_offset + block_h <= bottom + usable_h + 1e-6:
-        x_offset = left
-        while x_offset + block_w <= left + usable_w + 1e-6:
-            for slot in base_slots:
-                slots.append(
-                    {
-                        **slot,
-                        "id": f"hyb_{len(slots)}",
-                        "x_mm": x_offset + (slot["x_mm"] - min_x),
-                        "y_mm": y_offset + (slot["y_mm"] - min_y),
-                    }
-                )
-            x_offset += block_w + gap_x
-        y_offset += block_h + gap_y
+    for x_offset, y_offset in _pattern_offsets(block_w, block_h, layout):
+        for slot in base_slots:
+            slots.append(
+                {
+                    **slot,
+                    "id": f"hyb_{len(slots)}",
+                    "x_mm": x_offset + (slot["x_mm"] - min_x),
+                    "y_mm": y_offset + (slot["y_mm"] - min_y),
+                }
+            )
     return slots
 
 
-def apply_imposition_engine(layout: Dict, engine: str) -> List[Dict]:
+def repeat_store_over_sheet(
+    base: SlotStore,
+    bbox: tuple[float, float, float, float],
+    layout: Dict,
+) -> SlotStore:
+    """Como ``repeat_pattern_over_sheet`` pero repitiendo el bloque por columnas."""
+    if not len(base):
+        return SlotStore(id_prefix="hyb")
+    usable_w, usable_h, *_ = step_repeat_pro_engine.sheet_area(layout)
+    if usable_w <= 0 or usable_h <= 0:
+        return SlotStore(id_prefix="hyb")
+    min_x, min_y, max_x, max_y = bbox
+    block_w = max(0.0, max_x - min_x)
+    block_h = max(0.0, max_y - min_y)
+    if block_w <= 0 or block_h <= 0:
+        return base
+    return base.tiled(_pattern_offsets(block_w, block_h, layout), (min_x, min_y), id_prefix="hyb")
+
+
+def nesting_plan_payload(plan: NestingPlan, layout: Dict) -> Dict:
+    """Resumen multi-pliego para el editor: slots de cada pliego + faltantes."""
+    payload = plan.summary()
+    payload["sheets"] = [store_from_nesting_result(sheet, layout).to_dicts() for sheet in plan.sheets]
+    return payload
+
+
+def apply_nesting_plan(layout: Dict) -> tuple[List[Dict], Dict]:
+    """Slots del primer pliego y el plan completo de nesting multi-pliego."""
+    plan = compute_nesting_sheets(layout)
+    payload = nesting_plan_payload(plan, layout)
+    slots = payload["sheets"][0] if payload["sheets"] else []
+    return slots, payload
+
+
+def apply_imposition_engine(
+    layout: Dict,
+    engine: str,
+    cache: step_repeat_pro_engine.RepeatGroupCache | None = None,
+) -> List[Dict]:
     if engine == "nesting":
-        nesting = compute_nesting(layout)
-        return slots_from_nesting_result(nesting, layout)
+        slots, _ = apply_nesting_plan(layout)
+        return slots
     if engine == "hybrid":
         nesting = compute_nesting(layout)
-        base_slots = slots_from_nesting_result(nesting, layout)
-        return repeat_pattern_over_sheet(base_slots, nesting.bbox, layout)
-    return step_repeat_pro_engine.build_step_repeat_slots(layout)
+        base = store_from_nesting_result(nesting, layout)
+        return repeat_store_over_sheet(base, nesting.bbox, layout).to_dicts()
+    return step_repeat_pro_engine.build_step_repeat_slots(layout, cache=cache)
+
+
+def job_imposition_state(job_id: str) -> _JobImpositionState:
+    with _JOB_STATES_LOCK:
+        state = _JOB_STATES.get(job_id)
+        if state is None:
+            state = _JobImpositionState()
+            _JOB_STATES[job_id] = state
+        _JOB_STATES.move_to_end(job_id)
+        while len(_JOB_STATES) > IMPOSITION_STATE_JOBS:
+            _JOB_STATES.popitem(last=False)
+    return state
+
+
+def clear_imposition_state() -> None:
+    with _JOB_STATES_LOCK:
+        _JOB_STATES.clear()
+
+
+def _engine_input_key(layout: Dict, engine: str) -> str:
+    entrada = {k: v for k, v in layout.items() if k not in {"slots", "nesting_plan"}}
+    raw = json.dumps([engine, entrada], sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def apply_imposition_incremental(
+    job_id: str,
+    layout: Dict,
+    engine: str,
+) -> tuple[List[Dict], Dict | None, List[Dict[str, Any]]]:
+    """Como ``apply_imposition_engine`` pero reutilizando el cálculo anterior del job.
+
+    Con Step & Repeat solo se recolocan los grupos de zona cuyas entradas
+    cambiaron (ver ``RepeatGroupCache``). Nesting e híbrido no se dividen en
+    grupos: se reutiliza el resultado completo si el layout de entrada no
+    cambió. Devuelve ``(slots, nesting_plan, grupos)``, donde ``grupos`` indica
+    qué partes se reutilizaron. Lo devuelto es una copia: el llamador puede
+    modificarlo sin tocar el estado del job.
+    """
+    state = job_imposition_state(job_id)
+    with state.lock:
+        if engine not in {"nesting", "hybrid"}:
+            slots = apply_imposition_engine(layout, engine, cache=state.groups)
+            return slots, None, list(state.groups.last_groups)
+
+        key = _engine_input_key(layout, engine)
+        reused = state.engine_key == key and state.engine_result is not None
+        if not reused:
+            if engine == "nesting":
+                slots, nesting_plan = apply_nesting_plan(layout)
+            else:
+                slots, nesting_plan = apply_imposition_engine(layout, engine), None
+            state.engine_key, state.engine_result = key, copy.deepcopy((slots, nesting_plan))
+        slots, nesting_plan = copy.deepcopy(state.engine_result)
+    return slots, nesting_plan, [{"group": engine, "reused": reused, "slots": len(slots)}]
+
+
+def _slot_content_key(slot: Dict) -> str:
+    return json.dumps({k: v for k, v in slot.items() if k != "id"}, sort_keys=True, default=str)
+
+
+def slot_delta(previous: List[Dict], current: List[Dict]) -> Dict[str, Any]:
+    """Diferencia entre dos listas de slots, comparando contenido y no ids.
+
+    ``added`` trae los slots nuevos completos, ``removed`` los ids anteriores
+    que ya no existen y ``renamed`` los slots iguales que cambiaron de id (los
+    ids del motor son posicionales).
+    """
+    anteriores: Dict[str, List[str]] = {}
+    for slot in previous or []:
+        if isinstance(slot, dict):
+            anteriores.setdefault(_slot_content_key(slot), []).append(slot.get("id"))
+    added: List[Dict] = []
+    renamed: Dict[str, str] = {}
+    unchanged = 0
+    for slot in current:
+        ids = anteriores.get(_slot_content_key(slot))
+        if not ids:
+            added.append(slot)
+            continue
+        old_id = slot.get("id") if slot.get("id") in ids else ids[0]
+        ids.remove(old_id)
+        if old_id != slot.get("id"):
+            renamed[str(old_id)] = slot.get("id")
+        unchanged += 1
+    removed = [old_id for ids in anteriores.values() for old_id in ids]
+    return {"added": added, "removed": removed, "renamed": renamed, "unchanged": unchanged}
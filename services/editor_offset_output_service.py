@@ -1,7 +1,29 @@
 import os
-from typing import Callable, Dict, List
+import pickle
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Callable, Dict, List, Sequence
 
-from PyPDF2 import PdfReader, PdfWriter
+from utils import combinar_pdfs
+
+# Pool de procesos compartido para renderizar caras/planchas en paralelo.
+# Los rasters de diseño se comparten entre procesos a través de la caché en
+# disco (raster_cache), de modo que cada worker no vuelve a rasterizar un PDF
+# que otro ya procesó. Dentro de un worker de la cola de renders
+# (editor_offset_render_queue) las caras van en serie: esa cola ya reparte los
+# trabajos entre procesos y un pool anidado multiplicaría los procesos.
+FACE_RENDER_WORKERS = int(os.getenv("FACE_RENDER_WORKERS") or min(4, os.cpu_count() or 1))
+
+_FACE_EXECUTOR: Executor | None = None
+_FACE_EXECUTOR_LOCK = Lock()
+_IN_RENDER_WORKER = False
+
+
+def mark_render_worker() -> None:
+    """Marca el proceso actual como worker de la cola de renders."""
+    global _IN_RENDER_WORKER
+    _IN_RENDER_WORKER = True
 
 
 def _slot_has_export_override(slot: dict, key: str) -> bool:
@@ -169,6 +191,56 @@ def _resolve_output_path(res, default_path: str) -> str:
     return default_path
 
 
+def _face_executor() -> Executor:
+    global _FACE_EXECUTOR
+    with _FACE_EXECUTOR_LOCK:
+        if _FACE_EXECUTOR is None:
+            _FACE_EXECUTOR = ProcessPoolExecutor(max_workers=max(1, FACE_RENDER_WORKERS))
+        return _FACE_EXECUTOR
+
+
+def _reset_face_executor(executor: Executor) -> None:
+    """Descarta un pool roto (un worker murió); el próximo uso crea otro."""
+    global _FACE_EXECUTOR
+    with _FACE_EXECUTOR_LOCK:
+        if _FACE_EXECUTOR is executor:
+            _FACE_EXECUTOR = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _can_run_in_pool(render_fn: Callable, disenos: list, configs: Sequence) -> bool:
+    """Solo se usa el pool si la función y sus argumentos viajan a otro proceso.
+
+    Funciones locales o parcheadas en tests no son serializables: en ese caso
+    se renderiza en el proceso actual, en el mismo orden que antes. Tampoco se
+    usa dentro de un worker de la cola de renders.
+    """
+    if _IN_RENDER_WORKER or FACE_RENDER_WORKERS <= 1 or len(configs) <= 1:
+        return False
+    try:
+        pickle.dumps((render_fn, disenos, list(configs)))
+    except Exception:
+        return False
+    return True
+
+
+def _render_configs(render_fn: Callable, disenos: list, configs: Sequence) -> list:
+    """Renderiza una salida por config (caras, planchas) en paralelo si es posible.
+
+    Si un worker del pool muere, el pool se descarta y las caras se
+    renderizan en el proceso actual.
+    """
+    if not _can_run_in_pool(render_fn, disenos, configs):
+        return [render_fn(disenos, config) for config in configs]
+    executor = _face_executor()
+    try:
+        futures = [executor.submit(render_fn, disenos, config) for config in configs]
+        return [future.result() for future in futures]
+    except BrokenProcessPool:
+        _reset_face_executor(executor)
+        return [render_fn(disenos, config) for config in configs]
+
+
 def _build_designs(layout_data: dict, job_dir: str, diseno_cls) -> tuple[Dict[str, int], list]:
     ref_to_idx: Dict[str, int] = {}
     disenos = []
@@ -293,17 +365,23 @@ def montar_offset_desde_layout(
     diseno_cls=None,
     config_cls=None,
     render_fn: Callable | None = None,
+    progress_fn: Callable[[float, str], None] | None = None,
 ):
     """
     layout_data viene del layout_constructor.json.
     job_dir es la carpeta static/constructor_offset_jobs/<job_id>/.
     Si preview=True: genera un PNG y devuelve su ruta.
     Si preview=False: genera un PDF final y devuelve su ruta.
+    progress_fn(fraccion, mensaje) se invoca en cada etapa (cola de renders).
     """
 
     if layout_data is None:
         raise ValueError("layout_data es requerido")
 
+    def _report(fraction: float, message: str) -> None:
+        if progress_fn is not None:
+            progress_fn(fraction, message)
+
     diseno_cls, config_cls, render_fn = _resolve_legacy_dependencies(diseno_cls, config_cls, render_fn)
 
     sheet_mm = layout_data.get("sheet_mm", [640, 880])
@@ -353,6 +431,7 @@ def montar_offset_desde_layout(
     )
     has_front = len(front_positions) > 0
     has_back = len(back_positions) > 0
+    _report(0.1, "Posiciones calculadas")
 
     margin_left, margin_right, margin_top, margin_bottom = margins if len(margins) == 4 else (10, 10, 10, 10)
     preview_path = os.path.join(job_dir, "preview.png") if preview else None
@@ -395,6 +474,7 @@ def montar_offset_desde_layout(
         preview_positions = front_positions if has_front else back_positions
         preview_crop = front_crop if has_front else back_crop
         preview_config = _config_for_positions(preview_positions, preview_crop, output_path, preview_path)
+        _report(0.2, "Generando preview")
         res = render_fn(disenos, preview_config)
         if isinstance(res, dict):
             return res.get("preview_path", preview_path)
@@ -404,6 +484,7 @@ def montar_offset_desde_layout(
         target_positions = front_positions if has_front else back_positions
         crop_flag = front_crop if has_front else back_crop
         config = _config_for_positions(target_positions, crop_flag, output_path, None)
+        _report(0.2, "Generando PDF")
         res = render_fn(disenos, config)
         if isinstance(res, dict):
             return res.get("output_path", output_path)
@@ -417,20 +498,11 @@ def montar_offset_desde_layout(
     front_config = _config_for_positions(front_positions, front_crop, front_output, None)
     back_config = _config_for_positions(back_positions, back_crop, back_output, None)
 
-    front_res = render_fn(disenos, front_config)
-    back_res = render_fn(disenos, back_config)
+    _report(0.2, "Generando frente y dorso")
+    front_res, back_res = _render_configs(render_fn, disenos, (front_config, back_config))
+    _report(0.9, "Uniendo caras")
 
     front_path = _resolve_output_path(front_res, front_output)
     back_path = _resolve_output_path(back_res, back_output)
 
-    writer = PdfWriter()
-    for pdf_path in (front_path, back_path):
-        reader = PdfReader(pdf_path)
-        for page in reader.pages:
-            writer.add_page(page)
-
-    os.makedirs(os.path.dirname(output_path), exist_ok=True)
-    with open(output_path, "wb") as fh:
-        writer.write(fh)
-
-    return output_path
+    return combinar_pdfs((front_path, back_path), output_path)
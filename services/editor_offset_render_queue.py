@@ -0,0 +1,278 @@
+import json
+import os
+import time
+import traceback
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from threading import Lock
+from typing import Dict
+
+try:  # pragma: no cover - fcntl no existe en Windows
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+
+RENDER_TASKS_FILENAME = "render_tasks.json"
+RENDER_TASK_KINDS = ("preview", "pdf")
+MAX_TASKS_PER_JOB = 20
+# Una tarea en cola o en curso sin novedades en este tiempo (s) se da por
+# perdida (el worker murió o el servidor se reinició).
+RENDER_TASK_TIMEOUT_S = float(os.getenv("EDITOR_RENDER_TIMEOUT_S") or "900")
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+
+
+def tasks_path(job_dir: str) -> str:
+    return os.path.join(job_dir, RENDER_TASKS_FILENAME)
+
+
+@contextmanager
+def _locked_table(job_dir: str):
+    """Bloquea la tabla de tareas del job entre procesos (lock de archivo)."""
+    os.makedirs(job_dir, exist_ok=True)
+    lock_path = tasks_path(job_dir) + ".lock"
+    with open(lock_path, "a+") as lock_fh:
+        if fcntl is not None:
+            fcntl.flock(lock_fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lock_fh.fileno(), fcntl.LOCK_UN)
+
+
+def _read_table(job_dir: str) -> Dict[str, Dict]:
+    path = tasks_path(job_dir)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            data = json.load(fh)
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _write_table(job_dir: str, table: Dict[str, Dict]) -> None:
+    path = tasks_path(job_dir)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as fh:
+        json.dump(table, fh, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _prune(table: Dict[str, Dict]) -> None:
+    if len(table) <= MAX_TASKS_PER_JOB:
+        return
+    finished = sorted(
+        (t for t in table.values() if t.get("status") in (STATUS_DONE, STATUS_ERROR)),
+        key=lambda t: t.get("created_at", 0),
+    )
+    for task in finished[: len(table) - MAX_TASKS_PER_JOB]:
+        table.pop(task["task_id"], None)
+
+
+def _expire(table: Dict[str, Dict], now: float) -> bool:
+    expired = False
+    for task in table.values():
+        if task.get("status") not in (STATUS_QUEUED, STATUS_RUNNING):
+            continue
+        if now - float(task.get("updated_at") or 0) > RENDER_TASK_TIMEOUT_S:
+            task.update(
+                status=STATUS_ERROR,
+                message="Tiempo agotado",
+                error="La tarea no terminó a tiempo",
+                updated_at=now,
+            )
+            expired = True
+    return expired
+
+
+def load_tasks(job_dir: str) -> Dict[str, Dict]:
+    with _locked_table(job_dir):
+        table = _read_table(job_dir)
+        if _expire(table, time.time()):
+            _write_table(job_dir, table)
+        return table
+
+
+def get_task(job_dir: str, task_id: str) -> Dict | None:
+    return load_tasks(job_dir).get(task_id)
+
+
+def update_task(job_dir: str, task_id: str, **fields) -> Dict:
+    with _locked_table(job_dir):
+        table = _read_table(job_dir)
+        task = table.get(task_id) or {"task_id": task_id}
+        task.update(fields)
+        task["updated_at"] = time.time()
+        table[task_id] = task
+        _write_table(job_dir, table)
+        return task
+
+
+def create_task(job_dir: str, kind: str) -> Dict:
+    task_id = uuid.uuid4().hex[:12]
+    now = time.time()
+    task = {
+        "task_id": task_id,
+        "kind": kind,
+        "status": STATUS_QUEUED,
+        "progress": 0.0,
+        "message": "En cola",
+        "result_path": None,
+        "error": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+    with _locked_table(job_dir):
+        table = _read_table(job_dir)
+        table[task_id] = task
+        _prune(table)
+        _write_table(job_dir, table)
+    return task
+
+
+def run_render_task(job_dir: str, task_id: str, kind: str, layout: Dict) -> str | None:
+    """Punto de entrada del worker: genera la preview o el PDF final.
+
+    Se ejecuta dentro del pool de procesos (o inline en tests) y deja el
+    estado y el progreso en la tabla ``render_tasks.json`` del job.
+    """
+    from services.editor_offset_output_service import montar_offset_desde_layout
+
+    update_task(job_dir, task_id, status=STATUS_RUNNING, progress=0.01, message="Iniciando")
+
+    def _progress(fraction: float, message: str) -> None:
+        update_task(job_dir, task_id, progress=round(float(fraction), 3), message=message)
+
+    try:
+        result_path = montar_offset_desde_layout(
+            layout,
+            job_dir,
+            preview=(kind == "preview"),
+            progress_fn=_progress,
+        )
+    except Exception as exc:
+        update_task(
+            job_dir,
+            task_id,
+            status=STATUS_ERROR,
+            message="Falló la generación",
+            error=str(exc) or exc.__class__.__name__,
+            traceback=traceback.format_exc(limit=5),
+        )
+        return None
+    update_task(
+        job_dir,
+        task_id,
+        status=STATUS_DONE,
+        progress=1.0,
+        message="Listo",
+        result_path=result_path,
+    )
+    return result_path
+
+
+def _init_worker() -> None:
+    from services.editor_offset_output_service import mark_render_worker
+
+    mark_render_worker()
+
+
+class RenderQueue:
+    """Cola local de renders del editor visual sobre un pool de procesos.
+
+    Con ``inline=True`` las tareas se ejecutan en el mismo proceso al
+    enviarlas (modo usado por los tests y como degradación si no hay pool).
+    """
+
+    def __init__(self, max_workers: int = 2, inline: bool = False) -> None:
+        self.max_workers = max(1, int(max_workers))
+        self.inline = bool(inline)
+        self._executor: Executor | None = None
+        self._lock = Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, initializer=_init_worker)
+            return self._executor
+
+    def _drop_executor(self, executor: Executor) -> None:
+        """Descarta un pool roto; el próximo ``submit`` crea uno nuevo."""
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def _on_done(self, executor: Executor, job_dir: str, task_id: str, future: Future) -> None:
+        # run_render_task registra sus propios errores; aquí llegan los del
+        # pool (worker muerto, tarea cancelada).
+        if future.cancelled():
+            exc: BaseException = RuntimeError("Tarea cancelada")
+        else:
+            exc = future.exception()
+            if exc is None:
+                return
+        if isinstance(exc, BrokenProcessPool):
+            self._drop_executor(executor)
+        update_task(
+            job_dir,
+            task_id,
+            status=STATUS_ERROR,
+            message="Falló la generación",
+            error=str(exc) or exc.__class__.__name__,
+        )
+
+    def submit(self, job_dir: str, kind: str, layout: Dict) -> Dict:
+        if kind not in RENDER_TASK_KINDS:
+            raise ValueError(f"Tipo de render inválido: {kind}")
+        task = create_task(job_dir, kind)
+        if self.inline:
+            run_render_task(job_dir, task["task_id"], kind, layout)
+            return get_task(job_dir, task["task_id"]) or task
+        for _ in range(2):
+            executor = self._get_executor()
+            try:
+                future = executor.submit(run_render_task, job_dir, task["task_id"], kind, layout)
+            except BrokenProcessPool:
+                self._drop_executor(executor)
+                continue
+            future.add_done_callback(
+                lambda f, executor=executor: self._on_done(executor, job_dir, task["task_id"], f)
+            )
+            return task
+        return update_task(
+            job_dir,
+            task["task_id"],
+            status=STATUS_ERROR,
+            message="Falló la generación",
+            error="El pool de renders no está disponible",
+        )
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+
+
+_QUEUES: Dict[tuple[int, bool], RenderQueue] = {}
+_QUEUES_LOCK = Lock()
+
+
+def get_render_queue(max_workers: int = 2, inline: bool = False) -> RenderQueue:
+    key = (max(1, int(max_workers)), bool(inline))
+    with _QUEUES_LOCK:
+        queue = _QUEUES.get(key)
+        if queue is None:
+            queue = RenderQueue(max_workers=key[0], inline=key[1])
+            _QUEUES[key] = queue
+        return queue
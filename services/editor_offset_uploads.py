@@ -1,10 +1,10 @@
 import os
 from typing import Dict, Iterable
 
-from PyPDF2 import PdfReader
 from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
 
+from pdf_geometry import pdf_geometry
 from services.editor_offset_layout_defaults import (
     REPEAT_DESIGN_DEFAULT_PRIORITY,
     first_numeric,
@@ -13,11 +13,7 @@ from services.editor_offset_layout_defaults import (
 
 def pdf_page_size_mm(path: str) -> tuple[float, float]:
     try:
-        reader = PdfReader(path)
-        page = reader.pages[0]
-        w_pt = float(page.mediabox.width)
-        h_pt = float(page.mediabox.height)
-        return (w_pt * 25.4 / 72.0, h_pt * 25.4 / 72.0)
+        return pdf_geometry(path).size_mm()
     except Exception:
         return 0.0, 0.0
 
@@ -0,0 +1,244 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+from flask import current_app
+from werkzeug.utils import secure_filename
+
+from pdf_geometry import pdf_geometry
+from services.editor_offset_jobs import safe_job_id
+
+# Estado del editor manual por trabajo.
+#
+# La vista previa de ``/montaje_offset_inteligente`` abre el editor manual y
+# ``/api/manual/preview`` / ``/api/manual/impose`` necesitan el pliego, el
+# sangrado y la lista de PDFs de ESE montaje. Antes vivían en
+# ``current_app.config`` (un único estado por proceso), lo que impedía correr
+# varios workers. Ahora cada montaje tiene un token; el estado se guarda en
+# ``<instance>/manual_jobs/<token>/state.json`` junto con una copia de los PDFs
+# (fuera de ``static``: tiene rutas absolutas del servidor) y se sirve desde
+# una LRU en memoria que se invalida por mtime del archivo, de modo que
+# cualquier worker con acceso al mismo disco lo ve actualizado.
+#
+# Los trabajos se purgan al crear uno nuevo: se borran los que no se usan
+# hace más de ``MANUAL_JOBS_MAX_HORAS`` y, de los restantes, los menos usados
+# por encima de ``MANUAL_JOBS_MAX``. Cada lectura del estado renueva el uso.
+
+MANUAL_JOBS_PATH = os.getenv("MANUAL_JOBS_PATH") or ""
+MANUAL_JOBS_MAX = int(os.getenv("MANUAL_JOBS_MAX") or "200")
+MANUAL_JOBS_MAX_HORAS = float(os.getenv("MANUAL_JOBS_MAX_HORAS") or "24")
+
+MANUAL_JOBS_DIRNAME = "manual_jobs"
+STATE_FILENAME = "state.json"
+ASSETS_DIRNAME = "assets"
+MANUAL_STATE_CACHE_MAX = 64
+
+
+@dataclass
+class ManualEditorState:
+    job_id: str
+    sheet_mm: Dict[str, float]
+    sangrado_mm: float = 0.0
+    designs: List[str] = field(default_factory=list)
+    # ruta -> {"w_mm", "h_mm", "bleed_mm"} de la primera página
+    geometry: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    updated_at: float = 0.0
+
+    @property
+    def sheet_size(self) -> Tuple[float, float]:
+        return float(self.sheet_mm["w"]), float(self.sheet_mm["h"])
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ManualEditorState":
+        return cls(
+            job_id=str(data["job_id"]),
+            sheet_mm={"w": float(data["sheet_mm"]["w"]), "h": float(data["sheet_mm"]["h"])},
+            sangrado_mm=float(data.get("sangrado_mm") or 0.0),
+            designs=[str(p) for p in data.get("designs", [])],
+            geometry=dict(data.get("geometry") or {}),
+            updated_at=float(data.get("updated_at") or 0.0),
+        )
+
+
+_CACHE: "OrderedDict[str, Tuple[int, ManualEditorState]]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def manual_jobs_root() -> str:
+    """Carpeta de los trabajos; por defecto en ``instance/`` junto a ``static``."""
+    root = current_app.config.get("MANUAL_JOBS_PATH") or MANUAL_JOBS_PATH
+    if not root:
+        raiz = os.path.dirname(os.path.abspath(current_app.static_folder))
+        root = os.path.join(raiz, "instance", MANUAL_JOBS_DIRNAME)
+    os.makedirs(root, exist_ok=True)
+    return root
+
+
+def manual_job_dir(job_id: str | None) -> str | None:
+    token = safe_job_id(job_id)
+    if not token:
+        return None
+    return os.path.join(manual_jobs_root(), token)
+
+
+def _geometry(path: str) -> Dict[str, float]:
+    try:
+        geo = pdf_geometry(path)
+    except Exception:
+        return {}
+    w_mm, h_mm = geo.size_mm()
+    return {"w_mm": round(w_mm, 3), "h_mm": round(h_mm, 3), "bleed_mm": round(geo.bleed_mm, 3)}
+
+
+def _write_state(state: ManualEditorState) -> int:
+    """Escribe ``state.json`` de forma atómica y devuelve su mtime."""
+    job_dir = manual_job_dir(state.job_id)
+    os.makedirs(job_dir, exist_ok=True)
+    path = os.path.join(job_dir, STATE_FILENAME)
+    fd, tmp_path = tempfile.mkstemp(dir=job_dir, prefix=".state-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fh:
+            json.dump(state.to_dict(), fh, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return os.stat(path).st_mtime_ns
+
+
+def _remember(state: ManualEditorState, mtime_ns: int) -> None:
+    with _CACHE_LOCK:
+        _CACHE[state.job_id] = (mtime_ns, state)
+        _CACHE.move_to_end(state.job_id)
+        while len(_CACHE) > MANUAL_STATE_CACHE_MAX:
+            _CACHE.popitem(last=False)
+
+
+def _touch(job_dir: str) -> None:
+    # El mtime de la carpeta marca el último uso; state.json no se toca para
+    # no invalidar la LRU de los otros workers.
+    try:
+        os.utime(job_dir)
+    except OSError:
+        pass
+
+
+def purge_manual_jobs(ahora: float | None = None) -> List[str]:
+    """Borra los trabajos vencidos o sobrantes y devuelve sus tokens."""
+    root = manual_jobs_root()
+    max_jobs = int(current_app.config.get("MANUAL_JOBS_MAX", MANUAL_JOBS_MAX))
+    max_horas = float(current_app.config.get("MANUAL_JOBS_MAX_HORAS", MANUAL_JOBS_MAX_HORAS))
+    limite = (time.time() if ahora is None else ahora) - max_horas * 3600
+    trabajos = []
+    with os.scandir(root) as entradas:
+        for entrada in entradas:
+            if entrada.is_dir(follow_symlinks=False) and safe_job_id(entrada.name) == entrada.name:
+                try:
+                    trabajos.append((entrada.stat().st_mtime, entrada.name))
+                except OSError:
+                    continue
+    trabajos.sort(reverse=True)
+    borrar = [job for i, (mtime, job) in enumerate(trabajos) if mtime < limite or i >= max(max_jobs, 0)]
+    for job in borrar:
+        shutil.rmtree(os.path.join(root, job), ignore_errors=True)
+    if borrar:
+        with _CACHE_LOCK:
+            for job in borrar:
+                _CACHE.pop(job, None)
+    return borrar
+
+
+def create_manual_state(
+    sheet_mm: Dict[str, float],
+    sangrado_mm: float,
+    design_paths: Iterable[str],
+) -> ManualEditorState:
+    """Crea el estado de un montaje nuevo y copia sus PDFs al trabajo.
+
+    La copia evita que una subida posterior con el mismo nombre en la carpeta
+    compartida de uploads cambie los diseños de un editor ya abierto. Antes
+    de crearlo se purgan los trabajos vencidos (ver :func:`purge_manual_jobs`).
+    """
+    purge_manual_jobs()
+    job_id = uuid.uuid4().hex
+    assets_dir = os.path.join(manual_job_dir(job_id), ASSETS_DIRNAME)
+    os.makedirs(assets_dir, exist_ok=True)
+    designs: List[str] = []
+    for idx, src in enumerate(design_paths):
+        nombre = secure_filename(os.path.basename(src)) or f"diseno_{idx}.pdf"
+        if nombre in {os.path.basename(d) for d in designs}:
+            nombre = f"{idx}_{nombre}"
+        dest = os.path.join(assets_dir, nombre)
+        shutil.copyfile(src, dest)
+        designs.append(dest)
+    state = ManualEditorState(
+        job_id=job_id,
+        sheet_mm={"w": float(sheet_mm["w"]), "h": float(sheet_mm["h"])},
+        sangrado_mm=float(sangrado_mm or 0.0),
+        designs=designs,
+        geometry={path: _geometry(path) for path in designs},
+        updated_at=time.time(),
+    )
+    _remember(state, _write_state(state))
+    return state
+
+
+def save_manual_state(state: ManualEditorState) -> None:
+    state.updated_at = time.time()
+    _remember(state, _write_state(state))
+
+
+def load_manual_state(job_id: str | None) -> ManualEditorState | None:
+    """Estado del trabajo o ``None`` si el token es inválido o no existe.
+
+    El archivo en disco manda: si otro worker lo reescribió (mtime distinto)
+    la entrada en memoria se descarta y se vuelve a leer.
+    """
+    token = safe_job_id(job_id)
+    if not token:
+        return None
+    job_dir = manual_job_dir(token)
+    path = os.path.join(job_dir, STATE_FILENAME)
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    _touch(job_dir)
+    with _CACHE_LOCK:
+        cached = _CACHE.get(token)
+        if cached is not None and cached[0] == mtime_ns:
+            _CACHE.move_to_end(token)
+            _stats["hits"] += 1
+            return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            state = ManualEditorState.from_dict(json.load(fh))
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    with _CACHE_LOCK:
+        _stats["misses"] += 1
+    _remember(state, mtime_ns)
+    return state
+
+
+def manual_state_stats() -> dict:
+    with _CACHE_LOCK:
+        return {**_stats, "entries": len(_CACHE)}
+
+
+def clear_manual_state_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+        _stats["hits"] = _stats["misses"] = 0
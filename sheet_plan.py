@@ -0,0 +1,200 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, field, replace
+from typing import Any, Dict, List, Sequence, Tuple
+
+from montaje_offset_inteligente import (
+    MontajeConfig,
+    montar_pliego_offset_inteligente,
+    resolver_estrategia,
+)
+from raster_cache import file_digest
+
+# Planificación de un pliego offset separada de su salida.
+#
+# ``plan_sheet`` resuelve la estrategia y calcula solo la geometría (posiciones,
+# sobrantes y aprovechamiento) sin rasterizar ni escribir archivos; el resultado
+# se memoiza por un hash de los PDFs (contenido) y de los campos de
+# ``MontajeConfig`` que afectan a la geometría. ``render_sheet`` toma ese plan y
+# genera la vista previa o el PDF final, de modo que la secuencia preview →
+# final de ``/montaje_offset_inteligente`` calcula las posiciones una sola vez.
+
+SHEET_PLAN_CACHE_MAX = 64
+MODOS_RENDER = ("preview", "pdf")
+
+# Campos de ``MontajeConfig`` que solo afectan a la salida, no a las posiciones.
+CAMPOS_SOLO_RENDER = frozenset(
+    {
+        "es_pdf_final",
+        "preview_path",
+        "preview_job",
+        "output_path",
+        "resumen_path",
+        "devolver_posiciones",
+        "export_compat",
+        "export_area_util",
+        "output_mode",
+        "agregar_marcas",
+        "marcas_registro",
+        "marcas_corte",
+        "cutmarks_por_forma",
+        "debug_grilla",
+    }
+)
+
+
+@dataclass(frozen=True)
+class SheetPlan:
+    """Geometría de un pliego lista para renderizar.
+
+    ``posiciones`` y ``sobrantes`` están en el formato interno del montador
+    (``x``/``y``/``ancho``/``alto`` en mm, origen abajo a la izquierda) y ya
+    centradas; no deben modificarse porque el plan se comparte desde la caché.
+    """
+
+    key: str
+    disenos: Tuple[Tuple[str, int], ...]
+    ancho_mm: float
+    alto_mm: float
+    estrategia: str
+    posiciones: Tuple[Dict[str, Any], ...]
+    sobrantes: Tuple[Dict[str, Any], ...]
+    colocados: int
+    total: int
+    uso_pct: float
+    ranking: Tuple[Dict[str, Any], ...] = ()
+    config: MontajeConfig | None = field(default=None, compare=False, repr=False)
+
+    @property
+    def sheet_mm(self) -> Dict[str, float]:
+        return {"w": self.ancho_mm, "h": self.alto_mm}
+
+    def positions(self) -> List[Dict[str, Any]]:
+        """Posiciones normalizadas, igual que con ``devolver_posiciones``."""
+        return [
+            {
+                "file_idx": int(p["file_idx"]),
+                "archivo": p.get("archivo") or self.disenos[int(p["file_idx"])][0],
+                "ruta_pdf": p.get("archivo") or self.disenos[int(p["file_idx"])][0],
+                "x_mm": float(p["x"]),
+                "y_mm": float(p["y"]),
+                "w_mm": float(p["ancho"]),
+                "h_mm": float(p["alto"]),
+                "rot_deg": int(p.get("rot_deg", 0)) % 360,
+            }
+            for p in self.posiciones
+        ]
+
+
+_CACHE: "OrderedDict[str, SheetPlan]" = OrderedDict()
+_CACHE_LOCK = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def _como_tuplas(designs: Sequence[Any]) -> List[Tuple[str, int]]:
+    """Acepta ``Diseno`` o tuplas ``(ruta, copias)``; descarta copias <= 0."""
+    disenos: List[Tuple[str, int]] = []
+    for d in designs:
+        ruta, copias = (d.ruta, d.cantidad) if hasattr(d, "ruta") else d
+        if int(copias) > 0:
+            disenos.append((ruta, int(copias)))
+    return disenos
+
+
+def plan_key(designs: Sequence[Any], config: MontajeConfig) -> str:
+    """Hash de las entradas que determinan la geometría del pliego."""
+    geometria = {k: v for k, v in asdict(config).items() if k not in CAMPOS_SOLO_RENDER}
+    payload = {
+        "disenos": [
+            [os.path.abspath(ruta), file_digest(ruta), copias] for ruta, copias in _como_tuplas(designs)
+        ],
+        "config": geometria,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def plan_sheet(designs: Sequence[Any], config: MontajeConfig) -> SheetPlan:
+    """Calcula (o recupera de la caché) la geometría del pliego."""
+    disenos = _como_tuplas(designs)
+    if not disenos:
+        raise ValueError("Se requieren al menos una copia de algún diseño")
+    key = plan_key(disenos, config)
+    with _CACHE_LOCK:
+        plan = _CACHE.get(key)
+        if plan is not None:
+            _CACHE.move_to_end(key)
+            _stats["hits"] += 1
+            return plan
+
+    from strategies import get_strategy
+
+    estrategia, ranking = resolver_estrategia(disenos, config)
+    config_plan = replace(config, estrategia=estrategia)
+    geometria = get_strategy(estrategia).planificar(disenos, config_plan)
+    ancho_mm, alto_mm = config.tamano_pliego
+    plan = SheetPlan(
+        key=key,
+        disenos=tuple(disenos),
+        ancho_mm=float(ancho_mm),
+        alto_mm=float(alto_mm),
+        estrategia=estrategia,
+        posiciones=tuple(geometria["posiciones"]),
+        sobrantes=tuple(geometria["sobrantes"]),
+        colocados=int(geometria["colocados"]),
+        total=int(geometria["total"]),
+        uso_pct=float(geometria["uso_pct"]),
+        ranking=tuple(ranking),
+        config=config_plan,
+    )
+    with _CACHE_LOCK:
+        _stats["misses"] += 1
+        _CACHE[key] = plan
+        while len(_CACHE) > SHEET_PLAN_CACHE_MAX:
+            _CACHE.popitem(last=False)
+    return plan
+
+
+def render_sheet(plan: SheetPlan, mode: str = "pdf", config: MontajeConfig | None = None):
+    """Genera la salida de ``plan`` sin recalcular posiciones.
+
+    ``mode`` es ``"preview"`` (PNG en ``config.preview_path`` o bytes + resumen
+    si no hay ruta) o ``"pdf"`` (PDF final en ``config.output_path``). Las
+    opciones de salida (marcas, compatibilidad, ``output_mode``...) se toman de
+    ``config``, o de la configuración con la que se planificó. Devuelve lo
+    mismo que ``montar_pliego_offset_inteligente``.
+    """
+    if mode not in MODOS_RENDER:
+        raise ValueError(f"Modo de render desconocido: {mode}")
+    config = replace(config or plan.config, estrategia=plan.estrategia, es_pdf_final=mode == "pdf")
+    disenos = list(plan.disenos)
+
+    from strategies import get_strategy
+    from strategies.common import build_call_args
+
+    if mode == "pdf" and plan.estrategia == "nesting_pro" and plan.colocados < plan.total:
+        # El plan describe un único pliego; el PDF final de nesting_pro reparte
+        # el pedido completo en varias páginas.
+        return get_strategy("nesting_pro").calcular(disenos, config, {})
+
+    ancho_pliego, alto_pliego, kwargs = build_call_args(config)
+    kwargs["posiciones_calculadas"] = {
+        "posiciones": list(plan.posiciones),
+        "sobrantes": list(plan.sobrantes),
+    }
+    if mode == "pdf":
+        kwargs["preview_path"] = None
+    return montar_pliego_offset_inteligente(disenos, ancho_pliego, alto_pliego, **kwargs)
+
+
+def sheet_plan_stats() -> dict:
+    with _CACHE_LOCK:
+        return {**_stats, "entries": len(_CACHE)}
+
+
+def clear_sheet_plans() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
+        _stats["hits"] = _stats["misses"] = 0
@@ -1,19 +1,226 @@
+import io
+import math
 import os
+from typing import Mapping
+
 import fitz
+import numpy as np
 from PIL import Image, ImageDraw
 
+# Ángulos clásicos de trama por tinta (grados) para evitar el moiré.
+ANGULOS_CMYK = {"C": 15.0, "M": 75.0, "Y": 0.0, "K": 45.0}
+
+# Canales RGB que absorbe cada tinta; el negro absorbe los tres.
+_ABSORCION = {"C": (0,), "M": (1,), "Y": (2,), "K": (0, 1, 2)}
+
+# Opacidad de los puntos de la trama simulada (20 %).
+_ALFA_TRAMA = int(0.2 * 255)
+
+# Área de un punto redondo de radio r recortado a la celda unitaria, para
+# pasar de cobertura (fracción del área) a radio del punto.
+_RADIOS = np.linspace(0.0, math.sqrt(0.5), 2049)
+_AREAS = np.pi * _RADIOS**2 - 4 * np.where(
+    _RADIOS > 0.5,
+    _RADIOS**2 * np.arccos(np.minimum(1.0, 0.5 / np.maximum(_RADIOS, 0.5)))
+    - 0.5 * np.sqrt(np.maximum(_RADIOS**2 - 0.25, 0.0)),
+    0.0,
+)
+
+# Colores de las advertencias en la exportación de la simulación.
+_COLORES_ADVERTENCIA = {
+    "texto_pequeno": {"stroke": (220, 53, 69, 230), "fill": (220, 53, 69, 46)},
+    "trama_debil": {"stroke": (128, 0, 128, 230), "fill": (128, 0, 128, 46)},
+    "imagen_baja": {"stroke": (255, 140, 0, 230), "fill": (255, 140, 0, 46)},
+    "overprint": {"stroke": (0, 123, 255, 230), "fill": (0, 123, 255, 46)},
+    "sin_sangrado": {"stroke": (0, 150, 0, 230), "fill": (0, 150, 0, 46)},
+    "default": {"stroke": (255, 193, 7, 230), "fill": (255, 193, 7, 46)},
+}
+
+
+def mascara_trama_puntos(alto: int, ancho: int, lpi) -> np.ndarray:
+    """Máscara booleana de la trama de puntos que simula la lineatura ``lpi``.
+
+    Los puntos se centran en una grilla de paso ``int(spacing)`` con radio
+    ``spacing / 2`` (más medio píxel, como cubre ``ImageDraw.ellipse`` su
+    caja inclusiva). La distancia al punto más cercano se separa por eje: para
+    cada columna y cada fila alcanza con la distancia al nodo de la grilla
+    anterior o siguiente (si cae dentro de la imagen), y la máscara sale de
+    sumar los cuadrados con broadcasting, sin dibujar punto por punto.
+    """
+    try:
+        lpi_val = float(lpi) if lpi else 1.0
+    except Exception:
+        lpi_val = 1.0
+    spacing = max(2, (600 / lpi_val) * 4)
+    radio = spacing / 2 + 0.5
+    paso = int(spacing)
+
+    def _distancia_eje(n: int) -> np.ndarray:
+        pos = np.arange(n, dtype=np.float32)
+        anterior = pos % paso
+        siguiente = np.where(pos - anterior + paso < n, paso - anterior, np.inf)
+        return np.minimum(anterior, siguiente) ** 2
+
+    return _distancia_eje(alto)[:, None] + _distancia_eje(ancho)[None, :] <= radio * radio
+
+
+def radio_punto(cobertura: float) -> float:
+    """Radio (en celdas) del punto redondo que entinta ``cobertura`` del área."""
+    return float(np.interp(min(1.0, max(0.0, cobertura)), _AREAS, _RADIOS))
+
 
-def generar_simulacion_avanzada(base_img_path, advertencias, lpi, output_path):
+def mascara_tinta(
+    alto: int, ancho: int, spacing: float, angulo: float, cobertura: float, desplazamiento: int = 0
+) -> np.ndarray:
+    """Píxeles entintados por una trama de puntos redondos rotada ``angulo``.
+
+    La función de punto se evalúa directo sobre la grilla de la imagen: cada
+    píxel se lleva a coordenadas de la trama rotada (en celdas) y se entinta
+    si su distancia al centro de celda más cercano es menor que el radio que
+    da ``cobertura``. Las coordenadas salen de sumar dos vectores 1D con
+    broadcasting, así que el costo es lineal en píxeles y no depende del
+    ángulo ni de la lineatura.
+    """
+    radio = radio_punto(cobertura)
+    rad = math.radians(angulo)
+    cos, sin = np.float32(math.cos(rad) / spacing), np.float32(math.sin(rad) / spacing)
+    filas = np.arange(alto, dtype=np.float32)[:, None] + np.float32(desplazamiento)
+    columnas = np.arange(ancho, dtype=np.float32)[None, :] + np.float32(desplazamiento)
+    u = columnas * cos + filas * sin
+    u -= np.rint(u)
+    v = filas * cos - columnas * sin
+    v -= np.rint(v)
+    u *= u
+    v *= v
+    u += v
+    return u < np.float32(radio * radio)
+
+
+def renderizar_tramado(
+    base,
+    cobertura: Mapping[str, float],
+    spacing: float,
+    densidad: float,
+    angulo_base: float = 0.0,
+    desplazamiento: int = 0,
+    angulos: Mapping[str, float] | None = None,
+) -> np.ndarray:
+    """Simula la impresión tramada de ``base`` con puntos CMYK por canal.
+
+    ``cobertura`` va de 0 a 1 por tinta (``C``, ``M``, ``Y``, ``K``); cada
+    tinta usa su propio ángulo (``ANGULOS_CMYK`` + ``angulo_base``) y su
+    máscara de :func:`mascara_tinta`. ``densidad`` es la opacidad de la
+    tinta: donde hay punto, los canales RGB que absorbe se multiplican por
+    ``1 - densidad``. Devuelve el raster RGB ``uint8`` resultante.
+    """
+    rgb = np.asarray(_imagen_rgb(base))
+    alto, ancho = rgb.shape[:2]
+    transmision = np.ones((alto, ancho, 3), dtype=np.float32)
+    for canal, angulo in (ANGULOS_CMYK if angulos is None else angulos).items():
+        valor = min(1.0, max(0.0, float(cobertura.get(canal) or 0.0)))
+        if valor <= 0:
+            continue
+        tinta = mascara_tinta(alto, ancho, spacing, angulo + angulo_base, valor, desplazamiento)
+        factor = np.where(tinta, np.float32(1.0 - densidad), np.float32(1.0))
+        for idx in _ABSORCION[canal]:
+            transmision[..., idx] *= factor
+    return np.rint(rgb * transmision).astype(np.uint8)
+
+
+def parametros_trama(lpi, bcm, paso, cobertura_total: float) -> dict:
+    """Lineatura, densidad, ángulo y sombra de la simulación interactiva.
+
+    Replica las fórmulas de ``static/js/flexo_simulation.js`` para que la
+    exportación coincida con lo que muestran los sliders.
+    """
+    spacing = max(6.0, max(2.5, (540.0 / max(lpi or 0.0, 40.0)) * 3.0))
+    bcm_factor = min(1.2, (bcm or 0.0) / 12.0)
+    coverage_factor = max(0.05, min(1.0, cobertura_total / 300.0))
+    densidad = min(0.9, 0.12 + coverage_factor * (0.6 + bcm_factor))
+    return {
+        "spacing": spacing,
+        "densidad": densidad,
+        "desplazamiento": int(round(((paso or 0.0) % spacing) / 2.0)),
+        "angulo": math.degrees(math.sin((paso or 0.0) / 90.0)),
+        "sombra": max(0.0, min(1.0, densidad * 0.3)),
+    }
+
+
+def simulacion_png(base, cobertura: Mapping[str, float], lpi, bcm, paso, advertencias=None) -> bytes:
+    """PNG de la simulación de impresión que exporta ``/simulacion/exportar``.
+
+    ``cobertura`` va en porcentaje (0..100+) por tinta. Aplica la trama CMYK
+    con los parámetros de :func:`parametros_trama`, la sombra de densidad y
+    los recuadros de ``advertencias`` (bbox en píxeles de ``base``).
+    """
+    imagen = _imagen_rgb(base)
+    ancho, alto = imagen.size
+    total = sum(max(0.0, float(v or 0.0)) for v in cobertura.values())
+    overlay = Image.new("RGBA", (ancho, alto), (0, 0, 0, 0))
+    if total > 0 and ancho > 0 and alto > 0:
+        trama = parametros_trama(lpi, bcm, paso, total)
+        tramado = renderizar_tramado(
+            imagen,
+            {canal: (cobertura.get(canal, 0.0) or 0.0) / 100.0 for canal in "CMYK"},
+            spacing=trama["spacing"],
+            densidad=trama["densidad"],
+            angulo_base=trama["angulo"],
+            desplazamiento=trama["desplazamiento"],
+        )
+        imagen = Image.fromarray(tramado, "RGB")
+        if trama["sombra"] > 0:
+            overlay.paste((20, 40, 60, int(round(trama["sombra"] * 255))), (0, 0, ancho, alto))
+
+    draw = ImageDraw.Draw(overlay)
+    for adv in advertencias or []:
+        bbox = (adv.get("bbox") or adv.get("box")) if isinstance(adv, dict) else None
+        if not isinstance(bbox, (list, tuple)) or len(bbox) != 4:
+            continue
+        try:
+            x0, y0, x1, y1 = [float(v) for v in bbox]
+        except (TypeError, ValueError):
+            continue
+        tipo = str(adv.get("tipo") or adv.get("type") or "").lower()
+        colores = _COLORES_ADVERTENCIA.get(
+            "trama_debil" if tipo.startswith("trama") else tipo, _COLORES_ADVERTENCIA["default"]
+        )
+        draw.rectangle([(x0, y0), (x1, y1)], fill=colores["fill"], outline=colores["stroke"], width=2)
+
+    resultado = imagen.convert("RGBA")
+    resultado.alpha_composite(overlay)
+    salida = io.BytesIO()
+    resultado.save(salida, format="PNG", compress_level=1)
+    return salida.getvalue()
+
+
+def _imagen_rgb(base) -> Image.Image:
+    if isinstance(base, Image.Image):
+        return base.convert("RGB")
+    if isinstance(base, np.ndarray):
+        return Image.fromarray(base, "RGB")
+    return Image.open(base).convert("RGB")
+
+
+def generar_simulacion_avanzada(base_img, advertencias, lpi, output_path):
     """Genera una imagen PNG con la simulación avanzada.
 
     Se superpone la imagen base con las advertencias marcadas y un patrón de
     puntos para simular la lineatura especificada. El resultado se guarda en
     ``output_path``.
+
+    ``base_img`` puede ser una ruta, una imagen de Pillow o el raster RGB
+    ``uint8`` ya renderizado (por ejemplo ``RevisionRender.rgb``), para no
+    volver a leer la vista previa desde disco.
     """
 
-    base = Image.open(base_img_path).convert("RGBA")
-    overlay = Image.new("RGBA", base.size, (0, 0, 0, 0))
-    draw = ImageDraw.Draw(overlay, "RGBA")
+    base = np.asarray(_imagen_rgb(base_img))
+    alto, ancho = base.shape[:2]
+    # Puntos negros al 20 % compuestos de una vez sobre el raster, con el mismo
+    # redondeo que ``Image.alpha_composite``.
+    mascara = mascara_trama_puntos(alto, ancho, lpi)
+    sombreado = ((base.astype(np.uint16) * (255 - _ALFA_TRAMA) + 127) // 255).astype(np.uint8)
+    compuesto = Image.fromarray(np.where(mascara[..., None], sombreado, base), "RGB")
+    draw = ImageDraw.Draw(compuesto)
 
     colores = {
         "texto_pequeno": "red",
@@ -31,20 +238,6 @@ def generar_simulacion_avanzada(base_img_path, advertencias, lpi, output_path):
         color = colores.get(adv.get("tipo"), "red")
         draw.rectangle([x0, y0, x1, y1], outline=color, width=2)
 
-    try:
-        lpi_val = float(lpi) if lpi else 1.0
-    except Exception:
-        lpi_val = 1.0
-    spacing = max(2, (600 / lpi_val) * 4)
-    radius = spacing / 2
-    step = int(spacing)
-    alpha = int(0.2 * 255)
-    width, height = base.size
-    for y in range(0, height, step):
-        for x in range(0, width, step):
-            draw.ellipse((x - radius, y - radius, x + radius, y + radius), fill=(0, 0, 0, alpha))
-
-    compuesto = Image.alpha_composite(base, overlay).convert("RGB")
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     compuesto.save(output_path, "PNG")
     return output_path
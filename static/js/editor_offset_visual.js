@@ -545,7 +545,7 @@
 
     if (outputModeSelect) {
       const selected = outputModeSelect.value || 'raster';
-      const allowedModes = ['raster', 'vector_hybrid'];
+      const allowedModes = ['raster', 'vector_hybrid', 'vector'];
       state.layout.export_settings.output_mode = allowedModes.includes(selected)
         ? selected
         : 'raster';
@@ -2336,8 +2336,27 @@
       renderSheet();
       renderFaceToggle();
       pushHistory();
+      notifyNestingPlan(state.layout.nesting_plan);
     }
   }
+
+  function notifyNestingPlan(plan) {
+    if (!plan) return;
+    const unplaced = Array.isArray(plan.unplaced) ? plan.unplaced : [];
+    if ((plan.sheet_count || 0) <= 1 && unplaced.length === 0) return;
+    const lines = [];
+    if (plan.sheet_count > 1) {
+      lines.push(
+        `El pedido necesita ${plan.sheet_count} pliegos (${(plan.per_sheet || []).join(' + ')} formas). `
+          + 'El editor muestra el pliego 1.',
+      );
+    }
+    unplaced.forEach((item) => {
+      const motivo = item.reason === 'too_large' ? 'no entra en el pliego' : 'superó el máximo de pliegos';
+      lines.push(`${item.design_ref}: ${item.count} forma(s) sin colocar (${motivo}).`);
+    });
+    alert(lines.join('\n'));
+  }
   function formatAiResponse(data) {
     return aiPanel.formatResponse(data);
   }
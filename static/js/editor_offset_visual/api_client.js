@@ -61,6 +61,37 @@
     return { ok: res.ok, data };
   }
 
+  async function submitRender(jobId, kind) {
+    const res = await fetch(`/editor_offset/render/${jobId}/${kind}`, { method: 'POST' });
+    const data = await res.json();
+    return { ok: res.ok, data };
+  }
+
+  async function renderStatus(statusUrl) {
+    const res = await fetch(statusUrl, { cache: 'no-store' });
+    const data = await res.json();
+    return { ok: res.ok, data };
+  }
+
+  async function renderInBackground(jobId, kind, onProgress, intervalMs = 800, maxWaitMs = 15 * 60 * 1000) {
+    const submitted = await submitRender(jobId, kind);
+    if (!submitted.ok || submitted.data.ok === false) return submitted;
+    let data = submitted.data;
+    const deadline = Date.now() + maxWaitMs;
+    while (data.status === 'queued' || data.status === 'running') {
+      if (Date.now() > deadline) {
+        return { ok: false, data: { ...data, ok: false, error: 'La generación tardó demasiado.' } };
+      }
+      if (onProgress) onProgress(data);
+      await new Promise((resolve) => setTimeout(resolve, intervalMs));
+      const polled = await renderStatus(data.status_url);
+      if (!polled.ok) return polled;
+      data = polled.data;
+    }
+    if (onProgress) onProgress(data);
+    return { ok: data.status === 'done', data };
+  }
+
   async function uploadDesigns(jobId, files, workId) {
     const body = new FormData();
     for (const file of files) body.append('files', file);
@@ -79,6 +110,9 @@
     simulateBooklet,
     requestPreview,
     requestPdf,
+    submitRender,
+    renderStatus,
+    renderInBackground,
     uploadDesigns,
   };
 })();
@@ -7,6 +7,13 @@
       .concat((data.warnings || []).map((item) => `- Warning: ${item.message}`));
   }
 
+  function showProgress(ctx, label, data) {
+    if (!ctx.pdfOutput) return;
+    const pct = Math.round((data.progress || 0) * 100);
+    const message = data.message ? ` · ${data.message}` : '';
+    ctx.pdfOutput.textContent = `${label}: ${pct}%${message}`;
+  }
+
   async function requestPreview(ctx) {
     if (!ctx.state.layout.slots || ctx.state.layout.slots.length === 0) {
       alert('No hay slots en el pliego. Crea o genera los cuadros antes de generar la preview/PDF.');
@@ -20,7 +27,9 @@
       );
     }
     await ctx.saveLayout();
-    const result = await window.EditorOffsetVisual.apiClient.requestPreview(ctx.jobId);
+    const result = await window.EditorOffsetVisual.apiClient.renderInBackground(ctx.jobId, 'preview', (data) =>
+      showProgress(ctx, 'Preview', data),
+    );
     const data = result.data;
     if (!result.ok || data.ok === false) {
       alert([data.error || 'No se pudo generar la preview.', ...buildDetails(data)].join('\n'));
@@ -47,7 +56,9 @@
       );
     }
     await ctx.saveLayout();
-    const result = await window.EditorOffsetVisual.apiClient.requestPdf(ctx.jobId);
+    const result = await window.EditorOffsetVisual.apiClient.renderInBackground(ctx.jobId, 'pdf', (data) =>
+      showProgress(ctx, 'PDF', data),
+    );
     const data = result.data;
     if (!result.ok || data.ok === false) {
       alert([data.error || 'No se pudo generar el PDF final.', ...buildDetails(data)].join('\n'));
@@ -26,6 +26,13 @@
 
   if (!overlay || !img || !stage || !viewport) return;
 
+  // Token del montaje: el servidor guarda pliego, sangrado y PDFs por trabajo.
+  const manualJob = window.__manualJob || null;
+  // Identificador de la vista previa incremental: el servidor conserva el
+  // lienzo de este editor y solo repinta las formas que se movieron.
+  const previewJob = Array.from(crypto.getRandomValues(new Uint8Array(12)), b => b.toString(16).padStart(2, '0')).join('');
+  let livePreviewTimer = null;
+  let livePreviewCtrl = null;
 
   const toNum = (v, def=0) => {
     const n = Number(v);
@@ -383,7 +390,7 @@
 
   window.addEventListener('mouseup', () => {
     if (state.drag) {
-      if (state.drag.moved) pushHistory();
+      if (state.drag.moved) { pushHistory(); scheduleLivePreview(); }
       state.drag = null;
       state.snapGuides = {x:[], y:[]};
       repaint();
@@ -626,6 +633,43 @@
     return payload;
   }
 
+  function scheduleLivePreview() {
+    clearTimeout(livePreviewTimer);
+    livePreviewTimer = setTimeout(refreshLivePreview, 120);
+  }
+
+  // Vista previa rápida tras soltar un arrastre: solo actualiza la imagen,
+  // no toca las cajas ni el historial (eso lo hace applyManual).
+  async function refreshLivePreview() {
+    let positions;
+    try {
+      positions = buildPayload();
+    } catch (e) {
+      return;
+    }
+    livePreviewCtrl?.abort();
+    livePreviewCtrl = new AbortController();
+    try {
+      const res = await fetch('/api/manual/preview', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        signal: livePreviewCtrl.signal,
+        body: JSON.stringify({
+          positions,
+          manual_job: manualJob,
+          preview_job: previewJob,
+          export_compat: exportCompatSelect?.value || ''
+        })
+      });
+      const json = await res.json();
+      if (res.ok && !json.error && json.preview_path) {
+        img.src = json.preview_path + '?v=' + Date.now();
+      }
+    } catch (e) {
+      if (e.name !== 'AbortError') console.warn('live preview failed:', e);
+    }
+  }
+
   async function applyManual() {
     try {
       const positions = buildPayload();
@@ -634,6 +678,8 @@
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           positions,
+          manual_job: manualJob,
+          preview_job: previewJob,
           export_compat: exportCompatSelect?.value || ''
         })
       });
@@ -683,6 +729,7 @@
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           positions,
+          manual_job: manualJob,
           export_compat: exportCompatSelect?.value || ''
         })
       });
@@ -1,7 +1,14 @@
 from typing import Any, Dict, List, Tuple
 
+from montaje_offset_inteligente import montar_pliego_offset_inteligente
+
+from .common import build_call_args
+
 
 class BaseMontajeStrategy:
+    # Valor de ``estrategia`` con el que se llama al montador.
+    estrategia = "flujo"
+
     def calcular(
         self,
         disenos: List[Tuple[str, int]],
@@ -13,3 +20,14 @@ class BaseMontajeStrategy:
         'montar_pliego_offset_inteligente' para generar preview o PDF.
         """
         raise NotImplementedError()
+
+    def argumentos(self, disenos: List[Tuple[str, int]], config) -> Dict[str, Any]:
+        """Argumentos propios de la estrategia para el montador."""
+        return {"estrategia": self.estrategia}
+
+    def planificar(self, disenos: List[Tuple[str, int]], config) -> Dict[str, Any]:
+        """Solo la fase de posiciones (ver ``solo_posiciones``), sin render."""
+        ancho_pliego, alto_pliego, kwargs = build_call_args(config)
+        kwargs.update(self.argumentos(disenos, config))
+        kwargs.update(solo_posiciones=True, preview_path=None, resumen_path=None)
+        return montar_pliego_offset_inteligente(disenos, ancho_pliego, alto_pliego, **kwargs)
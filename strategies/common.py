@@ -55,6 +55,8 @@ def build_call_args(config: MontajeConfig) -> Tuple[float, float, Dict[str, Any]
         "export_compat": config.export_compat,
         "ctp_config": config.ctp_config,
         "output_mode": config.output_mode,
+        "maxrects_heuristica": config.maxrects_heuristica,
+        "preview_job": config.preview_job,
     }
 
     return float(ancho_pliego), float(alto_pliego), kwargs
@@ -7,6 +7,8 @@ from .common import build_call_args
 
 
 class FlowStrategy(BaseMontajeStrategy):
+    estrategia = "flujo"
+
     def calcular(
         self,
         disenos: List[Tuple[str, int]],
@@ -14,5 +16,5 @@ class FlowStrategy(BaseMontajeStrategy):
         meta: Dict[str, Any],
     ) -> Dict[str, Any]:
         ancho_pliego, alto_pliego, kwargs = build_call_args(config)
-        kwargs["estrategia"] = "flujo"
+        kwargs.update(self.argumentos(disenos, config))
         return montar_pliego_offset_inteligente(disenos, ancho_pliego, alto_pliego, **kwargs)
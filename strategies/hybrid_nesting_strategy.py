@@ -107,6 +107,13 @@ def _slots_to_posiciones(slots: List[Dict[str, Any]], bleed_default: float) -> L
 
 
 class HybridNestingStrategy(BaseMontajeStrategy):
+    def argumentos(self, disenos: List[Tuple[str, int]], config) -> Dict[str, Any]:
+        layout = _build_nesting_layout(disenos, config)
+        nesting_result = compute_nesting(layout)
+        repeated_slots = _repeat_pattern(nesting_result.slots, nesting_result.bbox, config)
+        posiciones = _slots_to_posiciones(repeated_slots, float(config.sangrado or 0.0))
+        return {"estrategia": "manual", "posiciones_override": posiciones}
+
     def calcular(
         self,
         disenos: List[Tuple[str, int]],
@@ -114,11 +121,5 @@ class HybridNestingStrategy(BaseMontajeStrategy):
         meta: Dict[str, Any],
     ) -> Dict[str, Any]:
         ancho_pliego, alto_pliego, kwargs = build_call_args(config)
-        layout = _build_nesting_layout(disenos, config)
-        nesting_result = compute_nesting(layout)
-        repeated_slots = _repeat_pattern(nesting_result.slots, nesting_result.bbox, config)
-        posiciones = _slots_to_posiciones(repeated_slots, float(config.sangrado or 0.0))
-
-        kwargs["estrategia"] = "manual"
-        kwargs["posiciones_override"] = posiciones
+        kwargs.update(self.argumentos(disenos, config))
         return montar_pliego_offset_inteligente(disenos, ancho_pliego, alto_pliego, **kwargs)
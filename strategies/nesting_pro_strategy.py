@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import logging
+import os
 from typing import Any, Dict, List, Tuple
 
-from engines.nesting_pro_engine import compute_nesting
+from engines.nesting_pro_engine import compute_nesting_sheets
 from montaje_offset_inteligente import obtener_dimensiones_pdf, montar_pliego_offset_inteligente
+from pdf_compat import apply_pdf_compat
+from utils import combinar_pdfs
 
 from .base import BaseMontajeStrategy
 from .common import build_call_args
 
+logger = logging.getLogger(__name__)
+
 
 def _build_nesting_layout(disenos: List[Tuple[str, int]], config) -> Dict:
     ancho_pliego, alto_pliego, _ = build_call_args(config)
@@ -66,7 +72,76 @@ def _slots_to_posiciones(slots: List[Dict[str, Any]], bleed_default: float) -> L
     return posiciones
 
 
+def _ruta_resultado(resultado) -> str | None:
+    if isinstance(resultado, str):
+        return resultado
+    if isinstance(resultado, dict):
+        return resultado.get("output_path")
+    return None
+
+
+def _montar_pliegos(
+    disenos: List[Tuple[str, int]],
+    ancho_pliego: float,
+    alto_pliego: float,
+    kwargs: Dict[str, Any],
+    pliegos: List[List[Dict[str, Any]]],
+):
+    """Monta cada pliego por separado y los une en un PDF de varias páginas.
+
+    La compatibilidad de exportación (PDF/X-1a, Adobe) se aplica una sola vez
+    sobre el PDF unido: ``insert_pdf`` no conserva el output intent.
+    """
+    output_path = kwargs.get("output_path") or "output/pliego_offset_inteligente.pdf"
+    export_compat = kwargs.get("export_compat")
+    base, ext = os.path.splitext(output_path)
+    primero = None
+    partes: List[str] = []
+    try:
+        for idx, posiciones in enumerate(pliegos):
+            kw = dict(
+                kwargs,
+                posiciones_override=posiciones,
+                output_path=f"{base}_pliego{idx + 1}{ext or '.pdf'}",
+                export_compat=None,
+            )
+            if idx:
+                kw["preview_path"] = None
+                kw["resumen_path"] = None
+            resultado = montar_pliego_offset_inteligente(disenos, ancho_pliego, alto_pliego, **kw)
+            if primero is None:
+                primero = resultado
+            ruta = _ruta_resultado(resultado)
+            if ruta:
+                partes.append(ruta)
+
+        combinar_pdfs(partes, output_path)
+    finally:
+        for ruta in partes:
+            if os.path.abspath(ruta) != os.path.abspath(output_path) and os.path.exists(ruta):
+                os.remove(ruta)
+
+    if export_compat:
+        try:
+            output_path = apply_pdf_compat(output_path, export_compat) or output_path
+        except Exception as e:
+            logger.warning("PDF compat post-process failed: %s", e)
+
+    if isinstance(primero, dict):
+        return {**primero, "output_path": output_path}
+    return output_path
+
+
 class NestingProStrategy(BaseMontajeStrategy):
+    def argumentos(self, disenos: List[Tuple[str, int]], config) -> Dict[str, Any]:
+        # Para comparar estrategias cuenta solo el primer pliego del plan.
+        plan = compute_nesting_sheets(_build_nesting_layout(disenos, config))
+        slots = plan.sheets[0].slots if plan.sheets else []
+        return {
+            "estrategia": "manual",
+            "posiciones_override": _slots_to_posiciones(slots, float(config.sangrado or 0.0)),
+        }
+
     def calcular(
         self,
         disenos: List[Tuple[str, int]],
@@ -75,9 +150,19 @@ class NestingProStrategy(BaseMontajeStrategy):
     ) -> Dict[str, Any]:
         ancho_pliego, alto_pliego, kwargs = build_call_args(config)
         layout = _build_nesting_layout(disenos, config)
-        nesting_result = compute_nesting(layout)
-        posiciones = _slots_to_posiciones(nesting_result.slots, float(config.sangrado or 0.0))
+        plan = compute_nesting_sheets(layout)
+        meta["nesting_plan"] = plan.summary()
+        bleed_default = float(config.sangrado or 0.0)
+        pliegos = [_slots_to_posiciones(sheet.slots, bleed_default) for sheet in plan.sheets] or [[]]
 
         kwargs["estrategia"] = "manual"
-        kwargs["posiciones_override"] = posiciones
-        return montar_pliego_offset_inteligente(disenos, ancho_pliego, alto_pliego, **kwargs)
+        if len(pliegos) > 1 and config.es_pdf_final:
+            # Un pedido que no entra en un pliego sale como PDF de varias
+            # páginas, una por pliego; la preview sigue mostrando el primero.
+            resultado = _montar_pliegos(disenos, ancho_pliego, alto_pliego, kwargs, pliegos)
+        else:
+            kwargs["posiciones_override"] = pliegos[0]
+            resultado = montar_pliego_offset_inteligente(disenos, ancho_pliego, alto_pliego, **kwargs)
+        if isinstance(resultado, dict):
+            resultado["nesting_plan"] = meta["nesting_plan"]
+        return resultado
@@ -0,0 +1,121 @@
+import sys
+import time
+from pathlib import Path
+
+import fitz
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import ai_strategy_selector as selector
+from ai_strategy_selector import complejidad_corte, evaluar_estrategias, seleccionar_estrategia_auto
+from montaje_offset_inteligente import Diseno, MontajeConfig, obtener_dimensiones_pdf, realizar_montaje_inteligente
+
+MM = 72 / 25.4
+
+
+def _pdf(path, w_mm, h_mm):
+    doc = fitz.open()
+    doc.new_page(width=w_mm * MM, height=h_mm * MM)
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def disenos(tmp_path):
+    return [
+        (_pdf(tmp_path / "a.pdf", 90, 50), 6),
+        (_pdf(tmp_path / "b.pdf", 60, 60), 4),
+        (_pdf(tmp_path / "c.pdf", 40, 25), 10),
+    ]
+
+
+def test_complejidad_corte_premia_la_grilla():
+    grilla = [(x * 10, y * 10, 10, 10) for x in range(4) for y in range(4)]
+    dispersas = [(i * 13, i * 7, 10, 10) for i in range(16)]
+    assert complejidad_corte(grilla) < complejidad_corte(dispersas) == 1.0
+    assert complejidad_corte([]) == 0.0
+
+
+def test_evalua_sin_renderizar(disenos, monkeypatch):
+    for ruta, _ in disenos:
+        obtener_dimensiones_pdf(ruta)
+
+    def _no_abrir(*a, **k):
+        raise AssertionError("la evaluación no debe abrir ni rasterizar PDFs")
+
+    monkeypatch.setattr(fitz, "open", _no_abrir)
+    config = MontajeConfig(tamano_pliego=(320, 450), separacion=3)
+
+    ranking = evaluar_estrategias(disenos, config)
+
+    assert {r["estrategia"] for r in ranking} == set(selector.CANDIDATOS_AUTO)
+    assert all("puntaje" in r for r in ranking)
+    assert [r["puntaje"] for r in ranking] == sorted((r["puntaje"] for r in ranking), reverse=True)
+    # Sin filas/columnas la grilla es de 1x1 y nunca puede ganar.
+    grid = next(r for r in ranking if r["estrategia"] == "grid")
+    assert grid["colocados"] <= 1
+    assert ranking[0]["excedente"] == 0
+    assert ranking[0]["colocados"] == max(min(r["colocados"], r["total"]) for r in ranking)
+    assert ranking[0]["total"] == 20
+
+
+def test_no_gana_un_plan_que_imprime_de_mas(tmp_path):
+    disenos = [(_pdf(tmp_path / "a.pdf", 90, 50), 4), (_pdf(tmp_path / "b.pdf", 60, 60), 2)]
+    config = MontajeConfig(tamano_pliego=(320, 450), separacion=3)
+
+    ranking = evaluar_estrategias(disenos, config)
+
+    assert ranking[0]["colocados"] == ranking[0]["total"] == 6
+    # hybrid_nesting_repeat llena el pliego (12 formas): queda detrás de los exactos.
+    excedidos = [bool(r["excedente"]) for r in ranking]
+    assert any(excedidos) and excedidos == sorted(excedidos)
+
+
+def test_presupuesto_descarta_candidatas_lentas(disenos, monkeypatch):
+    medir = selector._medir
+    medidas = []
+
+    def _medir(nombre, *args):
+        medidas.append(nombre)
+        if nombre != "flujo":
+            time.sleep(0.5)
+        return medir(nombre, *args)
+
+    monkeypatch.setattr(selector, "_medir", _medir)
+    config = MontajeConfig(tamano_pliego=(320, 450), separacion=3)
+
+    ranking = evaluar_estrategias(disenos, config, presupuesto_s=0.2)
+
+    assert ranking[0]["estrategia"] == "flujo"
+    assert all(r["error"] == "presupuesto agotado" for r in ranking[1:])
+    # Vencido el plazo no se empieza ninguna otra candidata.
+    assert medidas == ["flujo", "grid"]
+
+    monkeypatch.setattr(selector, "evaluar_estrategias", lambda *a, **k: [])
+    assert seleccionar_estrategia_auto(disenos, config) == ("maxrects", [])
+
+
+def test_modo_auto_usa_la_mejor_medida(disenos, tmp_path, monkeypatch):
+    elegidas = []
+    original = selector.seleccionar_estrategia_auto
+
+    def _espia(*args):
+        nombre, ranking = original(*args)
+        elegidas.append((nombre, ranking))
+        return nombre, ranking
+
+    monkeypatch.setattr(selector, "seleccionar_estrategia_auto", _espia)
+    config = MontajeConfig(
+        tamano_pliego=(320, 450),
+        separacion=3,
+        estrategia="auto",
+        output_path=str(tmp_path / "out.pdf"),
+    )
+
+    realizar_montaje_inteligente([Diseno(ruta, n) for ruta, n in disenos], config)
+
+    nombre, ranking = elegidas[0]
+    assert nombre == ranking[0]["estrategia"] == config.estrategia
+    assert (tmp_path / "out.pdf").exists()
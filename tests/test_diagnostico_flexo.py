@@ -15,10 +15,15 @@ from contextlib import contextmanager
 from pathlib import Path
 
 import fitz
+import numpy as np
 import pytest
 from flask import Flask, template_rendered
 
-from cobertura_utils import calcular_metricas_cobertura
+from cobertura_utils import (
+    CoberturaAcumulador,
+    calcular_metricas_cobertura,
+    calcular_metricas_cobertura_documento,
+)
 from diagnostico_flexo import (
     coeficiente_material,
     evaluar_riesgo_tinta,
@@ -182,10 +187,10 @@ def _setup_revision_app(
         }
         return ("<div>Resumen</div>", None, "Diagnóstico", analisis, [])
 
-    def fake_analizar(path_pdf, advertencias):
+    def fake_analizar(path_pdf, advertencias, **kwargs):
         return {"overlay_path": str(overlay_path), "advertencias": [], "dpi": 150}
 
-    def fake_preview(path_pdf, advertencias, dpi=150):
+    def fake_preview(path_pdf, advertencias, dpi=150, **kwargs):
         base_rel = "uploads/base.png"
         base_rel_path = static_dir / base_rel
         base_rel_path.parent.mkdir(parents=True, exist_ok=True)
@@ -284,6 +289,48 @@ def test_calcular_cobertura_ignora_casi_blancos(tmp_path):
     assert metricas["tac_p95"] < 1
 
 
+def test_cobertura_por_bandas_exacta(tmp_path):
+    """Procesar en bandas chicas da las mismas métricas que una sola banda."""
+
+    doc = fitz.open()
+    page = doc.new_page(width=300, height=200)
+    page.draw_rect(fitz.Rect(10, 10, 150, 120), fill=(0.2, 0.7, 0.1, 0.5))
+    page.draw_circle((220, 120), 60, fill=(0.9, 0.9, 0.9, 0.9))
+    doc.new_page(width=300, height=200).draw_rect(fitz.Rect(0, 0, 300, 100), fill=(0, 0, 0, 1))
+    pdf_path = tmp_path / "bandas.pdf"
+    doc.save(pdf_path)
+    doc.close()
+
+    con_bandas = calcular_metricas_cobertura(str(pdf_path), dpi=72, max_mb=0.05)
+    una_banda = calcular_metricas_cobertura(str(pdf_path), dpi=72, max_mb=512)
+    for clave in ("cobertura_promedio", "cobertura_por_area"):
+        assert con_bandas[clave] == pytest.approx(una_banda[clave], abs=0.05)
+    for clave in ("cobertura_total", "tac_p95", "tac_max"):
+        assert con_bandas[clave] == pytest.approx(una_banda[clave], abs=0.05)
+
+    documento = calcular_metricas_cobertura_documento(str(pdf_path), dpi=72, max_mb=0.05)
+    assert [p["pagina"] for p in documento["paginas"]] == [0, 1]
+    assert documento["paginas"][1]["cobertura_promedio"]["Negro"] == pytest.approx(50, abs=1)
+    assert documento["documento"]["tac_max"] == pytest.approx(max(p["tac_max"] for p in documento["paginas"]))
+
+
+def test_percentil_tac_igual_a_numpy():
+    rng = np.random.default_rng(3)
+    bandas = [rng.integers(0, 256, size=(7, 13, 4), dtype=np.uint8) for _ in range(5)]
+    acumulador = CoberturaAcumulador(umbral=5)
+    for banda in bandas:
+        acumulador.agregar(banda)
+
+    todo = np.concatenate(bandas).reshape(-1, 4).astype(np.int64)
+    c16 = todo.astype(np.uint16)
+    nk = 255 - c16[:, 3:4]
+    blanco = ((nk - (c16[:, :3] * nk + 127) // 255) > 245).all(axis=1)
+    todo[blanco] = 0
+    tac = todo.sum(axis=1) / 255.0 * 100.0
+    assert acumulador.percentil_tac(95) == pytest.approx(float(np.percentile(tac, 95)))
+    assert acumulador.resultado()["tac_max"] == pytest.approx(float(tac.max()))
+
+
 def test_resumen_y_semaforo():
     advertencias = [
         {"nivel": "critico"},
@@ -976,6 +1023,42 @@ def test_preview_bbox_scaling_exact(tmp_path):
     assert abs(bbox_px[3] - 60) <= 1
 
 
+def test_preview_diagnostico_por_revision_sin_colisiones(tmp_path):
+    doc = fitz.open()
+    for texto in ("uno", "dos"):
+        page = doc.new_page(width=144, height=144)
+        page.insert_textbox(fitz.Rect(10, 10, 80, 40), texto)
+        doc.save(tmp_path / f"{texto}.pdf")
+        doc.delete_page(0)
+    doc.close()
+
+    app = Flask(__name__)
+    app.static_folder = str(tmp_path / "static")
+    advertencias = [{"tipo": "texto_pequeno", "bbox": [10, 10, 30, 30], "descripcion": ""}]
+    with app.app_context():
+        resultados = [
+            generar_preview_diagnostico(
+                str(tmp_path / f"{texto}.pdf"),
+                advertencias,
+                dpi=72,
+                output_dir=str(tmp_path / "static" / "uploads" / texto),
+                nombre_base="diagnostico",
+            )
+            for texto in ("uno", "dos")
+        ]
+        _, rel_a, _, _ = generar_preview_diagnostico(str(tmp_path / "uno.pdf"), [], dpi=72)
+        _, rel_b, _, _ = generar_preview_diagnostico(str(tmp_path / "uno.pdf"), [], dpi=72)
+
+    (base_uno, rel_uno, iconos_uno, _), (base_dos, rel_dos, _, _) = resultados
+    assert rel_uno == "uploads/uno/diagnostico.png"
+    assert iconos_uno == "uploads/uno/diagnostico_iconos.png"
+    assert rel_dos == "uploads/dos/diagnostico.png"
+    assert Path(base_uno).read_bytes() != Path(base_dos).read_bytes()
+    assert (tmp_path / "static" / iconos_uno).exists()
+    # Sin directorio explícito cada llamada usa un nombre propio.
+    assert rel_a != rel_b and rel_a.startswith("previews/")
+
+
 def test_revisar_sangrado_detecta_borde(tmp_path):
     doc = fitz.open()
     page = doc.new_page(width=200, height=200)
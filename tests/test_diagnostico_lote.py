@@ -0,0 +1,163 @@
+import io
+import json
+import os
+import sys
+from concurrent.futures import Future
+from pathlib import Path
+
+import fitz
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import diagnostico_lote
+from app import app
+from diagnostico_lote import diagnosticar_documento, resumen_documento
+from diagnostico_pdf import diagnosticar_pagina
+
+MM = 72 / 25.4
+
+
+def _pdf_bytes(tamanos):
+    doc = fitz.open()
+    for w, h in tamanos:
+        page = doc.new_page(width=w * MM, height=h * MM)
+        page.draw_rect(fitz.Rect(8 * MM, 8 * MM, (w - 8) * MM, (h - 8) * MM), color=None, fill=(0.2, 0.5, 0.8))
+        page.insert_text((20 * MM, 30 * MM), "Catalogo", fontsize=12)
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+TAMANOS = [(120, 90)] * 4 + [(100, 100)] * 2
+
+
+@pytest.fixture(autouse=True)
+def _pools(monkeypatch):
+    # Permite probar el pool aunque la máquina tenga una sola CPU.
+    monkeypatch.setattr(diagnostico_lote, "DIAG_BATCH_MAX_WORKERS", 4)
+    yield
+    diagnostico_lote.shutdown_pools()
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    path = tmp_path / "catalogo.pdf"
+    path.write_bytes(_pdf_bytes(TAMANOS))
+    return str(path)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_un_evento_por_pagina_y_resumen(pdf, workers):
+    eventos = list(diagnosticar_documento(pdf, workers=workers))
+
+    assert eventos[0] == {"type": "start", "page_count": 6, "pages": 6, "workers": workers}
+    paginas = [e for e in eventos if e["type"] == "page"]
+    assert sorted(e["page"] for e in paginas) == list(range(6))
+    assert eventos[-1]["type"] == "summary"
+
+    with fitz.open(pdf) as doc:
+        esperado, _ = diagnosticar_pagina(doc[5], incluir_preview=False)
+    assert next(e for e in paginas if e["page"] == 5)["report"] == esperado
+
+    resumen = eventos[-1]["report"]
+    assert resumen["pages_ok"] == 6 and resumen["pages_error"] == []
+    assert len(resumen["final_sizes_mm"]) == 2
+    assert sum(len(v) for v in resumen["final_sizes_mm"].values()) == 6
+    assert any("tamaños finales distintos" in nota for nota in resumen["notes"])
+
+
+def test_modo_serial_no_deja_el_documento_abierto(pdf):
+    list(diagnosticar_documento(pdf, workers=1))
+    assert diagnostico_lote._WORKER_DOC is None
+
+
+def _morir(page, incluir_preview):
+    os._exit(1)
+
+
+def test_pool_roto_se_recrea(pdf, monkeypatch):
+    monkeypatch.setattr(diagnostico_lote, "diagnosticar_pagina", _morir)
+    eventos = list(diagnosticar_documento(pdf, workers=2))
+    assert eventos[-1]["report"]["pages_error"] == list(range(6))
+    assert diagnostico_lote._EXECUTORS == {}
+
+    monkeypatch.setattr(diagnostico_lote, "diagnosticar_pagina", diagnosticar_pagina)
+    eventos = list(diagnosticar_documento(pdf, workers=2))
+    assert eventos[-1]["report"]["pages_ok"] == 6
+
+
+def test_workers_se_acota(pdf):
+    eventos = list(diagnosticar_documento(pdf, workers=64))
+    assert eventos[0]["workers"] == 4
+    assert list(diagnostico_lote._EXECUTORS) == [4]
+
+
+def test_cerrar_el_stream_cancela_las_paginas_pendientes(pdf, monkeypatch):
+    cancelados = []
+    original = Future.cancel
+    monkeypatch.setattr(Future, "cancel", lambda self: cancelados.append(self) or original(self))
+    eventos = diagnosticar_documento(pdf, workers=2)
+    assert next(eventos)["type"] == "start"
+    assert next(eventos)["type"] in ("page", "page_error")
+    eventos.close()
+    assert len(cancelados) == 6
+
+
+def test_subconjunto_de_paginas_con_preview(pdf):
+    eventos = list(diagnosticar_documento(pdf, paginas=[4, 1, 99], workers=1, incluir_preview=True))
+
+    paginas = [e for e in eventos if e["type"] == "page"]
+    assert [e["page"] for e in paginas] == [1, 4]
+    assert all(e["preview_data"].startswith("data:image/jpeg;base64,") for e in paginas)
+
+
+def test_resumen_cuenta_errores():
+    resumen = resumen_documento([{"type": "page_error", "page": 2, "error": "boom"}], page_count=3)
+    assert resumen["pages_error"] == [2] and resumen["pages_ok"] == 0
+    assert resumen["notes"] == ["1 página(s) no se pudieron analizar."]
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    import routes
+
+    monkeypatch.setattr(routes, "UPLOAD_FOLDER", str(tmp_path))
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_endpoint_ndjson(client):
+    res = client.post(
+        "/diagnostico_offset/lote",
+        data={"pdf": (io.BytesIO(_pdf_bytes(TAMANOS)), "catalogo.pdf")},
+        content_type="multipart/form-data",
+    )
+    assert res.status_code == 200
+    assert res.mimetype == "application/x-ndjson"
+    eventos = [json.loads(linea) for linea in res.get_data(as_text=True).splitlines()]
+    assert [e["type"] for e in eventos].count("page") == 6
+    assert eventos[-1]["report"]["pages_ok"] == 6
+
+
+def test_endpoint_sse(client):
+    res = client.post(
+        "/diagnostico_offset/lote",
+        data={"pdf": (io.BytesIO(_pdf_bytes(TAMANOS[:2])), "catalogo.pdf"), "formato": "sse"},
+        content_type="multipart/form-data",
+    )
+    assert res.mimetype == "text/event-stream"
+    bloques = [b for b in res.get_data(as_text=True).split("\n\n") if b]
+    assert bloques[0].startswith("event: start\n")
+    assert bloques[-1].startswith("event: summary\ndata: ")
+    assert len(bloques) == 4
+
+
+def test_endpoint_rechaza_formato_desconocido(client):
+    res = client.post(
+        "/diagnostico_offset/lote",
+        data={"pdf": (io.BytesIO(_pdf_bytes(TAMANOS[:1])), "a.pdf"), "formato": "xml"},
+        content_type="multipart/form-data",
+    )
+    assert res.status_code == 400
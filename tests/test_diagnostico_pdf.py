@@ -0,0 +1,89 @@
+import sys
+from pathlib import Path
+
+import fitz
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import diagnostico_pdf as diag
+from diagnostico_pdf import PageFeatures, compute_final_area, diagnostico_offset_pro, measure_bleed
+
+MM = 72 / 25.4
+
+
+def _pdf(path, marks=True):
+    doc = fitz.open()
+    page = doc.new_page(width=120 * MM, height=90 * MM)
+    page.draw_rect(fitz.Rect(8 * MM, 8 * MM, 112 * MM, 82 * MM), color=None, fill=(0.2, 0.5, 0.8))
+    page.insert_text((20 * MM, 40 * MM), "Diagnostico", fontsize=14)
+    if marks:
+        shape = page.new_shape()
+        for x in (10, 110):
+            shape.draw_line((x * MM, 1 * MM), (x * MM, 6 * MM))
+            shape.draw_line((x * MM, 84 * MM), (x * MM, 89 * MM))
+        for y in (10, 80):
+            shape.draw_line((1 * MM, y * MM), (6 * MM, y * MM))
+            shape.draw_line((114 * MM, y * MM), (119 * MM, y * MM))
+        shape.finish(color=(0, 0, 0), width=0.25)
+        shape.commit()
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def contar(monkeypatch):
+    llamadas = {"get_drawings": 0, "get_pixmap": 0}
+    originales = {nombre: getattr(fitz.Page, nombre) for nombre in llamadas}
+
+    def _envolver(nombre):
+        def _llamada(self, *args, **kwargs):
+            llamadas[nombre] += 1
+            resultado = originales[nombre](self, *args, **kwargs)
+            if nombre == "get_drawings":
+                # Los detectores filtran por ``stroke``; se marca a mano para
+                # ejercitar las ramas vectoriales con cualquier versión de PyMuPDF.
+                for d in resultado:
+                    if "s" in (d.get("type") or ""):
+                        d["stroke"] = True
+            return resultado
+
+        return _llamada
+
+    for nombre in llamadas:
+        monkeypatch.setattr(fitz.Page, nombre, _envolver(nombre))
+    return llamadas
+
+
+def test_una_pasada_vectorial_y_una_raster(tmp_path, contar):
+    report, preview = diagnostico_offset_pro(_pdf(tmp_path / "a.pdf", marks=False))
+
+    assert contar == {"get_drawings": 1, "get_pixmap": 1}
+    assert report["detected_by"] == "raster"
+    assert preview[:2] == b"\xff\xd8"
+
+
+def test_segmentos_por_orientacion_y_marcas(tmp_path, contar):
+    with fitz.open(_pdf(tmp_path / "a.pdf")) as doc:
+        page = doc[0]
+        features = PageFeatures(page)
+
+        verticales, horizontales = features.segments("v"), features.segments("h")
+        assert len(verticales) == 4 and all(s.x0 == pytest.approx(s.x1) for s in verticales)
+        assert len(horizontales) >= 4 and all(s.y0 == pytest.approx(s.y1) for s in horizontales)
+        indices = [s.index for s in features.segments("vh")]
+        assert indices == sorted(indices) and len(indices) == len(verticales) + len(horizontales)
+        assert features.segments("vh", max_width=0.1) == []
+
+        rect, conf, info, _, _ = compute_final_area(page, features)
+        bleed = measure_bleed(page, rect, features)
+        assert (features.vector_passes, features.raster_passes) == (1, 1)
+        assert contar["get_drawings"] == 1
+
+        crop, marks, _, _ = diag.detect_cropmarks_vector(page, page.rect.width, page.rect.height, features)
+        assert len(marks) == len(indices)
+        assert tuple(crop) == pytest.approx((10 * MM, 10 * MM, 110 * MM, 80 * MM), abs=0.01)
+        assert "crop" in info["source"]
+        assert tuple(rect) == pytest.approx(tuple(crop), abs=0.01)
+        assert bleed == {"top": 10.0, "right": 10.0, "bottom": 10.0, "left": 10.0}
@@ -541,3 +541,110 @@ def test_explicit_slot_box_final_is_respected_for_repeat_slots(work_dir):
     )
 
     assert captured[0].posiciones_manual[0]["slot_box_final"] is True
+
+
+def test_montar_offset_desde_layout_renders_duplex_faces_in_pool(work_dir, monkeypatch):
+    import fitz
+
+    from services import editor_offset_output_service as output_service
+
+    job_dir = work_dir / "job_duplex"
+    job_dir.mkdir()
+    (job_dir / "pieza.pdf").write_bytes(_pdf_bytes().getvalue())
+    monkeypatch.setattr(output_service, "FACE_RENDER_WORKERS", 2)
+    submitted = []
+    original_executor = output_service._face_executor
+
+    def counting_executor():
+        executor = original_executor()
+        submitted.append(executor)
+        return executor
+
+    monkeypatch.setattr(output_service, "_face_executor", counting_executor)
+
+    layout = _repeat_layout()
+    layout["faces"] = ["front", "back"]
+    layout["slots"] = [
+        {
+            "id": f"{face}0",
+            "design_ref": "file0",
+            "x_mm": 20,
+            "y_mm": 20,
+            "w_mm": 30,
+            "h_mm": 20,
+            "bleed_mm": 0,
+            "rotation_deg": 0,
+            "face": face,
+        }
+        for face in ("front", "back")
+    ]
+
+    output = montar_constructor_layout(layout, str(job_dir), preview=False)
+
+    assert submitted, "las caras deben renderizarse en el pool de procesos"
+    with fitz.open(output) as doc:
+        assert doc.page_count == 2
+        assert doc[0].rect.width == pytest.approx(200 * mm, abs=0.5)
+
+
+def test_render_queue_worker_renders_faces_serially(work_dir, monkeypatch):
+    import fitz
+
+    from services import editor_offset_output_service as output_service
+
+    job_dir = work_dir / "job_duplex_worker"
+    job_dir.mkdir()
+    (job_dir / "pieza.pdf").write_bytes(_pdf_bytes().getvalue())
+    monkeypatch.setattr(output_service, "FACE_RENDER_WORKERS", 2)
+    monkeypatch.setattr(output_service, "_IN_RENDER_WORKER", True)
+
+    def no_pool():
+        raise AssertionError("un worker de la cola no debe abrir otro pool")
+
+    monkeypatch.setattr(output_service, "_face_executor", no_pool)
+
+    layout = _repeat_layout()
+    layout["faces"] = ["front", "back"]
+    layout["slots"] = [
+        {
+            "id": f"{face}0",
+            "design_ref": "file0",
+            "x_mm": 20,
+            "y_mm": 20,
+            "w_mm": 30,
+            "h_mm": 20,
+            "bleed_mm": 0,
+            "rotation_deg": 0,
+            "face": face,
+        }
+        for face in ("front", "back")
+    ]
+
+    output = montar_constructor_layout(layout, str(job_dir), preview=False)
+
+    with fitz.open(output) as doc:
+        assert doc.page_count == 2
+
+
+def _doble(disenos, config):
+    return config * 2
+
+
+def test_broken_face_pool_falls_back_to_serial(monkeypatch):
+    from concurrent.futures.process import BrokenProcessPool
+
+    from services import editor_offset_output_service as output_service
+
+    class PoolRoto:
+        def submit(self, *args, **kwargs):
+            raise BrokenProcessPool("un worker murió")
+
+        def shutdown(self, **kwargs):
+            pass
+
+    roto = PoolRoto()
+    monkeypatch.setattr(output_service, "FACE_RENDER_WORKERS", 2)
+    monkeypatch.setattr(output_service, "_FACE_EXECUTOR", roto)
+
+    assert output_service._render_configs(_doble, [], [1, 2]) == [2, 4]
+    assert output_service._FACE_EXECUTOR is None
@@ -0,0 +1,204 @@
+import io
+import re
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app import app
+from routes import _constructor_job_dir, _save_constructor_layout
+from services import editor_offset_render_queue as render_queue
+
+
+@pytest.fixture()
+def work_dir(request):
+    safe_name = re.sub(r"[^A-Za-z0-9_.-]+", "_", request.node.name)
+    path = Path("tests") / "_tmp_editor_offset_render_queue" / safe_name
+    if path.exists():
+        shutil.rmtree(path)
+    path.mkdir(parents=True)
+    yield path
+    if path.exists():
+        shutil.rmtree(path)
+
+
+@pytest.fixture()
+def editor_app(work_dir, monkeypatch):
+    static_root = work_dir / "static"
+    static_root.mkdir()
+    monkeypatch.setattr(app, "static_folder", str(static_root))
+    monkeypatch.setitem(app.config, "EDITOR_RENDER_INLINE", True)
+    app.config["TESTING"] = True
+    return app
+
+
+@pytest.fixture()
+def client(editor_app):
+    with editor_app.test_client() as test_client:
+        yield test_client
+
+
+def _pdf_bytes(width_mm=40, height_mm=20):
+    buffer = io.BytesIO()
+    c = canvas.Canvas(buffer, pagesize=(width_mm * mm, height_mm * mm))
+    c.rect(2 * mm, 2 * mm, (width_mm - 4) * mm, (height_mm - 4) * mm)
+    c.save()
+    return buffer.getvalue()
+
+
+def _layout(design_ref="file0"):
+    return {
+        "sheet_mm": [200, 160],
+        "margins_mm": [10, 10, 10, 10],
+        "bleed_default_mm": 0,
+        "gap_default_mm": 5,
+        "designs": [{"ref": "file0", "filename": "pieza.pdf", "width_mm": 40, "height_mm": 20, "forms_per_plate": 1}],
+        "works": [],
+        "faces": ["front"],
+        "active_face": "front",
+        "imposition_engine": "repeat",
+        "export_settings": {"bleed_mm": 0, "crop_marks": True, "output_mode": "raster"},
+        "design_export": {},
+        "slots": [
+            {
+                "id": "slot0",
+                "design_ref": design_ref,
+                "x_mm": 20,
+                "y_mm": 20,
+                "w_mm": 40,
+                "h_mm": 20,
+                "bleed_mm": 0,
+                "rotation_deg": 0,
+                "face": "front",
+            }
+        ],
+    }
+
+
+def _prepare_job(editor_app, job_id, layout):
+    with editor_app.app_context():
+        job_dir = _constructor_job_dir(job_id)
+        Path(job_dir).mkdir(parents=True, exist_ok=True)
+        (Path(job_dir) / "pieza.pdf").write_bytes(_pdf_bytes())
+        _save_constructor_layout(job_dir, layout)
+    return job_dir
+
+
+@pytest.mark.parametrize("kind,ext", [("preview", ".png"), ("pdf", ".pdf")])
+def test_render_endpoints_submit_status_and_result(client, editor_app, kind, ext):
+    job_id = f"queue{kind}"
+    _prepare_job(editor_app, job_id, _layout())
+
+    response = client.post(f"/editor_offset/render/{job_id}/{kind}")
+    assert response.status_code == 202
+    submitted = response.get_json()
+    assert submitted["status"] == "done"
+    assert submitted["progress"] == pytest.approx(1.0)
+    assert submitted["url"].endswith(ext)
+
+    status = client.get(submitted["status_url"]).get_json()
+    assert status["task_id"] == submitted["task_id"]
+    assert status["status"] == "done"
+
+    result = client.get(submitted["result_url"])
+    assert result.status_code == 200
+    assert result.get_json()["url"] == submitted["url"]
+
+
+def test_render_submit_validates_layout_and_kind(client, editor_app):
+    job_id = "queueinvalid"
+    _prepare_job(editor_app, job_id, _layout(design_ref="missing"))
+
+    response = client.post(f"/editor_offset/render/{job_id}/preview")
+    assert response.status_code == 422
+    assert any(issue["code"] == "slot_design_ref_invalid" for issue in response.get_json()["errors"])
+
+    response = client.post(f"/editor_offset/render/{job_id}/tiff")
+    assert response.status_code == 400
+
+    response = client.get(f"/editor_offset/render/{job_id}/status/abc123")
+    assert response.status_code == 404
+
+
+def test_render_task_records_error(work_dir):
+    job_dir = str(work_dir / "job")
+    task = render_queue.create_task(job_dir, "pdf")
+    render_queue.run_render_task(job_dir, task["task_id"], "pdf", None)
+
+    stored = render_queue.get_task(job_dir, task["task_id"])
+    assert stored["status"] == render_queue.STATUS_ERROR
+    assert stored["error"]
+
+
+def test_render_queue_runs_in_process_pool(work_dir):
+    job_dir = work_dir / "job"
+    job_dir.mkdir()
+    (job_dir / "pieza.pdf").write_bytes(_pdf_bytes())
+    queue = render_queue.RenderQueue(max_workers=1)
+    try:
+        task = queue.submit(str(job_dir), "preview", _layout())
+        assert task["status"] == render_queue.STATUS_QUEUED
+        deadline = time.time() + 60
+        stored = task
+        while time.time() < deadline:
+            stored = render_queue.get_task(str(job_dir), task["task_id"])
+            if stored["status"] in (render_queue.STATUS_DONE, render_queue.STATUS_ERROR):
+                break
+            time.sleep(0.1)
+    finally:
+        queue.shutdown()
+
+    assert stored["status"] == render_queue.STATUS_DONE, stored.get("error")
+    assert Path(stored["result_path"]).exists()
+
+
+def _worker_muere(job_dir, task_id, kind, layout):
+    import os
+
+    os._exit(1)
+
+
+def _esperar_fin(job_dir, task_id, segundos=60):
+    deadline = time.time() + segundos
+    stored = render_queue.get_task(job_dir, task_id)
+    while time.time() < deadline and stored["status"] not in (render_queue.STATUS_DONE, render_queue.STATUS_ERROR):
+        time.sleep(0.1)
+        stored = render_queue.get_task(job_dir, task_id)
+    return stored
+
+
+def test_render_queue_recreates_broken_pool(work_dir, monkeypatch):
+    job_dir = work_dir / "job"
+    job_dir.mkdir()
+    (job_dir / "pieza.pdf").write_bytes(_pdf_bytes())
+    queue = render_queue.RenderQueue(max_workers=1)
+    try:
+        monkeypatch.setattr(render_queue, "run_render_task", _worker_muere)
+        task = queue.submit(str(job_dir), "preview", _layout())
+        stored = _esperar_fin(str(job_dir), task["task_id"])
+        assert stored["status"] == render_queue.STATUS_ERROR
+
+        monkeypatch.undo()
+        task = queue.submit(str(job_dir), "preview", _layout())
+        stored = _esperar_fin(str(job_dir), task["task_id"])
+    finally:
+        queue.shutdown()
+
+    assert stored["status"] == render_queue.STATUS_DONE, stored.get("error")
+
+
+def test_stale_tasks_expire(work_dir, monkeypatch):
+    job_dir = str(work_dir / "job")
+    task = render_queue.create_task(job_dir, "pdf")
+    assert render_queue.get_task(job_dir, task["task_id"])["status"] == render_queue.STATUS_QUEUED
+
+    monkeypatch.setattr(render_queue, "RENDER_TASK_TIMEOUT_S", -1)
+    stored = render_queue.get_task(job_dir, task["task_id"])
+    assert stored["status"] == render_queue.STATUS_ERROR
+    assert stored["message"] == "Tiempo agotado"
@@ -0,0 +1,128 @@
+import io
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+import pytest
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app import app
+from services.manual_editor_state import (
+    clear_manual_state_cache,
+    create_manual_state,
+    load_manual_state,
+    manual_jobs_root,
+    manual_state_stats,
+    purge_manual_jobs,
+    save_manual_state,
+)
+
+
+def _pdf_bytes(w_mm, h_mm):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(w_mm * mm, h_mm * mm))
+    c.drawString(5, 5, "pieza")
+    c.save()
+    return buf.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def _entorno(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "static_folder", str(tmp_path / "static"))
+    app.config["TESTING"] = True
+    clear_manual_state_cache()
+    yield
+    clear_manual_state_cache()
+
+
+def _posicion(w_mm, h_mm):
+    return {"file_idx": 0, "x_mm": 20, "y_mm": 20, "w_mm": w_mm, "h_mm": h_mm, "rot_deg": 0}
+
+
+def test_estado_persistido_y_recargado(tmp_path):
+    src = tmp_path / "a.pdf"
+    src.write_bytes(_pdf_bytes(80, 50))
+    with app.app_context():
+        state = create_manual_state({"w": 320, "h": 450}, 3, [str(src)])
+        # Los PDFs se copian al trabajo: la carpeta de uploads puede cambiar.
+        src.write_bytes(_pdf_bytes(10, 10))
+        assert load_manual_state(state.job_id) is state
+        assert state.geometry[state.designs[0]]["w_mm"] == pytest.approx(80, abs=0.01)
+
+        # Otro worker (sin memoria compartida) lo lee desde disco.
+        clear_manual_state_cache()
+        otro = load_manual_state(state.job_id)
+        assert otro is not state and otro == state
+        assert otro.sheet_size == (320.0, 450.0)
+
+        state.sangrado_mm = 5
+        save_manual_state(state)
+        os.utime(os.path.join(os.path.dirname(os.path.dirname(state.designs[0])), "state.json"), ns=(1, 1))
+        assert load_manual_state(state.job_id).sangrado_mm == 5
+        assert manual_state_stats()["misses"] == 2
+
+        assert load_manual_state("no-existe") is None
+        assert load_manual_state("../otro") is None
+
+
+def test_trabajos_fuera_de_static_y_purgados(tmp_path):
+    src = tmp_path / "a.pdf"
+    src.write_bytes(_pdf_bytes(80, 50))
+    with app.app_context():
+        root = manual_jobs_root()
+        assert not root.startswith(str(tmp_path / "static"))
+
+        viejo, usado, nuevo = (create_manual_state({"w": 320, "h": 450}, 3, [str(src)]) for _ in range(3))
+        os.utime(os.path.join(root, viejo.job_id), (1, 1))
+        os.utime(os.path.join(root, usado.job_id), (1, 1))
+        os.utime(os.path.join(root, nuevo.job_id), (time.time() - 60,) * 2)
+        # Leer el estado renueva su uso.
+        assert load_manual_state(usado.job_id) is usado
+
+        app.config["MANUAL_JOBS_MAX"] = 1
+        try:
+            assert sorted(purge_manual_jobs()) == sorted([viejo.job_id, nuevo.job_id])
+        finally:
+            app.config.pop("MANUAL_JOBS_MAX")
+        assert load_manual_state(viejo.job_id) is None
+        assert sorted(os.listdir(root)) == [usado.job_id]
+
+
+def test_editores_concurrentes_no_se_pisan():
+    def _form(ancho, w_mm):
+        return {
+            "accion": "preview",
+            "pliego": "personalizado",
+            "ancho_pliego_custom": str(ancho),
+            "alto_pliego_custom": "450",
+            "separacion": "4",
+            "archivos[]": (io.BytesIO(_pdf_bytes(w_mm, 50)), "pieza.pdf"),
+            "repeticiones_0": "2",
+        }
+
+    with app.test_client() as client:
+        jobs = []
+        for ancho, w_mm in ((320, 80), (500, 120)):
+            html = client.post(
+                "/montaje_offset_inteligente", data=_form(ancho, w_mm), content_type="multipart/form-data"
+            ).get_data(as_text=True)
+            jobs.append(re.search(r'window.__manualJob\s*=\s*"(\w+)"', html).group(1))
+
+        # El primer editor sigue usando su pliego y su PDF aunque el segundo
+        # haya subido otro archivo con el mismo nombre.
+        with app.app_context():
+            primero, segundo = (load_manual_state(job) for job in jobs)
+        assert primero.sheet_size[0] == 320 and segundo.sheet_size[0] == 500
+        assert primero.geometry[primero.designs[0]]["w_mm"] == pytest.approx(80, abs=0.01)
+
+        res = client.post("/api/manual/impose", json={"positions": [_posicion(80, 50)], "manual_job": jobs[0]})
+        assert res.status_code == 200
+        assert res.get_json()["pdf_url"].endswith(".pdf")
+
+        sin_job = client.post("/api/manual/preview", json={"positions": [_posicion(80, 50)]})
+        assert sin_job.status_code == 404
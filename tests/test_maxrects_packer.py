@@ -0,0 +1,67 @@
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from maxrects_packer import HEURISTICS, MaxRectsArray
+
+
+def _solapan(a, b):
+    return a[0] < b[0] + b[2] and a[0] + a[2] > b[0] and a[1] < b[1] + b[3] and a[1] + a[3] > b[1]
+
+
+@pytest.mark.parametrize("heuristica", HEURISTICS)
+def test_piezas_sin_superposicion_y_dentro_del_pliego(heuristica):
+    rnd = random.Random(5)
+    packer = MaxRectsArray(320, 450, heuristica=heuristica)
+    colocados = []
+    for _ in range(200):
+        w, h = rnd.choice([20, 33.5, 50, 71]), rnd.choice([15, 27, 40])
+        pos = packer.insert(w, h)
+        if pos is not None:
+            colocados.append((pos[0], pos[1], w, h))
+    assert len(colocados) > 50
+    for i, a in enumerate(colocados):
+        assert a[0] >= 0 and a[1] >= 0
+        assert a[0] + a[2] <= 320 and a[1] + a[3] <= 450
+        assert not any(_solapan(a, b) for b in colocados[:i])
+    libres = packer.free
+    # Ningún libre queda contenido en otro tras la poda.
+    contenido = MaxRectsArray._contained(libres, libres)
+    assert contenido.sum() == len(libres)
+
+
+def test_sin_lugar_devuelve_none():
+    packer = MaxRectsArray(100, 50)
+    assert packer.insert(120, 10) is None
+    assert packer.insert(100, 50) == (0.0, 0.0)
+    assert packer.insert(1, 1) is None
+    assert packer.occupancy() == pytest.approx(1.0)
+
+
+def test_bssf_prefiere_el_hueco_mas_justo():
+    packer = MaxRectsArray(100, 100)
+    packer.insert(100, 60)  # libre restante: franja de 100x40 arriba
+    packer.insert(70, 40)  # libre restante: 30x40 a la derecha
+    assert packer.free_rects == [(70.0, 60.0, 30.0, 40.0)]
+    assert packer.insert(30, 40) == (70.0, 60.0)
+
+
+def test_heuristica_desconocida():
+    with pytest.raises(ValueError):
+        MaxRectsArray(10, 10, heuristica="xyz")
+
+
+def test_contact_point_se_apoya_en_piezas_colocadas():
+    packer = MaxRectsArray(100, 100, heuristica="contact")
+    assert packer.insert(40, 40) == (0.0, 0.0)
+    # Los dos candidatos (40,0) y (0,40) tocan borde + pieza: empate en contacto,
+    # gana el de menor sobrante corto y luego el de menor índice.
+    x, y = packer.insert(20, 20)
+    assert (x, y) in {(40.0, 0.0), (0.0, 40.0)}
+    assert packer._contact(
+        packer.free[:, 0], packer.free[:, 1], 10, 10
+    ).max() >= 20
@@ -5,12 +5,13 @@ import sys
 sys.path.append(str(Path(__file__).resolve().parents[1]))
 
 import fitz
+import pytest
 from PIL import Image
 from reportlab.pdfgen import canvas
 from reportlab.lib.units import mm
 from reportlab.lib.utils import ImageReader
 
-from montaje import montar_pdf
+from montaje import montar_cuadernillos_pdf, montar_pdf
 from montaje_offset import montar_pliego_offset, calcular_distribucion
 
 
@@ -28,17 +29,75 @@ def test_rotacion_automatica(monkeypatch, tmp_path):
     _crear_pdf_simple(input_pdf, 4)
 
     angulos = []
-    original_rotate = Image.Image.rotate
+    original_show = fitz.Page.show_pdf_page
 
-    def registrar_rotacion(self, angle, expand=True):
-        angulos.append(angle)
-        return original_rotate(self, angle, expand=expand)
+    def registrar_rotacion(self, rect, src, pno=0, **kwargs):
+        angulos.append(kwargs.get("rotate", 0))
+        return original_show(self, rect, src, pno, **kwargs)
 
-    monkeypatch.setattr(Image.Image, "rotate", registrar_rotacion)
+    monkeypatch.setattr(fitz.Page, "show_pdf_page", registrar_rotacion)
     montar_pdf(str(input_pdf), str(output_pdf), paginas_por_cara=2)
 
-    assert angulos.count(180) == 2
-    assert all(a == 180 for a in angulos)
+    assert angulos == [0, 0, 180, 180]
+
+
+def test_montaje_conserva_texto_vectorial(tmp_path):
+    input_pdf = tmp_path / "input.pdf"
+    output_pdf = tmp_path / "salida.pdf"
+    _crear_pdf_simple(input_pdf, 8)
+
+    montar_pdf(str(input_pdf), str(output_pdf), paginas_por_cara=4)
+    with fitz.open(str(output_pdf)) as doc:
+        assert doc[0].get_text().split() == ["p7", "p0", "p2", "p5"]
+        assert doc[0].get_images() == []
+
+
+def test_cuadernillos_8_y_16_siguen_al_simulador(tmp_path):
+    input_pdf = tmp_path / "revista.pdf"
+    _crear_pdf_simple(input_pdf, 32)
+
+    for tipo, caras, textos in ((8, 8, ["p31", "p28", "p0", "p3"]), (16, 4, ["p4", "p27", "p24", "p7"])):
+        output_pdf = tmp_path / f"cuadernillo_{tipo}.pdf"
+        simulacion = montar_cuadernillos_pdf(str(input_pdf), str(output_pdf), tipo_cuadernillo=tipo)
+        with fitz.open(str(output_pdf)) as doc:
+            assert len(doc) == caras == 2 * len(simulacion["pliegos"])
+            assert doc[0].get_text().split()[:4] == textos
+            assert doc[0].get_images() == []
+
+
+def test_cuadernillo_cabeza_con_cabeza(tmp_path):
+    input_pdf = tmp_path / "revista.pdf"
+    c = canvas.Canvas(str(input_pdf), pagesize=(100 * mm, 140 * mm))
+    for _ in range(8):
+        # Cabeza marcada con una franja negra arriba.
+        c.rect(0, 130 * mm, 100 * mm, 10 * mm, fill=1, stroke=0)
+        c.showPage()
+    c.save()
+    output_pdf = tmp_path / "salida.pdf"
+
+    montar_cuadernillos_pdf(str(input_pdf), str(output_pdf), tipo_cuadernillo=8)
+    with fitz.open(str(output_pdf)) as doc:
+        cara = doc[0]
+        assert (cara.rect.width, cara.rect.height) == pytest.approx((280 * mm, 200 * mm))
+        pix = cara.get_pixmap(dpi=20, alpha=False)
+        # 2x2 acostadas: las cabezas de ambas columnas se tocan en el centro.
+        fila = pix.height // 4
+        assert pix.pixel(pix.width // 2 - 2, fila) == (0, 0, 0)
+        assert pix.pixel(pix.width // 2 + 2, fila) == (0, 0, 0)
+        assert pix.pixel(2, fila) == (255, 255, 255)
+
+
+def test_cuadernillo_con_tapa_y_paginas_blancas(tmp_path):
+    input_pdf = tmp_path / "revista.pdf"
+    output_pdf = tmp_path / "salida.pdf"
+    _crear_pdf_simple(input_pdf, 10)
+
+    simulacion = montar_cuadernillos_pdf(str(input_pdf), str(output_pdf), tipo_cuadernillo=8, tipo_tapa="tapa_completa")
+    assert simulacion["total_paginas_final"] == 12
+    with fitz.open(str(output_pdf)) as doc:
+        # Tapa [12, 11, 1, 2]: las dos primeras son relleno en blanco.
+        assert doc[0].get_text().split() == ["p0", "p1"]
+        assert len(doc) == 1 + 2
 
 
 def test_generacion_multiples_pliegos(tmp_path):
@@ -78,3 +137,32 @@ def test_calculo_correcto_espaciados():
         100, 100, 30, 30, 10, 10, 10, 10, 5, 5, 0
     )
     assert (cols, rows, total) == (2, 2, 4)
+
+
+def test_ruta_montar_usa_cuadernillos(tmp_path, monkeypatch):
+    import routes
+    from app import app
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "output").mkdir()
+    monkeypatch.setattr(routes, "UPLOAD_FOLDER", str(tmp_path))
+    input_pdf = tmp_path / "revista.pdf"
+    _crear_pdf_simple(input_pdf, 10)
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        res = client.post(
+            "/",
+            data={
+                "action": "montar",
+                "modo_montaje": "8",
+                "tipo_tapa": "tapa_completa",
+                "pdf": (io.BytesIO(input_pdf.read_bytes()), "revista.pdf"),
+            },
+            content_type="multipart/form-data",
+        )
+    assert res.status_code == 200
+    with fitz.open(str(tmp_path / "output" / "montado.pdf")) as doc:
+        # Tapa (una cara) + un cuadernillo de 8 (frente y dorso), como en el simulador.
+        assert len(doc) == 3
+        assert doc[0].get_text().split() == ["p0", "p1"]
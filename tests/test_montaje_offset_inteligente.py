@@ -431,6 +431,146 @@ def test_vector_hybrid_sin_sangrado(tmp_path):
     assert output == str(out_path)
 
 
+def _crear_pdf_marcado(tmp_path: Path, nombre: str, sangrado_real_mm: float = 0) -> str:
+    """Diseño 40x20 mm azul con un bloque rojo en la esquina superior izquierda."""
+    import fitz
+
+    ruta = tmp_path / nombre
+    b = sangrado_real_mm
+    c = canvas.Canvas(str(ruta), pagesize=((40 + 2 * b) * mm, (20 + 2 * b) * mm))
+    c.setFillColorRGB(0, 0, 1)
+    c.rect(0, 0, (40 + 2 * b) * mm, (20 + 2 * b) * mm, fill=1, stroke=0)
+    c.setFillColorRGB(1, 0, 0)
+    c.rect(b * mm, (b + 10) * mm, 15 * mm, 10 * mm, fill=1, stroke=0)
+    c.save()
+    if b:
+        doc = fitz.open(str(ruta))
+        page = doc[0]
+        b_pt = b * mm
+        page.set_trimbox(fitz.Rect(b_pt, b_pt, page.rect.x1 - b_pt, page.rect.y1 - b_pt))
+        page.set_bleedbox(page.rect)
+        doc.saveIncr()
+        doc.close()
+    return str(ruta)
+
+
+def _pixeles_pliego(ruta: str, dpi: int = 50):
+    import fitz
+    import numpy as np
+
+    with fitz.open(ruta) as doc:
+        pix = doc[0].get_pixmap(dpi=dpi)
+    return np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)[..., :3].astype(int)
+
+
+@pytest.mark.parametrize("rot", [0, 90, 180, 270])
+def test_vector_coincide_con_raster_en_rotacion(tmp_path, rot):
+    import numpy as np
+
+    pdf_path = _crear_pdf_marcado(tmp_path, "marcado.pdf")
+    swapped = rot in (90, 270)
+    pos = [
+        {
+            "file_idx": 0,
+            "x_mm": 30,
+            "y_mm": 30,
+            "w_mm": 20 if swapped else 40,
+            "h_mm": 40 if swapped else 20,
+            "rot_deg": rot,
+            "bleed_mm": 2,
+            "source_w_mm": 40,
+            "source_h_mm": 20,
+        }
+    ]
+    salidas = {}
+    for modo in ("raster", "vector"):
+        salidas[modo] = str(tmp_path / f"{modo}_{rot}.pdf")
+        montar_pliego_offset_inteligente(
+            [(pdf_path, 1)],
+            120,
+            120,
+            sangrado=2,
+            output_path=salidas[modo],
+            posiciones_manual=pos,
+            output_mode=modo,
+        )
+
+    raster = _pixeles_pliego(salidas["raster"])
+    vector = _pixeles_pliego(salidas["vector"])
+    rojo_raster = np.argwhere((raster[..., 0] > 200) & (raster[..., 2] < 80))
+    rojo_vector = np.argwhere((vector[..., 0] > 200) & (vector[..., 2] < 80))
+    assert len(rojo_raster) > 0
+    # Mismo bloque rojo en el mismo lugar (tolerancia de antialias en bordes)
+    assert len(rojo_vector) == pytest.approx(len(rojo_raster), rel=0.15)
+    assert np.abs(rojo_raster.mean(axis=0) - rojo_vector.mean(axis=0)).max() < 1.0
+
+
+def test_vector_sin_raster_cuando_el_pdf_trae_sangrado(tmp_path):
+    import fitz
+    import numpy as np
+
+    pdf_path = _crear_pdf_marcado(tmp_path, "con_bleed.pdf", sangrado_real_mm=3)
+    out_path = tmp_path / "vector_bleed_real.pdf"
+
+    montar_pliego_offset_inteligente(
+        [(pdf_path, 4)],
+        200,
+        120,
+        sangrado=2,
+        output_path=str(out_path),
+        posiciones_manual=[
+            {"file_idx": 0, "x_mm": 10 + i * 46, "y_mm": 20, "w_mm": 40, "h_mm": 20, "rot_deg": 0, "bleed_mm": 2}
+            for i in range(4)
+        ],
+        output_mode="vector",
+    )
+
+    with fitz.open(str(out_path)) as doc:
+        page = doc[0]
+        assert page.get_images(full=True) == []
+    # En el sangrado izquierdo de la primera copia el PDF trae azul; un marco
+    # espejo mostraría el bloque rojo reflejado.
+    pixeles = _pixeles_pliego(str(out_path), dpi=72)
+    azul = (pixeles[..., 2] > 200) & (pixeles[..., 0] < 80)
+    x0 = int(np.nonzero(azul.any(axis=0))[0].min())
+    rojo = (pixeles[..., 0] > 200) & (pixeles[..., 2] < 80)
+    assert rojo[:, x0 + 9].any()
+    assert not rojo[:, x0 + 2].any()
+
+
+def test_vector_marco_espejo_solo_en_bordes(tmp_path, monkeypatch):
+    import fitz
+
+    pdf_path = _crear_pdf_marcado(tmp_path, "sin_bleed.pdf")
+    clips = []
+    original = fitz.Page.get_pixmap
+
+    def registrar(self, *args, **kwargs):
+        clips.append(kwargs.get("clip"))
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(fitz.Page, "get_pixmap", registrar)
+    out_path = tmp_path / "vector_marco.pdf"
+    montar_pliego_offset_inteligente(
+        [(pdf_path, 1)],
+        120,
+        120,
+        sangrado=2,
+        output_path=str(out_path),
+        posiciones_manual=[{"file_idx": 0, "x_mm": 30, "y_mm": 30, "w_mm": 40, "h_mm": 20, "rot_deg": 0, "bleed_mm": 2}],
+        output_mode="vector",
+    )
+    monkeypatch.setattr(fitz.Page, "get_pixmap", original)
+
+    assert clips, "el marco espejo se rasteriza desde las franjas del borde"
+    area_trim = (40 * mm) * (20 * mm)
+    for clip in clips:
+        assert clip is not None
+        assert clip.width * clip.height < 0.25 * area_trim
+    with fitz.open(str(out_path)) as doc:
+        assert len(doc[0].get_images(full=True)) == 1
+
+
 def _crear_pdf_en(tmp_path, nombre: str = "base.pdf") -> str:
     ruta = tmp_path / nombre
     c = canvas.Canvas(str(ruta), pagesize=(100 * mm, 100 * mm))
@@ -455,3 +595,32 @@ def test_export_pdfx1a(tmp_path):
     assert out_path.endswith("_PDFX1a.pdf")
     assert os.path.exists(out_path)
     assert os.path.getsize(out_path) > 0
+
+
+@pytest.mark.parametrize("heuristica", ["bssf", "contact"])
+def test_maxrects_sin_superposiciones(tmp_path, heuristica):
+    grande = tmp_path / "grande.pdf"
+    chica = tmp_path / "chica.pdf"
+    for ruta, (w, h) in ((grande, (60, 40)), (chica, (25, 15))):
+        c = canvas.Canvas(str(ruta), pagesize=(w * mm, h * mm))
+        c.drawString(5, 5, ruta.stem)
+        c.save()
+
+    resultado = montar_pliego_offset_inteligente(
+        diseños=[(str(grande), 5), (str(chica), 14)],
+        ancho_pliego=220,
+        alto_pliego=160,
+        separacion=2,
+        sangrado=1,
+        estrategia="maxrects",
+        maxrects_heuristica=heuristica,
+        devolver_posiciones=True,
+        output_path=str(tmp_path / "pliego.pdf"),
+    )
+
+    positions = resultado["positions"]
+    assert len(positions) == 19
+    rects = [(p["x_mm"], p["y_mm"], p["w_mm"], p["h_mm"]) for p in positions]
+    for i, (ax, ay, aw, ah) in enumerate(rects):
+        for bx, by, bw, bh in rects[:i]:
+            assert not (ax < bx + bw and ax + aw > bx and ay < by + bh and ay + ah > by)
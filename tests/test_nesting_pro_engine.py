@@ -0,0 +1,168 @@
+import sys
+from pathlib import Path
+
+import fitz
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from engines.nesting_pro_engine import compute_nesting, compute_nesting_sheets
+from montaje_offset_inteligente import Diseno, MontajeConfig, realizar_montaje_inteligente
+from services import editor_offset_imposition_service as imposition
+
+
+def _layout(designs, **extra):
+    layout = {
+        "sheet_mm": [320, 450],
+        "margins_mm": [10, 10, 10, 10],
+        "gap_default_mm": 3,
+        "designs": designs,
+    }
+    layout.update(extra)
+    return layout
+
+
+def _solapan(a, b):
+    return (
+        a["x_mm"] < b["x_mm"] + b["w_mm"]
+        and a["x_mm"] + a["w_mm"] > b["x_mm"]
+        and a["y_mm"] < b["y_mm"] + b["h_mm"]
+        and a["y_mm"] + a["h_mm"] > b["y_mm"]
+    )
+
+
+def test_pedido_de_300_piezas_en_varios_pliegos():
+    layout = _layout(
+        [
+            {"ref": "a", "width_mm": 50, "height_mm": 30, "bleed_mm": 2, "forms_per_plate": 180},
+            {"ref": "b", "width_mm": 90, "height_mm": 60, "bleed_mm": 2, "forms_per_plate": 100},
+            {"ref": "c", "width_mm": 20, "height_mm": 20, "forms_per_plate": 20},
+        ]
+    )
+    plan = compute_nesting_sheets(layout)
+
+    assert plan.unplaced == []
+    assert plan.placed_count == 300
+    assert plan.sheet_count > 1
+    for sheet in plan.sheets:
+        slots = sheet.slots
+        assert slots
+        for i, slot in enumerate(slots):
+            assert slot["x_mm"] >= 10 - 1e-6 and slot["x_mm"] + slot["w_mm"] <= 310 + 1e-6
+            assert slot["y_mm"] >= 10 - 1e-6 and slot["y_mm"] + slot["h_mm"] <= 440 + 1e-6
+            assert not any(_solapan(slot, other) for other in slots[:i])
+
+
+def test_un_solo_pliego_coincide_con_compute_nesting():
+    layout = _layout([{"ref": "a", "width_mm": 50, "height_mm": 30, "bleed_mm": 2, "forms_per_plate": 12}])
+    plan = compute_nesting_sheets(layout)
+    single = compute_nesting(layout)
+
+    assert plan.sheet_count == 1
+    assert plan.sheets[0].slots == single.slots
+    assert single.unplaced == []
+
+
+def test_reporta_piezas_sin_colocar():
+    layout = _layout(
+        [
+            {"ref": "gigante", "width_mm": 500, "height_mm": 500, "forms_per_plate": 2},
+            {"ref": "a", "width_mm": 140, "height_mm": 200, "forms_per_plate": 9, "allow_rotation": False},
+        ],
+        max_sheets=2,
+    )
+    plan = compute_nesting_sheets(layout)
+
+    assert plan.sheet_count == 2
+    assert {"design_ref": "gigante", "count": 2, "reason": "too_large"} in plan.unplaced
+    assert {"design_ref": "a", "count": 1, "reason": "sheet_limit"} in plan.unplaced
+    assert compute_nesting(layout).unplaced[-1] == {"design_ref": "a", "count": 5, "reason": "sheet_limit"}
+    for sheet in plan.sheets:
+        # Sin rotación permitida: 2x2 piezas de 140x200 (+3 de gap) por pliego.
+        assert all(slot["rotation_deg"] == 0 and slot["w_mm"] == 140 for slot in sheet.slots)
+        assert sheet.bbox[3] <= 440 + 1e-6
+
+
+def test_editor_nesting_expone_el_plan():
+    layout = _layout(
+        [{"ref": "a", "width_mm": 90, "height_mm": 60, "bleed_mm": 2, "forms_per_plate": 40}],
+        active_face="front",
+    )
+    slots, plan = imposition.apply_nesting_plan(layout)
+
+    assert plan["sheet_count"] == len(plan["sheets"]) > 1
+    assert slots == plan["sheets"][0]
+    assert sum(plan["per_sheet"]) == 40
+    assert imposition.apply_imposition_engine(layout, "nesting") == slots
+
+
+def test_estrategia_nesting_pro_genera_un_pagina_por_pliego(tmp_path):
+    pdf_path = tmp_path / "pieza.pdf"
+    c = canvas.Canvas(str(pdf_path), pagesize=(90 * mm, 60 * mm))
+    c.drawString(5, 5, "pieza")
+    c.save()
+
+    output = tmp_path / "pliego.pdf"
+    config = MontajeConfig(
+        tamano_pliego=(320, 450),
+        separacion=3,
+        sangrado=2,
+        estrategia="nesting_pro",
+        output_path=str(output),
+    )
+    resultado = realizar_montaje_inteligente([Diseno(str(pdf_path), 40)], config)
+
+    assert resultado == str(output)
+    with fitz.open(str(output)) as doc:
+        assert doc.page_count > 1
+    assert not list(tmp_path.glob("pliego_pliego*.pdf"))
+
+
+def test_varios_pliegos_aplican_compat_al_pdf_unido(tmp_path, monkeypatch):
+    import strategies.nesting_pro_strategy as nesting_strategy
+
+    pdf_path = tmp_path / "pieza.pdf"
+    c = canvas.Canvas(str(pdf_path), pagesize=(90 * mm, 60 * mm))
+    c.drawString(5, 5, "pieza")
+    c.save()
+
+    llamadas = []
+    original = nesting_strategy.apply_pdf_compat
+
+    def _espia(path, mode):
+        llamadas.append((path, mode))
+        return original(path, mode)
+
+    monkeypatch.setattr(nesting_strategy, "apply_pdf_compat", _espia)
+    output = tmp_path / "pliego.pdf"
+    config = MontajeConfig(
+        tamano_pliego=(320, 450),
+        separacion=3,
+        estrategia="nesting_pro",
+        output_path=str(output),
+        export_compat="adobe_compatible",
+    )
+    resultado = realizar_montaje_inteligente([Diseno(str(pdf_path), 40)], config)
+
+    assert llamadas == [(str(output), "adobe_compatible")]
+    assert resultado == str(tmp_path / "pliego_ADOBE.pdf")
+    with fitz.open(resultado) as doc:
+        assert doc.page_count > 1
+    assert not list(tmp_path.glob("pliego_pliego*"))
+
+
+def test_plan_reutilizado_es_una_copia():
+    imposition.clear_imposition_state()
+    layout = _layout([{"ref": "a", "width_mm": 50, "height_mm": 30, "bleed_mm": 2, "forms_per_plate": 12}])
+
+    slots, plan, grupos = imposition.apply_imposition_incremental("job_copia", layout, "nesting")
+    assert grupos[0]["reused"] is False
+    plan["sheets"].clear()
+    slots[0]["x_mm"] = -1
+
+    slots2, plan2, grupos = imposition.apply_imposition_incremental("job_copia", layout, "nesting")
+    assert grupos[0]["reused"] is True
+    assert plan2["sheets"] and slots2[0]["x_mm"] != -1
+    plan2["sheets"].clear()
+    assert imposition.apply_imposition_incremental("job_copia", layout, "nesting")[1]["sheets"]
@@ -0,0 +1,147 @@
+from pathlib import Path
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import os
+os.environ.setdefault("OPENAI_API_KEY", "test")
+
+import fitz
+import numpy as np
+import pytest
+
+import montaje_flexo
+from page_analysis import PageAnalysisContext
+
+
+def _crear_pdf_cmyk(path):
+    doc = fitz.open()
+    page = doc.new_page(width=200, height=120)
+    page.draw_rect(fitz.Rect(20, 20, 120, 80), color=None, fill=(0, 0, 0), width=0)
+    page.insert_text((130, 60), "Texto", fontsize=10)
+    doc.save(path)
+    doc.close()
+
+
+def test_contexto_memoiza_raster_y_vistas(tmp_path):
+    pdf = tmp_path / "ctx.pdf"
+    _crear_pdf_cmyk(pdf)
+    with PageAnalysisContext(str(pdf), dpi=72) as ctx:
+        cmyk = ctx.cmyk
+        assert cmyk.shape[2] == 4
+        assert ctx.cmyk is cmyk
+        assert ctx.rgb.shape == cmyk.shape[:2] + (3,)
+        assert ctx.gray.shape == cmyk.shape[:2]
+        # El rectángulo negro queda oscuro y el fondo blanco en las vistas derivadas
+        assert ctx.gray[50, 70] < 40
+        assert ctx.gray[5, 5] == 255
+        assert ctx.render_count == 1
+        assert ctx.text_dict is ctx.text_dict
+        assert ctx.drawings is ctx.drawings
+
+
+def test_revision_flexo_rasteriza_una_sola_vez(tmp_path, monkeypatch):
+    pdf = tmp_path / "revision.pdf"
+    _crear_pdf_cmyk(pdf)
+
+    def no_poppler(*_args, **_kwargs):
+        raise AssertionError("convert_from_path no debe usarse con contexto")
+
+    monkeypatch.setattr(montaje_flexo, "convert_from_path", no_poppler)
+    renders = []
+    original = fitz.Page.get_pixmap
+
+    def contar(self, *args, **kwargs):
+        renders.append(1)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(fitz.Page, "get_pixmap", contar)
+
+    ctx = PageAnalysisContext(str(pdf), dpi=300)
+    resultado = montaje_flexo.revisar_diseño_flexo(str(pdf), 360, 330, material="film", ctx=ctx)
+    assert ctx.render_count == 1
+    assert len(renders) == 1
+    analisis = resultado[3]
+    assert analisis["cobertura_total"] is not None
+    ctx.close()
+
+
+def test_tramas_debiles_con_contexto(tmp_path):
+    pdf = tmp_path / "trama.pdf"
+    _crear_pdf_cmyk(pdf)
+    ctx = PageAnalysisContext(str(pdf), dpi=72)
+    ctx._cmyk = np.zeros((50, 50, 4), dtype=np.uint8)
+    ctx._cmyk[:, :, 3] = 10
+    resultado = montaje_flexo.detectar_tramas_débiles(str(pdf), ctx=ctx)
+    assert resultado["hay_tramas_debiles"] is True
+    ctx.close()
+
+
+def test_revision_flexo_no_retiene_la_pagina(tmp_path, monkeypatch):
+    pdf = tmp_path / "bobina.pdf"
+    _crear_pdf_cmyk(pdf)
+    monkeypatch.setattr(montaje_flexo, "convert_from_path", lambda *a, **k: [])
+
+    def sin_raster_completo(self):
+        raise AssertionError("la revisión no debe materializar la página completa")
+
+    monkeypatch.setattr(PageAnalysisContext, "cmyk", property(sin_raster_completo))
+    bandas = []
+    original = fitz.Page.get_pixmap
+
+    def contar(self, *args, **kwargs):
+        pix = original(self, *args, **kwargs)
+        bandas.append(len(pix.samples))
+        return pix
+
+    monkeypatch.setattr(fitz.Page, "get_pixmap", contar)
+
+    max_mb = 0.5
+    with PageAnalysisContext(str(pdf), dpi=300, max_mb=max_mb) as ctx:
+        resultado = montaje_flexo.revisar_diseño_flexo(str(pdf), 360, 330, material="film", ctx=ctx)
+        assert ctx.render_count == 1
+        assert resultado[3]["cobertura_total"] is not None
+    assert len(bandas) > 1
+    assert max(bandas) < max_mb * 1024 * 1024
+
+
+def test_resumen_raster_igual_al_raster_completo(tmp_path):
+    pdf = tmp_path / "ctx.pdf"
+    _crear_pdf_cmyk(pdf)
+    with PageAnalysisContext(str(pdf), dpi=144, max_mb=0.05) as ctx:
+        resumen = ctx.resumen_raster
+        cmyk, gray = ctx.cmyk, ctx.gray
+        for i in range(4):
+            assert (resumen.histograma_canales[i] == np.bincount(cmyk[..., i].ravel(), minlength=256)).all()
+        assert (resumen.histograma_gris == np.bincount(gray.ravel(), minlength=256)).all()
+        contraste = montaje_flexo.analizar_contraste(str(pdf), ctx=ctx)
+        p2, p98 = np.percentile(gray, (2, 98))
+        assert f"<b>{p98 - p2}</b>" in contraste[0]
+
+
+def _pdf_planos(path, colores):
+    doc = fitz.open()
+    page = doc.new_page(width=280, height=200)
+    ancho = 280 / len(colores)
+    for i, color in enumerate(colores):
+        page.draw_rect(fitz.Rect(i * ancho, 0, (i + 1) * ancho, 200), color=None, fill=color, width=0)
+    doc.save(path)
+    doc.close()
+
+
+@pytest.mark.parametrize(
+    "colores, esperado, aviso",
+    [
+        # Planos CMYK saturados + negro: más contraste que con el render RGB de poppler.
+        ([(0.8, 0.1, 0.3, 0.05), (0.1, 0.6, 0, 0), (0, 0, 0, 1)], 163.0, False),
+        # Grises claros (10 % y 20 % K): siguen por debajo del umbral.
+        ([(0, 0, 0, 0.1), (0, 0, 0, 0.2)], 26.0, True),
+    ],
+)
+def test_contraste_con_contexto_valores(tmp_path, colores, esperado, aviso):
+    pdf = tmp_path / "planos.pdf"
+    _pdf_planos(pdf, colores)
+    with PageAnalysisContext(str(pdf), dpi=150) as ctx:
+        mensaje = montaje_flexo.analizar_contraste(str(pdf), ctx=ctx)[0]
+    assert f"<b>{esperado}</b>" in mensaje
+    assert ("bajo contraste" in mensaje) is aviso
@@ -0,0 +1,72 @@
+from pathlib import Path
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import fitz
+import pytest
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+import montaje_offset_inteligente
+import raster_cache
+from raster_cache import RasterCache
+
+
+@pytest.fixture(autouse=True)
+def cache(tmp_path):
+    raster_cache.set_raster_cache(RasterCache(str(tmp_path / "cache"), 64 * 1024 * 1024))
+    yield
+    raster_cache.set_raster_cache(None)
+
+
+def _crear_diseno(path, w_mm=40, h_mm=20):
+    c = canvas.Canvas(str(path), pagesize=(w_mm * mm, h_mm * mm))
+    c.setFillColorRGB(1, 0, 0)
+    c.rect(0, 0, w_mm * mm, h_mm * mm, fill=1, stroke=0)
+    c.save()
+
+
+def _posiciones(n, bleed):
+    return [
+        {
+            "file_idx": 0,
+            "x_mm": 10 + (i % 4) * 50,
+            "y_mm": 10 + (i // 4) * 30,
+            "w_mm": 40,
+            "h_mm": 20,
+            "rot_deg": 90 if i == 0 else 0,
+            "bleed_mm": bleed,
+        }
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("modo", ["raster", "vector_hybrid"])
+def test_pliego_emite_un_form_por_diseno(tmp_path, modo):
+    pdf = tmp_path / "diseno.pdf"
+    _crear_diseno(pdf)
+    salida = tmp_path / f"pliego_{modo}.pdf"
+
+    montaje_offset_inteligente.montar_pliego_offset_inteligente(
+        [(str(pdf), 12)],
+        220,
+        120,
+        sangrado=2,
+        output_path=str(salida),
+        posiciones_manual=_posiciones(12, 2),
+        output_mode=modo,
+    )
+
+    with fitz.open(str(salida)) as doc:
+        page = doc[0]
+        imagenes = {img[0] for img in page.get_images(full=True)}
+        assert len(imagenes) == 1
+        contenido = page.read_contents().decode("latin-1")
+        assert contenido.count(" Do") >= 12
+        pix = page.get_pixmap(dpi=36)
+        # Centro de la segunda copia (x=60..100 mm, y=10..30 mm desde abajo)
+        px = int(80 / 25.4 * 36)
+        py = pix.height - int(20 / 25.4 * 36)
+        r, g, b = pix.pixel(px, py)[:3]
+        assert r > 200 and g < 60 and b < 60
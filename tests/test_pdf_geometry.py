@@ -0,0 +1,86 @@
+import os
+import sys
+from pathlib import Path
+
+import fitz
+import pytest
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pdf_geometry as geometry_mod
+from ai_strategy_selector import select_strategy
+from montaje_offset_inteligente import MontajeConfig, detectar_sangrado_pdf, obtener_dimensiones_pdf
+from pdf_geometry import clear_pdf_geometry, pdf_geometry, pdf_geometry_stats
+from services.editor_offset_uploads import pdf_page_size_mm
+from strategies.hybrid_nesting_strategy import _build_nesting_layout
+
+MM = 72 / 25.4
+
+
+def _pdf(path, w_mm, h_mm, bleed_mm=0.0, pages=1):
+    doc = fitz.open()
+    for _ in range(pages):
+        page = doc.new_page(width=(w_mm + 2 * bleed_mm) * MM, height=(h_mm + 2 * bleed_mm) * MM)
+        if bleed_mm:
+            b = bleed_mm * MM
+            page.set_bleedbox(page.rect)
+            page.set_trimbox(fitz.Rect(b, b, page.rect.x1 - b, page.rect.y1 - b))
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def _memo_limpio():
+    clear_pdf_geometry()
+    yield
+    clear_pdf_geometry()
+
+
+def test_geometria_completa(tmp_path):
+    path = _pdf(tmp_path / "a.pdf", 100, 50, bleed_mm=3, pages=2)
+    geo = pdf_geometry(path)
+
+    assert geo.page_count == 2
+    assert geo.rotation == 0
+    assert geo.size_mm() == pytest.approx((106, 56))
+    assert geo.size_mm(usar_trimbox=True) == pytest.approx((100, 50))
+    assert geo.bleed_mm == pytest.approx(3)
+    assert obtener_dimensiones_pdf(path) == (106.0, 56.0)
+    assert obtener_dimensiones_pdf(path, usar_trimbox=True) == (100.0, 50.0)
+    assert detectar_sangrado_pdf(path) == pytest.approx(3)
+    assert pdf_page_size_mm(path) == pytest.approx((106, 56))
+    assert pdf_geometry_stats()["misses"] == 1
+
+
+def test_se_invalida_si_el_archivo_cambia(tmp_path):
+    path = _pdf(tmp_path / "a.pdf", 100, 50)
+    assert obtener_dimensiones_pdf(path) == (100.0, 50.0)
+    _pdf(tmp_path / "a.pdf", 80, 40, bleed_mm=2)
+    os.utime(path, ns=(1, 1))  # mtime distinto aunque el reloj sea grueso
+    assert obtener_dimensiones_pdf(path) == (84.0, 44.0)
+    assert pdf_geometry_stats()["misses"] == 2
+
+
+def test_estrategia_auto_abre_cada_pdf_una_vez(tmp_path, monkeypatch):
+    rutas = [
+        _pdf(tmp_path / "a.pdf", 90, 50),
+        _pdf(tmp_path / "b.pdf", 60, 60),
+        _pdf(tmp_path / "c.pdf", 40, 25),
+    ]
+    aperturas = []
+    fitz_open = geometry_mod.fitz.open
+    monkeypatch.setattr(
+        geometry_mod.fitz, "open", lambda *a, **k: aperturas.append(a) or fitz_open(*a, **k)
+    )
+    disenos = [(ruta, 4) for ruta in rutas]
+    config = MontajeConfig(tamano_pliego=(320, 450), separacion=3)
+
+    select_strategy(disenos, config)
+    _build_nesting_layout(disenos, config)
+    for ruta in rutas:
+        detectar_sangrado_pdf(ruta)
+        pdf_page_size_mm(ruta)
+
+    assert len(aperturas) == 3
+    assert pdf_page_size_mm(str(tmp_path / "no-existe.pdf")) == (0.0, 0.0)
@@ -0,0 +1,101 @@
+import io
+import sys
+from pathlib import Path
+
+import pytest
+from PIL import Image, ImageChops
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app import app
+from montaje_offset_inteligente import generar_preview_pliego
+from preview_compositor import clear_preview_compositors, preview_compositor_stats
+from services.manual_editor_state import create_manual_state
+
+
+def _pdf(path, w_mm, h_mm, texto):
+    c = canvas.Canvas(str(path), pagesize=(w_mm * mm, h_mm * mm))
+    c.setFillGray(0.3)
+    c.rect(0, 0, w_mm * mm / 2, h_mm * mm, fill=1, stroke=0)
+    c.setFillGray(0)
+    c.drawString(5, 5, texto)
+    c.save()
+    return str(path)
+
+
+@pytest.fixture(autouse=True)
+def _compositores_limpios():
+    clear_preview_compositors()
+    yield
+    clear_preview_compositors()
+
+
+@pytest.fixture
+def disenos(tmp_path):
+    return [(_pdf(tmp_path / "a.pdf", 60, 40, "A"), 1), (_pdf(tmp_path / "b.pdf", 45, 45, "B"), 1)]
+
+
+def _posiciones(dx=0.0):
+    return [
+        {"file_idx": 0, "x_mm": 10, "y_mm": 10, "w_mm": 60, "h_mm": 40, "rot_deg": 0},
+        {"file_idx": 1, "x_mm": 80 + dx, "y_mm": 30, "w_mm": 45, "h_mm": 45, "rot_deg": 90},
+        {"file_idx": 0, "x_mm": 100, "y_mm": 60, "w_mm": 40, "h_mm": 60, "rot_deg": 270},
+    ]
+
+
+def _iguales(a, b):
+    with Image.open(a) as ia, Image.open(b) as ib:
+        return ImageChops.difference(ia, ib).getbbox() is None
+
+
+def test_incremental_igual_al_render_completo(disenos, tmp_path):
+    inc, ref = tmp_path / "inc.png", tmp_path / "ref.png"
+
+    generar_preview_pliego(disenos, _posiciones(), 200, 150, str(inc), preview_job="j1")
+    # Mover una pieza para que se superponga con la tercera.
+    generar_preview_pliego(disenos, _posiciones(dx=15), 200, 150, str(inc), preview_job="j1")
+    generar_preview_pliego(disenos, _posiciones(dx=15), 200, 150, str(ref))
+
+    assert _iguales(inc, ref)
+    stats = preview_compositor_stats()
+    assert stats["full_renders"] == 1
+    assert stats["incremental_renders"] == 1
+    # La pieza movida conserva tamaño y rotación: ningún sprite nuevo.
+    assert stats["sprite_misses"] == 3
+
+
+def test_cambio_de_pliego_repinta_todo(disenos, tmp_path):
+    out = tmp_path / "p.png"
+    generar_preview_pliego(disenos, _posiciones(), 200, 150, str(out), preview_job="j1")
+    generar_preview_pliego(disenos, _posiciones(), 200, 150, str(out), preview_job="j1")
+    generar_preview_pliego(disenos, _posiciones(), 220, 150, str(out), preview_job="j1")
+
+    stats = preview_compositor_stats()
+    assert stats["unchanged"] == 1
+    assert stats["full_renders"] == 2
+    with Image.open(out) as img:
+        assert img.size[0] > 1100
+
+
+def test_endpoint_manual_usa_el_compositor(disenos, tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "static_folder", str(tmp_path / "static"))
+    app.config["TESTING"] = True
+    with app.app_context():
+        job = create_manual_state({"w": 200, "h": 150}, 0, [ruta for ruta, _ in disenos]).job_id
+
+    with app.test_client() as client:
+        primera = client.post(
+            "/api/manual/preview", json={"positions": _posiciones(), "manual_job": job, "preview_job": "abc123"}
+        )
+        segunda = client.post(
+            "/api/manual/preview", json={"positions": _posiciones(dx=15), "manual_job": job, "preview_job": "abc123"}
+        )
+
+    assert primera.status_code == 200 and segunda.status_code == 200
+    assert segunda.get_json()["preview_path"].endswith("manual_abc123.png")
+    assert (tmp_path / "static" / "previews" / "manual_abc123.png").exists()
+    stats = preview_compositor_stats()
+    assert stats["full_renders"] == 1
+    assert stats["incremental_renders"] == 1
@@ -0,0 +1,132 @@
+from pathlib import Path
+
+import sys
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import fitz
+import pytest
+from PIL import Image
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+import montaje_offset_inteligente
+import raster_cache
+from raster_cache import RasterCache, cached_raster, raster_key
+
+
+def _crear_pdf(path, w_mm=40, h_mm=30, texto="A"):
+    c = canvas.Canvas(str(path), pagesize=(w_mm * mm, h_mm * mm))
+    c.drawString(10, 10, texto)
+    c.save()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = RasterCache(str(tmp_path / "cache"), max_bytes=64 * 1024 * 1024)
+    raster_cache.set_raster_cache(cache)
+    yield cache
+    raster_cache.set_raster_cache(None)
+
+
+def test_raster_key_depende_del_contenido_y_no_de_la_ruta(tmp_path):
+    a = tmp_path / "a.pdf"
+    b = tmp_path / "b.pdf"
+    _crear_pdf(a)
+    b.write_bytes(a.read_bytes())
+    assert raster_key(str(a), bleed_mm=3) == raster_key(str(b), bleed_mm=3)
+    assert raster_key(str(a), bleed_mm=3) != raster_key(str(a), bleed_mm=2)
+    assert raster_key(str(a), clip="trimbox") != raster_key(str(a), clip=None)
+
+
+def test_cached_raster_no_vuelve_a_renderizar(tmp_path, cache):
+    pdf = tmp_path / "d.pdf"
+    _crear_pdf(pdf)
+    llamadas = []
+
+    def render():
+        llamadas.append(1)
+        return Image.new("RGB", (20, 10), (10, 20, 30))
+
+    first = cached_raster(str(pdf), render, bleed_mm=1.0)
+    second = cached_raster(str(pdf), render, bleed_mm=1.0)
+    assert len(llamadas) == 1
+    assert second.size == first.size
+    assert second.mode == "RGB"
+    assert second.getpixel((0, 0)) == (10, 20, 30)
+
+
+def test_raster_cache_expulsa_lru_por_bytes(tmp_path):
+    cache = RasterCache(str(tmp_path / "lru"), max_bytes=2 * 100 * 100 * 3 + 1024)
+    img = Image.new("RGB", (100, 100), (255, 0, 0))
+    cache.put("aa01", img)
+    cache.put("bb02", img)
+    assert cache.get("aa01") is not None  # aa01 pasa a ser el más reciente
+    cache.put("cc03", img)
+    assert cache.get("bb02") is None
+    assert cache.get("aa01") is not None
+    assert cache.get("cc03") is not None
+    assert cache.total_bytes() <= cache.max_bytes
+
+
+def test_reexportar_no_rasteriza_de_nuevo(tmp_path, cache, monkeypatch):
+    pdf = tmp_path / "diseno.pdf"
+    _crear_pdf(pdf, 50, 50)
+    renders = []
+    original = fitz.Page.get_pixmap
+
+    def contar(self, *args, **kwargs):
+        renders.append(1)
+        return original(self, *args, **kwargs)
+
+    monkeypatch.setattr(fitz.Page, "get_pixmap", contar)
+
+    for idx in range(2):
+        montaje_offset_inteligente.montar_pliego_offset_inteligente(
+            [(str(pdf), 2)],
+            200,
+            200,
+            sangrado=2,
+            output_path=str(tmp_path / f"out{idx}.pdf"),
+        )
+        if idx == 0:
+            assert renders
+            renders.clear()
+    assert renders == []
+
+
+def test_put_no_recorre_la_carpeta_dentro_del_presupuesto(tmp_path, monkeypatch):
+    cache = RasterCache(str(tmp_path / "total"), max_bytes=3 * 100 * 100 * 3 + 1024)
+    img = Image.new("RGB", (100, 100), (0, 255, 0))
+    recorridos = []
+    original = cache._entries
+
+    def contar():
+        recorridos.append(1)
+        return original()
+
+    monkeypatch.setattr(cache, "_entries", contar)
+    cache.put("aa01", img)  # primera medición de la carpeta
+    cache.put("bb02", img)
+    cache.put("bb02", img)  # reemplazar no suma dos veces
+    cache.put("cc03", img)
+    assert len(recorridos) == 1
+
+    cache.put("dd04", img)  # se pasa del presupuesto: mide y expulsa
+    assert len(recorridos) == 2
+    assert cache.get("aa01") is None
+    assert cache.total_bytes() <= cache.max_bytes
+
+
+def test_memo_de_digests_acotada(tmp_path, monkeypatch):
+    monkeypatch.setattr(raster_cache, "DIGEST_MEMO_MAX", 2)
+    monkeypatch.setattr(raster_cache, "_DIGEST_MEMO", raster_cache.OrderedDict())
+    rutas = []
+    for i in range(3):
+        ruta = tmp_path / f"d{i}.bin"
+        ruta.write_bytes(bytes([i]) * 10)
+        rutas.append(str(ruta))
+    raster_cache.file_digest(rutas[0])
+    raster_cache.file_digest(rutas[1])
+    raster_cache.file_digest(rutas[0])  # d0 pasa a ser el más reciente
+    raster_cache.file_digest(rutas[2])
+    assert [key[0] for key in raster_cache._DIGEST_MEMO] == [rutas[0], rutas[2]]
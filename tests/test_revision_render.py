@@ -0,0 +1,88 @@
+import sys
+from pathlib import Path
+
+import fitz
+import numpy as np
+from flask import Flask
+from PIL import Image, ImageDraw
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from diagnostico_flexo import generar_preview_diagnostico
+from preview_tecnico import analizar_riesgos_pdf
+from revision_render import RevisionRender
+from simulacion import generar_simulacion_avanzada, mascara_trama_puntos
+
+
+def _pdf(tmp_path):
+    doc = fitz.open()
+    page = doc.new_page(width=200, height=150)
+    page.draw_rect(fitz.Rect(20, 20, 120, 90), color=(0, 0, 0), fill=(0.2, 0.4, 0.8))
+    page.insert_text((30, 120), "Texto", fontsize=6)
+    pdf_path = tmp_path / "pieza.pdf"
+    doc.save(pdf_path)
+    doc.close()
+    return str(pdf_path)
+
+
+def test_un_solo_render_para_todas_las_etapas(tmp_path):
+    pdf_path = _pdf(tmp_path)
+    advertencias = [{"tipo": "texto_pequeno", "bbox": [30, 110, 60, 122], "descripcion": ""}]
+    render = RevisionRender(pdf_path, dpi=144)
+
+    app = Flask(__name__)
+    app.static_folder = str(tmp_path / "static")
+    with app.app_context():
+        with render.etapa("overlay"):
+            overlay = analizar_riesgos_pdf(
+                pdf_path,
+                advertencias=advertencias,
+                output_path=str(tmp_path / "overlay.png"),
+                render=render,
+            )
+        with render.etapa("preview"):
+            base_path, _, _, iconos = generar_preview_diagnostico(
+                pdf_path,
+                overlay["advertencias"],
+                dpi=overlay["dpi"],
+                output_dir=str(tmp_path / "static" / "rev"),
+                render=render,
+            )
+        with render.etapa("simulacion"):
+            generar_simulacion_avanzada(render.rgb, iconos, 120, str(tmp_path / "sim.png"))
+
+    assert render.render_count == 1
+    assert overlay["dpi"] == 144
+    assert Image.open(tmp_path / "overlay.png").size == render.size == (400, 300)
+    with fitz.open(pdf_path) as doc:
+        pix = doc[0].get_pixmap(matrix=fitz.Matrix(2, 2), alpha=False)
+    assert np.array_equal(np.asarray(Image.open(base_path)), render.rgb)
+    assert np.asarray(Image.open(base_path)).tobytes() == pix.samples
+    assert set(render.tiempos) == {"render", "overlay", "preview", "simulacion"}
+
+
+def test_trama_vectorizada_igual_a_dibujar_puntos():
+    alto, ancho, lpi = 250, 330, 120
+    spacing = 600 / lpi * 4
+    radio = spacing / 2
+    paso = int(spacing)
+    ref = Image.new("L", (ancho, alto), 0)
+    draw = ImageDraw.Draw(ref)
+    for y in range(0, alto, paso):
+        for x in range(0, ancho, paso):
+            draw.ellipse((x - radio, y - radio, x + radio, y + radio), fill=255)
+
+    assert np.array_equal(mascara_trama_puntos(alto, ancho, lpi), np.asarray(ref) > 0)
+
+
+def test_simulacion_acepta_ruta_o_array(tmp_path):
+    base = np.full((40, 60, 3), 200, dtype=np.uint8)
+    Image.fromarray(base).save(tmp_path / "base.png")
+
+    desde_ruta = generar_simulacion_avanzada(str(tmp_path / "base.png"), [], 150, str(tmp_path / "a.png"))
+    desde_array = generar_simulacion_avanzada(base, [], 150, str(tmp_path / "b.png"))
+
+    a = np.asarray(Image.open(desde_ruta))
+    assert np.array_equal(a, np.asarray(Image.open(desde_array)))
+    # Puntos al 20 %: 200 * 204 / 255 = 160.
+    assert set(np.unique(a)) == {160, 200}
@@ -0,0 +1,87 @@
+import sys
+import time
+from pathlib import Path
+
+from PIL import Image
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app import app
+from revision_store import RevisionStore
+
+
+def _resultado(n=3):
+    return {
+        "resumen": "<div>Resumen</div>",
+        "diag_base_web": "uploads/r/diagnostico.png",
+        "diagnostico_json": {"archivo": "pieza.pdf", "material": "film", "tac_total": 280.5, "ink_risk": "medio"},
+        "advertencias_iconos": [{"tipo": "texto_pequeno", "bbox": [i, i, i + 5, i + 5]} for i in range(n)],
+        "analisis": {"detalle": list(range(1000))},
+    }
+
+
+def test_guardar_y_cargar_por_secciones(tmp_path):
+    store = RevisionStore(str(tmp_path / "rev.sqlite3"))
+    store.guardar("r1", _resultado(), {"dpi": 200, "overlay_path": "/x/overlay.png"})
+
+    completo = store.cargar("r1")
+    assert completo == _resultado()
+
+    parcial = store.cargar("r1", ("resultado", "diagnostico_json"))
+    assert parcial["diag_base_web"] == "uploads/r/diagnostico.png"
+    assert parcial["diagnostico_json"]["material"] == "film"
+    assert "analisis" not in parcial and "advertencias_iconos" not in parcial
+
+    assert store.cargar_diagnostico("r1") == {"dpi": 200, "overlay_path": "/x/overlay.png"}
+    assert store.cargar("no-existe") is None
+    assert store.cargar_diagnostico("no-existe") is None
+
+    # Guardar de nuevo reemplaza la revisión completa.
+    store.guardar("r1", _resultado(1))
+    assert len(store.cargar("r1", ("advertencias_iconos",))["advertencias_iconos"]) == 1
+    assert store.cargar_diagnostico("r1") is None
+
+
+def test_listar_y_purgar(tmp_path):
+    store = RevisionStore(str(tmp_path / "rev.sqlite3"), max_revisiones=2, max_dias=1)
+    for rid in ("a", "b", "c", "d"):
+        store.guardar(rid, _resultado())
+    store.cargar("a")  # "a" pasa a ser la más usada
+
+    listado = store.listar()
+    assert [r["id"] for r in listado] == ["d", "c", "b", "a"]
+    assert listado[0]["archivo"] == "pieza.pdf" and listado[0]["tac_total"] == 280.5
+
+    assert sorted(store.purgar()) == ["b", "c"]
+    assert {r["id"] for r in store.listar()} == {"a", "d"}
+
+    # Pasado el plazo de retención se expulsa todo lo no consultado.
+    assert sorted(store.purgar(ahora=time.time() + 2 * 86400)) == ["a", "d"]
+    assert store.listar() == []
+    assert not store.eliminar("a")
+
+
+def test_exportar_lee_del_almacen(tmp_path, monkeypatch):
+    static_dir = tmp_path / "static"
+    rev_dir = static_dir / "uploads" / "r2"
+    rev_dir.mkdir(parents=True)
+    Image.new("RGB", (80, 60), (255, 255, 255)).save(rev_dir / "diagnostico.png")
+    monkeypatch.setattr(app, "static_folder", str(static_dir))
+    monkeypatch.setitem(app.config, "REVISION_STORE_PATH", str(tmp_path / "rev.sqlite3"))
+    app.config["TESTING"] = True
+
+    resultado = _resultado()
+    resultado["diag_base_web"] = "uploads/r2/diagnostico.png"
+    with app.app_context():
+        from routes import _revision_store
+
+        _revision_store().guardar("r2", resultado)
+
+    with app.test_client() as client:
+        resp = client.post("/simulacion/exportar/r2", json={"cobertura": {"K": 40}})
+        faltante = client.post("/simulacion/exportar/otra", json={})
+
+    assert resp.status_code == 200
+    assert resp.mimetype == "image/png"
+    assert faltante.status_code == 404
+    assert not (rev_dir / "res.json").exists()
@@ -0,0 +1,110 @@
+import io
+import sys
+from dataclasses import replace
+from pathlib import Path
+
+import fitz
+import pytest
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app import app
+from montaje_offset_inteligente import Diseno, MontajeConfig, realizar_montaje_inteligente
+from sheet_plan import clear_sheet_plans, plan_sheet, render_sheet, sheet_plan_stats
+
+
+def _pdf_bytes(w_mm, h_mm):
+    buf = io.BytesIO()
+    c = canvas.Canvas(buf, pagesize=(w_mm * mm, h_mm * mm))
+    c.drawString(5, 5, "pieza")
+    c.save()
+    return buf.getvalue()
+
+
+@pytest.fixture(autouse=True)
+def _cache_limpia():
+    clear_sheet_plans()
+    yield
+    clear_sheet_plans()
+
+
+@pytest.fixture
+def disenos(tmp_path):
+    rutas = []
+    for nombre, w, h in (("a.pdf", 90, 50), ("b.pdf", 40, 70)):
+        ruta = tmp_path / nombre
+        ruta.write_bytes(_pdf_bytes(w, h))
+        rutas.append(str(ruta))
+    return [(rutas[0], 5), (rutas[1], 3)]
+
+
+def test_plan_se_cachea_por_geometria(disenos, tmp_path):
+    config = MontajeConfig(tamano_pliego=(320, 450), separacion=3, es_pdf_final=False)
+    plan = plan_sheet(disenos, config)
+
+    assert plan.colocados == plan.total == 8
+    assert len(plan.positions()) == 8
+    assert plan.sheet_mm == {"w": 320.0, "h": 450.0}
+
+    # Cambiar solo opciones de salida reutiliza el plan...
+    final = replace(config, es_pdf_final=True, output_path=str(tmp_path / "x.pdf"), marcas_corte=True)
+    assert plan_sheet([Diseno(r, n) for r, n in disenos], final) is plan
+    # ...pero no la geometría.
+    assert plan_sheet(disenos, replace(config, separacion=6)) is not plan
+    assert sheet_plan_stats() == {"hits": 1, "misses": 2, "entries": 2}
+
+
+@pytest.mark.parametrize("estrategia", ["flujo", "maxrects", "hybrid_nesting_repeat"])
+def test_render_coincide_con_el_montaje(disenos, tmp_path, estrategia):
+    config = MontajeConfig(
+        tamano_pliego=(320, 450),
+        separacion=3,
+        permitir_rotacion=True,
+        estrategia=estrategia,
+        devolver_posiciones=True,
+        output_path=str(tmp_path / "directo.pdf"),
+    )
+    directo = realizar_montaje_inteligente([Diseno(r, n) for r, n in disenos], replace(config))
+
+    plan = plan_sheet(disenos, config)
+    renderizado = render_sheet(plan, "pdf", replace(config, output_path=str(tmp_path / "plan.pdf")))
+
+    clave = lambda p: (p["file_idx"], round(p["x_mm"], 3), round(p["y_mm"], 3), p["rot_deg"])
+    assert sorted(map(clave, renderizado["positions"])) == sorted(map(clave, directo["positions"]))
+    assert sorted(map(clave, plan.positions())) == sorted(map(clave, directo["positions"]))
+    with fitz.open(renderizado["output_path"]) as doc:
+        assert doc.page_count == 1
+
+
+def test_render_modo_invalido(disenos):
+    plan = plan_sheet(disenos, MontajeConfig(tamano_pliego=(320, 450)))
+    with pytest.raises(ValueError):
+        render_sheet(plan, "tiff")
+
+
+def test_preview_y_final_comparten_el_plan(tmp_path, monkeypatch):
+    monkeypatch.setattr(app, "static_folder", str(tmp_path / "static"))
+    app.config["TESTING"] = True
+    pdf = _pdf_bytes(80, 50)
+
+    def _form(accion):
+        return {
+            "accion": accion,
+            "pliego": "personalizado",
+            "ancho_pliego_custom": "320",
+            "alto_pliego_custom": "450",
+            "separacion": "4",
+            "archivos[]": (io.BytesIO(pdf), "pieza.pdf"),
+            "repeticiones_0": "4",
+        }
+
+    with app.test_client() as client:
+        preview = client.post("/montaje_offset_inteligente", data=_form("preview"), content_type="multipart/form-data")
+        final = client.post("/montaje_offset_inteligente", data=_form("generar"), content_type="multipart/form-data")
+
+    assert preview.status_code == 200
+    assert final.status_code == 200 and final.mimetype == "application/pdf"
+    assert sheet_plan_stats()["misses"] == 1
+    assert sheet_plan_stats()["hits"] == 1
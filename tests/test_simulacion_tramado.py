@@ -0,0 +1,77 @@
+import io
+import json
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from app import app
+from simulacion import mascara_tinta, radio_punto, renderizar_tramado, simulacion_png
+
+
+@pytest.mark.parametrize("angulo", [0.0, 15.0, 45.0, 75.0, 118.0, 33.7])
+def test_mascara_tinta_de_area_exacta(angulo):
+    for cobertura in (0.1, 0.5, 0.9):
+        tinta = mascara_tinta(300, 400, 12.4, angulo, cobertura)
+        assert tinta.mean() == pytest.approx(cobertura, abs=0.01)
+    # El centro del punto (origen de la trama) es lo primero que se entinta.
+    assert mascara_tinta(50, 50, 12.4, angulo, 0.02)[0, 0]
+
+
+def test_radio_punto_cubre_toda_la_celda():
+    assert radio_punto(0.0) == 0.0
+    assert radio_punto(np.pi / 4) == pytest.approx(0.5, abs=1e-3)
+    assert radio_punto(1.0) == pytest.approx(np.sqrt(0.5))
+
+
+def test_tramado_por_canal_sobre_blanco():
+    blanco = np.full((240, 320, 3), 255, dtype=np.uint8)
+    salida = renderizar_tramado(blanco, {"C": 0.3, "Y": 0.6}, spacing=10, densidad=1.0)
+
+    assert salida.shape == blanco.shape
+    # El cian solo absorbe rojo y el amarillo solo azul; el verde queda intacto.
+    assert (salida[..., 1] == 255).all()
+    assert (salida[..., 0] == 0).mean() == pytest.approx(0.3, abs=0.02)
+    assert (salida[..., 2] == 0).mean() == pytest.approx(0.6, abs=0.02)
+
+
+def test_simulacion_png_con_advertencias():
+    base = np.full((120, 160, 3), 255, dtype=np.uint8)
+    png = simulacion_png(base, {"K": 40}, 120, 4, 0, [{"bbox": [10, 10, 50, 40], "tipo": "trama_debil"}])
+
+    img = np.asarray(Image.open(io.BytesIO(png)).convert("RGB")).astype(int)
+    assert img.shape == (120, 160, 3)
+    # Borde violeta del recuadro de trama débil.
+    assert img[10, 30, 1] < img[10, 30, 0] and img[10, 30, 1] < img[10, 30, 2]
+    assert simulacion_png(base, {}, 120, 4, 0)[:8] == b"\x89PNG\r\n\x1a\n"
+
+
+def test_exportar_simulacion_usa_el_tramado(tmp_path, monkeypatch):
+    revision = "rev123"
+    rev_dir = tmp_path / "uploads" / revision
+    rev_dir.mkdir(parents=True)
+    Image.new("RGB", (160, 120), (255, 255, 255)).save(rev_dir / "diagnostico.png")
+    datos = {
+        "diag_base_web": f"uploads/{revision}/diagnostico.png",
+        "diagnostico_json": {"anilox_lpi": 360, "anilox_bcm": 4, "paso": 0},
+        "advertencias_iconos": [],
+    }
+    (rev_dir / "res.json").write_text(json.dumps(datos), encoding="utf-8")
+    monkeypatch.setattr(app, "static_folder", str(tmp_path))
+    app.config["TESTING"] = True
+
+    with app.test_client() as client:
+        resp = client.post(
+            f"/simulacion/exportar/{revision}",
+            json={"cobertura": {"C": 0, "M": 50, "Y": 0, "K": 0}},
+        )
+
+    assert resp.status_code == 200
+    img = np.asarray(Image.open(io.BytesIO(resp.data)).convert("RGB")).astype(int)
+    # Puntos de magenta: el verde baja más que el rojo y el azul.
+    manchados = img[..., 1] < img[..., 0] - 20
+    assert 0.3 < manchados.mean() < 0.7
@@ -0,0 +1,58 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from engines.slot_index import SlotIndex, rects_overlap
+
+
+def _rect_aleatorio(rnd):
+    return (
+        rnd.uniform(0, 300),
+        rnd.uniform(0, 300),
+        rnd.choice([0.0, rnd.uniform(1, 15), rnd.uniform(20, 120)]),
+        rnd.choice([0.0, rnd.uniform(1, 15), rnd.uniform(20, 120)]),
+    )
+
+
+def test_slot_index_coincide_con_recorrido_lineal():
+    rnd = random.Random(11)
+    index = SlotIndex(cell_mm=10)
+    rects = {}
+    for key in range(400):
+        rect = _rect_aleatorio(rnd)
+        rects[key] = rect
+        index.insert(key, rect)
+    for key in range(0, 400, 3):
+        index.remove(key)
+        rects.pop(key)
+    index.translate([1, 2, 4], 17.5, -3.0)
+    for key in (1, 2, 4):
+        x, y, w, h = rects[key]
+        rects[key] = (x + 17.5, y - 3.0, w, h)
+
+    for _ in range(300):
+        probe = _rect_aleatorio(rnd)
+        esperado = {key for key, rect in rects.items() if rects_overlap(probe, rect)}
+        assert set(index.query(probe)) == esperado
+        assert index.overlaps(probe) == bool(esperado)
+        if esperado:
+            excluido = next(iter(esperado))
+            assert index.overlaps(probe, exclude={excluido}) == bool(esperado - {excluido})
+
+
+def test_slot_index_bordes_que_se_tocan_no_solapan():
+    index = SlotIndex.from_slots([{"x_mm": 0, "y_mm": 0, "w_mm": 10, "h_mm": 5}])
+    assert not index.overlaps((10, 0, 10, 5))
+    assert not index.overlaps((0, 5, 10, 5))
+    assert index.overlaps((9.99, 4.99, 1, 1))
+    assert index.overlaps_slot({"x_mm": "2", "y_mm": None, "w_mm": 1, "h_mm": 1})
+
+
+def test_from_slots_celda_segun_todos_los_slots():
+    chico = {"x_mm": 0, "y_mm": 0, "w_mm": 1, "h_mm": 1}
+    grandes = [{"x_mm": 10 + 100 * i, "y_mm": 10, "w_mm": 90, "h_mm": 60} for i in range(3)]
+    index = SlotIndex.from_slots([chico] + grandes)
+    assert index.cell_mm == 90
+    assert index.overlaps((50, 30, 5, 5))
@@ -0,0 +1,87 @@
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from engines.nesting_pro_engine import compute_nesting
+from engines.slot_store import SlotStore
+from services import editor_offset_imposition_service as imposition
+
+
+def _layout():
+    return {
+        "sheet_mm": [320, 450],
+        "margins_mm": [10, 10, 10, 10],
+        "bleed_default_mm": 3,
+        "gap_default_mm": 3,
+        "spacingSettings": {"spacingX_mm": 2, "spacingY_mm": 4},
+        "active_face": "back",
+        "designs": [
+            {"ref": "a", "width_mm": 50, "height_mm": 30, "bleed_mm": 2, "forms_per_plate": 3},
+            {"ref": "b", "width_mm": 20, "height_mm": 40, "bleed_mm": 0, "forms_per_plate": 2, "allow_rotation": False},
+        ],
+    }
+
+
+def test_from_dicts_to_dicts_ida_y_vuelta():
+    slots = [
+        {
+            "id": "s1",
+            "x_mm": "10.5",
+            "y_mm": 20,
+            "w_mm": 30,
+            "h_mm": 40,
+            "rotation_deg": 450,
+            "logical_work_id": "w1",
+            "bleed_mm": None,
+            "crop_marks": False,
+            "locked": True,
+            "design_ref": "a",
+            "face": "front",
+            "nota": "extra",
+        },
+        {"x_mm": 1, "y_mm": 2, "w_mm": 3, "h_mm": 4, "design_ref": "a", "face": "front"},
+    ]
+    store = SlotStore.from_dicts(slots, id_prefix="s")
+    assert len(store) == 2
+    assert len(store.refs) == 1
+    out = store.to_dicts()
+    assert out[0]["id"] == "s1"
+    assert out[0]["x_mm"] == 10.5
+    assert out[0]["rotation_deg"] == 90
+    assert out[0]["bleed_mm"] == 0.0
+    assert out[0]["crop_marks"] is False and out[0]["locked"] is True
+    assert out[0]["nota"] == "extra"
+    assert out[1]["id"] == "s_1"
+    assert "nota" not in out[1]
+    assert store.bbox() == (1.0, 2.0, 40.5, 60.0)
+
+
+def test_tiled_equivale_a_repetir_dicts():
+    layout = _layout()
+    nesting = compute_nesting(layout)
+    base_dicts = imposition.slots_from_nesting_result(nesting, layout)
+    esperado = imposition.repeat_pattern_over_sheet(base_dicts, nesting.bbox, layout)
+
+    base = imposition.store_from_nesting_result(nesting, layout)
+    obtenido = imposition.repeat_store_over_sheet(base, nesting.bbox, layout).to_dicts()
+
+    assert len(esperado) > len(base_dicts)
+    assert obtenido == esperado
+    assert all(slot["face"] == "back" for slot in obtenido)
+
+
+def test_nesting_result_expone_slots_como_dicts():
+    nesting = compute_nesting(_layout())
+    assert len(nesting.store) == 5
+    assert list(nesting.slots[0]) == [
+        "design_ref",
+        "x_mm",
+        "y_mm",
+        "w_mm",
+        "h_mm",
+        "rotation_deg",
+        "bleed_mm",
+    ]
+    assert {slot["design_ref"] for slot in nesting.slots} == {"a", "b"}
+    assert nesting.store.nbytes < 5 * 64
@@ -286,3 +286,68 @@ def test_all_generated_slots_include_required_contract_fields():
     for slot in slots:
         assert required <= set(slot)
         assert slot["face"] == "back"
+
+
+def _zonal_layout(top_forms=2, fill_forms=2):
+    return _layout(
+        _design("top", width=30, height=15, forms=top_forms, zone="top"),
+        _design("center", width=25, height=12, forms=3, zone="center"),
+        _design("auto", width=25, height=15, forms=2, zone="auto"),
+        _design("fill", width=20, height=12, forms=fill_forms, zone="fill", role="fill"),
+        sheet=(220, 220),
+        margins=(10, 10, 10, 10),
+        spacing=(4, 6),
+    )
+
+
+def test_incremental_repeat_reuses_untouched_zone_groups():
+    from engines.step_repeat_pro_engine import RepeatGroupCache, build_step_repeat_slots
+
+    cache = RepeatGroupCache()
+    assert build_step_repeat_slots(_zonal_layout(), cache=cache) == _build_step_repeat_slots(_zonal_layout())
+    assert not any(group["reused"] for group in cache.last_groups)
+
+    changed = _zonal_layout(fill_forms=3)
+    slots = build_step_repeat_slots(deepcopy(changed), cache=cache)
+
+    assert slots == _build_step_repeat_slots(changed)
+    reused = {group["group"]: group["reused"] for group in cache.last_groups}
+    assert reused == {"top": True, "center": True, "auto": True, "fill": False}
+
+    changed = _zonal_layout(top_forms=3, fill_forms=3)
+    assert build_step_repeat_slots(deepcopy(changed), cache=cache) == _build_step_repeat_slots(changed)
+    reused = {group["group"]: group["reused"] for group in cache.last_groups}
+    assert reused["top"] is False and reused["center"] is True
+
+
+def test_apply_imposition_returns_slot_delta():
+    from services import editor_offset_imposition_service as imposition
+
+    imposition.clear_imposition_state()
+    job_id = "srdelta"
+    with app.app_context():
+        job_dir = Path(_constructor_job_dir(job_id))
+        if job_dir.exists():
+            shutil.rmtree(job_dir)
+
+    app.config["TESTING"] = True
+    with app.test_client() as client:
+        def _apply(layout):
+            response = client.post(
+                "/editor_offset_visual/apply_imposition",
+                data={"job_id": job_id, "selected_engine": "repeat", "layout_json": json.dumps(layout)},
+            )
+            assert response.status_code == 200
+            return response.get_json()
+
+        first = _apply(_zonal_layout())
+        layout = first["layout"]
+        layout["designs"][3]["forms_per_plate"] = 3
+        second = _apply(layout)
+
+    assert len(first["slot_delta"]["added"]) == len(first["layout"]["slots"])
+    delta = second["slot_delta"]
+    assert [slot["design_ref"] for slot in delta["added"]] == ["fill"]
+    assert delta["removed"] == [] and delta["renamed"] == {}
+    assert delta["unchanged"] == len(second["layout"]["slots"]) - 1
+    assert {g["group"] for g in delta["groups"] if not g["reused"]} == {"fill"}
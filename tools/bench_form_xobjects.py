@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""Benchmark del pliego final: tamaño y tiempo según la cantidad de copias.
+
+Compara el render con Form XObjects (un form por diseño) contra el camino
+anterior, que llamaba ``drawImage`` en cada copia.
+
+    python tools/bench_form_xobjects.py --copias 1 12 48 96 --modo raster vector_hybrid vector
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from reportlab.lib.units import mm  # noqa: E402
+from reportlab.lib.utils import ImageReader  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+import montaje_offset_inteligente  # noqa: E402
+import pdf_form_xobjects  # noqa: E402
+import raster_cache  # noqa: E402
+
+
+def _crear_diseno(path: str, w_mm: float = 50, h_mm: float = 30) -> None:
+    c = canvas.Canvas(path, pagesize=(w_mm * mm, h_mm * mm))
+    c.setFillColorCMYK(0.2, 0.7, 0, 0)
+    c.rect(0, 0, w_mm * mm, h_mm * mm, fill=1, stroke=0)
+    c.setFillColorCMYK(0, 0, 0, 1)
+    c.setFont("Helvetica-Bold", 14)
+    c.drawString(4 * mm, h_mm / 2 * mm, "ETIQUETA 48-UP")
+    c.save()
+
+
+class _LegacyRegistry(pdf_form_xobjects.FormXObjectRegistry):
+    """Camino anterior: un ``drawImage`` completo por cada copia."""
+
+    def draw(self, key, img, x, y, width, height):  # noqa: D401
+        kwargs = {"mask": "auto"} if getattr(img, "mode", "") == "RGBA" else {}
+        self.canvas.drawImage(ImageReader(img), x, y, width=width, height=height, **kwargs)
+
+
+@contextmanager
+def _registry(legacy: bool):
+    original = montaje_offset_inteligente.FormXObjectRegistry
+    if legacy:
+        montaje_offset_inteligente.FormXObjectRegistry = _LegacyRegistry
+    try:
+        yield
+    finally:
+        montaje_offset_inteligente.FormXObjectRegistry = original
+
+
+def _posiciones(copias: int, w_mm: float, h_mm: float, bleed_mm: float, cols: int) -> List[Dict]:
+    paso_x = w_mm + 2 * bleed_mm + 2
+    paso_y = h_mm + 2 * bleed_mm + 2
+    return [
+        {
+            "file_idx": 0,
+            "x_mm": 10 + (i % cols) * paso_x,
+            "y_mm": 10 + (i // cols) * paso_y,
+            "w_mm": w_mm,
+            "h_mm": h_mm,
+            "rot_deg": 0,
+            "bleed_mm": bleed_mm,
+        }
+        for i in range(copias)
+    ]
+
+
+def medir(pdf: str, copias: int, modo: str, legacy: bool, workdir: str) -> Dict:
+    cols = 8
+    filas = max(1, -(-copias // cols))
+    w_mm, h_mm, bleed_mm = 50.0, 30.0, 2.0
+    ancho = 20 + cols * (w_mm + 2 * bleed_mm + 2)
+    alto = 20 + filas * (h_mm + 2 * bleed_mm + 2)
+    salida = os.path.join(workdir, f"{modo}_{copias}_{'legacy' if legacy else 'forms'}.pdf")
+    with _registry(legacy):
+        t0 = time.perf_counter()
+        montaje_offset_inteligente.montar_pliego_offset_inteligente(
+            [(pdf, copias)],
+            ancho,
+            alto,
+            sangrado=bleed_mm,
+            output_path=salida,
+            posiciones_manual=_posiciones(copias, w_mm, h_mm, bleed_mm, cols),
+            output_mode=modo,
+        )
+        elapsed = time.perf_counter() - t0
+    return {
+        "modo": modo,
+        "copias": copias,
+        "render": "drawImage" if legacy else "form_xobject",
+        "segundos": round(elapsed, 4),
+        "bytes": os.path.getsize(salida),
+    }
+
+
+def run(copias: Iterable[int], modos: Iterable[str]) -> List[Dict]:
+    resultados = []
+    with tempfile.TemporaryDirectory() as workdir:
+        # Caché de rasters aislada y precalentada: se mide la escritura del
+        # pliego, no la rasterización del diseño.
+        raster_cache.set_raster_cache(
+            raster_cache.RasterCache(os.path.join(workdir, "cache"), 512 * 1024 * 1024)
+        )
+        pdf = os.path.join(workdir, "diseno.pdf")
+        _crear_diseno(pdf)
+        try:
+            for modo in modos:
+                medir(pdf, 1, modo, False, workdir)
+                for n in copias:
+                    for legacy in (True, False):
+                        resultados.append(medir(pdf, n, modo, legacy, workdir))
+        finally:
+            raster_cache.set_raster_cache(None)
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--copias", type=int, nargs="+", default=[1, 12, 48, 96])
+    parser.add_argument("--modo", nargs="+", default=["raster", "vector_hybrid", "vector"])
+    parser.add_argument("--json", action="store_true", help="Imprime el resultado como JSON")
+    args = parser.parse_args()
+
+    resultados = run(args.copias, args.modo)
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    print(f"{'modo':<14}{'copias':>7}  {'render':<13}{'seg':>9}{'KB':>10}")
+    for r in resultados:
+        print(
+            f"{r['modo']:<14}{r['copias']:>7}  {r['render']:<13}"
+            f"{r['segundos']:>9.3f}{r['bytes'] / 1024:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
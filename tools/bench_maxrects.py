@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""Benchmark del empaquetador MaxRects vectorizado frente a la clase anterior.
+
+Empaqueta 100, 1.000 y 5.000 piezas de tamaños mezclados y reporta tiempo,
+piezas colocadas, ocupación y superposiciones para cada heurística de
+``MaxRectsArray`` y para la implementación anterior en Python puro.
+
+    python tools/bench_maxrects.py --piezas 100 1000 5000 --heuristica bssf baf
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from maxrects_packer import HEURISTICS, MaxRectsArray  # noqa: E402
+
+
+class _Rect:
+    __slots__ = ("x", "y", "w", "h")
+
+    def __init__(self, x: float, y: float, w: float, h: float) -> None:
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+
+
+class _LegacyMaxRects:
+    """``MaxRects`` anterior, con listas de ``Rect`` (solo como referencia)."""
+
+    def __init__(self, width: float, height: float) -> None:
+        self.width = width
+        self.height = height
+        self.free_rects: List[_Rect] = [_Rect(0, 0, width, height)]
+
+    def insert(self, width: float, height: float) -> Tuple[float, float] | None:
+        best_index = -1
+        best_short = math.inf
+        best_long = math.inf
+        best_rect: _Rect | None = None
+        for i, r in enumerate(self.free_rects):
+            if r.w >= width and r.h >= height:
+                leftover_h = r.h - height
+                leftover_w = r.w - width
+                short_side = min(leftover_w, leftover_h)
+                long_side = max(leftover_w, leftover_h)
+                if short_side < best_short or (
+                    short_side == best_short and long_side < best_long
+                ):
+                    best_index = i
+                    best_rect = r
+                    best_short = short_side
+                    best_long = long_side
+        if best_index == -1 or best_rect is None:
+            return None
+        placed = _Rect(best_rect.x, best_rect.y, width, height)
+        self._split_free_rect(best_rect, placed)
+        del self.free_rects[best_index]
+        self._prune_free_list()
+        return placed.x, placed.y
+
+    def _split_free_rect(self, free: _Rect, used: _Rect) -> None:
+        if (
+            used.x >= free.x + free.w
+            or used.x + used.w <= free.x
+            or used.y >= free.y + free.h
+            or used.y + used.h <= free.y
+        ):
+            return
+        if used.x < free.x + free.w and used.x + used.w > free.x:
+            if used.y > free.y:
+                self.free_rects.append(
+                    _Rect(free.x, free.y, free.w, used.y - free.y)
+                )
+            if used.y + used.h < free.y + free.h:
+                self.free_rects.append(
+                    _Rect(
+                        free.x,
+                        used.y + used.h,
+                        free.w,
+                        free.y + free.h - (used.y + used.h),
+                    )
+                )
+        if used.y < free.y + free.h and used.y + used.h > free.y:
+            if used.x > free.x:
+                self.free_rects.append(
+                    _Rect(free.x, free.y, used.x - free.x, free.h)
+                )
+            if used.x + used.w < free.x + free.w:
+                self.free_rects.append(
+                    _Rect(
+                        used.x + used.w,
+                        free.y,
+                        free.x + free.w - (used.x + used.w),
+                        free.h,
+                    )
+                )
+
+    def _prune_free_list(self) -> None:
+        i = 0
+        while i < len(self.free_rects):
+            j = i + 1
+            while j < len(self.free_rects):
+                if self._is_contained_in(self.free_rects[i], self.free_rects[j]):
+                    del self.free_rects[i]
+                    i -= 1
+                    break
+                if self._is_contained_in(self.free_rects[j], self.free_rects[i]):
+                    del self.free_rects[j]
+                else:
+                    j += 1
+            i += 1
+
+    @staticmethod
+    def _is_contained_in(a: _Rect, b: _Rect) -> bool:
+        return (
+            a.x >= b.x
+            and a.y >= b.y
+            and a.x + a.w <= b.x + b.w
+            and a.y + a.h <= b.y + b.h
+        )
+
+
+def _piezas(n: int, seed: int) -> List[Tuple[float, float]]:
+    rnd = random.Random(seed)
+    tamanos = [(10, 5), (20, 10), (25, 15), (35, 20), (50, 30), (70, 25)]
+    return [rnd.choice(tamanos) for _ in range(n)]
+
+
+def _pliego(piezas: List[Tuple[float, float]]) -> Tuple[float, float]:
+    # Pliego con ~20% más de área que las piezas, proporción 3:2.
+    area = sum(w * h for w, h in piezas) * 1.2
+    alto = math.sqrt(area / 1.5)
+    return round(alto * 1.5, 1), round(alto, 1)
+
+
+def _superposiciones(colocados: List[Tuple[float, float, float, float]]) -> int:
+    ordenados = sorted(colocados)
+    total = 0
+    for i, (ax, ay, aw, ah) in enumerate(ordenados):
+        for bx, by, bw, bh in ordenados[i + 1 :]:
+            if bx >= ax + aw:
+                break
+            if ay < by + bh and ay + ah > by:
+                total += 1
+    return total
+
+
+def medir(n: int, heuristica: str, seed: int) -> Dict:
+    piezas = _piezas(n, seed)
+    ancho, alto = _pliego(piezas)
+    if heuristica == "anterior":
+        packer = _LegacyMaxRects(ancho, alto)
+    else:
+        packer = MaxRectsArray(ancho, alto, heuristica=heuristica)
+    colocados = []
+    t0 = time.perf_counter()
+    for w, h in piezas:
+        pos = packer.insert(w, h)
+        if pos is not None:
+            colocados.append((pos[0], pos[1], w, h))
+    elapsed = time.perf_counter() - t0
+    return {
+        "piezas": n,
+        "heuristica": heuristica,
+        "colocadas": len(colocados),
+        "ocupacion": round(sum(w * h for *_, w, h in colocados) / (ancho * alto), 4),
+        "superposiciones": _superposiciones(colocados),
+        "segundos": round(elapsed, 4),
+    }
+
+
+def run(piezas: Iterable[int], heuristicas: Iterable[str], anterior_max: int, seed: int) -> List[Dict]:
+    resultados = []
+    for n in piezas:
+        for heuristica in heuristicas:
+            if heuristica == "anterior" and n > anterior_max:
+                continue
+            resultados.append(medir(n, heuristica, seed))
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--piezas", type=int, nargs="+", default=[100, 1000, 5000])
+    parser.add_argument(
+        "--heuristica",
+        nargs="+",
+        default=[*HEURISTICS, "anterior"],
+        choices=[*HEURISTICS, "anterior"],
+    )
+    parser.add_argument(
+        "--anterior-max",
+        type=int,
+        default=5000,
+        help="Máximo de piezas para medir también la clase anterior",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", action="store_true", help="Imprime el resultado como JSON")
+    args = parser.parse_args()
+
+    resultados = run(args.piezas, args.heuristica, args.anterior_max, args.seed)
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    print(f"{'piezas':>7}  {'heuristica':<10}{'colocadas':>10}{'ocup':>8}{'solapes':>9}{'seg':>10}")
+    for r in resultados:
+        print(
+            f"{r['piezas']:>7}  {r['heuristica']:<10}{r['colocadas']:>10}"
+            f"{r['ocupacion']:>8.3f}{r['superposiciones']:>9}{r['segundos']:>10.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""Micro-benchmark del índice espacial del motor Step & Repeat PRO.
+
+Arma pliegos con 1k a 10k etiquetas chicas (zona ``fill`` y ``auto`` con
+``avoid_existing``) y mide ``build_step_repeat_slots`` con ``SlotIndex``
+frente al recorrido lineal anterior.
+
+    python tools/bench_step_repeat_index.py --etiquetas 1000 2500 5000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from engines import slot_index, step_repeat_pro_engine  # noqa: E402
+
+
+class _LinearIndex(slot_index.SlotIndex):
+    """Mismo contrato que SlotIndex pero comparando contra todos los slots."""
+
+    def overlaps(self, rect, exclude=None):
+        excluded = set(exclude or ())
+        return any(
+            slot_index.rects_overlap(rect, other)
+            for key, other in self._rects.items()
+            if key not in excluded
+        )
+
+    def insert(self, key, rect):
+        self._rects[key] = rect
+
+    def remove(self, key):
+        self._rects.pop(key, None)
+
+
+@contextmanager
+def _index_cls(lineal: bool):
+    original = step_repeat_pro_engine.SlotIndex
+    if lineal:
+        step_repeat_pro_engine.SlotIndex = _LinearIndex
+    try:
+        yield
+    finally:
+        step_repeat_pro_engine.SlotIndex = original
+
+
+def _layout(etiquetas: int, zona: str) -> Dict:
+    # Etiquetas de 10x5 mm con 1 mm de calle; el pliego se dimensiona para
+    # que entren con ~10% de holgura.
+    cols = max(1, int((etiquetas * 1.1) ** 0.5 * 1.4))
+    rows = max(1, -(-int(etiquetas * 1.1) // cols))
+    sheet_w = 20 + cols * 11
+    sheet_h = 20 + rows * 6
+    designs = [
+        {
+            "ref": "ancla",
+            "filename": "ancla.pdf",
+            "width_mm": 60,
+            "height_mm": 30,
+            "bleed_mm": 0,
+            "forms_per_plate": 1,
+            "allow_rotation": False,
+            "preferred_zone": "top",
+        },
+        {
+            "ref": "etiqueta",
+            "filename": "etiqueta.pdf",
+            "width_mm": 10,
+            "height_mm": 5,
+            "bleed_mm": 0,
+            "forms_per_plate": etiquetas,
+            "allow_rotation": False,
+            "preferred_zone": zona,
+        },
+    ]
+    return {
+        "sheet_mm": [sheet_w, sheet_h + 40],
+        "margins_mm": [10, 10, 10, 10],
+        "bleed_default_mm": 0,
+        "gap_default_mm": 1,
+        "spacingSettings": {"spacingX_mm": 1, "spacingY_mm": 1},
+        "designs": designs,
+        "active_face": "front",
+    }
+
+
+def medir(etiquetas: int, zona: str, lineal: bool) -> Dict:
+    layout = _layout(etiquetas, zona)
+    with _index_cls(lineal):
+        t0 = time.perf_counter()
+        try:
+            slots = step_repeat_pro_engine.build_step_repeat_slots(layout)
+            colocados = len(slots)
+        except step_repeat_pro_engine.IncompleteImpositionError as exc:
+            colocados = sum(item["placed_forms"] for item in exc.details) if exc.details else -1
+        elapsed = time.perf_counter() - t0
+    return {
+        "etiquetas": etiquetas,
+        "zona": zona,
+        "indice": "lineal" if lineal else "SlotIndex",
+        "slots": colocados,
+        "segundos": round(elapsed, 4),
+    }
+
+
+def run(etiquetas: Iterable[int], zonas: Iterable[str], lineal_max: int) -> List[Dict]:
+    resultados = []
+    for zona in zonas:
+        for n in etiquetas:
+            resultados.append(medir(n, zona, False))
+            if n <= lineal_max:
+                resultados.append(medir(n, zona, True))
+    return resultados
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--etiquetas", type=int, nargs="+", default=[1000, 2500, 5000, 10000])
+    parser.add_argument("--zona", nargs="+", default=["fill", "auto"])
+    parser.add_argument(
+        "--lineal-max",
+        type=int,
+        default=2500,
+        help="Máximo de etiquetas para medir también el recorrido lineal (es cuadrático)",
+    )
+    parser.add_argument("--json", action="store_true", help="Imprime el resultado como JSON")
+    args = parser.parse_args()
+
+    resultados = run(args.etiquetas, args.zona, args.lineal_max)
+    if args.json:
+        print(json.dumps(resultados, indent=2))
+        return
+    print(f"{'zona':<6}{'etiquetas':>10}  {'indice':<10}{'slots':>8}{'seg':>10}")
+    for r in resultados:
+        print(f"{r['zona']:<6}{r['etiquetas']:>10}  {r['indice']:<10}{r['slots']:>8}{r['segundos']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""Suite de benchmarks de los motores de imposición y los renderers.
+
+Genera PDFs sintéticos con reportlab en un directorio temporal y mide cada
+camino (motores, exportación final, preview, cobertura, revisión flexo y
+cuadernillos) en varios tamaños de pliego y cantidades de copias. Cada caso corre en un
+proceso hijo para registrar su pico de RSS. El resultado es un JSON que se
+compara entre commits:
+
+    python tools/bench_suite.py run --salida bench/base.json
+    python tools/bench_suite.py run --casos step_repeat nesting --copias 12 96 384
+    python tools/bench_suite.py comparar bench/base.json bench/head.json --umbral 15
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from copy import deepcopy
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from reportlab.lib.units import mm  # noqa: E402
+from reportlab.pdfgen import canvas  # noqa: E402
+
+import raster_cache  # noqa: E402
+
+FORMATO_VERSION = 1
+
+# Pliegos offset (mm). Para cobertura y flexo el "pliego" es la página del
+# diseño, así que se usan tamaños de etiqueta/bobina.
+PLIEGOS = {"chico": (320.0, 450.0), "grande": (700.0, 1000.0)}
+PAGINAS_FLEXO = {"chico": (100.0, 70.0), "grande": (250.0, 180.0)}
+COPIAS = (12, 96)
+
+# Dos diseños de tamaño distinto; las copias se reparten entre ambos.
+DISENOS_MM = ((60.0, 40.0), (45.0, 45.0))
+SANGRADO_MM = 3.0
+SEPARACION_MM = 4.0
+
+# Diferencias absolutas menores que esto son ruido del reloj, no regresiones.
+RUIDO_S = 0.002
+
+
+def _crear_pdf(path: str, w_mm: float, h_mm: float, rotulo: str) -> str:
+    """Diseño con planos CMYK, degradé de tramas, texto chico y filetes finos."""
+    c = canvas.Canvas(path, pagesize=(w_mm * mm, h_mm * mm))
+    c.setFillColorCMYK(0.1, 0.6, 0.0, 0.0)
+    c.rect(0, 0, w_mm * mm, h_mm * mm, fill=1, stroke=0)
+    pasos = 12
+    for i in range(pasos):
+        c.setFillColorCMYK(0.8, 0.1 + 0.07 * i, 0.3, 0.05 * i)
+        c.rect(i * w_mm / pasos * mm, 0, w_mm / pasos * mm, h_mm / 3 * mm, fill=1, stroke=0)
+    c.setFillColorCMYK(0, 0, 0, 1)
+    c.setFont("Helvetica-Bold", max(6, min(w_mm, h_mm) / 4))
+    c.drawString(3 * mm, h_mm / 2 * mm, rotulo)
+    c.setFont("Helvetica", 4)
+    c.drawString(3 * mm, (h_mm / 2 - 4) * mm, "Texto legal en cuerpo cuatro para las reglas de legibilidad")
+    c.setLineWidth(0.1)
+    c.setStrokeColorCMYK(0, 0, 0, 1)
+    c.line(2 * mm, 2 * mm, (w_mm - 2) * mm, (h_mm - 2) * mm)
+    c.save()
+    return path
+
+
+class Contexto:
+    """Fixtures de un caso: directorio de trabajo, PDFs y parámetros."""
+
+    def __init__(self, workdir: str, pliego: str, copias: int) -> None:
+        self.workdir = workdir
+        self.pliego = pliego
+        self.copias = copias
+        self.ancho_mm, self.alto_mm = PLIEGOS[pliego]
+        self.pdfs = [
+            _crear_pdf(os.path.join(workdir, f"diseno_{i}.pdf"), w, h, f"D{i}")
+            for i, (w, h) in enumerate(DISENOS_MM)
+        ]
+
+    @property
+    def disenos(self) -> List[Tuple[str, int]]:
+        mitad = max(1, self.copias // 2)
+        return [(self.pdfs[0], mitad), (self.pdfs[1], max(1, self.copias - mitad))]
+
+    def layout_editor(self) -> Dict:
+        designs = []
+        for idx, ((w, h), (_, formas)) in enumerate(zip(DISENOS_MM, self.disenos)):
+            designs.append(
+                {
+                    "ref": f"file{idx}",
+                    "width_mm": w,
+                    "height_mm": h,
+                    "bleed_mm": SANGRADO_MM,
+                    "forms_per_plate": formas,
+                    "allow_rotation": True,
+                    "preferred_zone": "auto",
+                }
+            )
+        return {
+            "sheet_mm": [self.ancho_mm, self.alto_mm],
+            "margins_mm": [10, 10, 10, 10],
+            "bleed_default_mm": SANGRADO_MM,
+            "gap_default_mm": SEPARACION_MM,
+            "designs": designs,
+            "slots": [],
+            "active_face": "front",
+        }
+
+
+# Cada caso recibe el contexto, prepara lo que no se mide y devuelve la
+# función a cronometrar (su valor de retorno se resume en ``detalle``).
+Preparar = Callable[[Contexto], Callable[[], Dict[str, Any]]]
+
+
+def _caso_step_repeat(ctx: Contexto):
+    from engines.step_repeat_pro_engine import build_step_repeat_slots
+
+    layout = ctx.layout_editor()
+    return lambda: {"slots": len(build_step_repeat_slots(deepcopy(layout)))}
+
+
+def _caso_nesting(ctx: Contexto):
+    from engines.nesting_pro_engine import compute_nesting
+
+    layout = ctx.layout_editor()
+
+    def medir():
+        resultado = compute_nesting(deepcopy(layout))
+        return {"slots": len(resultado.slots), "sin_colocar": len(resultado.unplaced)}
+
+    return medir
+
+
+def _caso_maxrects(ctx: Contexto):
+    from maxrects_packer import MaxRectsArray
+
+    piezas = []
+    for (w, h), (_, n) in zip(DISENOS_MM, ctx.disenos):
+        piezas += [(w + 2 * SANGRADO_MM + SEPARACION_MM, h + 2 * SANGRADO_MM + SEPARACION_MM)] * n
+
+    def medir():
+        packer = MaxRectsArray(ctx.ancho_mm - 20, ctx.alto_mm - 20)
+        colocadas = sum(packer.insert(w, h) is not None for w, h in piezas)
+        return {"colocadas": colocadas, "ocupacion": round(packer.occupancy(), 4)}
+
+    return medir
+
+
+def _caso_calcular_posiciones(ctx: Contexto):
+    from montaje_offset_inteligente import calcular_posiciones
+
+    disenos = [
+        {"archivo": ruta, "ancho": w, "alto": h}
+        for (w, h), (ruta, n) in zip(DISENOS_MM, ctx.disenos)
+        for _ in range(n)
+    ]
+
+    def medir():
+        posiciones = calcular_posiciones(
+            disenos, ctx.ancho_mm, ctx.alto_mm, separacion=SEPARACION_MM, sangrado=SANGRADO_MM
+        )
+        return {"posiciones": len(posiciones)}
+
+    return medir
+
+
+def _plan(ctx: Contexto) -> Dict[str, Any]:
+    from montaje_offset_inteligente import montar_pliego_offset_inteligente
+
+    return montar_pliego_offset_inteligente(
+        ctx.disenos,
+        ctx.ancho_mm,
+        ctx.alto_mm,
+        separacion=SEPARACION_MM,
+        sangrado=SANGRADO_MM,
+        solo_posiciones=True,
+    )
+
+
+def _caso_export(modo: str) -> Preparar:
+    def preparar(ctx: Contexto):
+        from montaje_offset_inteligente import montar_pliego_offset_inteligente
+
+        plan = _plan(ctx)
+        salida = os.path.join(ctx.workdir, f"pliego_{modo}.pdf")
+
+        def medir():
+            montar_pliego_offset_inteligente(
+                ctx.disenos,
+                ctx.ancho_mm,
+                ctx.alto_mm,
+                separacion=SEPARACION_MM,
+                sangrado=SANGRADO_MM,
+                output_path=salida,
+                output_mode=modo,
+                posiciones_calculadas=plan,
+            )
+            return {"formas": plan["colocados"], "kb": round(os.path.getsize(salida) / 1024, 1)}
+
+        return medir
+
+    return preparar
+
+
+def _caso_preview(ctx: Contexto):
+    from montaje_offset_inteligente import generar_preview_pliego
+
+    plan = _plan(ctx)
+    posiciones = [
+        {"file_idx": p["file_idx"], "x_mm": x, "y_mm": y, "w_mm": w, "h_mm": h, "rot_deg": p.get("rot_deg", 0)}
+        for p, (x, y, w, h) in zip(plan["posiciones"], plan["cajas_mm"])
+    ]
+    salida = os.path.join(ctx.workdir, "preview.png")
+
+    def medir():
+        generar_preview_pliego(ctx.disenos, posiciones, ctx.ancho_mm, ctx.alto_mm, salida)
+        return {"formas": len(posiciones)}
+
+    return medir
+
+
+def _pagina_flexo(ctx: Contexto) -> str:
+    w, h = PAGINAS_FLEXO[ctx.pliego]
+    return _crear_pdf(os.path.join(ctx.workdir, "flexo.pdf"), w, h, "FLEXO")
+
+
+def _caso_cobertura(ctx: Contexto):
+    from cobertura_utils import calcular_metricas_cobertura
+
+    pdf = _pagina_flexo(ctx)
+    return lambda: {"tac_max": calcular_metricas_cobertura(pdf, dpi=150).get("tac_max")}
+
+
+def _caso_revision_flexo(ctx: Contexto):
+    from montaje_flexo import revisar_diseño_flexo
+
+    pdf = _pagina_flexo(ctx)
+
+    def medir():
+        resultado = revisar_diseño_flexo(pdf, 400, 330, material="film", anilox_bcm=3.5)
+        return {"tipo": type(resultado).__name__}
+
+    return medir
+
+
+def _caso_cuadernillos(ctx: Contexto):
+    from montaje import montar_cuadernillos_pdf
+
+    # Revista de ``copias`` páginas A4 (múltiplo de 4).
+    paginas = max(4, (ctx.copias + 3) // 4 * 4)
+    revista = os.path.join(ctx.workdir, "revista.pdf")
+    c = canvas.Canvas(revista, pagesize=(210 * mm, 297 * mm))
+    for i in range(paginas):
+        c.setFillColorCMYK(0.1, 0.6, 0.0, 0.0)
+        c.rect(10 * mm, 10 * mm, 190 * mm, 277 * mm, fill=1, stroke=0)
+        c.setFillColorCMYK(0, 0, 0, 1)
+        c.setFont("Helvetica", 9)
+        for linea in range(40):
+            c.drawString(15 * mm, (280 - 6 * linea) * mm, f"Página {i + 1} línea {linea} de texto corrido")
+        c.showPage()
+    c.save()
+    salida = os.path.join(ctx.workdir, "cuadernillos.pdf")
+
+    def medir():
+        simulacion = montar_cuadernillos_pdf(revista, salida, tipo_cuadernillo=16)
+        return {"pliegos": len(simulacion["pliegos"]), "bytes": os.path.getsize(salida)}
+
+    return medir
+
+
+# nombre -> (preparar, depende de las copias)
+CASOS: Dict[str, Tuple[Preparar, bool]] = {
+    "step_repeat": (_caso_step_repeat, True),
+    "nesting": (_caso_nesting, True),
+    "maxrects": (_caso_maxrects, True),
+    "calcular_posiciones": (_caso_calcular_posiciones, True),
+    "export_raster": (_caso_export("raster"), True),
+    "export_vector_hybrid": (_caso_export("vector_hybrid"), True),
+    "preview": (_caso_preview, True),
+    "cobertura": (_caso_cobertura, False),
+    "revision_flexo": (_caso_revision_flexo, False),
+    "cuadernillos": (_caso_cuadernillos, True),
+}
+
+
+def _rss_mb() -> float:
+    # ru_maxrss está en KB en Linux y en bytes en macOS.
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def _ejecutar_caso(caso: str, pliego: str, copias: int, repeticiones: int, workdir: str) -> Dict[str, Any]:
+    resultado: Dict[str, Any] = {"caso": caso, "pliego": pliego, "copias": copias}
+    rss_inicio = _rss_mb()
+    try:
+        # Caché de rasters propia del caso: la primera corrida (calentamiento)
+        # llena la caché y las siguientes miden el camino habitual.
+        raster_cache.set_raster_cache(
+            raster_cache.RasterCache(os.path.join(workdir, "cache"), 512 * 1024 * 1024)
+        )
+        ctx = Contexto(workdir, pliego, copias)
+        medir = CASOS[caso][0](ctx)
+        t0 = time.perf_counter()
+        detalle = medir()
+        calentamiento = time.perf_counter() - t0
+        tiempos = []
+        for _ in range(repeticiones):
+            t0 = time.perf_counter()
+            detalle = medir()
+            tiempos.append(time.perf_counter() - t0)
+        resultado.update(
+            calentamiento_s=round(calentamiento, 5),
+            min_s=round(min(tiempos), 5),
+            mediana_s=round(statistics.median(tiempos), 5),
+            detalle=detalle,
+        )
+    except Exception as exc:  # un caso roto no corta la suite
+        resultado["error"] = f"{type(exc).__name__}: {exc}"
+        resultado["traceback"] = traceback.format_exc(limit=5)
+    finally:
+        raster_cache.set_raster_cache(None)
+    pico = _rss_mb()
+    resultado["rss_pico_mb"] = round(pico, 1)
+    resultado["rss_delta_mb"] = round(max(0.0, pico - rss_inicio), 1)
+    return resultado
+
+
+def _hijo(conn, *args) -> None:
+    conn.send(_ejecutar_caso(*args))
+    conn.close()
+
+
+def _en_proceso(caso: str, pliego: str, copias: int, repeticiones: int, workdir: str) -> Dict[str, Any]:
+    """Corre el caso en un hijo (fork) para que el pico de RSS sea solo suyo."""
+    if "fork" not in multiprocessing.get_all_start_methods():
+        return _ejecutar_caso(caso, pliego, copias, repeticiones, workdir)
+    mp = multiprocessing.get_context("fork")
+    padre, hijo = mp.Pipe(duplex=False)
+    proceso = mp.Process(target=_hijo, args=(hijo, caso, pliego, copias, repeticiones, workdir))
+    proceso.start()
+    hijo.close()
+    try:
+        return padre.recv()
+    except EOFError:
+        return {"caso": caso, "pliego": pliego, "copias": copias, "error": "el proceso del caso terminó sin resultado"}
+    finally:
+        proceso.join()
+
+
+def _commit() -> str | None:
+    try:
+        salida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parents[1],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return salida.stdout.strip() or None
+
+
+def run(
+    casos: Iterable[str],
+    pliegos: Iterable[str],
+    copias: Iterable[int],
+    repeticiones: int = 3,
+) -> Dict[str, Any]:
+    resultados = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for caso in casos:
+            usa_copias = CASOS[caso][1]
+            for pliego in pliegos:
+                for n in copias if usa_copias else (1,):
+                    casedir = os.path.join(workdir, f"{caso}_{pliego}_{n}")
+                    os.makedirs(casedir)
+                    resultados.append(_en_proceso(caso, pliego, n, repeticiones, casedir))
+    return {
+        "version": FORMATO_VERSION,
+        "commit": _commit(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "repeticiones": repeticiones,
+        "resultados": resultados,
+    }
+
+
+def _estado(antes: float, ahora: float, umbral_pct: float) -> Tuple[float, str]:
+    variacion = (ahora - antes) / antes * 100 if antes > 0 else 0.0
+    if abs(ahora - antes) < RUIDO_S:
+        return variacion, "igual"
+    if variacion > umbral_pct:
+        return variacion, "regresion"
+    return variacion, "mejora" if variacion < -umbral_pct else "igual"
+
+
+def comparar(base: Dict[str, Any], nuevo: Dict[str, Any], umbral_pct: float) -> List[Dict[str, Any]]:
+    """Empareja casos por (caso, pliego, copias) y calcula la variación.
+
+    Se comparan la mediana (caché de rasters caliente) y el calentamiento
+    (primera corrida, con la caché vacía): una regresión en el render que la
+    caché tapa en la mediana aparece en el calentamiento. El caso es regresión
+    si lo es cualquiera de las dos.
+    """
+    previos = {(r["caso"], r["pliego"], r["copias"]): r for r in base.get("resultados", [])}
+    filas = []
+    for r in nuevo.get("resultados", []):
+        previo = previos.get((r["caso"], r["pliego"], r["copias"]))
+        fila = {"caso": r["caso"], "pliego": r["pliego"], "copias": r["copias"]}
+        if not previo or "mediana_s" not in previo or "mediana_s" not in r:
+            fila["estado"] = "sin_base" if not previo else "error"
+            filas.append(fila)
+            continue
+        antes, ahora = previo["mediana_s"], r["mediana_s"]
+        variacion, estado = _estado(antes, ahora, umbral_pct)
+        fila.update(
+            base_s=antes,
+            nuevo_s=ahora,
+            variacion_pct=round(variacion, 1),
+            estado_mediana=estado,
+        )
+        estados = [estado]
+        if "calentamiento_s" in previo and "calentamiento_s" in r:
+            antes, ahora = previo["calentamiento_s"], r["calentamiento_s"]
+            variacion, estado = _estado(antes, ahora, umbral_pct)
+            fila.update(
+                calentamiento_base_s=antes,
+                calentamiento_nuevo_s=ahora,
+                calentamiento_variacion_pct=round(variacion, 1),
+                estado_calentamiento=estado,
+            )
+            estados.append(estado)
+        fila.update(
+            rss_base_mb=previo.get("rss_pico_mb"),
+            rss_nuevo_mb=r.get("rss_pico_mb"),
+            estado="regresion" if "regresion" in estados else ("mejora" if "mejora" in estados else "igual"),
+        )
+        filas.append(fila)
+    return filas
+
+
+def _imprimir_run(datos: Dict[str, Any]) -> None:
+    print(f"{'caso':<22}{'pliego':<8}{'copias':>7}{'calent. s':>11}{'mediana s':>11}{'min s':>9}{'RSS MB':>9}")
+    for r in datos["resultados"]:
+        if "error" in r:
+            print(f"{r['caso']:<22}{r['pliego']:<8}{r['copias']:>7}  ERROR {r['error']}")
+            continue
+        print(
+            f"{r['caso']:<22}{r['pliego']:<8}{r['copias']:>7}"
+            f"{r['calentamiento_s']:>11.4f}{r['mediana_s']:>11.4f}{r['min_s']:>9.4f}{r['rss_pico_mb']:>9.1f}"
+        )
+
+
+def _imprimir_comparacion(filas: List[Dict[str, Any]]) -> None:
+    print(
+        f"{'caso':<22}{'pliego':<8}{'copias':>7}{'base s':>10}{'nuevo s':>10}{'var %':>8}"
+        f"{'calent. base':>14}{'calent. nuevo':>15}{'var %':>8}  estado"
+    )
+    for f in filas:
+        if "base_s" not in f:
+            print(f"{f['caso']:<22}{f['pliego']:<8}{f['copias']:>7}{'':>65}  {f['estado']}")
+            continue
+        if "calentamiento_base_s" in f:
+            calentamiento = (
+                f"{f['calentamiento_base_s']:>14.4f}{f['calentamiento_nuevo_s']:>15.4f}"
+                f"{f['calentamiento_variacion_pct']:>8.1f}"
+            )
+        else:
+            calentamiento = f"{'':>37}"
+        print(
+            f"{f['caso']:<22}{f['pliego']:<8}{f['copias']:>7}"
+            f"{f['base_s']:>10.4f}{f['nuevo_s']:>10.4f}{f['variacion_pct']:>8.1f}{calentamiento}  {f['estado']}"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_run = sub.add_parser("run", help="Corre la suite y guarda el JSON")
+    p_run.add_argument("--casos", nargs="+", choices=sorted(CASOS), default=list(CASOS))
+    p_run.add_argument("--pliegos", nargs="+", choices=sorted(PLIEGOS), default=list(PLIEGOS))
+    p_run.add_argument("--copias", type=int, nargs="+", default=list(COPIAS))
+    p_run.add_argument("--repeticiones", type=int, default=3)
+    p_run.add_argument("--salida", help="Ruta del JSON de resultados")
+
+    p_cmp = sub.add_parser("comparar", help="Compara dos JSON de resultados")
+    p_cmp.add_argument("base")
+    p_cmp.add_argument("nuevo")
+    p_cmp.add_argument("--umbral", type=float, default=10.0, help="Variación (%%) que cuenta como regresión")
+    p_cmp.add_argument("--json", action="store_true", help="Imprime la comparación como JSON")
+
+    args = parser.parse_args()
+    if args.comando == "run":
+        datos = run(args.casos, args.pliegos, args.copias, max(1, args.repeticiones))
+        if args.salida:
+            os.makedirs(os.path.dirname(os.path.abspath(args.salida)), exist_ok=True)
+            with open(args.salida, "w", encoding="utf-8") as fh:
+                json.dump(datos, fh, indent=2, ensure_ascii=False)
+        _imprimir_run(datos)
+        return
+
+    with open(args.base, encoding="utf-8") as fh:
+        base = json.load(fh)
+    with open(args.nuevo, encoding="utf-8") as fh:
+        nuevo = json.load(fh)
+    filas = comparar(base, nuevo, args.umbral)
+    if args.json:
+        print(json.dumps(filas, indent=2, ensure_ascii=False))
+    else:
+        _imprimir_comparacion(filas)
+    # Código de salida distinto de cero si hay regresiones, para usarlo en CI.
+    sys.exit(1 if any(f["estado"] == "regresion" for f in filas) else 0)
+
+
+if __name__ == "__main__":
+    main()
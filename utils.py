@@ -3,7 +3,10 @@ from PIL import Image
 import numpy as np
 from io import BytesIO
 import math
-from typing import Dict
+import os
+from typing import Dict, Sequence
+
+from raster_cache import cached_raster
 
 
 def corregir_sangrado(input_path, output_path):
@@ -29,9 +32,20 @@ def corregir_sangrado(input_path, output_path):
     nuevo_doc = fitz.open()
 
     for pagina in doc:
-        pix = pagina.get_pixmap(dpi=dpi, alpha=False)
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        img_con_sangrado = replicar_bordes(img, margen_px)
+
+        def _render(pagina=pagina):
+            pix = pagina.get_pixmap(dpi=dpi, alpha=False)
+            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+            return replicar_bordes(img, margen_px)
+
+        img_con_sangrado = cached_raster(
+            input_path,
+            _render,
+            page=pagina.number,
+            dpi=dpi,
+            bleed_mm=margen_mm,
+            mode="reflect_rgb",
+        )
 
         buffer = BytesIO()
         img_con_sangrado.save(buffer, format="JPEG", quality=95)
@@ -47,6 +61,20 @@ def corregir_sangrado(input_path, output_path):
     nuevo_doc.save(output_path)
 
 
+def combinar_pdfs(pdf_paths: Sequence[str], output_path: str) -> str:
+    """Une las páginas de varios PDFs copiando objetos con PyMuPDF (sin re-parsear)."""
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    combined = fitz.open()
+    try:
+        for pdf_path in pdf_paths:
+            with fitz.open(pdf_path) as src:
+                combined.insert_pdf(src)
+        combined.save(output_path, garbage=1, deflate=True)
+    finally:
+        combined.close()
+    return output_path
+
+
 def redimensionar_pdf(input_path, output_path, nuevo_ancho_mm, nuevo_alto_mm=None):
     """Redimensiona un PDF a un nuevo ancho/alto manteniendo proporciones."""
     doc = fitz.open(input_path)